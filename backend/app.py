@@ -1,17 +1,29 @@
 import os
 from flask import Flask, jsonify, request, make_response
 from flask_cors import CORS
-from infrastructure.database.connection import get_db_connection, test_connection
+from infrastructure.database.connection import get_db_connection
+from infrastructure.database.health import get_readiness_check
 from infrastructure.api.routes import register_routes
-from infrastructure.config.config import load_config
+from infrastructure.config.config import get_settings, load_startup_settings
+from infrastructure.config.logging_config import configure_logging
+from infrastructure.database.schema import get_schema_registry, SchemaUnavailableError
+import logging
+
+logger = logging.getLogger(__name__)
 
 def create_app():
     # Create Flask application
     app = Flask(__name__)
     
-    # Load configuration
-    config = load_config()
-    app.config.update(config)
+    # Log through a background writer before anything else reports on startup
+    configure_logging(get_settings())
+    
+    # Load configuration once per process; the request path reads the cached settings
+    settings = load_startup_settings()
+    app.config.update(settings)
+    
+    # Probe the database catalog once so repositories can read cached capability flags
+    get_schema_registry().refresh()
     
     # Allow these origins for CORS
     allowed_origins = [
@@ -32,11 +44,19 @@ def create_app():
          origins=allowed_origins,
          supports_credentials=True,
          allow_headers=["Content-Type", "Authorization", "Origin"],
+         expose_headers=["X-Next-Cursor", "Link", "ETag", "Server-Timing"],
          methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"])
     
     # Register routes
     register_routes(app)
     
+    # Unknown capabilities are a temporary outage, not a missing table
+    @app.errorhandler(SchemaUnavailableError)
+    def schema_unavailable(e):
+        response = jsonify({'error': 'Database schema is not available yet', 'details': str(e)})
+        response.headers['Retry-After'] = str(max(int(e.retry_in + 0.999), 1))
+        return response, 503
+    
     # Add status endpoint with special CORS handling
     @app.route('/api/status', methods=['GET', 'OPTIONS'])
     def status():
@@ -47,7 +67,8 @@ def create_app():
         
         # For GET request
         try:
-            connection_status = test_connection()
+            # Cached readiness result, so polling this does not open a connection each time
+            connection_status = get_readiness_check().check()['database'] is not False
             return jsonify({
                 'status': 'ok',
                 'database_connected': connection_status,
@@ -75,16 +96,17 @@ def create_app():
     return app
 
 if __name__ == '__main__':
+    # Flask's development server; production runs wsgi:app under gunicorn (see gunicorn.conf.py)
     app = create_app()
     port = int(os.environ.get('PORT', 5000))
     
     # Certifikatsökväg
-    cert_path = "C:\\Dev\\cert"
+    cert_path = os.environ.get('SSL_CERT_DIR', "C:\\Dev\\cert")
     cert_file = os.path.join(cert_path, "cert.pem")
     key_file = os.path.join(cert_path, "key.pem")
     
     if os.path.exists(cert_file) and os.path.exists(key_file):
-        print(f"Found SSL certificates, running with HTTPS on port {port}")
+        logger.info("Found SSL certificates, running with HTTPS on port %s", port)
         app.run(
             host='0.0.0.0', 
             port=port, 
@@ -92,6 +114,6 @@ if __name__ == '__main__':
             debug=True
         )
     else:
-        print(f"No SSL certificates found at {cert_path}, running with HTTP on port {port}")
-        print("To enable HTTPS, create cert.pem and key.pem in the specified directory.")
+        logger.info("No SSL certificates found at %s, running with HTTP on port %s", cert_path, port)
+        logger.info("To enable HTTPS, create cert.pem and key.pem in the specified directory.")
         app.run(host='0.0.0.0', port=port, debug=True)
\ No newline at end of file
@@ -0,0 +1,64 @@
+from infrastructure.cache.cache import cached
+from infrastructure.config.config import get_settings
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BootstrapService:
+    """Service that loads all reference data of the prompt builder in one go.
+
+    The eight reads are independent, so they run concurrently on a thread
+    pool, each on its own pooled connection. They go through the streaming
+    repository reads, which raise on database errors instead of returning
+    an empty list: a bootstrap document is cached by clients under its ETag,
+    so a partial one must never be served.
+    """
+
+    def __init__(self, template_service, category_service, department_service, color_service,
+                 completion_type_service, children_category_service, information_service,
+                 text_management_service):
+        # Reference data that the services already cache is read through the same cache keys
+        self.readers = {
+            'templates': lambda: list(template_service.stream_templates()),
+            'categories': lambda: list(category_service.stream_categories()),
+            'departments': lambda: cached(department_service.ALL_KEY, lambda: list(department_service.stream_departments())),
+            'colors': lambda: cached(color_service.ALL_KEY, lambda: list(color_service.stream_colors())),
+            'completion_types': lambda: cached(completion_type_service.ALL_KEY, lambda: list(completion_type_service.stream_completion_types())),
+            'children_categories': lambda: list(children_category_service.stream_categories()),
+            'information': lambda: list(information_service.stream_information()),
+            'variables': lambda: list(text_management_service.stream_variables())
+        }
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _get_executor(self):
+        # Created on first use, so that gunicorn workers start their threads after the fork
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=get_settings()['BOOTSTRAP_WORKERS'],
+                        thread_name_prefix='bootstrap'
+                    )
+        return self._executor
+
+    def get_bootstrap(self):
+        """Load every reference list concurrently; raises if any of them fails."""
+        executor = self._get_executor()
+        # Each read runs in a copy of the caller's context, so its queries land in the request's query log
+        futures = {
+            name: executor.submit(contextvars.copy_context().run, reader)
+            for name, reader in self.readers.items()
+        }
+        try:
+            document = {name: future.result() for name, future in futures.items()}
+        except Exception as e:
+            for future in futures.values():
+                future.cancel()
+            logger.exception("Error in bootstrap service get_bootstrap: %s", e)
+            raise
+        logger.debug("Bootstrap loaded %s", {name: len(items) for name, items in document.items()})
+        return document
@@ -0,0 +1,82 @@
+from infrastructure.events.change_events import publish_changes
+
+OPERATIONS = ('create', 'update', 'delete')
+
+def prepare_bulk(payload, prepare, max_rows):
+    """Validate the rows of a bulk request one by one.
+
+    payload is an object with optional create, update and delete lists.
+    prepare is the service's single-row validation; it gets a copy of each
+    create/update row and raises ValueError for an invalid one. Returns
+    (creates, updates, deletes, errors): the rows that passed as
+    (index, value) pairs, and an error entry per row that did not.
+    Malformed requests as a whole raise ValueError.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Bulk request must be an object with create, update and/or delete lists")
+    unknown = set(payload) - set(OPERATIONS)
+    if unknown:
+        raise ValueError(f"Unknown bulk operations: {', '.join(sorted(unknown))}")
+    for operation in OPERATIONS:
+        if not isinstance(payload.get(operation, []), list):
+            raise ValueError(f"'{operation}' must be a list")
+
+    total = sum(len(payload.get(operation, [])) for operation in OPERATIONS)
+    if total == 0:
+        raise ValueError("Bulk request contains no rows")
+    if total > max_rows:
+        raise ValueError(f"Bulk request has {total} rows, the limit is {max_rows}")
+
+    creates, updates, deletes, errors = [], [], [], []
+
+    for index, item in enumerate(payload.get('create', [])):
+        try:
+            creates.append((index, prepare(dict(item) if isinstance(item, dict) else item)))
+        except ValueError as e:
+            errors.append(_error('create', index, e))
+
+    seen = set()
+    for index, item in enumerate(payload.get('update', [])):
+        try:
+            if not isinstance(item, dict) or item.get('id') in (None, ''):
+                raise ValueError("id is required")
+            if item['id'] in seen:
+                raise ValueError(f"Row {item['id']} is updated more than once")
+            seen.add(item['id'])
+            prepared = prepare(dict(item))
+            prepared['id'] = item['id']
+            updates.append((index, prepared))
+        except ValueError as e:
+            errors.append(_error('update', index, e))
+
+    seen = set()
+    for index, row_id in enumerate(payload.get('delete', [])):
+        if not isinstance(row_id, (str, int)) or isinstance(row_id, bool) or row_id == '':
+            errors.append(_error('delete', index, "id must be a string or an integer"))
+        elif row_id in seen:
+            errors.append(_error('delete', index, f"Row {row_id} is deleted more than once"))
+        else:
+            seen.add(row_id)
+            deletes.append((index, row_id))
+
+    return creates, updates, deletes, errors
+
+def finish_bulk(validation_errors, result=None):
+    """Merge validation errors into a repository result (or an empty, uncommitted one)."""
+    if result is None:
+        result = {'created': [], 'updated': [], 'deleted': [], 'errors': [], 'committed': False}
+    order = {operation: position for position, operation in enumerate(OPERATIONS)}
+    result['errors'] = sorted(validation_errors + result['errors'], key=lambda e: (order[e['operation']], e['index']))
+    return result
+
+def _error(operation, index, error):
+    return {'operation': operation, 'index': index, 'error': str(error)}
+
+def publish_bulk(entity, result):
+    """Publish a change event for every row a committed bulk write touched."""
+    if result['committed']:
+        publish_changes(entity, (
+            [(row['id'], 'create') for row in result['created']]
+            + [(row['id'], 'update') for row in result['updated']]
+            + [(row_id, 'delete') for row_id in result['deleted']]
+        ))
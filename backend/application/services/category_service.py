@@ -1,6 +1,10 @@
+from application.services.bulk import finish_bulk, prepare_bulk, publish_bulk
 from domain.repositories.category_repository import CategoryRepository
-import traceback
-import sys
+from infrastructure.config.config import get_settings
+from infrastructure.events.change_events import publish_change
+import logging
+
+logger = logging.getLogger(__name__)
 
 class CategoryService:
     """Service for category operations."""
@@ -12,28 +16,32 @@ class CategoryService:
         """Get all categories."""
         try:
             categories = self.repository.get_all()
-            print(f"Category service retrieved {len(categories)} categories")
+            logger.debug("Category service retrieved %s categories", len(categories))
             return categories
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category service get_all_categories at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category service get_all_categories: %s", e)
             return []
     
+    def get_categories_page(self, page):
+        """Get one keyset page of categories."""
+        try:
+            return self.repository.get_page(page)
+        except Exception as e:
+            logger.exception("Error in category service get_categories_page: %s", e)
+            raise
+    
+    def stream_categories(self):
+        """Stream all categories without building the whole list in memory."""
+        return self.repository.iter_all()
+    
     def get_categories_by_template(self, template_id):
         """Get categories for a specific template."""
         try:
             categories = self.repository.get_by_template_id(template_id)
-            print(f"Retrieved {len(categories)} categories for template {template_id}")
+            logger.debug("Retrieved %s categories for template %s", len(categories), template_id)
             return categories
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category service get_categories_by_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category service get_categories_by_template: %s", e)
             return []
 
     def get_category_by_id(self, category_id):
@@ -42,75 +50,61 @@ class CategoryService:
             category = self.repository.get_by_id(category_id)
             return category
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category service get_category_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category service get_category_by_id: %s", e)
             return None
     
+    def _prepare(self, category_data):
+        """Validate a category and fill in defaults; returns a copy."""
+        if not category_data or not isinstance(category_data, dict):
+            raise ValueError("Invalid category data format")
+        
+        if 'name' not in category_data or not category_data['name']:
+            raise ValueError("Category name is required")
+        
+        category_data = dict(category_data)
+        category_data.setdefault('description', None)
+        
+        if category_data.get('template_id') == '':
+            category_data['template_id'] = None
+        
+        return category_data
+    
     def create_category(self, category_data):
         """Create a new category."""
         try:
-            if not category_data or not isinstance(category_data, dict):
-                raise ValueError("Invalid category data format")
-                
-            if 'name' not in category_data or not category_data['name']:
-                raise ValueError("Category name is required")
-                
-            if 'description' not in category_data:
-                category_data['description'] = None
-                  
-            if 'template_id' in category_data and category_data['template_id'] == '':
-                category_data['template_id'] = None
+            category_data = self._prepare(category_data)
                 
             category = self.repository.create(category_data)
-            print(f"Created category: {category['name']} with ID {category['id']}")
+            publish_change('category', category['id'], 'create')
+            logger.info("Created category: %s with ID %s", category['name'], category['id'])
             if category.get('template_id'):
-                print(f"  Associated with template ID: {category['template_id']}")
+                logger.info("Associated with template ID: %s", category['template_id'])
                 
             return category
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category service create_category at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category service create_category: %s", e)
             raise
     
     def update_category(self, category_id, category_data):
         """Update a category."""
         try:
-            if not category_data or not isinstance(category_data, dict):
-                raise ValueError("Invalid category data format")
-                
-            if 'name' not in category_data or not category_data['name']:
-                raise ValueError("Category name is required")
-                
-            if 'description' not in category_data:
-                category_data['description'] = None
-                
-            if 'template_id' in category_data and category_data['template_id'] == '':
-                category_data['template_id'] = None
+            category_data = self._prepare(category_data)
                 
             category = self.repository.update(category_id, category_data)
             
             if category:
-                print(f"Updated category with ID {category['id']}")
+                publish_change('category', category['id'], 'update')
+                logger.info("Updated category with ID %s", category['id'])
                 if category.get('template_id'):
-                    print(f"  Associated with template ID: {category['template_id']}")
+                    logger.info("Associated with template ID: %s", category['template_id'])
             else:
-                print(f"Category with ID {category_id} not found for update")
+                logger.warning("Category with ID %s not found for update", category_id)
                 
             return category
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category service update_category at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category service update_category: %s", e)
             raise
 
     def associate_with_template(self, category_id, template_id):
@@ -123,21 +117,18 @@ class CategoryService:
             # Detta är kritiskt för PostgreSQL som kräver rätt typ
             template_id_converted = int(template_id) if template_id is not None else None
             
-            print(f"BEFORE CONVERSION - category_id: {category_id} ({type(category_id)}), template_id: {template_id} ({type(template_id)})")
-            print(f"AFTER CONVERSION - category_id: {category_id_str} ({type(category_id_str)}), template_id: {template_id_converted} ({type(template_id_converted)})")
+            logger.debug("BEFORE CONVERSION - category_id: %r, template_id: %r", category_id, template_id)
+            logger.debug("AFTER CONVERSION - category_id: %r, template_id: %r", category_id_str, template_id_converted)
             
             result = self.repository.associate_with_template(category_id_str, template_id_converted)
             if result:
-                print(f"Associated category {category_id} with template {template_id}")
+                publish_change('category', category_id, 'associate')
+                logger.info("Associated category %s with template %s", category_id, template_id)
             else:
-                print(f"Failed to associate category {category_id} with template {template_id}")
+                logger.warning("Failed to associate category %s with template %s", category_id, template_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category service associate_with_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category service associate_with_template: %s", e)
             raise
 
     def remove_template_association(self, category_id):
@@ -145,16 +136,13 @@ class CategoryService:
         try:
             result = self.repository.remove_template_association(category_id)
             if result:
-                print(f"Removed template association from category {category_id}")
+                publish_change('category', category_id, 'dissociate')
+                logger.info("Removed template association from category %s", category_id)
             else:
-                print(f"Failed to remove template association from category {category_id}")
+                logger.warning("Failed to remove template association from category %s", category_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category service remove_template_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category service remove_template_association: %s", e)
             raise
     
     def delete_category(self, category_id):
@@ -162,15 +150,33 @@ class CategoryService:
         try:
             success = self.repository.delete(category_id)
             if success:
-                print(f"Deleted category with ID {category_id}")
+                publish_change('category', category_id, 'delete')
+                logger.info("Deleted category with ID %s", category_id)
             else:
-                print(f"Category with ID {category_id} not found for deletion")
+                logger.warning("Category with ID %s not found for deletion", category_id)
             return success
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category service delete_category at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
-            raise
\ No newline at end of file
+            logger.exception("Error in category service delete_category: %s", e)
+            raise
+    
+    def bulk_categories(self, payload, atomic=False):
+        """Create, update and delete many categories in one transaction.
+        
+        Rows are validated like single writes; invalid rows are reported per
+        row and the rest are written, unless atomic is set, in which case
+        nothing is written if any row fails.
+        """
+        try:
+            creates, updates, deletes, errors = prepare_bulk(payload, self._prepare, get_settings()['BULK_MAX_ROWS'])
+            if atomic and errors:
+                return finish_bulk(errors)
+            
+            result = finish_bulk(errors, self.repository.bulk_write(creates, updates, deletes, atomic=atomic))
+            publish_bulk('category', result)
+            logger.info("Bulk categories: %s created, %s updated, %s deleted, %s errors",
+                        len(result['created']), len(result['updated']), len(result['deleted']), len(result['errors']))
+            return result
+        except Exception as e:
+            logger.exception("Error in category service bulk_categories: %s", e)
+            raise
@@ -0,0 +1,44 @@
+from domain.repositories.category_tree_repository import CategoryTreeRepository
+import logging
+
+logger = logging.getLogger(__name__)
+
+class CategoryTreeService:
+    """Service for reading whole subtrees of the category tree in one query."""
+
+    def __init__(self):
+        self.repository = CategoryTreeRepository()
+
+    def get_subtree(self, kind, node_id, max_depth=None):
+        """Get a node with its descendants nested under 'children', or None if it is not in the tree.
+
+        Raises ValueError for an unknown kind or a negative depth.
+        """
+        if kind not in self.repository.KINDS:
+            raise ValueError(f"Unknown tree node kind: {kind}")
+        if max_depth is not None and max_depth < 0:
+            raise ValueError("depth must be zero or greater")
+
+        try:
+            rows = self.repository.get_subtree(kind, node_id, max_depth)
+        except Exception as e:
+            logger.exception("Error in category tree service get_subtree: %s", e)
+            raise
+
+        # Rows come parents first, so every parent is placed before its children
+        nodes = {}
+        root = None
+        for row in rows:
+            key = (row['kind'], row['id'])
+            if key in nodes:
+                continue
+            node = nodes[key] = {'kind': row['kind'], 'id': row['id'], 'name': row['name'], 'children': []}
+            if row['depth'] == 0:
+                root = node
+            else:
+                parent = nodes.get((row['parent_kind'], row['parent_id']))
+                if parent is not None:
+                    parent['children'].append(node)
+
+        logger.debug("Category tree of %s %s has %s nodes", kind, node_id, len(nodes))
+        return root
@@ -1,28 +1,42 @@
 from domain.repositories.color_repository import ColorRepository
-import traceback
-import sys
+from infrastructure.cache.cache import cached, invalidate
+from infrastructure.events.change_events import publish_change
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ColorService:
     """Service for color operations."""
     
+    # Cache key for the read-through color list
+    ALL_KEY = 'colors:all'
+    
     def __init__(self):
         self.repository = ColorRepository()
     
     def get_all_colors(self):
         """Get all colors."""
         try:
-            colors = self.repository.get_all()
-            print(f"Color service retrieved {len(colors)} colors")
+            colors = cached(self.ALL_KEY, self.repository.get_all)
+            logger.debug("Color service retrieved %s colors", len(colors))
             return colors
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in color service get_all_colors at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in color service get_all_colors: %s", e)
             # Return empty list instead of failing
             return []
     
+    def get_colors_page(self, page):
+        """Get one keyset page of colors."""
+        try:
+            return self.repository.get_page(page)
+        except Exception as e:
+            logger.exception("Error in color service get_colors_page: %s", e)
+            raise
+    
+    def stream_colors(self):
+        """Stream all colors without building the whole list in memory."""
+        return self.repository.iter_all()
+    
     def create_color(self, color_data):
         """Create a new color."""
         try:
@@ -37,11 +51,11 @@ class ColorService:
                 raise ValueError("Color hex value is required")
                 
             # Skapa logposter för att felsöka
-            print(f"Color data before save: {color_data}")
+            logger.debug("Color data before save: %s", color_data)
             
             # Se till att hexkoden är i rätt format (om det behövs)
             if color_data['hex_value'] and not color_data['hex_value'].startswith('#'):
-                print(f"Adding # prefix to hex value: {color_data['hex_value']}")
+                logger.debug("Adding # prefix to hex value: %s", color_data['hex_value'])
                 color_data['hex_value'] = f"#{color_data['hex_value']}"
                 
             # Ensure description exists even if it's None
@@ -50,15 +64,13 @@ class ColorService:
                 
             # Create the color
             color = self.repository.create(color_data)
-            print(f"Created color: {color['name']} with ID {color['id']} and hex_value {color['hex_value']}")
+            invalidate(self.ALL_KEY)
+            publish_change('color', color['id'], 'create')
+            logger.info("Created color: %s with ID %s and hex_value %s", color['name'], color['id'], color['hex_value'])
             return color
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in color service create_color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in color service create_color: %s", e)
             raise
             
     def update_color(self, color_id, color_data):
@@ -76,7 +88,7 @@ class ColorService:
             
             # Se till att hexkoden är i rätt format (om det behövs)
             if color_data['hex_value'] and not color_data['hex_value'].startswith('#'):
-                print(f"Adding # prefix to hex value: {color_data['hex_value']}")
+                logger.debug("Adding # prefix to hex value: %s", color_data['hex_value'])
                 color_data['hex_value'] = f"#{color_data['hex_value']}"
                 
             # Ensure description exists even if it's None
@@ -85,38 +97,34 @@ class ColorService:
                 
             # Update the color
             color = self.repository.update(color_id, color_data)
+            invalidate(self.ALL_KEY)
             
             if color:
-                print(f"Updated color: {color['name']} with ID {color['id']} and hex_value {color['hex_value']}")
+                publish_change('color', color['id'], 'update')
+                logger.info("Updated color: %s with ID %s and hex_value %s", color['name'], color['id'], color['hex_value'])
             else:
-                print(f"Color with ID {color_id} not found for update")
+                logger.warning("Color with ID %s not found for update", color_id)
                 
             return color
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in color service update_color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in color service update_color: %s", e)
             raise
             
     def delete_color(self, color_id):
         """Delete a color."""
         try:
             success = self.repository.delete(color_id)
+            invalidate(self.ALL_KEY)
             
             if success:
-                print(f"Deleted color with ID {color_id}")
+                publish_change('color', color_id, 'delete')
+                logger.info("Deleted color with ID %s", color_id)
             else:
-                print(f"Color with ID {color_id} not found for deletion")
+                logger.warning("Color with ID %s not found for deletion", color_id)
                 
             return success
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in color service delete_color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in color service delete_color: %s", e)
             raise
\ No newline at end of file
@@ -1,42 +1,71 @@
 from domain.repositories.completion_type_repository import CompletionTypeRepository
-import traceback
-import sys
+from infrastructure.cache.cache import cached, invalidate
+from infrastructure.events.change_events import publish_change
+import logging
+
+logger = logging.getLogger(__name__)
 
 class CompletionTypeService:
     """Service for completion type operations."""
     
+    # Cache keys for read-through completion type lookups
+    ALL_KEY = 'completion_types:all'
+    ID_PREFIX = 'completion_types:id:'
+    TEMPLATE_PREFIX = 'completion_types:template:'
+    
     def __init__(self):
         self.repository = CompletionTypeRepository()
     
+    def _invalidate(self, completion_type_id):
+        """Drop cached reads touched by a write to one completion type.
+
+        The previous template of the completion type is not known here, so
+        all per-template lists are dropped.
+        """
+        invalidate(self.ALL_KEY, f"{self.ID_PREFIX}{completion_type_id}", prefixes=(self.TEMPLATE_PREFIX,))
+    
     def get_all_completion_types(self):
         """Get all completion types."""
         try:
-            completion_types = self.repository.get_all()
-            print(f"Completion type service retrieved {len(completion_types)} completion types")
+            completion_types = cached(self.ALL_KEY, self.repository.get_all)
+            logger.debug("Completion type service retrieved %s completion types", len(completion_types))
             return completion_types
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type service get_all_completion_types at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type service get_all_completion_types: %s", e)
             # Return empty list instead of failing
             return []
     
+    def get_completion_types_page(self, page):
+        """Get one keyset page of completion types."""
+        try:
+            return self.repository.get_page(page)
+        except Exception as e:
+            logger.exception("Error in completion type service get_completion_types_page: %s", e)
+            raise
+    
+    def stream_completion_types(self):
+        """Stream all completion types without building the whole list in memory."""
+        return self.repository.iter_all()
+    
     def get_completion_types_by_template(self, template_id):
         """Get completion types for a specific template."""
         try:
-            completion_types = self.repository.get_by_template_id(template_id)
-            print(f"Retrieved {len(completion_types)} completion types for template {template_id}")
+            completion_types = cached(f"{self.TEMPLATE_PREFIX}{template_id}", lambda: self.repository.get_by_template_id(template_id))
+            logger.debug("Retrieved %s completion types for template %s", len(completion_types), template_id)
             return completion_types
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type service get_completion_types_by_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type service get_completion_types_by_template: %s", e)
             return []
-    
+
+    def get_completion_type_by_id(self, completion_type_id):
+        """Get a completion type by ID."""
+        try:
+            completion_type = cached(f"{self.ID_PREFIX}{completion_type_id}", lambda: self.repository.get_by_id(completion_type_id))
+            return completion_type
+        except Exception as e:
+            logger.exception("Error in completion type service get_completion_type_by_id: %s", e)
+            return None
+
     def create_completion_type(self, completion_type_data):
         """Create a new completion type."""
         try:
@@ -57,18 +86,16 @@ class CompletionTypeService:
                 
             # Create the completion type
             completion_type = self.repository.create(completion_type_data)
-            print(f"Created completion type: {completion_type['name']} with ID {completion_type['id']}")
+            invalidate(self.ALL_KEY, f"{self.TEMPLATE_PREFIX}{completion_type_data.get('template_id')}")
+            publish_change('completion_type', completion_type['id'], 'create')
+            logger.info("Created completion type: %s with ID %s", completion_type['name'], completion_type['id'])
             if completion_type.get('template_id'):
-                print(f"  Associated with template ID: {completion_type['template_id']}")
+                logger.info("Associated with template ID: %s", completion_type['template_id'])
                 
             return completion_type
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type service create_completion_type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type service create_completion_type: %s", e)
             raise
     
     def update_completion_type(self, completion_type_id, completion_type_data):
@@ -91,73 +118,65 @@ class CompletionTypeService:
                 
             # Update the completion type
             completion_type = self.repository.update(completion_type_id, completion_type_data)
+            self._invalidate(completion_type_id)
             
             if completion_type:
-                print(f"Updated completion type: {completion_type['name']} with ID {completion_type['id']}")
+                publish_change('completion_type', completion_type['id'], 'update')
+                logger.info("Updated completion type: %s with ID %s", completion_type['name'], completion_type['id'])
                 if completion_type.get('template_id'):
-                    print(f"  Associated with template ID: {completion_type['template_id']}")
+                    logger.info("Associated with template ID: %s", completion_type['template_id'])
             else:
-                print(f"Completion type with ID {completion_type_id} not found for update")
+                logger.warning("Completion type with ID %s not found for update", completion_type_id)
                 
             return completion_type
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type service update_completion_type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type service update_completion_type: %s", e)
             raise
     
     def associate_with_template(self, completion_type_id, template_id):
         """Associate a completion type with a template."""
         try:
             result = self.repository.associate_with_template(completion_type_id, template_id)
+            self._invalidate(completion_type_id)
             if result:
-                print(f"Associated completion type {completion_type_id} with template {template_id}")
+                publish_change('completion_type', completion_type_id, 'associate')
+                logger.info("Associated completion type %s with template %s", completion_type_id, template_id)
             else:
-                print(f"Failed to associate completion type {completion_type_id} with template {template_id}")
+                logger.warning("Failed to associate completion type %s with template %s", completion_type_id, template_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type service associate_with_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type service associate_with_template: %s", e)
             raise
     
     def remove_template_association(self, completion_type_id):
         """Remove the template association from a completion type."""
         try:
             result = self.repository.remove_template_association(completion_type_id)
+            self._invalidate(completion_type_id)
             if result:
-                print(f"Removed template association from completion type {completion_type_id}")
+                publish_change('completion_type', completion_type_id, 'dissociate')
+                logger.info("Removed template association from completion type %s", completion_type_id)
             else:
-                print(f"Failed to remove template association from completion type {completion_type_id}")
+                logger.warning("Failed to remove template association from completion type %s", completion_type_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type service remove_template_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type service remove_template_association: %s", e)
             raise
     
     def delete_completion_type(self, completion_type_id):
         """Delete a completion type."""
         try:
             success = self.repository.delete(completion_type_id)
+            self._invalidate(completion_type_id)
             if success:
-                print(f"Deleted completion type with ID {completion_type_id}")
+                publish_change('completion_type', completion_type_id, 'delete')
+                logger.info("Deleted completion type with ID %s", completion_type_id)
                 return True
             else:
-                print(f"Completion type with ID {completion_type_id} could not be deleted, it may be referenced by templates")
+                logger.warning("Completion type with ID %s could not be deleted, it may be referenced by templates", completion_type_id)
                 return False
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type service delete_completion_type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type service delete_completion_type: %s", e)
             raise
\ No newline at end of file
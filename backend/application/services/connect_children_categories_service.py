@@ -1,6 +1,8 @@
 from domain.repositories.connect_children_categories_repository import ConnectChildrenCategoryRepository
-import traceback
-import sys
+from infrastructure.events.change_events import publish_change
+import logging
+
+logger = logging.getLogger(__name__)
 
 class ConnectChildrenCategoryService:
     """Service for children categories operations."""
@@ -12,42 +14,42 @@ class ConnectChildrenCategoryService:
         """Get all children categories."""
         try:
             categories = self.repository.get_all()
-            print(f"Children category service retrieved {len(categories)} categories")
+            logger.debug("Children category service retrieved %s categories", len(categories))
             return categories
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service get_all_categories at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service get_all_categories: %s", e)
             return []
     
+    def get_categories_page(self, page):
+        """Get one keyset page of children categories."""
+        try:
+            return self.repository.get_page(page)
+        except Exception as e:
+            logger.exception("Error in children category service get_categories_page: %s", e)
+            raise
+    
+    def stream_categories(self):
+        """Stream all children categories without building the whole list in memory."""
+        return self.repository.iter_all()
+    
     def get_categories_by_completion_type(self, completion_type_id):
         """Get children categories for a specific completion type."""
         try:
             categories = self.repository.get_by_completion_type_id(completion_type_id)
-            print(f"Retrieved {len(categories)} categories for completion type {completion_type_id}")
+            logger.debug("Retrieved %s categories for completion type %s", len(categories), completion_type_id)
             return categories
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service get_categories_by_completion_type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service get_categories_by_completion_type: %s", e)
             return []
 
     def get_categories_by_department(self, department_id):
         """Get children categories for a specific department."""
         try:
             categories = self.repository.get_by_department_id(department_id)
-            print(f"Retrieved {len(categories)} categories for department {department_id}")
+            logger.debug("Retrieved %s categories for department %s", len(categories), department_id)
             return categories
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service get_categories_by_department at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service get_categories_by_department: %s", e)
             return []
 
     def get_category_by_id(self, category_id):
@@ -56,11 +58,7 @@ class ConnectChildrenCategoryService:
             category = self.repository.get_by_id(category_id)
             return category
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service get_category_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service get_category_by_id: %s", e)
             return None
     
     def create_category(self, category_data):
@@ -82,22 +80,19 @@ class ConnectChildrenCategoryService:
                 category_data['department_id'] = None
                 
             category = self.repository.create(category_data)
-            print(f"Created children category: {category['name']} with ID {category['id']}")
+            publish_change('child_category', category['id'], 'create')
+            logger.info("Created children category: %s with ID %s", category['name'], category['id'])
             
             if category.get('completion_type_id'):
-                print(f"  Associated with completion type ID: {category['completion_type_id']}")
+                logger.info("Associated with completion type ID: %s", category['completion_type_id'])
                 
             if category.get('department_id'):
-                print(f"  Associated with department ID: {category['department_id']}")
+                logger.info("Associated with department ID: %s", category['department_id'])
                 
             return category
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service create_category at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service create_category: %s", e)
             raise
     
     def update_category(self, category_id, category_data):
@@ -121,24 +116,21 @@ class ConnectChildrenCategoryService:
             category = self.repository.update(category_id, category_data)
             
             if category:
-                print(f"Updated children category with ID {category['id']}")
+                publish_change('child_category', category['id'], 'update')
+                logger.info("Updated children category with ID %s", category['id'])
                 
                 if category.get('completion_type_id'):
-                    print(f"  Associated with completion type ID: {category['completion_type_id']}")
+                    logger.info("Associated with completion type ID: %s", category['completion_type_id'])
                     
                 if category.get('department_id'):
-                    print(f"  Associated with department ID: {category['department_id']}")
+                    logger.info("Associated with department ID: %s", category['department_id'])
             else:
-                print(f"Children category with ID {category_id} not found for update")
+                logger.warning("Children category with ID %s not found for update", category_id)
                 
             return category
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service update_category at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service update_category: %s", e)
             raise
 
     def associate_with_completion_type(self, category_id, completion_type_id):
@@ -151,21 +143,18 @@ class ConnectChildrenCategoryService:
             # This is critical for PostgreSQL which requires correct types
             completion_type_id_converted = int(completion_type_id) if completion_type_id is not None else None
             
-            print(f"BEFORE CONVERSION - category_id: {category_id} ({type(category_id)}), completion_type_id: {completion_type_id} ({type(completion_type_id)})")
-            print(f"AFTER CONVERSION - category_id: {category_id_str} ({type(category_id_str)}), completion_type_id: {completion_type_id_converted} ({type(completion_type_id_converted)})")
+            logger.debug("BEFORE CONVERSION - category_id: %r, completion_type_id: %r", category_id, completion_type_id)
+            logger.debug("AFTER CONVERSION - category_id: %r, completion_type_id: %r", category_id_str, completion_type_id_converted)
             
             result = self.repository.associate_with_completion_type(category_id_str, completion_type_id_converted)
             if result:
-                print(f"Associated children category {category_id} with completion type {completion_type_id}")
+                publish_change('child_category', category_id, 'associate')
+                logger.info("Associated children category %s with completion type %s", category_id, completion_type_id)
             else:
-                print(f"Failed to associate children category {category_id} with completion type {completion_type_id}")
+                logger.warning("Failed to associate children category %s with completion type %s", category_id, completion_type_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service associate_with_completion_type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service associate_with_completion_type: %s", e)
             raise
 
     def associate_with_department(self, category_id, department_id):
@@ -178,21 +167,18 @@ class ConnectChildrenCategoryService:
             # This is critical for PostgreSQL which requires correct types
             department_id_converted = str(department_id) if department_id is not None else None
             
-            print(f"BEFORE CONVERSION - category_id: {category_id} ({type(category_id)}), department_id: {department_id} ({type(department_id)})")
-            print(f"AFTER CONVERSION - category_id: {category_id_str} ({type(category_id_str)}), department_id: {department_id_converted} ({type(department_id_converted)})")
+            logger.debug("BEFORE CONVERSION - category_id: %r, department_id: %r", category_id, department_id)
+            logger.debug("AFTER CONVERSION - category_id: %r, department_id: %r", category_id_str, department_id_converted)
             
             result = self.repository.associate_with_department(category_id_str, department_id_converted)
             if result:
-                print(f"Associated children category {category_id} with department {department_id}")
+                publish_change('child_category', category_id, 'associate')
+                logger.info("Associated children category %s with department %s", category_id, department_id)
             else:
-                print(f"Failed to associate children category {category_id} with department {department_id}")
+                logger.warning("Failed to associate children category %s with department %s", category_id, department_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service associate_with_department at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service associate_with_department: %s", e)
             raise
 
     def remove_completion_type_association(self, category_id):
@@ -200,16 +186,13 @@ class ConnectChildrenCategoryService:
         try:
             result = self.repository.remove_completion_type_association(category_id)
             if result:
-                print(f"Removed completion type association from children category {category_id}")
+                publish_change('child_category', category_id, 'dissociate')
+                logger.info("Removed completion type association from children category %s", category_id)
             else:
-                print(f"Failed to remove completion type association from children category {category_id}")
+                logger.warning("Failed to remove completion type association from children category %s", category_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service remove_completion_type_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service remove_completion_type_association: %s", e)
             raise
     
     def remove_department_association(self, category_id):
@@ -217,16 +200,13 @@ class ConnectChildrenCategoryService:
         try:
             result = self.repository.remove_department_association(category_id)
             if result:
-                print(f"Removed department association from children category {category_id}")
+                publish_change('child_category', category_id, 'dissociate')
+                logger.info("Removed department association from children category %s", category_id)
             else:
-                print(f"Failed to remove department association from children category {category_id}")
+                logger.warning("Failed to remove department association from children category %s", category_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service remove_department_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service remove_department_association: %s", e)
             raise
     
     def delete_category(self, category_id):
@@ -234,15 +214,12 @@ class ConnectChildrenCategoryService:
         try:
             success = self.repository.delete(category_id)
             if success:
-                print(f"Deleted children category with ID {category_id}")
+                publish_change('child_category', category_id, 'delete')
+                logger.info("Deleted children category with ID %s", category_id)
             else:
-                print(f"Children category with ID {category_id} not found for deletion")
+                logger.warning("Children category with ID %s not found for deletion", category_id)
             return success
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in children category service delete_category at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in children category service delete_category: %s", e)
             raise
\ No newline at end of file
@@ -1,52 +1,68 @@
 from domain.repositories.department_repository import DepartmentRepository
-import traceback
-import sys
+from infrastructure.cache.cache import cached, invalidate
+from infrastructure.events.change_events import publish_change
+import logging
+
+logger = logging.getLogger(__name__)
 
 class DepartmentService:
     """Service for department operations."""
     
+    # Cache keys for read-through department lookups
+    ALL_KEY = 'departments:all'
+    ID_PREFIX = 'departments:id:'
+    TEMPLATE_PREFIX = 'departments:template:'
+    
     def __init__(self):
         self.repository = DepartmentRepository()
     
+    def _invalidate(self, department_id):
+        """Drop cached reads touched by a write to one department.
+
+        The previous template of the department is not known here, so all
+        per-template lists are dropped.
+        """
+        invalidate(self.ALL_KEY, f"{self.ID_PREFIX}{department_id}", prefixes=(self.TEMPLATE_PREFIX,))
+    
     def get_all_departments(self):
         """Get all departments."""
         try:
-            departments = self.repository.get_all()
-            print(f"Department service retrieved {len(departments)} departments")
+            departments = cached(self.ALL_KEY, self.repository.get_all)
+            logger.debug("Department service retrieved %s departments", len(departments))
             return departments
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department service get_all_departments at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department service get_all_departments: %s", e)
             return []
     
+    def get_departments_page(self, page):
+        """Get one keyset page of departments."""
+        try:
+            return self.repository.get_page(page)
+        except Exception as e:
+            logger.exception("Error in department service get_departments_page: %s", e)
+            raise
+    
+    def stream_departments(self):
+        """Stream all departments without building the whole list in memory."""
+        return self.repository.iter_all()
+    
     def get_departments_by_template(self, template_id):
         """Get departments for a specific template."""
         try:
-            departments = self.repository.get_by_template_id(template_id)
-            print(f"Retrieved {len(departments)} departments for template {template_id}")
+            departments = cached(f"{self.TEMPLATE_PREFIX}{template_id}", lambda: self.repository.get_by_template_id(template_id))
+            logger.debug("Retrieved %s departments for template %s", len(departments), template_id)
             return departments
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department service get_departments_by_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department service get_departments_by_template: %s", e)
             return []
 
     def get_department_by_id(self, department_id):
         """Get a department by ID."""
         try:
-            department = self.repository.get_by_id(department_id)
+            department = cached(f"{self.ID_PREFIX}{department_id}", lambda: self.repository.get_by_id(department_id))
             return department
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department service get_department_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department service get_department_by_id: %s", e)
             return None
     
     def create_department(self, department_data):
@@ -65,18 +81,16 @@ class DepartmentService:
                 department_data['template_id'] = None
                 
             department = self.repository.create(department_data)
-            print(f"Created department: {department['name']} with ID {department['id']}")
+            invalidate(self.ALL_KEY, f"{self.TEMPLATE_PREFIX}{department_data.get('template_id')}")
+            publish_change('department', department['id'], 'create')
+            logger.info("Created department: %s with ID %s", department['name'], department['id'])
             if department.get('template_id'):
-                print(f"  Associated with template ID: {department['template_id']}")
+                logger.info("Associated with template ID: %s", department['template_id'])
                 
             return department
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department service create_department at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department service create_department: %s", e)
             raise
     
     def update_department(self, department_id, department_data):
@@ -95,22 +109,20 @@ class DepartmentService:
                 department_data['template_id'] = None
                 
             department = self.repository.update(department_id, department_data)
+            self._invalidate(department_id)
             
             if department:
-                print(f"Updated department with ID {department['id']}")
+                publish_change('department', department['id'], 'update')
+                logger.info("Updated department with ID %s", department['id'])
                 if department.get('template_id'):
-                    print(f"  Associated with template ID: {department['template_id']}")
+                    logger.info("Associated with template ID: %s", department['template_id'])
             else:
-                print(f"Department with ID {department_id} not found for update")
+                logger.warning("Department with ID %s not found for update", department_id)
                 
             return department
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department service update_department at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department service update_department: %s", e)
             raise
 
     def associate_with_template(self, department_id, template_id):
@@ -123,54 +135,48 @@ class DepartmentService:
             # Detta är kritiskt för PostgreSQL som kräver rätt typ
             template_id_converted = int(template_id) if template_id is not None else None
             
-            print(f"BEFORE CONVERSION - department_id: {department_id} ({type(department_id)}), template_id: {template_id} ({type(template_id)})")
-            print(f"AFTER CONVERSION - department_id: {department_id_str} ({type(department_id_str)}), template_id: {template_id_converted} ({type(template_id_converted)})")
+            logger.debug("BEFORE CONVERSION - department_id: %r, template_id: %r", department_id, template_id)
+            logger.debug("AFTER CONVERSION - department_id: %r, template_id: %r", department_id_str, template_id_converted)
             
             result = self.repository.associate_with_template(department_id_str, template_id_converted)
+            self._invalidate(department_id)
             if result:
-                print(f"Associated department {department_id} with template {template_id}")
+                publish_change('department', department_id, 'associate')
+                logger.info("Associated department %s with template %s", department_id, template_id)
             else:
-                print(f"Failed to associate department {department_id} with template {template_id}")
+                logger.warning("Failed to associate department %s with template %s", department_id, template_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department service associate_with_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department service associate_with_template: %s", e)
             raise
 
     def remove_template_association(self, department_id):
         """Remove the template association from a department."""
         try:
             result = self.repository.remove_template_association(department_id)
+            self._invalidate(department_id)
             if result:
-                print(f"Removed template association from department {department_id}")
+                publish_change('department', department_id, 'dissociate')
+                logger.info("Removed template association from department %s", department_id)
             else:
-                print(f"Failed to remove template association from department {department_id}")
+                logger.warning("Failed to remove template association from department %s", department_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department service remove_template_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department service remove_template_association: %s", e)
             raise
     
     def delete_department(self, department_id):
         """Delete a department."""
         try:
             success = self.repository.delete(department_id)
+            self._invalidate(department_id)
             if success:
-                print(f"Deleted department with ID {department_id}")
+                publish_change('department', department_id, 'delete')
+                logger.info("Deleted department with ID %s", department_id)
             else:
-                print(f"Department with ID {department_id} not found for deletion")
+                logger.warning("Department with ID %s not found for deletion", department_id)
             return success
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department service delete_department at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department service delete_department: %s", e)
             raise
\ No newline at end of file
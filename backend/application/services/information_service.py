@@ -1,6 +1,10 @@
+from application.services.bulk import finish_bulk, prepare_bulk, publish_bulk
 from domain.repositories.information_repository import InformationRepository
-import traceback
-import sys
+from infrastructure.config.config import get_settings
+from infrastructure.events.change_events import publish_change
+import logging
+
+logger = logging.getLogger(__name__)
 
 class InformationService:
     """Service for information operations."""
@@ -12,28 +16,32 @@ class InformationService:
         """Get all information items."""
         try:
             information_items = self.repository.get_all()
-            print(f"Information service retrieved {len(information_items)} items")
+            logger.debug("Information service retrieved %s items", len(information_items))
             return information_items
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information service get_all_information at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information service get_all_information: %s", e)
             return []
     
+    def get_information_page(self, page):
+        """Get one keyset page of information items."""
+        try:
+            return self.repository.get_page(page)
+        except Exception as e:
+            logger.exception("Error in information service get_information_page: %s", e)
+            raise
+    
+    def stream_information(self):
+        """Stream all information items without building the whole list in memory."""
+        return self.repository.iter_all()
+    
     def get_information_by_template(self, template_id):
         """Get information items for a specific template."""
         try:
             information_items = self.repository.get_by_template_id(template_id)
-            print(f"Retrieved {len(information_items)} information items for template {template_id}")
+            logger.debug("Retrieved %s information items for template %s", len(information_items), template_id)
             return information_items
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information service get_information_by_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information service get_information_by_template: %s", e)
             return []
 
     def get_information_by_id(self, information_id):
@@ -42,87 +50,63 @@ class InformationService:
             information = self.repository.get_by_id(information_id)
             return information
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information service get_information_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information service get_information_by_id: %s", e)
             return None
     
+    def _prepare(self, information_data):
+        """Validate an information item and fill in defaults; returns a copy."""
+        if not information_data or not isinstance(information_data, dict):
+            raise ValueError("Invalid information data format")
+        
+        if 'name' not in information_data or not information_data['name']:
+            raise ValueError("Information name is required")
+        
+        information_data = dict(information_data)
+        information_data.setdefault('description', None)
+        information_data.setdefault('label', None)
+        information_data.setdefault('comments', False)
+        
+        if information_data.get('template_id') == '':
+            information_data['template_id'] = None
+        
+        return information_data
+    
     def create_information(self, information_data):
         """Create a new information item."""
         try:
-            if not information_data or not isinstance(information_data, dict):
-                raise ValueError("Invalid information data format")
-                
-            if 'name' not in information_data or not information_data['name']:
-                raise ValueError("Information name is required")
-                
-            if 'description' not in information_data:
-                information_data['description'] = None
-                
-            if 'label' not in information_data:
-                information_data['label'] = None
-                  
-            if 'template_id' in information_data and information_data['template_id'] == '':
-                information_data['template_id'] = None
-                
-            if 'comments' not in information_data:
-                information_data['comments'] = False
+            information_data = self._prepare(information_data)
                 
             information = self.repository.create(information_data)
-            print(f"Created information item: {information['name']} with ID {information['id']}")
+            publish_change('information', information['id'], 'create')
+            logger.info("Created information item: %s with ID %s", information['name'], information['id'])
             if information.get('template_id'):
-                print(f"  Associated with template ID: {information['template_id']}")
+                logger.info("Associated with template ID: %s", information['template_id'])
                 
             return information
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information service create_information at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information service create_information: %s", e)
             raise
     
     def update_information(self, information_id, information_data):
         """Update an information item."""
         try:
-            if not information_data or not isinstance(information_data, dict):
-                raise ValueError("Invalid information data format")
-                
-            if 'name' not in information_data or not information_data['name']:
-                raise ValueError("Information name is required")
-                
-            if 'description' not in information_data:
-                information_data['description'] = None
-                
-            if 'label' not in information_data:
-                information_data['label'] = None
-                
-            if 'template_id' in information_data and information_data['template_id'] == '':
-                information_data['template_id'] = None
-                
-            if 'comments' not in information_data:
-                information_data['comments'] = False
+            information_data = self._prepare(information_data)
                 
             information = self.repository.update(information_id, information_data)
             
             if information:
-                print(f"Updated information item with ID {information['id']}")
+                publish_change('information', information['id'], 'update')
+                logger.info("Updated information item with ID %s", information['id'])
                 if information.get('template_id'):
-                    print(f"  Associated with template ID: {information['template_id']}")
+                    logger.info("Associated with template ID: %s", information['template_id'])
             else:
-                print(f"Information item with ID {information_id} not found for update")
+                logger.warning("Information item with ID %s not found for update", information_id)
                 
             return information
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information service update_information at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information service update_information: %s", e)
             raise
 
     def associate_with_template(self, information_id, template_id):
@@ -135,21 +119,18 @@ class InformationService:
             # Detta är kritiskt för PostgreSQL som kräver rätt typ
             template_id_converted = int(template_id) if template_id is not None else None
             
-            print(f"BEFORE CONVERSION - information_id: {information_id} ({type(information_id)}), template_id: {template_id} ({type(template_id)})")
-            print(f"AFTER CONVERSION - information_id: {information_id_str} ({type(information_id_str)}), template_id: {template_id_converted} ({type(template_id_converted)})")
+            logger.debug("BEFORE CONVERSION - information_id: %r, template_id: %r", information_id, template_id)
+            logger.debug("AFTER CONVERSION - information_id: %r, template_id: %r", information_id_str, template_id_converted)
             
             result = self.repository.associate_with_template(information_id_str, template_id_converted)
             if result:
-                print(f"Associated information item {information_id} with template {template_id}")
+                publish_change('information', information_id, 'associate')
+                logger.info("Associated information item %s with template %s", information_id, template_id)
             else:
-                print(f"Failed to associate information item {information_id} with template {template_id}")
+                logger.warning("Failed to associate information item %s with template %s", information_id, template_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information service associate_with_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information service associate_with_template: %s", e)
             raise
 
     def remove_template_association(self, information_id):
@@ -157,16 +138,13 @@ class InformationService:
         try:
             result = self.repository.remove_template_association(information_id)
             if result:
-                print(f"Removed template association from information item {information_id}")
+                publish_change('information', information_id, 'dissociate')
+                logger.info("Removed template association from information item %s", information_id)
             else:
-                print(f"Failed to remove template association from information item {information_id}")
+                logger.warning("Failed to remove template association from information item %s", information_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information service remove_template_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information service remove_template_association: %s", e)
             raise
     
     def delete_information(self, information_id):
@@ -174,15 +152,33 @@ class InformationService:
         try:
             success = self.repository.delete(information_id)
             if success:
-                print(f"Deleted information item with ID {information_id}")
+                publish_change('information', information_id, 'delete')
+                logger.info("Deleted information item with ID %s", information_id)
             else:
-                print(f"Information item with ID {information_id} not found for deletion")
+                logger.warning("Information item with ID %s not found for deletion", information_id)
             return success
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information service delete_information at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
-            raise
\ No newline at end of file
+            logger.exception("Error in information service delete_information: %s", e)
+            raise
+    
+    def bulk_information(self, payload, atomic=False):
+        """Create, update and delete many information items in one transaction.
+        
+        Rows are validated like single writes; invalid rows are reported per
+        row and the rest are written, unless atomic is set, in which case
+        nothing is written if any row fails.
+        """
+        try:
+            creates, updates, deletes, errors = prepare_bulk(payload, self._prepare, get_settings()['BULK_MAX_ROWS'])
+            if atomic and errors:
+                return finish_bulk(errors)
+            
+            result = finish_bulk(errors, self.repository.bulk_write(creates, updates, deletes, atomic=atomic))
+            publish_bulk('information', result)
+            logger.info("Bulk information: %s created, %s updated, %s deleted, %s errors",
+                        len(result['created']), len(result['updated']), len(result['deleted']), len(result['errors']))
+            return result
+        except Exception as e:
+            logger.exception("Error in information service bulk_information: %s", e)
+            raise
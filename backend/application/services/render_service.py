@@ -0,0 +1,171 @@
+from domain.repositories.template_repository import TemplateRepository
+from domain.rendering.compiler import CompiledTemplateCache, MISSING_KEEP, MISSING_POLICIES, normalize_values, render_many
+from infrastructure.config.config import get_settings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+import multiprocessing
+import itertools
+import threading
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+def render_worker_count():
+    """Number of worker processes for large render batches."""
+    return get_settings()['RENDER_WORKERS'] or os.cpu_count() or 1
+
+def get_render_pool():
+    """Get the worker processes for large render batches, starting them on first use."""
+    global _render_pool
+    if _render_pool is None:
+        with _render_pool_lock:
+            if _render_pool is None:
+                # spawn rather than fork: forking a threaded server can copy held locks into the child
+                _render_pool = ProcessPoolExecutor(
+                    max_workers=render_worker_count(),
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _render_pool
+
+def shutdown_render_pool():
+    """Stop the render worker processes, if they were started."""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+def _forget_render_pool_after_fork():
+    """The parent's worker processes cannot be driven from a forked child."""
+    global _render_pool, _render_pool_lock
+    _render_pool = None
+    _render_pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_render_pool_after_fork)
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+class RenderService:
+    """Service for rendering template content with variable values."""
+
+    def __init__(self):
+        self.repository = TemplateRepository()
+        self.compiled_templates = CompiledTemplateCache(get_settings()['RENDER_CACHE_SIZE'])
+
+    def get_compiled_template(self, template_id):
+        """Get the compiled form of a template's current content, or None if it does not exist."""
+        known_updated_at = self.compiled_templates.known_version(template_id)
+        source = self.repository.get_render_source(template_id, known_updated_at)
+        if source is None:
+            return None
+
+        compiled = self.compiled_templates.resolve(template_id, source['updated_at'], source['content'])
+        if compiled is None:
+            # The cached version was evicted between the version check and the lookup
+            source = self.repository.get_render_source(template_id)
+            if source is None:
+                return None
+            compiled = self.compiled_templates.resolve(template_id, source['updated_at'], source['content'])
+        return compiled
+
+    def render_template(self, template_id, variables, missing=MISSING_KEEP):
+        """Render a template with a map of variable values.
+
+        Returns None if the template does not exist. Raises ValueError for
+        invalid input and, with missing='error', for variables without a value.
+        """
+        try:
+            if missing not in MISSING_POLICIES:
+                raise ValueError(f"missing must be one of: {', '.join(MISSING_POLICIES)}")
+
+            if variables is None:
+                variables = {}
+            if not isinstance(variables, dict):
+                raise ValueError("variables must be an object")
+
+            compiled = self.get_compiled_template(template_id)
+            if compiled is None:
+                logger.warning("Template with ID %s not found for rendering", template_id)
+                return None
+
+            content, missing_variables = compiled.render(normalize_values(variables), missing)
+            return {
+                'template_id': template_id,
+                'content': content,
+                'variables': list(compiled.variables),
+                'missing_variables': missing_variables
+            }
+
+        except Exception as e:
+            logger.exception("Error in render service render_template: %s", e)
+            raise
+
+    def render_batch(self, template_id, items, missing=MISSING_KEEP):
+        """Render a template once for each item of variable values.
+
+        The template is compiled once for the whole batch. items may be a
+        lazy iterator. Returns None if the template does not exist, otherwise
+        an iterator of results in input order; bad items give error results
+        instead of stopping the batch.
+        """
+        try:
+            if missing not in MISSING_POLICIES:
+                raise ValueError(f"missing must be one of: {', '.join(MISSING_POLICIES)}")
+
+            compiled = self.get_compiled_template(template_id)
+            if compiled is None:
+                logger.warning("Template with ID %s not found for batch rendering", template_id)
+                return None
+
+            return self._render_batch(compiled, items, missing)
+
+        except Exception as e:
+            logger.exception("Error in render service render_batch: %s", e)
+            raise
+
+    def _render_batch(self, compiled, items, missing):
+        settings = get_settings()
+        chunks = _chunks(enumerate(items), settings['RENDER_BATCH_CHUNK'])
+
+        # Small batches are rendered inline, where handing chunks to other processes costs more than it saves
+        buffered = []
+        count = 0
+        for chunk in chunks:
+            buffered.append(chunk)
+            count += len(chunk)
+            if count >= settings['RENDER_PARALLEL_THRESHOLD']:
+                break
+        else:
+            for chunk in buffered:
+                yield from render_many(compiled, chunk, missing)
+            return
+
+        # Keep a bounded number of chunks in flight so a long input is never read ahead entirely
+        pool = get_render_pool()
+        max_in_flight = render_worker_count() * 2
+        in_flight = deque()
+        try:
+            for chunk in itertools.chain(buffered, chunks):
+                in_flight.append(pool.submit(render_many, compiled, chunk, missing))
+                if len(in_flight) >= max_in_flight:
+                    yield from in_flight.popleft().result()
+            while in_flight:
+                yield from in_flight.popleft().result()
+        except BrokenProcessPool:
+            # A worker died; start a fresh pool for the next batch
+            shutdown_render_pool()
+            raise
+        finally:
+            for future in in_flight:
+                future.cancel()
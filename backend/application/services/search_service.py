@@ -0,0 +1,106 @@
+from domain.repositories.search_repository import SearchRepository
+from domain.search.inverted_index import InvertedIndex, highlight
+from infrastructure.config.config import get_settings
+from infrastructure.database.pagination import Page, decode_cursor, encode_cursor
+from infrastructure.database.schema import get_schema_registry
+from infrastructure.database.table_versions import get_table_versions
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables whose rows are searchable; a change to any of them makes the in-memory index stale
+SEARCH_TABLES = ('templates', 'information', 'category_variabels')
+
+class SearchService:
+    """Service for ranked, highlighted search across templates, information and variables.
+
+    With the search migration applied, queries go to Postgres (tsvector and
+    pg_trgm). Otherwise, or with SEARCH_BACKEND=memory, an in-memory
+    inverted index built from the source tables answers them; it is rebuilt
+    when table_versions shows a change, or after SEARCH_INDEX_TTL seconds
+    when versions are not available.
+    """
+
+    def __init__(self):
+        self.repository = SearchRepository()
+        self._index = None
+        self._index_state = None
+        self._index_built_at = 0.0
+        self._index_lock = threading.Lock()
+
+    def search(self, query, types=None, limit=20, cursor=None):
+        """Get one page of hits, best first.
+
+        types limits the hits to some of 'template', 'information' and
+        'variable'. Raises ValueError for an empty query, an unknown type or
+        an invalid cursor.
+        """
+        query = (query or '').strip()
+        if not query:
+            raise ValueError("q is required")
+
+        entities = tuple(types) if types else self.repository.ENTITIES
+        unknown = [entity for entity in entities if entity not in self.repository.ENTITIES]
+        if unknown:
+            raise ValueError(f"Unsupported type: {', '.join(unknown)}")
+
+        after = None
+        if cursor:
+            after = decode_cursor(cursor, 'rank', True)
+            if not isinstance(after[0], (int, float)) or not isinstance(after[1], str):
+                raise ValueError("Invalid cursor")
+
+        try:
+            if self._backend() == 'postgres':
+                hits = self.repository.search(query, entities, limit + 1, after)
+            else:
+                hits = self._search_index(query, entities, limit + 1, after)
+        except Exception as e:
+            logger.exception("Error in search service search: %s", e)
+            raise
+
+        if len(hits) <= limit:
+            return Page(hits)
+        hits = hits[:limit]
+        last = hits[-1]
+        return Page(hits, encode_cursor('rank', True, [last['rank'], f"{last['type']}:{last['id']}"]))
+
+    def _backend(self):
+        backend = get_settings()['SEARCH_BACKEND']
+        if backend == 'auto':
+            return 'postgres' if get_schema_registry().has_table('search_documents') else 'memory'
+        return backend
+
+    def _current_index(self):
+        """The in-memory index, rebuilt first if the searchable tables have changed."""
+        state = get_table_versions(SEARCH_TABLES)
+        with self._index_lock:
+            if self._index is not None:
+                if state is not None and state == self._index_state:
+                    return self._index
+                if state is None and time.monotonic() - self._index_built_at < get_settings()['SEARCH_INDEX_TTL']:
+                    return self._index
+
+            started = time.perf_counter()
+            self._index = InvertedIndex(self.repository.load_documents())
+            self._index_state = state
+            self._index_built_at = time.monotonic()
+            logger.info(
+                "Built in-memory search index of %s documents in %.1f ms",
+                len(self._index), (time.perf_counter() - started) * 1000
+            )
+            return self._index
+
+    def _search_index(self, query, entities, limit, after):
+        return [
+            {
+                'type': document.entity,
+                'id': document.id,
+                'title': highlight(document.title, terms),
+                'snippet': highlight(document.body, terms, snippet=True),
+                'rank': rank
+            }
+            for rank, document, terms in self._current_index().search(query, set(entities), limit, after)
+        ]
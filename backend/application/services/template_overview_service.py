@@ -0,0 +1,84 @@
+from domain.repositories.async_repositories import (
+    AsyncCategoryRepository,
+    AsyncCompletionTypeRepository,
+    AsyncDepartmentRepository,
+    AsyncInformationRepository,
+    AsyncTemplateRepository
+)
+from domain.repositories.category_repository import CategoryRepository
+from domain.repositories.completion_type_repository import CompletionTypeRepository
+from domain.repositories.department_repository import DepartmentRepository
+from domain.repositories.information_repository import InformationRepository
+from domain.repositories.template_repository import TemplateRepository
+from infrastructure.database.async_connection import async_db_available, run_async
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TemplateOverviewService:
+    """Service that loads a template together with everything linked to it.
+
+    The five reads are independent, so on the async stack they run
+    concurrently and the request waits for the slowest one instead of the
+    sum. Without asyncpg the same reads run one after another.
+    """
+    
+    def __init__(self):
+        self.templates = TemplateRepository()
+        self.categories = CategoryRepository()
+        self.departments = DepartmentRepository()
+        self.information = InformationRepository()
+        self.completion_types = CompletionTypeRepository()
+        self.async_templates = AsyncTemplateRepository()
+        self.async_categories = AsyncCategoryRepository()
+        self.async_departments = AsyncDepartmentRepository()
+        self.async_information = AsyncInformationRepository()
+        self.async_completion_types = AsyncCompletionTypeRepository()
+    
+    def get_overview(self, template_id, use_async=None):
+        """Get a template with its categories, departments, information and completion types.
+
+        Returns None if the template does not exist; raises ValueError if
+        template_id is not an integer.
+        """
+        try:
+            template_id = int(template_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid template id: {template_id!r}")
+        if use_async is None:
+            use_async = async_db_available()
+        try:
+            if use_async:
+                parts = run_async(self._gather(template_id))
+            else:
+                parts = (
+                    self.templates.get_document_by_id(template_id),
+                    self.categories.get_by_template_id(template_id),
+                    self.departments.get_by_template_id(template_id),
+                    self.information.get_by_template_id(template_id),
+                    self.completion_types.get_by_template_id(template_id)
+                )
+        except Exception as e:
+            logger.exception("Error in template overview service get_overview: %s", e)
+            raise
+        
+        template, categories, departments, information, completion_types = parts
+        if template is None:
+            return None
+        return {
+            'template': template,
+            'categories': categories,
+            'departments': departments,
+            'information': information,
+            'completion_types': completion_types
+        }
+    
+    async def _gather(self, template_id):
+        return await asyncio.gather(
+            self.async_templates.get_document_by_id(template_id),
+            self.async_categories.get_by_template_id(template_id),
+            self.async_departments.get_by_template_id(template_id),
+            self.async_information.get_by_template_id(template_id),
+            self.async_completion_types.get_by_template_id(template_id)
+        )
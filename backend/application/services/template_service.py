@@ -1,39 +1,62 @@
 from domain.repositories.template_repository import TemplateRepository
-import traceback
-import sys
+from domain.repositories.template_version_repository import TemplateVersionRepository
+from infrastructure.cache.cache import invalidate
+from infrastructure.events.change_events import publish_change
+import logging
+
+logger = logging.getLogger(__name__)
 
 class TemplateService:
     """Service for template operations."""
     
     def __init__(self):
         self.repository = TemplateRepository()
+        self.versions = TemplateVersionRepository()
+    
+    def _invalidate_reference_data(self):
+        """Drop cached departments and completion types, which embed template titles and links."""
+        invalidate(prefixes=('departments:', 'completion_types:'))
     
-    def get_all_templates(self):
-        """Get all templates."""
+    def get_all_templates(self, aggregated=False, include_related=False):
+        """Get all templates.
+        
+        With aggregated (or include_related) the nested documents are built by
+        a single query in Postgres instead of being assembled row by row.
+        """
         try:
-            templates = self.repository.get_all()
-            print(f"Template service retrieved {len(templates)} templates")
+            if aggregated or include_related:
+                templates = self.repository.get_all_documents(include_related=include_related)
+            else:
+                templates = self.repository.get_all()
+            logger.debug("Template service retrieved %s templates", len(templates))
             return templates
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service get_all_templates at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service get_all_templates: %s", e)
             # Return empty list instead of failing
             return []
     
-    def get_template_by_id(self, template_id):
+    def get_templates_page(self, page, aggregated=False, include_related=False):
+        """Get one keyset page of templates."""
+        try:
+            return self.repository.get_page(page, aggregated, include_related)
+        except Exception as e:
+            logger.exception("Error in template service get_templates_page: %s", e)
+            raise
+    
+    def stream_templates(self, include_related=False):
+        """Stream all templates without building the whole list in memory."""
+        return self.repository.iter_all(include_related)
+    
+    def get_template_by_id(self, template_id, aggregated=False, include_related=False):
         """Get template by ID."""
         try:
-            template = self.repository.get_by_id(template_id)
+            if aggregated or include_related:
+                template = self.repository.get_document_by_id(template_id, include_related=include_related)
+            else:
+                template = self.repository.get_by_id(template_id)
             return template
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service get_template_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service get_template_by_id: %s", e)
             return None
     
     def create_template(self, template_data):
@@ -58,20 +81,18 @@ class TemplateService:
                 
             # Create the template
             template = self.repository.create(template_data)
-            print(f"Created template: {template['title']} with ID {template['id']}")
+            self._invalidate_reference_data()
+            publish_change('template', template['id'], 'create')
+            logger.info("Created template: %s with ID %s", template['title'], template['id'])
             
             # Log color_id if it was set
             if template.get('color_id'):
-                print(f"  Template has color_id: {template['color_id']}")
+                logger.debug("Template has color_id: %s", template['color_id'])
                 
             return template
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service create_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service create_template: %s", e)
             raise
     
     def update_template(self, template_id, template_data):
@@ -96,39 +117,35 @@ class TemplateService:
                 
             # Update the template
             template = self.repository.update(template_id, template_data)
+            self._invalidate_reference_data()
             if template:
-                print(f"Updated template with ID {template['id']}")
+                publish_change('template', template['id'], 'update')
+                logger.info("Updated template with ID %s", template['id'])
                 if 'color_id' in template_data:
-                    print(f"  Updated color_id to: {template_data['color_id']}")
+                    logger.info("Updated color_id to: %s", template_data['color_id'])
             else:
-                print(f"Template with ID {template_id} not found for update")
+                logger.warning("Template with ID %s not found for update", template_id)
                 
             return template
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service update_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service update_template: %s", e)
             raise
     
     def delete_template(self, template_id):
         """Delete a template."""
         try:
             success = self.repository.delete(template_id)
+            self._invalidate_reference_data()
             if success:
-                print(f"Deleted template with ID {template_id}")
+                publish_change('template', template_id, 'delete')
+                logger.info("Deleted template with ID %s", template_id)
             else:
-                print(f"Template with ID {template_id} not found for deletion")
+                logger.warning("Template with ID %s not found for deletion", template_id)
             return success
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service delete_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service delete_template: %s", e)
             raise
     
     def update_template_color(self, template_id, color_id):
@@ -140,18 +157,15 @@ class TemplateService:
                 
             success = self.repository.update_color(template_id, color_id)
             if success:
-                print(f"Updated template {template_id} color to {color_id if color_id else 'None'}")
+                publish_change('template', template_id, 'update')
+                logger.info("Updated template %s color to %s", template_id, color_id if color_id else 'None')
             else:
-                print(f"Failed to update template {template_id} color")
+                logger.warning("Failed to update template %s color", template_id)
                 
             return success
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service update_template_color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service update_template_color: %s", e)
             raise
     
     def remove_template_color(self, template_id):
@@ -159,86 +173,100 @@ class TemplateService:
         try:
             success = self.repository.remove_color(template_id)
             if success:
-                print(f"Removed color from template {template_id}")
+                publish_change('template', template_id, 'update')
+                logger.info("Removed color from template %s", template_id)
             else:
-                print(f"Failed to remove color from template {template_id}")
+                logger.warning("Failed to remove color from template %s", template_id)
                 
             return success
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service remove_template_color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service remove_template_color: %s", e)
             raise
     
     def associate_completion_type(self, template_id, completion_type_id):
         """Associate a completion type with a template."""
         try:
             result = self.repository.associate_completion_type(template_id, completion_type_id)
+            invalidate(prefixes=('completion_types:',))
             if result:
-                print(f"Associated completion type {completion_type_id} with template {template_id}")
+                publish_change('template', template_id, 'associate')
+                logger.info("Associated completion type %s with template %s", completion_type_id, template_id)
             else:
-                print(f"Failed to associate completion type {completion_type_id} with template {template_id}")
+                logger.warning("Failed to associate completion type %s with template %s", completion_type_id, template_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service associate_completion_type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service associate_completion_type: %s", e)
             raise
     
     def remove_completion_type_association(self, template_id, completion_type_id):
         """Remove the association between a template and a completion type."""
         try:
             result = self.repository.remove_completion_type_association(template_id, completion_type_id)
+            invalidate(prefixes=('completion_types:',))
             if result:
-                print(f"Removed association between completion type {completion_type_id} and template {template_id}")
+                publish_change('template', template_id, 'dissociate')
+                logger.info("Removed association between completion type %s and template %s", completion_type_id, template_id)
             else:
-                print(f"Failed to remove association between completion type {completion_type_id} and template {template_id}")
+                logger.warning("Failed to remove association between completion type %s and template %s", completion_type_id, template_id)
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service remove_completion_type_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template service remove_completion_type_association: %s", e)
             raise
     
     def update_template_completion_types(self, template_id, completion_type_ids):
-        """Update all completion type associations for a template."""
+        """Update all completion type associations for a template; returns the updated template or None."""
         try:
-            # First, check if the template exists
-            template = self.repository.get_by_id(template_id)
-            if not template:
-                print(f"Template with ID {template_id} not found")
-                return False
-            
-            # Create update data with bare minimum fields
-            update_data = {
-                'title': template['title'],
-                'content': template['content'],
-                'completion_types': completion_type_ids
-            }
+            if not isinstance(completion_type_ids, list):
+                raise ValueError("completion_type_ids must be a list")
             
-            # Add department_id if it exists in template
-            if template.get('department') and template['department'].get('id'):
-                update_data['department_id'] = template['department']['id']
-            
-            # Add color_id if it exists in template
-            if template.get('color') and template['color'].get('id'):
-                update_data['color_id'] = template['color']['id']
-            
-            # Update the template
-            updated_template = self.repository.update(template_id, update_data)
-            return updated_template is not None
+            template = self.repository.set_completion_types(template_id, completion_type_ids)
+            self._invalidate_reference_data()
+            if template:
+                publish_change('template', template_id, 'associate')
+                logger.info("Template %s now has %s completion types", template_id, len(template['completion_types']))
+            else:
+                logger.warning("Template with ID %s not found", template_id)
+            return template
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template service update_template_completion_types at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
-            raise
\ No newline at end of file
+            logger.exception("Error in template service update_template_completion_types: %s", e)
+            raise
+    
+    def get_template_versions(self, template_id):
+        """Get the versions of a template, newest first, each with its cache key."""
+        try:
+            versions = self.versions.list_versions(template_id)
+            for version in versions:
+                version['key'] = f"{template_id}@{version['version']}"
+            return versions
+        except Exception as e:
+            logger.exception("Error in template service get_template_versions: %s", e)
+            raise
+    
+    def get_template_version(self, template_id, version):
+        """Get one version of a template with its content; version is a number or 'latest'.
+        
+        Returns None if the template or version does not exist. The key
+        (template_id@version) names content that never changes.
+        """
+        if version != 'latest':
+            try:
+                version = int(version)
+            except (TypeError, ValueError):
+                raise ValueError("version must be a positive integer or 'latest'")
+            if version < 1:
+                raise ValueError("version must be a positive integer or 'latest'")
+        
+        try:
+            if version == 'latest':
+                found = self.versions.get_latest(template_id)
+            else:
+                found = self.versions.get_version(template_id, version)
+            if found:
+                found['template_id'] = str(template_id)
+                found['key'] = f"{template_id}@{found['version']}"
+            return found
+        except Exception as e:
+            logger.exception("Error in template service get_template_version: %s", e)
+            raise
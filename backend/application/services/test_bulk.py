@@ -0,0 +1,98 @@
+import pytest
+
+from application.services.bulk import finish_bulk, prepare_bulk
+
+
+def prepare(item):
+    if not isinstance(item, dict) or not item.get('name'):
+        raise ValueError("name is required")
+    item.setdefault('description', None)
+    return item
+
+
+def test_valid_rows_are_prepared_with_their_request_index():
+    payload = {
+        'create': [{'name': 'a'}],
+        'update': [{'id': 7, 'name': 'b'}],
+        'delete': [8, '9']
+    }
+
+    creates, updates, deletes, errors = prepare_bulk(payload, prepare, 10)
+
+    assert creates == [(0, {'name': 'a', 'description': None})]
+    assert updates == [(0, {'id': 7, 'name': 'b', 'description': None})]
+    assert deletes == [(0, 8), (1, '9')]
+    assert errors == []
+
+
+def test_invalid_rows_are_reported_one_by_one():
+    payload = {
+        'create': [{'name': 'a'}, {}, 'text'],
+        'update': [{'name': 'no id'}, {'id': 1, 'name': 'x'}, {'id': 1, 'name': 'y'}, {'id': 2}],
+        'delete': [3, 3, True, '']
+    }
+
+    creates, updates, deletes, errors = prepare_bulk(payload, prepare, 20)
+
+    assert [index for index, _ in creates] == [0]
+    assert [index for index, _ in updates] == [1]
+    assert deletes == [(0, 3)]
+    assert errors == [
+        {'operation': 'create', 'index': 1, 'error': 'name is required'},
+        {'operation': 'create', 'index': 2, 'error': 'name is required'},
+        {'operation': 'update', 'index': 0, 'error': 'id is required'},
+        {'operation': 'update', 'index': 2, 'error': 'Row 1 is updated more than once'},
+        {'operation': 'update', 'index': 3, 'error': 'name is required'},
+        {'operation': 'delete', 'index': 1, 'error': 'Row 3 is deleted more than once'},
+        {'operation': 'delete', 'index': 2, 'error': 'id must be a string or an integer'},
+        {'operation': 'delete', 'index': 3, 'error': 'id must be a string or an integer'},
+    ]
+
+
+def test_prepare_gets_a_copy_of_each_row():
+    row = {'name': 'a'}
+
+    prepare_bulk({'create': [row]}, prepare, 10)
+
+    assert row == {'name': 'a'}
+
+
+@pytest.mark.parametrize('payload, message', [
+    ([], 'must be an object'),
+    ({'upsert': []}, 'Unknown bulk operations: upsert'),
+    ({'create': {}}, "'create' must be a list"),
+    ({'create': []}, 'no rows'),
+    ({'delete': [1, 2, 3]}, '3 rows, the limit is 2'),
+])
+def test_malformed_requests_are_rejected_as_a_whole(payload, message):
+    with pytest.raises(ValueError, match=message):
+        prepare_bulk(payload, prepare, 2)
+
+
+def test_finish_merges_validation_and_database_errors_in_request_order():
+    validation_errors = [
+        {'operation': 'delete', 'index': 0, 'error': 'id must be a string or an integer'},
+        {'operation': 'create', 'index': 2, 'error': 'name is required'},
+    ]
+    result = {
+        'created': [{'id': 1}], 'updated': [], 'deleted': [], 'committed': True,
+        'errors': [
+            {'operation': 'update', 'index': 0, 'error': 'Row 5 not found'},
+            {'operation': 'create', 'index': 0, 'error': 'template_id 9 does not exist'},
+        ]
+    }
+
+    merged = finish_bulk(validation_errors, result)
+
+    assert [(e['operation'], e['index']) for e in merged['errors']] == [
+        ('create', 0), ('create', 2), ('update', 0), ('delete', 0)
+    ]
+    assert merged['committed'] is True
+
+
+def test_finish_without_a_write_reports_nothing_committed():
+    errors = [{'operation': 'create', 'index': 0, 'error': 'name is required'}]
+
+    assert finish_bulk(errors) == {
+        'created': [], 'updated': [], 'deleted': [], 'errors': errors, 'committed': False
+    }
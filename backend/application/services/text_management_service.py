@@ -1,6 +1,10 @@
+from application.services.bulk import finish_bulk, prepare_bulk, publish_bulk
 from domain.repositories.text_management_repository import TextManagementRepository
-import traceback
-import sys
+from infrastructure.config.config import get_settings
+from infrastructure.events.change_events import publish_change
+import logging
+
+logger = logging.getLogger(__name__)
 
 class TextManagementService:
     def __init__(self):
@@ -10,94 +14,78 @@ class TextManagementService:
         """Get all text variables."""
         try:
             variables = self.repository.get_all_variables()
-            print(f"Retrieved {len(variables)} variables")
+            logger.debug("Retrieved %s variables", len(variables))
             return variables
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in text management service get_all_variables at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in text management service get_all_variables: %s", e)
             return []
     
+    def get_variables_page(self, page):
+        """Get one keyset page of text variables."""
+        try:
+            return self.repository.get_variables_page(page)
+        except Exception as e:
+            logger.exception("Error in text management service get_variables_page: %s", e)
+            raise
+    
+    def stream_variables(self):
+        """Stream all text variables without building the whole list in memory."""
+        return self.repository.iter_variables()
+    
     def get_variable_by_id(self, variable_id):
         """Get a variable by ID."""
         try:
             variable = self.repository.get_variable_by_id(variable_id)
             return variable
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in text management service get_variable_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in text management service get_variable_by_id: %s", e)
             return None
     
+    def _prepare(self, variable_data):
+        """Validate a variable and fill in defaults; returns a copy."""
+        if not variable_data or not isinstance(variable_data, dict):
+            raise ValueError("Invalid variable data format")
+        
+        if 'namn' not in variable_data or not variable_data['namn']:
+            raise ValueError("Variable name (namn) is required")
+        
+        # Säkerställ att alla nödvändiga fält finns
+        variable_data = dict(variable_data)
+        variable_data.setdefault('beskrivning', '')
+        variable_data.setdefault('variabel_namn', f"${variable_data['namn']}$")
+        variable_data.setdefault('comments', False)
+        
+        return variable_data
+    
     def create_variable(self, variable_data):
         """Create a new variable."""
         try:
-            # Validera data
-            if not variable_data or not isinstance(variable_data, dict):
-                raise ValueError("Invalid variable data format")
-            
-            if 'namn' not in variable_data or not variable_data['namn']:
-                raise ValueError("Variable name (namn) is required")
-            
-            # Säkerställ att alla nödvändiga fält finns
-            if 'beskrivning' not in variable_data:
-                variable_data['beskrivning'] = ''
-                
-            if 'variabel_namn' not in variable_data:
-                variable_data['variabel_namn'] = f"${variable_data['namn']}$"
-                
-            if 'comments' not in variable_data:
-                variable_data['comments'] = False
+            variable_data = self._prepare(variable_data)
             
             variable = self.repository.create_variable(variable_data)
-            print(f"Created variable: {variable['namn']} with ID {variable['id']}")
+            publish_change('variable', variable['id'], 'create')
+            logger.info("Created variable: %s with ID %s", variable['namn'], variable['id'])
             return variable
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in text management service create_variable at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in text management service create_variable: %s", e)
             raise
     
     def update_variable(self, variable_id, variable_data):
         """Update a variable."""
         try:
-            # Validera data
-            if not variable_data or not isinstance(variable_data, dict):
-                raise ValueError("Invalid variable data format")
-            
-            if 'namn' not in variable_data or not variable_data['namn']:
-                raise ValueError("Variable name (namn) is required")
-            
-            # Säkerställ att alla nödvändiga fält finns
-            if 'beskrivning' not in variable_data:
-                variable_data['beskrivning'] = ''
-                
-            if 'variabel_namn' not in variable_data:
-                variable_data['variabel_namn'] = f"${variable_data['namn']}$"
-                
-            if 'comments' not in variable_data:
-                variable_data['comments'] = False
+            variable_data = self._prepare(variable_data)
             
             variable = self.repository.update_variable(variable_id, variable_data)
             
             if variable:
-                print(f"Updated variable with ID {variable['id']}")
+                publish_change('variable', variable['id'], 'update')
+                logger.info("Updated variable with ID %s", variable['id'])
             else:
-                print(f"Variable with ID {variable_id} not found for update")
+                logger.warning("Variable with ID %s not found for update", variable_id)
                 
             return variable
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in text management service update_variable at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in text management service update_variable: %s", e)
             raise
     
     def delete_variable(self, variable_id):
@@ -105,16 +93,13 @@ class TextManagementService:
         try:
             success = self.repository.delete_variable(variable_id)
             if success:
-                print(f"Deleted variable with ID {variable_id}")
+                publish_change('variable', variable_id, 'delete')
+                logger.info("Deleted variable with ID %s", variable_id)
             else:
-                print(f"Variable with ID {variable_id} not found for deletion")
+                logger.warning("Variable with ID %s not found for deletion", variable_id)
             return success
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in text management service delete_variable at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in text management service delete_variable: %s", e)
             raise
             
     def update_variable_comments(self, variable_id, comments_status):
@@ -123,7 +108,7 @@ class TextManagementService:
             # Hämta befintlig variabel
             existing_variable = self.repository.get_variable_by_id(variable_id)
             if not existing_variable:
-                print(f"Variable with ID {variable_id} not found for comments update")
+                logger.warning("Variable with ID %s not found for comments update", variable_id)
                 return None
             
             # Uppdatera endast comments-fältet
@@ -137,14 +122,32 @@ class TextManagementService:
             variable = self.repository.update_variable(variable_id, update_data)
             
             if variable:
-                print(f"Updated comments status for variable with ID {variable['id']} to {comments_status}")
+                publish_change('variable', variable['id'], 'update')
+                logger.info("Updated comments status for variable with ID %s to %s", variable['id'], comments_status)
             
             return variable
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in text management service update_variable_comments at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
-            raise
\ No newline at end of file
+            logger.exception("Error in text management service update_variable_comments: %s", e)
+            raise
+    
+    def bulk_variables(self, payload, atomic=False):
+        """Create, update and delete many variables in one transaction.
+        
+        Rows are validated like single writes; invalid rows are reported per
+        row and the rest are written, unless atomic is set, in which case
+        nothing is written if any row fails.
+        """
+        try:
+            creates, updates, deletes, errors = prepare_bulk(payload, self._prepare, get_settings()['BULK_MAX_ROWS'])
+            if atomic and errors:
+                return finish_bulk(errors)
+            
+            result = finish_bulk(errors, self.repository.bulk_write_variables(creates, updates, deletes, atomic=atomic))
+            publish_bulk('variable', result)
+            logger.info("Bulk variables: %s created, %s updated, %s deleted, %s errors",
+                        len(result['created']), len(result['updated']), len(result['deleted']), len(result['errors']))
+            return result
+        except Exception as e:
+            logger.exception("Error in text management service bulk_variables: %s", e)
+            raise
@@ -0,0 +1,102 @@
+"""Compare latency under concurrency of the sync and async repository stacks.
+
+Loads the overview of one template (five independent reads) at increasing
+concurrency. The sync stack runs each overview on a thread with psycopg2,
+one read after another; the async stack runs them as coroutines on the
+asyncpg pool, with the five reads of an overview in parallel. Both pools get
+the same number of connections. Needs the asyncpg package and a database
+with at least one template; nothing is written.
+
+    python benchmarks/async_vs_sync.py --concurrency 1 4 16 64 --requests 400 --pool-size 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': statistics.median(latencies) * 1000,
+        'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000
+    }
+
+def run_sync(service, template_id, concurrency, requests):
+    def one(_):
+        started = time.perf_counter()
+        service.get_overview(template_id, use_async=False)
+        return time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        latencies = list(executor.map(one, range(requests)))
+        return summarize(latencies, time.perf_counter() - started)
+
+async def run_async_level(service, template_id, concurrency, requests):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await service._gather(template_id)
+            return time.perf_counter() - started
+
+    started = time.perf_counter()
+    latencies = await asyncio.gather(*(one() for _ in range(requests)))
+    return summarize(latencies, time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--requests', type=int, default=400, help='overviews loaded per concurrency level')
+    parser.add_argument('--pool-size', type=int, default=10, help='connections in each pool')
+    parser.add_argument('--template-id', help='template to load (default: the first one)')
+    args = parser.parse_args()
+
+    # Size both pools before the settings are first read
+    os.environ['DB_POOL_MAX_SIZE'] = str(args.pool_size)
+    os.environ['ASYNC_DB_POOL_MAX_SIZE'] = str(args.pool_size)
+
+    from application.services.template_overview_service import TemplateOverviewService
+    from infrastructure.database.async_connection import async_db_available, close_async_pool, run_async
+    from infrastructure.database.connection import close_pool, db_connection
+
+    if not async_db_available():
+        sys.exit("asyncpg is not installed (pip install asyncpg)")
+
+    template_id = args.template_id
+    if template_id is None:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM templates ORDER BY id LIMIT 1")
+            row = cursor.fetchone()
+            cursor.close()
+        if row is None:
+            sys.exit("No templates in the database")
+        template_id = row['id']
+
+    service = TemplateOverviewService()
+    # Warm both pools and the statement caches
+    service.get_overview(template_id, use_async=False)
+    service.get_overview(template_id, use_async=True)
+
+    print(f"{'concurrency':>11} {'sync req/s':>11} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'async req/s':>12} {'p50 ms':>8} {'p95 ms':>8}")
+    try:
+        for concurrency in args.concurrency:
+            sync = run_sync(service, template_id, concurrency, args.requests)
+            async_ = run_async(run_async_level(service, template_id, concurrency, args.requests))
+            print(f"{concurrency:>11} {sync['rps']:>11.0f} {sync['p50']:>8.2f} {sync['p95']:>8.2f} "
+                  f"{async_['rps']:>12.0f} {async_['p50']:>8.2f} {async_['p95']:>8.2f}")
+    finally:
+        close_async_pool()
+        close_pool()
+
+if __name__ == '__main__':
+    main()
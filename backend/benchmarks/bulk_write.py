@@ -0,0 +1,98 @@
+"""Compare rows/sec of per-row writes against the bulk write path.
+
+Creates, renames and deletes information items in the configured database,
+once through InformationService.create_information() / update_information() /
+delete_information() (a connection and a commit per row, like one POST per
+row) and once through InformationService.bulk_information() (one
+transaction). Rows are marked by name and removed afterwards.
+
+    python benchmarks/bulk_write.py --rows 100 1000 5000 --allow-writes
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from application.services.information_service import InformationService
+from infrastructure.database.connection import close_pool, db_connection
+
+MARKER = '__bench_bulk_write__'
+
+def rows(count, suffix=''):
+    return [
+        {'name': f"{MARKER}{i}{suffix}", 'label': 'bench', 'description': 'seeded', 'comments': False}
+        for i in range(count)
+    ]
+
+def per_row(service, count):
+    """Create, update and delete count rows one call at a time; returns seconds per phase."""
+    timings = {}
+    started = time.perf_counter()
+    created = [service.create_information(row) for row in rows(count)]
+    timings['create'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for item, row in zip(created, rows(count, '-renamed')):
+        service.update_information(item['id'], row)
+    timings['update'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for item in created:
+        service.delete_information(item['id'])
+    timings['delete'] = time.perf_counter() - started
+    return timings
+
+def bulk(service, count):
+    """Create, update and delete count rows with one bulk request per phase."""
+    timings = {}
+    started = time.perf_counter()
+    created = service.bulk_information({'create': rows(count)})['created']
+    timings['create'] = time.perf_counter() - started
+
+    updates = [dict(row, id=item['id']) for item, row in zip(created, rows(count, '-renamed'))]
+    started = time.perf_counter()
+    service.bulk_information({'update': updates})
+    timings['update'] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    service.bulk_information({'delete': [item['id'] for item in created]})
+    timings['delete'] = time.perf_counter() - started
+    return timings
+
+def cleanup():
+    """Remove rows a failed run left behind."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM information WHERE name LIKE %s", (MARKER + '%',))
+        cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--allow-writes', action='store_true',
+                        help='required: the benchmark inserts, updates and deletes rows')
+    args = parser.parse_args()
+
+    if not args.allow_writes:
+        parser.error('this benchmark writes to the configured database; pass --allow-writes')
+
+    # Let the largest size through in a single bulk request
+    os.environ['BULK_MAX_ROWS'] = str(max(args.rows))
+
+    service = InformationService()
+    print(f"{'rows':>6} {'phase':>7} {'per-row rows/s':>15} {'bulk rows/s':>12} {'speedup':>8}")
+    try:
+        for count in args.rows:
+            single = per_row(service, count)
+            batched = bulk(service, count)
+            for phase in ('create', 'update', 'delete'):
+                print(f"{count:>6} {phase:>7} {count / single[phase]:>15.0f} "
+                      f"{count / batched[phase]:>12.0f} {single[phase] / batched[phase]:>7.1f}x")
+    finally:
+        cleanup()
+        close_pool()
+
+if __name__ == '__main__':
+    main()
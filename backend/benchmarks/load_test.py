@@ -0,0 +1,163 @@
+"""Measure request throughput of the gunicorn deployment at several worker counts.
+
+Starts gunicorn with gunicorn.conf.py once per worker count, drives it with
+keep-alive HTTP clients spread over several processes (so the load generator
+is not limited by one GIL) and prints requests per second and latency
+percentiles. The default paths need no database; add read endpoints such as
+/api/templates to include it. Only GET requests are sent.
+
+    python benchmarks/load_test.py --workers 1 2 4 8 --threads 4 --duration 15
+    python benchmarks/load_test.py --url http://localhost:5000 --paths /api/templates
+
+Run it on the machine being measured, with the load generator's cores in
+mind: on a 4-core box the clients compete with 4 workers for the same CPUs.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def client_process(url, paths, connections, duration):
+    """Run keep-alive request loops on several threads; returns (latencies, errors)."""
+    target = urllib.parse.urlsplit(url)
+    deadline = time.perf_counter() + duration
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+
+    def loop(offset):
+        conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        own = []
+        own_errors = 0
+        index = offset
+        while time.perf_counter() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                conn.request('GET', path)
+                response = conn.getresponse()
+                response.read()
+                if response.status >= 500:
+                    own_errors += 1
+                else:
+                    own.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                own_errors += 1
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        conn.close()
+        with lock:
+            latencies.extend(own)
+            errors[0] += own_errors
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0]
+
+def run_load(url, paths, clients, connections, duration):
+    with multiprocessing.get_context('spawn').Pool(clients) as pool:
+        started = time.perf_counter()
+        results = pool.starmap(client_process, [(url, paths, connections, duration)] * clients)
+        elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency for result in results for latency in result[0])
+    errors = sum(result[1] for result in results)
+    if not latencies:
+        return {'rps': 0.0, 'p50': 0.0, 'p95': 0.0, 'p99': 0.0, 'errors': errors}
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        'rps': len(latencies) / min(elapsed, duration),
+        'p50': statistics.median(latencies) * 1000,
+        'p95': percentile(0.95),
+        'p99': percentile(0.99),
+        'errors': errors
+    }
+
+def wait_until_up(url, timeout=60):
+    target = urllib.parse.urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(target.hostname, target.port, timeout=2)
+            conn.request('GET', '/api/health/live')
+            if conn.getresponse().status == 200:
+                return True
+        except OSError:
+            pass
+        time.sleep(0.5)
+    return False
+
+def start_server(port, workers, threads):
+    env = dict(os.environ, PORT=str(port), GUNICORN_WORKERS=str(workers), GUNICORN_THREADS=str(threads),
+               LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'))
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+def stop_server(server):
+    # SIGTERM is a graceful shutdown: workers finish running requests first
+    server.send_signal(signal.SIGTERM)
+    try:
+        server.wait(timeout=60)
+    except subprocess.TimeoutExpired:
+        server.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help='Load an already running server instead of starting gunicorn')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4],
+                        help='gunicorn worker counts to compare')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn threads per worker')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--paths', nargs='+', default=['/api/health/live', '/api/health', '/metrics'])
+    parser.add_argument('--clients', type=int, default=max(1, os.cpu_count() or 1),
+                        help='load generator processes')
+    parser.add_argument('--connections', type=int, default=8, help='keep-alive connections per client process')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of load per run')
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+
+    def report(label, result):
+        print(f"{label:>8} {result['rps']:>10.0f} {result['p50']:>8.2f} {result['p95']:>8.2f} "
+              f"{result['p99']:>8.2f} {result['errors']:>7}")
+
+    if args.url:
+        report('-', run_load(args.url, args.paths, args.clients, args.connections, args.duration))
+        return
+
+    url = f"http://127.0.0.1:{args.port}"
+    baseline = None
+    for workers in args.workers:
+        server = start_server(args.port, workers, args.threads)
+        try:
+            if not wait_until_up(url):
+                print(f"{workers:>8} gunicorn did not come up")
+                continue
+            result = run_load(url, args.paths, args.clients, args.connections, args.duration)
+        finally:
+            stop_server(server)
+        report(workers, result)
+        baseline = baseline or result['rps']
+        if baseline:
+            print(f"{'':>8} {result['rps'] / baseline:>9.2f}x of {args.workers[0]} worker(s)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Measure prompt rendering throughput on one core.
+
+Compares the compiled single-pass renderer with substituting each variable
+through str.replace, which is what the browser did. No database is used.
+
+    python benchmarks/render_throughput.py --variables 10 --size 2000 --renders 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.rendering.compiler import compile_template
+
+def build_content(variables, size):
+    """Template text of roughly size characters using each variable twice."""
+    names = [f"variabel_{i}" for i in range(variables)]
+    words = []
+    length = 0
+    index = 0
+    while length < size:
+        word = f"${names[index % variables]}$" if index % 8 == 0 else "text"
+        words.append(word)
+        length += len(word) + 1
+        index += 1
+    return ' '.join(words), names
+
+def replace_render(content, values):
+    for name, value in values.items():
+        content = content.replace(f"${name}$", value)
+    return content
+
+def throughput(fn, renders):
+    started = time.perf_counter()
+    for _ in range(renders):
+        fn()
+    return renders / (time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--variables', type=int, default=10)
+    parser.add_argument('--size', type=int, default=2000, help='template length in characters')
+    parser.add_argument('--renders', type=int, default=100000)
+    args = parser.parse_args()
+
+    content, names = build_content(args.variables, args.size)
+    values = {name: f"värde {name}" for name in names}
+
+    compiled = compile_template(content)
+    expected = replace_render(content, values)
+    if compiled.render(values)[0] != expected:
+        raise SystemExit('compiled and str.replace output differ')
+
+    compiled_rate = throughput(lambda: compiled.render(values), args.renders)
+    replace_rate = throughput(lambda: replace_render(content, values), args.renders)
+    compile_rate = throughput(lambda: compile_template(content), max(args.renders // 10, 1))
+
+    print(f"template: {len(content)} chars, {len(compiled.names)} placeholders, {len(names)} variables")
+    print(f"{'compiled render':<18} {compiled_rate:>12,.0f} renders/s")
+    print(f"{'str.replace':<18} {replace_rate:>12,.0f} renders/s")
+    print(f"{'compile':<18} {compile_rate:>12,.0f} compiles/s")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Measure how fast query rows are turned into API dicts.
+
+Compares the compiled RowMapper on tuple rows (what list reads now fetch)
+and on dict rows (RealDictCursor, asyncpg) with the per-row mapping the
+repositories used before, which checked hasattr(row, 'keys') and called
+isoformat() on every row. The "fetch +" variants also build the rows the
+way each cursor does, since RealDictCursor assembles every RealDictRow
+column by column in Python. Rows have the shape of the category list
+query. No database is used.
+
+    python benchmarks/row_mapping.py --rows 100000 --repeat 5
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+from collections import namedtuple
+
+from psycopg2.extras import RealDictRow
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.repositories.category_repository import CategoryRepository
+
+Column = namedtuple('Column', 'name type_code')
+
+# Column names and type OIDs of CategoryRepository.LIST_QUERY
+DESCRIPTION = (
+    Column('id', 2950), Column('name', 25), Column('description', 25),
+    Column('created_at', 1184), Column('template_id', 2950), Column('template_title', 25)
+)
+
+def build_rows(count):
+    created = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    rows = []
+    for i in range(count):
+        template = i % 3 != 0
+        rows.append((
+            f"00000000-0000-0000-0000-{i:012d}", f"Kategori {i}", 'Beskrivning' if i % 2 else None,
+            created + datetime.timedelta(seconds=i),
+            f"10000000-0000-0000-0000-{i % 50:012d}" if template else None,
+            f"Mall {i % 50}" if template else None
+        ))
+    return rows
+
+def real_dict_rows(tuples, description):
+    """Build RealDictRows the way RealDictCursor does while fetching."""
+    mapping = [column.name for column in description]
+    rows = []
+    for values in tuples:
+        row = RealDictRow()
+        row[RealDictRow] = mapping
+        for index, value in enumerate(values):
+            row[index] = value
+        rows.append(row)
+    return rows
+
+def legacy_map(row):
+    """The per-row mapping the category repository had before RowMapper."""
+    if hasattr(row, 'keys'):
+        category = {
+            'id': row['id'],
+            'name': row['name'],
+            'description': row['description'],
+            'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+            'template_id': row['template_id']
+        }
+        if row['template_id']:
+            category['template'] = {'id': row['template_id'], 'title': row['template_title']}
+        else:
+            category['template'] = None
+        return category
+    category = {
+        'id': row[0],
+        'name': row[1],
+        'description': row[2],
+        'created_at': row[3].isoformat() if row[3] else None,
+        'template_id': row[4]
+    }
+    category['template'] = {'id': row[4], 'title': row[5]} if row[4] else None
+    return category
+
+def best_rate(fn, rows, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return rows / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per variant; the best is reported')
+    args = parser.parse_args()
+
+    mapper = CategoryRepository.LIST_ROW
+    tuples = build_rows(args.rows)
+    dicts = real_dict_rows(tuples, DESCRIPTION)
+
+    expected = [legacy_map(row) for row in dicts]
+    if mapper.map_rows(tuples, DESCRIPTION) != expected or mapper.map_rows(dicts) != expected:
+        raise SystemExit('RowMapper and legacy mapping output differ')
+
+    variants = [
+        ('legacy, dict rows', lambda: [legacy_map(row) for row in dicts]),
+        ('legacy, tuples', lambda: [legacy_map(row) for row in tuples]),
+        ('RowMapper, dicts', lambda: mapper.map_rows(dicts)),
+        ('RowMapper, tuples', lambda: mapper.map_rows(tuples, DESCRIPTION)),
+        ('fetch + legacy, dicts', lambda: [legacy_map(row) for row in real_dict_rows(tuples, DESCRIPTION)]),
+        ('fetch + RowMapper, tuples', lambda: mapper.map_rows(list(tuples), DESCRIPTION)),
+    ]
+    print(f"rows: {args.rows:,}, best of {args.repeat}")
+    for label, fn in variants:
+        print(f"{label:<26} {best_rate(fn, args.rows, args.repeat):>12,.0f} rows/s")
+
+if __name__ == '__main__':
+    main()
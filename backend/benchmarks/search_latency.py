@@ -0,0 +1,114 @@
+"""Measure /api/search latency on a synthetic corpus.
+
+With --backend memory (the default) the in-memory inverted index is built
+from generated documents and no database is used. With --backend postgres
+the documents are seeded as information rows into the configured database,
+which must have the search migration applied (its triggers fill
+search_documents); the seeded rows are removed afterwards.
+
+    python benchmarks/search_latency.py --documents 100000
+    python benchmarks/search_latency.py --backend postgres --documents 100000 --allow-writes
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.search.inverted_index import InvertedIndex, SearchDocument
+
+MARKER = '__bench_search__'
+
+WORDS = (
+    'patient', 'journal', 'remiss', 'behandling', 'läkemedel', 'uppföljning', 'provsvar', 'diagnos',
+    'vårdplan', 'anamnes', 'status', 'bedömning', 'åtgärd', 'sjuksköterska', 'mottagning', 'besök',
+    'referral', 'treatment', 'medication', 'follow', 'results', 'assessment', 'discharge', 'summary',
+    'allergi', 'blodtryck', 'puls', 'temperatur', 'smärta', 'rehabilitering', 'kontroll', 'recept'
+)
+
+# Exact, multi-word, English, misspelled and rare-word queries
+QUERIES = ('remiss', 'läkemedel uppföljning', 'discharge summary', 'rehabilitrering', 'blodtryk', 'ord123')
+
+def build_documents(count, seed=1):
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        title = ' '.join(rng.choices(WORDS, k=3)) + f" ord{i % 1000}"
+        body = ' '.join(rng.choices(WORDS, k=40))
+        documents.append(SearchDocument('information', str(i), title, body))
+    return documents
+
+def latencies(fn, queries, repeat):
+    """Median and 95th percentile in ms per query."""
+    results = {}
+    for query in queries:
+        durations = []
+        hits = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hits = fn(query)
+            durations.append((time.perf_counter() - started) * 1000)
+        durations.sort()
+        results[query] = (statistics.median(durations), durations[int(len(durations) * 0.95) - 1], hits)
+    return results
+
+def run_memory(args):
+    documents = build_documents(args.documents)
+    started = time.perf_counter()
+    index = InvertedIndex(documents)
+    print(f"index of {len(index):,} documents built in {(time.perf_counter() - started) * 1000:.0f} ms")
+    return latencies(lambda query: len(index.search(query, limit=args.limit)), QUERIES, args.repeat)
+
+def run_postgres(args):
+    from domain.repositories.search_repository import SearchRepository
+    from infrastructure.database.connection import db_connection
+
+    documents = build_documents(args.documents)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM information WHERE name LIKE %s", (MARKER + '%',))
+        cursor.executemany(
+            "INSERT INTO information (name, label, description) VALUES (%s, %s, %s)",
+            [(f"{MARKER}{document.id}", document.title, document.body) for document in documents]
+        )
+        cursor.execute("ANALYZE search_documents")
+        cursor.close()
+
+    try:
+        repository = SearchRepository()
+        return latencies(
+            lambda query: len(repository.search(query, repository.ENTITIES, args.limit)),
+            QUERIES, args.repeat
+        )
+    finally:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("DELETE FROM information WHERE name LIKE %s", (MARKER + '%',))
+            cursor.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--backend', choices=('memory', 'postgres'), default='memory')
+    parser.add_argument('--documents', type=int, default=100000)
+    parser.add_argument('--limit', type=int, default=20, help='hits per page')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--allow-writes', action='store_true',
+                        help='required for --backend postgres, which seeds and deletes rows')
+    args = parser.parse_args()
+
+    if args.backend == 'postgres':
+        if not args.allow_writes:
+            raise SystemExit('--backend postgres writes to the configured database; pass --allow-writes')
+        results = run_postgres(args)
+    else:
+        results = run_memory(args)
+
+    print(f"{'query':<24} {'median ms':>10} {'p95 ms':>10} {'hits':>6}")
+    for query, (median, p95, hits) in results.items():
+        print(f"{query:<24} {median:>10.2f} {p95:>10.2f} {hits:>6}")
+
+if __name__ == '__main__':
+    main()
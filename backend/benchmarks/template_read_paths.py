@@ -0,0 +1,116 @@
+"""Compare the row-by-row and the single-query template read paths.
+
+Seeds templates (with a department, a color and completion types) into the
+configured database, times TemplateRepository.get_all() against
+get_all_documents() at each size, checks that both return the same data and
+removes the seeded rows afterwards.
+
+    python benchmarks/template_read_paths.py --sizes 1000 10000 100000 --allow-writes
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domain.repositories.template_repository import TemplateRepository
+from infrastructure.database.connection import db_connection
+
+MARKER = '__bench_template_read__'
+
+def seed(target):
+    """Grow the seeded template set to target rows."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT count(*) AS n FROM templates WHERE title LIKE %s", (MARKER + '%',))
+        existing = cursor.fetchone()['n']
+        if existing >= target:
+            return
+
+        cursor.execute("SELECT id FROM departments WHERE name = %s", (MARKER,))
+        row = cursor.fetchone()
+        if row:
+            department_id = row['id']
+        else:
+            cursor.execute("INSERT INTO departments (name) VALUES (%s) RETURNING id", (MARKER,))
+            department_id = cursor.fetchone()['id']
+
+        cursor.execute("SELECT id FROM colors WHERE name = %s", (MARKER,))
+        row = cursor.fetchone()
+        if row:
+            color_id = row['id']
+        else:
+            cursor.execute("INSERT INTO colors (name, hex_value) VALUES (%s, '#000000') RETURNING id", (MARKER,))
+            color_id = cursor.fetchone()['id']
+
+        cursor.execute("""
+            WITH new_templates AS (
+                INSERT INTO templates (title, content, department_id, color_id)
+                SELECT %s || g, repeat('Hej $namn$, ', 20), %s, %s
+                FROM generate_series(%s, %s) AS g
+                RETURNING id
+            )
+            INSERT INTO completion_types (name, description, template_id)
+            SELECT %s, 'seeded', id FROM new_templates, generate_series(1, 2)
+        """, (MARKER, department_id, color_id, existing + 1, target, MARKER))
+        cursor.close()
+
+def cleanup():
+    """Remove everything seed() created."""
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM completion_types WHERE name = %s", (MARKER,))
+        cursor.execute("DELETE FROM templates WHERE title LIKE %s", (MARKER + '%',))
+        cursor.execute("DELETE FROM departments WHERE name = %s", (MARKER,))
+        cursor.execute("DELETE FROM colors WHERE name = %s", (MARKER,))
+        cursor.close()
+
+def timed(fn, repeat):
+    """Run fn repeat times and return the median duration in ms and the last result."""
+    durations = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations), result
+
+def normalized(templates):
+    """Sort templates and their completion types so both paths can be compared."""
+    docs = []
+    for template in sorted(templates, key=lambda t: t['id']):
+        template = dict(template)
+        template['completion_types'] = sorted(template['completion_types'], key=lambda ct: ct['id'])
+        docs.append(template)
+    return docs
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--allow-writes', action='store_true',
+                        help='required: the benchmark inserts and deletes rows')
+    parser.add_argument('--keep', action='store_true', help='keep the seeded rows')
+    args = parser.parse_args()
+
+    if not args.allow_writes:
+        parser.error('this benchmark writes to the configured database; pass --allow-writes')
+
+    repository = TemplateRepository()
+    print(f"{'templates':>10} {'get_all ms':>12} {'documents ms':>14} {'speedup':>8}  same")
+    try:
+        for size in sorted(args.sizes):
+            seed(size)
+            legacy_ms, legacy = timed(repository.get_all, args.repeat)
+            aggregated_ms, aggregated = timed(repository.get_all_documents, args.repeat)
+            same = normalized(legacy) == normalized(aggregated)
+            print(f"{len(legacy):>10} {legacy_ms:>12.1f} {aggregated_ms:>14.1f} "
+                  f"{legacy_ms / aggregated_ms:>7.2f}x  {same}")
+    finally:
+        if not args.keep:
+            cleanup()
+
+if __name__ == '__main__':
+    main()
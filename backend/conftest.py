@@ -0,0 +1,9 @@
+"""pytest setup for the backend's unit tests, which sit next to the code they cover."""
+import os
+import sys
+
+# Tests import the packages from this directory, as the app does
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Scripts that are run by hand, not tests
+collect_ignore = ['simple_cors_test.py', 'benchmarks']
@@ -0,0 +1,155 @@
+from collections import OrderedDict
+import re
+import threading
+
+# Variables are written $namn$ (see TextManagementService.create_variable). A
+# name starts with a letter or underscore, so amounts like "$5 och $10" are
+# left alone.
+VARIABLE_PATTERN = re.compile(r'\$([^\W\d][\w\- ]{0,63}?)\$')
+
+# How render() handles variables that have no value
+MISSING_KEEP = 'keep'
+MISSING_EMPTY = 'empty'
+MISSING_ERROR = 'error'
+MISSING_POLICIES = (MISSING_KEEP, MISSING_EMPTY, MISSING_ERROR)
+
+class MissingVariablesError(ValueError):
+    """Raised by render() with the error policy when variables have no value."""
+
+    def __init__(self, names):
+        super().__init__(f"Missing values for variables: {', '.join(names)}")
+        self.names = names
+
+class CompiledTemplate:
+    """Template content split once into literal text and variable names.
+
+    literals always has one more item than names; rendering interleaves them,
+    so each render is a single pass with one dict lookup per variable.
+    """
+
+    __slots__ = ('literals', 'names', 'variables')
+
+    def __init__(self, literals, names):
+        self.literals = literals
+        self.names = names
+        self.variables = tuple(dict.fromkeys(names))
+
+    def render(self, values, missing=MISSING_KEEP):
+        """Substitute values and return (text, names of missing variables)."""
+        literals = self.literals
+        parts = [literals[0]]
+        absent = None
+        for index, name in enumerate(self.names, 1):
+            value = values.get(name)
+            if value is None:
+                if absent is None:
+                    absent = []
+                if name not in absent:
+                    absent.append(name)
+                value = f"${name}$" if missing == MISSING_KEEP else ''
+            elif not isinstance(value, str):
+                value = str(value)
+            parts.append(value)
+            parts.append(literals[index])
+
+        if absent and missing == MISSING_ERROR:
+            raise MissingVariablesError(absent)
+        return ''.join(parts), absent or []
+
+def compile_template(content):
+    """Split template content into a CompiledTemplate."""
+    literals = []
+    names = []
+    position = 0
+    for match in VARIABLE_PATTERN.finditer(content or ''):
+        literals.append(content[position:match.start()])
+        names.append(match.group(1))
+        position = match.end()
+    literals.append((content or '')[position:])
+    return CompiledTemplate(tuple(literals), tuple(names))
+
+def normalize_values(values):
+    """Accept variable maps keyed by either namn or $namn$."""
+    normalized = {}
+    for key, value in values.items():
+        key = str(key)
+        if len(key) > 1 and key.startswith('$') and key.endswith('$'):
+            key = key[1:-1]
+        normalized[key] = value
+    return normalized
+
+def render_many(compiled, indexed_values, missing=MISSING_KEEP):
+    """Render (index, values) pairs into result dicts for a batch.
+
+    Module level so it can run in a worker process. A value that is an
+    exception (e.g. a line that was not valid JSON) becomes an error result,
+    so one bad item does not stop the batch.
+    """
+    results = []
+    for index, values in indexed_values:
+        if isinstance(values, Exception):
+            results.append({'index': index, 'error': str(values)})
+            continue
+        if not isinstance(values, dict):
+            results.append({'index': index, 'error': 'Each item must be an object of variable values'})
+            continue
+        try:
+            content, missing_variables = compiled.render(normalize_values(values), missing)
+            results.append({'index': index, 'content': content, 'missing_variables': missing_variables})
+        except MissingVariablesError as e:
+            results.append({'index': index, 'error': str(e), 'missing_variables': e.names})
+    return results
+
+class CompiledTemplateCache:
+    """LRU cache of compiled templates keyed by (template_id, updated_at).
+
+    Only the latest version of a template is kept: a newer updated_at
+    replaces the entry for that template.
+    """
+
+    def __init__(self, max_entries=1024):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def known_version(self, template_id):
+        """updated_at of the cached compiled template, or None."""
+        with self._lock:
+            entry = self._entries.get(template_id)
+            return entry[0] if entry else None
+
+    def resolve(self, template_id, updated_at, content):
+        """Return the compiled template for this version.
+
+        content is None when the database confirmed that the cached version
+        is current; None is returned if that entry has been evicted meanwhile.
+        """
+        if content is None:
+            with self._lock:
+                entry = self._entries.get(template_id)
+                if entry is not None and entry[0] == updated_at:
+                    self._entries.move_to_end(template_id)
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+            return None
+
+        compiled = compile_template(content)
+        with self._lock:
+            self.misses += 1
+            self._entries[template_id] = (updated_at, compiled)
+            self._entries.move_to_end(template_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def stats(self):
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
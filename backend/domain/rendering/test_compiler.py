@@ -0,0 +1,76 @@
+import pytest
+
+from domain.rendering.compiler import (
+    MISSING_EMPTY,
+    MISSING_ERROR,
+    CompiledTemplateCache,
+    MissingVariablesError,
+    compile_template,
+    render_many,
+)
+
+def test_compile_splits_literals_and_variables():
+    compiled = compile_template("Hej $namn$, din resa till $stad$ den $datum$.")
+
+    assert compiled.literals == ("Hej ", ", din resa till ", " den ", ".")
+    assert compiled.names == ("namn", "stad", "datum")
+
+def test_amounts_are_not_variables():
+    compiled = compile_template("Det kostar $5 och $10.")
+
+    assert compiled.names == ()
+    assert compiled.render({}) == ("Det kostar $5 och $10.", [])
+
+def test_render_substitutes_repeated_variables_and_converts_values():
+    compiled = compile_template("$namn$ har $antal$ biljetter, $namn$.")
+
+    assert compiled.variables == ("namn", "antal")
+    assert compiled.render({'namn': 'Anna', 'antal': 2}) == ("Anna har 2 biljetter, Anna.", [])
+
+def test_missing_variables_are_kept_by_default():
+    compiled = compile_template("Hej $namn$ och $namn$ från $stad$")
+
+    assert compiled.render({'stad': 'Malmö'}) == ("Hej $namn$ och $namn$ från Malmö", ['namn'])
+
+def test_missing_variables_can_be_emptied_or_rejected():
+    compiled = compile_template("Hej $namn$!")
+
+    assert compiled.render({}, MISSING_EMPTY) == ("Hej !", ['namn'])
+    with pytest.raises(MissingVariablesError) as error:
+        compiled.render({}, MISSING_ERROR)
+    assert error.value.names == ['namn']
+
+def test_empty_content():
+    compiled = compile_template(None)
+
+    assert compiled.literals == ('',)
+    assert compiled.render({'namn': 'Anna'}) == ('', [])
+
+def test_render_many_reports_errors_per_item():
+    compiled = compile_template("Hej $namn$")
+
+    results = render_many(compiled, [
+        (0, {'$namn$': 'Anna'}),
+        (1, ValueError('Invalid JSON')),
+        (2, ['Anna']),
+        (3, {})
+    ], MISSING_ERROR)
+
+    assert results[0] == {'index': 0, 'content': 'Hej Anna', 'missing_variables': []}
+    assert results[1] == {'index': 1, 'error': 'Invalid JSON'}
+    assert results[2]['error'] == 'Each item must be an object of variable values'
+    assert results[3]['missing_variables'] == ['namn']
+
+def test_cache_keeps_the_latest_version_of_each_template():
+    cache = CompiledTemplateCache(max_entries=2)
+
+    first = cache.resolve(1, 'v1', "Hej $namn$")
+    assert cache.known_version(1) == 'v1'
+    assert cache.resolve(1, 'v1', None) is first
+    assert cache.resolve(1, 'v2', None) is None
+
+    cache.resolve(1, 'v2', "Hejsan $namn$")
+    cache.resolve(2, 'v1', "A")
+    cache.resolve(3, 'v1', "B")
+    assert cache.known_version(1) is None
+    assert cache.stats()['size'] == 2
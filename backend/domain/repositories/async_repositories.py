@@ -0,0 +1,170 @@
+from domain.repositories.category_repository import CategoryRepository
+from domain.repositories.color_repository import ColorRepository
+from domain.repositories.completion_type_repository import CompletionTypeRepository
+from domain.repositories.connect_children_categories_repository import ConnectChildrenCategoryRepository
+from domain.repositories.department_repository import DepartmentRepository
+from domain.repositories.information_repository import InformationRepository
+from domain.repositories.template_repository import TemplateRepository
+from domain.repositories.text_management_repository import TextManagementRepository
+from infrastructure.database.async_connection import DataError, fetch, fetchrow
+import logging
+
+logger = logging.getLogger(__name__)
+
+# The async stack covers the reads of each repository, for handlers that fan
+# out several independent reads concurrently. Writes stay on the sync
+# repositories: each is one short transaction whose commit is followed by
+# cache eviction and change events in the services, and running it on
+# another driver would gain nothing while duplicating that logic. Keyset
+# pages stay sync too, since their cursors carry values as JSON strings that
+# psycopg2 casts and asyncpg would reject.
+
+class AsyncListRepository:
+    """Async reads on top of a sync repository's list query and row mapping.
+
+    The SQL and the dict shapes are taken from the sync repository, so both
+    stacks return identical data. Subclasses set repository_class and, where
+    the sync get_all sorts, order_by. Parameters asyncpg cannot encode raise
+    DataError instead of reading as no rows.
+    """
+
+    repository_class = None
+    name = 'list'
+    order_by = None
+
+    def __init__(self):
+        repository = self.repository_class()
+        self._mapper = getattr(repository, 'LIST_ROW', repository.ROW)
+        self._list_query = repository.LIST_QUERY
+        self._all_query = f"{self._list_query} ORDER BY {self.order_by}" if self.order_by else self._list_query
+        self._id_column = repository.PAGE_SORTS['id']
+        self._by_id_query = f"{self._list_query} WHERE {self._id_column} = %s"
+        self._filters = repository.PAGE_FILTERS
+
+    async def get_all(self):
+        """Get all rows."""
+        try:
+            return self._mapper.map_rows(await fetch(self._all_query))
+        except DataError:
+            raise
+        except Exception as e:
+            logger.exception("Error in async %s repository get_all: %s", self.name, e)
+            return []
+
+    async def get_by_id(self, item_id):
+        """Get one row by ID."""
+        try:
+            row = await fetchrow(self._by_id_query, (item_id,))
+            return self._mapper.map_row(row)
+        except DataError:
+            raise
+        except Exception as e:
+            logger.exception("Error in async %s repository get_by_id: %s", self.name, e)
+            return None
+
+    async def _get_by(self, filter_name, value):
+        """Get the rows whose column behind an 'eq' page filter has the value."""
+        column = self._filters[filter_name][0]
+        query = f"{self._list_query} WHERE {column} = %s ORDER BY {self.order_by or self._id_column}"
+        try:
+            return self._mapper.map_rows(await fetch(query, (value,)))
+        except DataError:
+            raise
+        except Exception as e:
+            logger.exception("Error in async %s repository get by %s: %s", self.name, filter_name, e)
+            return []
+
+class AsyncTemplateChildRepository(AsyncListRepository):
+    """Async reads of rows that belong to templates."""
+
+    async def get_by_template_id(self, template_id):
+        """Get the rows belonging to a template, without the nested template (as in the sync repositories)."""
+        items = await self._get_by('template_id', template_id)
+        for item in items:
+            item.pop('template', None)
+        return items
+
+class AsyncCategoryRepository(AsyncTemplateChildRepository):
+    """Async category reads."""
+
+    repository_class = CategoryRepository
+    name = 'category'
+
+class AsyncCompletionTypeRepository(AsyncTemplateChildRepository):
+    """Async completion type reads."""
+
+    repository_class = CompletionTypeRepository
+    name = 'completion type'
+
+class AsyncDepartmentRepository(AsyncTemplateChildRepository):
+    """Async department reads."""
+
+    repository_class = DepartmentRepository
+    name = 'department'
+
+class AsyncInformationRepository(AsyncTemplateChildRepository):
+    """Async information reads."""
+
+    repository_class = InformationRepository
+    name = 'information'
+
+class AsyncColorRepository(AsyncListRepository):
+    """Async color reads."""
+
+    repository_class = ColorRepository
+    name = 'color'
+
+class AsyncConnectChildrenCategoryRepository(AsyncListRepository):
+    """Async children category reads."""
+
+    repository_class = ConnectChildrenCategoryRepository
+    name = 'children category'
+    order_by = 'cc.name'
+
+    async def get_by_completion_type_id(self, completion_type_id):
+        """Get the children categories of a completion type."""
+        return await self._get_by('completion_type_id', completion_type_id)
+
+    async def get_by_department_id(self, department_id):
+        """Get the children categories of a department."""
+        return await self._get_by('department_id', department_id)
+
+class AsyncTextManagementRepository(AsyncListRepository):
+    """Async variable reads, under the names of TextManagementRepository."""
+
+    repository_class = TextManagementRepository
+    name = 'variable'
+
+    async def get_all_variables(self):
+        return await self.get_all()
+
+    async def get_variable_by_id(self, variable_id):
+        return await self.get_by_id(variable_id)
+
+class AsyncTemplateRepository:
+    """Async template reads, returning the nested documents of TemplateRepository."""
+
+    def __init__(self):
+        self._repository = TemplateRepository()
+
+    async def get_all_documents(self, include_related=False):
+        """Get all templates as nested documents."""
+        try:
+            rows = await fetch(self._repository._document_query(include_related=include_related))
+            return self._repository._document_mapper(include_related).map_rows(rows)
+        except DataError:
+            raise
+        except Exception as e:
+            logger.exception("Error in async template repository get_all_documents: %s", e)
+            return []
+
+    async def get_document_by_id(self, template_id, include_related=False):
+        """Get a template as a nested document."""
+        try:
+            row = await fetchrow(self._repository._document_query("WHERE t.id = %s", include_related), (template_id,))
+            return self._repository._document_mapper(include_related).map_row(row)
+        except DataError:
+            raise
+        except Exception as e:
+            logger.exception("Error in async template repository get_document_by_id: %s", e)
+            return None
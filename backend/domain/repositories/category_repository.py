@@ -1,75 +1,66 @@
-from infrastructure.database.connection import get_db_connection
-import traceback
-import sys
+from infrastructure.database.bulk import bulk_write
+from infrastructure.database.connection import get_db_connection, stream_query
+from infrastructure.database.mapping import RowMapper, Nested, Timestamp, tuple_cursor
+from infrastructure.database.pagination import build_page_query, page_from_rows
+from infrastructure.metrics.metrics import instrument_repository
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrument_repository
 class CategoryRepository:
     """Repository for category operations."""
     
+    LIST_QUERY = """
+        SELECT c.id, c.name, c.description, c.created_at, c.template_id,
+            t.title as template_title  
+        FROM categories c
+        LEFT JOIN templates t ON c.template_id = t.id
+    """
+    
+    # Sorterings- och filterfält som får användas vid keyset-paginering
+    PAGE_SORTS = {
+        'id': 'c.id',
+        'name': 'c.name',
+        'created_at': 'c.created_at'
+    }
+    PAGE_FILTERS = {
+        'template_id': ('c.template_id', 'eq', int),
+        'name': ('c.name', 'prefix', str)
+    }
+    
+    # Fältplaner för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'created_at': Timestamp('created_at'),
+        'template_id': 'template_id'
+    })
+    LIST_ROW = ROW.extend({
+        'template': Nested({'id': 'template_id', 'title': 'template_title'}, when='template_id')
+    })
+    
+    def _map_list_row(self, row):
+        """Convert a LIST_QUERY row to a category dict."""
+        return self.LIST_ROW.map_row(row)
+    
     def get_all(self):
         """Get all categories."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT c.id, c.name, c.description, c.created_at, c.template_id,
-                    t.title as template_title  
-                FROM categories c
-                LEFT JOIN templates t ON c.template_id = t.id
-            """)
-            
-            categories = []
-            rows = cursor.fetchall()
-            
-            print(f"Query returned {len(rows)} rows")
-            if rows and len(rows) > 0:
-                print(f"First row type: {type(rows[0])}")
-                if hasattr(rows[0], 'keys'):
-                    print(f"Row keys: {list(rows[0].keys())}")
-            
-            for row in rows:
-                if hasattr(row, 'keys'):
-                    category = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'template_id': row['template_id'],
-                        'template': None
-                    }
-                    
-                    if row['template_id'] is not None:
-                        category['template'] = {
-                            'id': row['template_id'],
-                            'title': row['template_title']
-                        }
-                else:
-                    category = {
-                        'id': row[0],
-                        'name': row[1],
-                        'description': row[2],
-                        'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                        'template_id': row[4],
-                        'template': None
-                    }
-                    
-                    if row[4] is not None:
-                        category['template'] = {
-                            'id': row[4],
-                            'title': row[5]
-                        }
-                
-                categories.append(category)
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.LIST_QUERY)
+            categories = self.LIST_ROW.fetch_all(cursor)
+            
+            logger.debug("Query returned %s rows", len(categories))
             
             return categories
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category repository get_all at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category repository get_all: %s", e)
             return []
             
         finally:
@@ -78,6 +69,33 @@ class CategoryRepository:
             if conn:
                 conn.close()
     
+    def get_page(self, page):
+        """Get one keyset page of categories."""
+        conn = None
+        cursor = None
+        try:
+            query, params = build_page_query(self.LIST_QUERY, page, self.PAGE_SORTS, self.PAGE_FILTERS)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, params)
+            
+            return page_from_rows(page, self.LIST_ROW.fetch_all(cursor))
+            
+        except Exception as e:
+            logger.exception("Error in category repository get_page: %s", e)
+            raise
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def iter_all(self):
+        """Stream all categories from a server-side cursor."""
+        yield from stream_query(self.LIST_QUERY, mapper=self.LIST_ROW)
+    
     def create(self, category_data):
         """Create a new category."""
         conn = None
@@ -106,24 +124,7 @@ class CategoryRepository:
                     category_data.get('description')
                 ))
             
-            row = cursor.fetchone()
-            
-            if hasattr(row, 'keys'):
-                category = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id']
-                }
-            else:
-                category = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4]
-                }
+            category = self.ROW.fetch_one(cursor)
             
             conn.commit()
             return category
@@ -131,11 +132,7 @@ class CategoryRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category repository create at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category repository create: %s", e)
             raise
             
         finally:
@@ -176,38 +173,17 @@ class CategoryRepository:
                     category_id
                 ))
             
-            row = cursor.fetchone()
-            if not row:
+            category = self.ROW.fetch_one(cursor)
+            if not category:
                 return None
             
-            if hasattr(row, 'keys'):
-                category = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id']
-                }
-            else:
-                category = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4]
-                }
-            
             conn.commit()
             return category
             
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category repository update at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category repository update: %s", e)
             raise
             
         finally:
@@ -225,21 +201,21 @@ class CategoryRepository:
             cursor = conn.cursor()
             
             # Skriv ut detaljer för felsökning
-            print(f"[REPO] Associating category {category_id} with template {template_id}")
-            print(f"[REPO] Category ID type: {type(category_id)}, Template ID type: {type(template_id)}")
+            logger.debug("Associating category %s with template %s", category_id, template_id)
+            logger.debug("Category ID: %r, Template ID: %r", category_id, template_id)
             
             # Testa att först hämta kategorin för att säkerställa att det existerar
             cursor.execute("SELECT id FROM categories WHERE id = %s", (category_id,))
             cat_exists = cursor.fetchone()
-            print(f"[REPO] Category exists check: {cat_exists}")
+            logger.debug("Category exists check: %s", cat_exists)
             
             # Om template_id inte är None, verifiera att mallen existerar
             if template_id is not None:
                 cursor.execute("SELECT id FROM templates WHERE id = %s", (template_id,))
                 template_exists = cursor.fetchone()
-                print(f"[REPO] Template exists check: {template_exists}")
+                logger.debug("Template exists check: %s", template_exists)
                 if not template_exists:
-                    print(f"[REPO] WARNING: Template with ID {template_id} does not exist!")
+                    logger.warning("Template with ID %s does not exist!", template_id)
             
             # Kör uppdateringen
             cursor.execute("""
@@ -253,12 +229,12 @@ class CategoryRepository:
             success = row is not None
             
             # Skriv ut resultat för felsökning
-            print(f"[REPO] Association query result: {row}")
+            logger.debug("Association query result: %s", row)
             if not success:
-                print(f"[REPO] WARNING: Update succeeded but no rows were returned!")
+                logger.warning("Update succeeded but no rows were returned!")
                 # Kontrollera om någon rad uppdaterades, även om RETURNING inte gav resultat
                 affected_rows = cursor.rowcount
-                print(f"[REPO] Affected rows: {affected_rows}")
+                logger.debug("Affected rows: %s", affected_rows)
                 success = affected_rows > 0
             
             conn.commit()
@@ -267,11 +243,7 @@ class CategoryRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category repository associate_with_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category repository associate_with_template: %s", e)
             raise
             
         finally:
@@ -304,11 +276,7 @@ class CategoryRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category repository remove_template_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category repository remove_template_association: %s", e)
             raise
             
         finally:
@@ -340,11 +308,7 @@ class CategoryRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category repository delete at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category repository delete: %s", e)
             raise
             
         finally:
@@ -353,13 +317,29 @@ class CategoryRepository:
             if conn:
                 conn.close()
     
+    def bulk_write(self, creates=(), updates=(), deletes=(), atomic=False):
+        """Create, update and delete categories in one transaction (see infrastructure.database.bulk)."""
+        try:
+            return bulk_write(
+                'categories',
+                columns=('name', 'description', 'template_id'),
+                returning=('id', 'name', 'description', 'created_at', 'template_id'),
+                creates=creates, updates=updates, deletes=deletes,
+                optional_columns=('template_id',),
+                references={'template_id': 'templates'},
+                atomic=atomic
+            )
+        except Exception as e:
+            logger.exception("Error in category repository bulk_write: %s", e)
+            raise
+    
     def get_by_template_id(self, template_id):
         """Get categories by template ID."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             cursor.execute("""
                 SELECT id, name, description, created_at, template_id 
@@ -367,37 +347,12 @@ class CategoryRepository:
                 WHERE template_id = %s
             """, (template_id,))
             
-            categories = []
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                if hasattr(row, 'keys'):
-                    category = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'template_id': row['template_id']
-                    }
-                else:
-                    category = {
-                        'id': row[0],
-                        'name': row[1],
-                        'description': row[2],
-                        'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                        'template_id': row[4]
-                    }
-                
-                categories.append(category)
+            categories = self.ROW.fetch_all(cursor)
             
             return categories
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category repository get_by_template_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category repository get_by_template_id: %s", e)
             return []
             
         finally:
@@ -412,7 +367,7 @@ class CategoryRepository:
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             cursor.execute("""
                 SELECT c.id, c.name, c.description, c.created_at, c.template_id,
@@ -422,50 +377,10 @@ class CategoryRepository:
                 WHERE c.id = %s
             """, (category_id,))
             
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-                
-            if hasattr(row, 'keys'):
-                category = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id'],
-                    'template': None
-                }
-                
-                if row['template_id'] is not None:
-                    category['template'] = {
-                        'id': row['template_id'],
-                        'title': row['template_title']
-                    }
-            else:
-                category = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4],
-                    'template': None
-                }
-                
-                if row[4] is not None:
-                    category['template'] = {
-                        'id': row[4],
-                        'title': row[5]
-                    }
-            
-            return category
+            return self.LIST_ROW.fetch_one(cursor)
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in category repository get_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in category repository get_by_id: %s", e)
             return None
             
         finally:
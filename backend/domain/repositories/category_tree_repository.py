@@ -0,0 +1,118 @@
+from infrastructure.database.connection import get_db_connection
+from infrastructure.database.mapping import RowMapper, tuple_cursor
+from infrastructure.database.schema import get_schema_registry
+from infrastructure.metrics.metrics import instrument_repository
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables that make up the tree, as in the category tree migration:
+# (table, node kind, name column, ((parent column, parent kind), ...))
+TREE_TABLES = (
+    ('templates', 'template', 'title', ()),
+    ('departments', 'department', 'name', ()),
+    ('completion_types', 'completion_type', 'name', (('template_id', 'template'),)),
+    ('categories', 'category', 'name', (('template_id', 'template'),)),
+    ('connect_children_categories', 'children_category', 'name',
+     (('completion_type_id', 'completion_type'), ('department_id', 'department'))),
+)
+
+def _fallback_query():
+    """Subtree query over the source tables, for databases without the closure table."""
+    nodes = ' UNION ALL '.join(
+        f"SELECT '{kind}', t.id::text, to_jsonb(t)->>'{name_column}' FROM {table} t"
+        for table, kind, name_column, _ in TREE_TABLES
+    )
+    edges = ' UNION ALL '.join(
+        f"SELECT '{parent_kind}', to_jsonb(t)->>'{column}', '{kind}', t.id::text FROM {table} t"
+        for table, kind, _, parents in TREE_TABLES
+        for column, parent_kind in parents
+    )
+    return f"""
+        WITH RECURSIVE nodes (kind, id, name) AS ({nodes}),
+        edges (parent_kind, parent_id, kind, id) AS ({edges}),
+        subtree (kind, id, depth, parent_kind, parent_id) AS (
+            SELECT kind, id, 0, NULL::text, NULL::text
+            FROM nodes WHERE kind = %(kind)s AND id = %(id)s
+            UNION ALL
+            SELECT e.kind, e.id, s.depth + 1, s.kind, s.id
+            FROM subtree s
+            JOIN edges e ON e.parent_kind = s.kind AND e.parent_id = s.id
+            WHERE %(depth)s::integer IS NULL OR s.depth < %(depth)s::integer
+        )
+        SELECT s.kind, s.id, n.name, s.depth, s.parent_kind, s.parent_id
+        FROM subtree s
+        JOIN nodes n ON n.kind = s.kind AND n.id = s.id
+        ORDER BY s.depth, s.kind, n.name
+    """
+
+@instrument_repository
+class CategoryTreeRepository:
+    """Repository for reading the template/department → completion type → category tree.
+
+    Reads go to the closure table kept up to date by the category tree
+    triggers (migration b7d3f1a9c2e4): a whole subtree is one index range
+    scan on the ancestor, whatever its depth.
+    """
+
+    KINDS = tuple(kind for _, kind, _, _ in TREE_TABLES)
+
+    # Descendants of one node with, for each, its parent inside the subtree
+    SUBTREE_QUERY = """
+        WITH subtree AS (
+            SELECT descendant_kind AS kind, descendant_id AS id, depth
+            FROM category_tree_paths
+            WHERE ancestor_kind = %(kind)s AND ancestor_id = %(id)s
+              AND (%(depth)s::integer IS NULL OR depth <= %(depth)s::integer)
+        )
+        SELECT s.kind, s.id, n.name, s.depth, e.ancestor_kind AS parent_kind, e.ancestor_id AS parent_id
+        FROM subtree s
+        JOIN category_tree_nodes n ON n.kind = s.kind AND n.id = s.id
+        LEFT JOIN category_tree_paths e
+          ON e.descendant_kind = s.kind AND e.descendant_id = s.id AND e.depth = 1
+         AND s.depth > 0
+         AND (e.ancestor_kind, e.ancestor_id) IN (SELECT kind, id FROM subtree)
+        ORDER BY s.depth, s.kind, n.name
+    """
+
+    FALLBACK_QUERY = _fallback_query()
+
+    # Fältplan för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'kind': 'kind',
+        'id': 'id',
+        'name': 'name',
+        'depth': 'depth',
+        'parent_kind': 'parent_kind',
+        'parent_id': 'parent_id'
+    })
+
+    def get_subtree(self, kind, node_id, max_depth=None):
+        """Get a node and its descendants as flat rows, parents before their children.
+
+        max_depth limits how many levels below the node are included.
+        """
+        conn = None
+        cursor = None
+        try:
+            if get_schema_registry().has_table('category_tree_paths'):
+                query = self.SUBTREE_QUERY
+            else:
+                logger.debug("Category tree table missing, reading the subtree from the source tables")
+                query = self.FALLBACK_QUERY
+
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, {'kind': kind, 'id': str(node_id), 'depth': max_depth})
+
+            return self.ROW.fetch_all(cursor)
+
+        except Exception as e:
+            logger.exception("Error in category tree repository get_subtree: %s", e)
+            raise
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
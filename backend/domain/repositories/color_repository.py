@@ -1,60 +1,61 @@
-from infrastructure.database.connection import get_db_connection
-import traceback
-import sys
+from infrastructure.database.connection import get_db_connection, stream_query
+from infrastructure.database.mapping import RowMapper, Timestamp, tuple_cursor
+from infrastructure.database.pagination import build_page_query, page_from_rows
+from infrastructure.metrics.metrics import instrument_repository
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrument_repository
 class ColorRepository:
     """Repository for color operations."""
     
+    LIST_QUERY = """
+        SELECT id, name, hex_value, description, created_at FROM colors
+    """
+    
+    # Sorterings- och filterfält som får användas vid keyset-paginering
+    PAGE_SORTS = {
+        'id': 'id',
+        'name': 'name',
+        'created_at': 'created_at'
+    }
+    PAGE_FILTERS = {
+        'name': ('name', 'prefix', str)
+    }
+    
+    # Fältplan för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'id': 'id',
+        'name': 'name',
+        'hex_value': 'hex_value',
+        'description': 'description',
+        'created_at': Timestamp('created_at')
+    })
+    # LIST_QUERY har inga joins, så listraden är samma som en vanlig rad
+    LIST_ROW = ROW
+    
+    def _map_list_row(self, row):
+        """Convert a LIST_QUERY row to a color dict."""
+        return self.LIST_ROW.map_row(row)
+    
     def get_all(self):
         """Get all colors."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("SELECT id, name, hex_value, description, created_at FROM colors")
-            
-            colors = []
-            rows = cursor.fetchall()
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.LIST_QUERY)
+            colors = self.ROW.fetch_all(cursor)
             
             # Debug: Print what we're getting from the database
-            print(f"Color query returned {len(rows)} rows")
-            if rows and len(rows) > 0:
-                print(f"First row type: {type(rows[0])}")
-                if hasattr(rows[0], 'keys'):
-                    print(f"Row keys: {list(rows[0].keys())}")
-            
-            for row in rows:
-                # If using RealDictCursor, row is dict-like
-                if hasattr(row, 'keys'):
-                    color = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'hex_value': row['hex_value'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at']
-                    }
-                # Fallback to index-based access
-                else:
-                    color = {
-                        'id': row[0],
-                        'name': row[1],
-                        'hex_value': row[2],
-                        'description': row[3],
-                        'created_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4]
-                    }
-                
-                colors.append(color)
+            logger.debug("Color query returned %s rows", len(colors))
             
             return colors
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in color repository get_all at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in color repository get_all: %s", e)
             # Return empty list on error instead of crashing
             return []
             
@@ -64,6 +65,33 @@ class ColorRepository:
             if conn:
                 conn.close()
     
+    def get_page(self, page):
+        """Get one keyset page of colors."""
+        conn = None
+        cursor = None
+        try:
+            query, params = build_page_query(self.LIST_QUERY, page, self.PAGE_SORTS, self.PAGE_FILTERS)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, params)
+            
+            return page_from_rows(page, self.ROW.fetch_all(cursor))
+            
+        except Exception as e:
+            logger.exception("Error in color repository get_page: %s", e)
+            raise
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def iter_all(self):
+        """Stream all colors from a server-side cursor."""
+        yield from stream_query(self.LIST_QUERY, mapper=self.ROW)
+    
     def create(self, color_data):
         """Create a new color."""
         conn = None
@@ -73,7 +101,7 @@ class ColorRepository:
             cursor = conn.cursor()
             
             # Använd exakt de hex_value som kommer från frontend
-            print(f"Creating color with hex_value: {color_data['hex_value']}")
+            logger.debug("Creating color with hex_value: %s", color_data['hex_value'])
             
             cursor.execute("""
                 INSERT INTO colors (name, hex_value, description)
@@ -81,32 +109,10 @@ class ColorRepository:
                 RETURNING id, name, hex_value, description, created_at
             """, (color_data['name'], color_data['hex_value'], color_data.get('description')))
             
-            row = cursor.fetchone()
+            color = self.ROW.fetch_one(cursor)
             
             # Debug output för att verifiera att färgen sparades korrekt
-            if hasattr(row, 'keys'):
-                print(f"Color saved with hex_value: {row['hex_value']}")
-            else:
-                print(f"Color saved with hex_value: {row[2]}")
-            
-            # If using RealDictCursor, row is dict-like
-            if hasattr(row, 'keys'):
-                color = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'hex_value': row['hex_value'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at']
-                }
-            # Fallback to index-based access
-            else:
-                color = {
-                    'id': row[0],
-                    'name': row[1],
-                    'hex_value': row[2],
-                    'description': row[3],
-                    'created_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4]
-                }
+            logger.debug("Color saved with hex_value: %s", color['hex_value'])
             
             conn.commit()
             return color
@@ -114,11 +120,7 @@ class ColorRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in color repository create at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in color repository create: %s", e)
             raise
             
         finally:
@@ -136,7 +138,7 @@ class ColorRepository:
             cursor = conn.cursor()
             
             # Uppdatera en befintlig färg
-            print(f"Updating color ID {color_id} with hex_value: {color_data['hex_value']}")
+            logger.debug("Updating color ID %s with hex_value: %s", color_id, color_data['hex_value'])
             
             cursor.execute("""
                 UPDATE colors
@@ -145,34 +147,12 @@ class ColorRepository:
                 RETURNING id, name, hex_value, description, created_at
             """, (color_data['name'], color_data['hex_value'], color_data.get('description'), color_id))
             
-            row = cursor.fetchone()
-            if not row:
+            color = self.ROW.fetch_one(cursor)
+            if not color:
                 return None
-                
+            
             # Debug output för att verifiera att färgen uppdaterades korrekt
-            if hasattr(row, 'keys'):
-                print(f"Color updated with hex_value: {row['hex_value']}")
-            else:
-                print(f"Color updated with hex_value: {row[2]}")
-            
-            # If using RealDictCursor, row is dict-like
-            if hasattr(row, 'keys'):
-                color = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'hex_value': row['hex_value'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at']
-                }
-            # Fallback to index-based access
-            else:
-                color = {
-                    'id': row[0],
-                    'name': row[1],
-                    'hex_value': row[2],
-                    'description': row[3],
-                    'created_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4]
-                }
+            logger.debug("Color updated with hex_value: %s", color['hex_value'])
             
             conn.commit()
             return color
@@ -180,11 +160,7 @@ class ColorRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in color repository update at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in color repository update: %s", e)
             raise
             
         finally:
@@ -211,11 +187,7 @@ class ColorRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in color repository delete at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in color repository delete: %s", e)
             raise
             
         finally:
@@ -1,83 +1,65 @@
-from infrastructure.database.connection import get_db_connection
-import traceback
-import sys
+from infrastructure.database.connection import get_db_connection, stream_query
+from infrastructure.database.mapping import RowMapper, Nested, Timestamp, tuple_cursor
+from infrastructure.database.pagination import build_page_query, page_from_rows
+from infrastructure.metrics.metrics import instrument_repository
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrument_repository
 class CompletionTypeRepository:
     """Repository for completion type operations."""
     
+    LIST_QUERY = """
+        SELECT ct.id, ct.name, ct.description, ct.created_at, ct.template_id, 
+            t.title as template_title
+        FROM completion_types ct
+        LEFT JOIN templates t ON ct.template_id = t.id
+    """
+    
+    # Sorterings- och filterfält som får användas vid keyset-paginering
+    PAGE_SORTS = {
+        'id': 'ct.id',
+        'name': 'ct.name',
+        'created_at': 'ct.created_at'
+    }
+    PAGE_FILTERS = {
+        'template_id': ('ct.template_id', 'eq', int),
+        'name': ('ct.name', 'prefix', str)
+    }
+    
+    # Fältplaner för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'created_at': Timestamp('created_at'),
+        'template_id': 'template_id'
+    })
+    LIST_ROW = ROW.extend({
+        'template': Nested({'id': 'template_id', 'title': 'template_title'}, when='template_id')
+    })
+    
+    def _map_list_row(self, row):
+        """Convert a LIST_QUERY row to a completion type dict."""
+        return self.LIST_ROW.map_row(row)
+    
     def get_all(self):
         """Get all completion types."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.LIST_QUERY)
+            completion_types = self.LIST_ROW.fetch_all(cursor)
             
-            # Ändrad query för att hämta template-information
-            cursor.execute("""
-                SELECT ct.id, ct.name, ct.description, ct.created_at, ct.template_id, 
-                    t.title as template_title
-                FROM completion_types ct
-                LEFT JOIN templates t ON ct.template_id = t.id
-            """)
-            
-            completion_types = []
-            rows = cursor.fetchall()
-            
-            # Debug: Print what we're getting from the database
-            print(f"Completion type query returned {len(rows)} rows")
-            if rows and len(rows) > 0:
-                print(f"First row type: {type(rows[0])}")
-                if hasattr(rows[0], 'keys'):
-                    print(f"Row keys: {list(rows[0].keys())}")
-            
-            for row in rows:
-                # If using RealDictCursor, row is dict-like
-                if hasattr(row, 'keys'):
-                    completion_type = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'template_id': row['template_id'],
-                        'template': None
-                    }
-                    
-                    # Lägg till template-information om det finns
-                    if row['template_id'] is not None:
-                        completion_type['template'] = {
-                            'id': row['template_id'],
-                            'title': row['template_title']
-                        }
-                # Fallback to index-based access
-                else:
-                    completion_type = {
-                        'id': row[0],
-                        'name': row[1],
-                        'description': row[2],
-                        'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                        'template_id': row[4],
-                        'template': None
-                    }
-                    
-                    # Lägg till template-information om det finns
-                    if row[4] is not None:
-                        completion_type['template'] = {
-                            'id': row[4],
-                            'title': row[5]
-                        }
-                
-                completion_types.append(completion_type)
+            logger.debug("Completion type query returned %s rows", len(completion_types))
             
             return completion_types
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type repository get_all at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
-            # Return empty list on error instead of crashing
+            logger.exception("Error in completion type repository get_all: %s", e)
             return []
             
         finally:
@@ -86,13 +68,40 @@ class CompletionTypeRepository:
             if conn:
                 conn.close()
     
+    def get_page(self, page):
+        """Get one keyset page of completion types."""
+        conn = None
+        cursor = None
+        try:
+            query, params = build_page_query(self.LIST_QUERY, page, self.PAGE_SORTS, self.PAGE_FILTERS)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, params)
+            
+            return page_from_rows(page, self.LIST_ROW.fetch_all(cursor))
+            
+        except Exception as e:
+            logger.exception("Error in completion type repository get_page: %s", e)
+            raise
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def iter_all(self):
+        """Stream all completion types from a server-side cursor."""
+        yield from stream_query(self.LIST_QUERY, mapper=self.LIST_ROW)
+    
     def get_by_template_id(self, template_id):
         """Get completion types by template ID."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             cursor.execute("""
                 SELECT id, name, description, created_at, template_id 
@@ -100,39 +109,12 @@ class CompletionTypeRepository:
                 WHERE template_id = %s
             """, (template_id,))
             
-            completion_types = []
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                # If using RealDictCursor, row is dict-like
-                if hasattr(row, 'keys'):
-                    completion_type = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'template_id': row['template_id']
-                    }
-                # Fallback to index-based access
-                else:
-                    completion_type = {
-                        'id': row[0],
-                        'name': row[1],
-                        'description': row[2],
-                        'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                        'template_id': row[4]
-                    }
-                
-                completion_types.append(completion_type)
+            completion_types = self.ROW.fetch_all(cursor)
             
             return completion_types
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type repository get_by_template_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type repository get_by_template_id: %s", e)
             # Return empty list on error instead of crashing
             return []
             
@@ -171,26 +153,7 @@ class CompletionTypeRepository:
                     completion_type_data.get('description')
                 ))
             
-            row = cursor.fetchone()
-            
-            # If using RealDictCursor, row is dict-like
-            if hasattr(row, 'keys'):
-                completion_type = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id']
-                }
-            # Fallback to index-based access
-            else:
-                completion_type = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4]
-                }
+            completion_type = self.ROW.fetch_one(cursor)
             
             conn.commit()
             return completion_type
@@ -198,11 +161,7 @@ class CompletionTypeRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type repository create at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type repository create: %s", e)
             raise
             
         finally:
@@ -244,40 +203,17 @@ class CompletionTypeRepository:
                     completion_type_id
                 ))
             
-            row = cursor.fetchone()
-            if not row:
+            completion_type = self.ROW.fetch_one(cursor)
+            if not completion_type:
                 return None
             
-            # If using RealDictCursor, row is dict-like
-            if hasattr(row, 'keys'):
-                completion_type = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id']
-                }
-            # Fallback to index-based access
-            else:
-                completion_type = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4]
-                }
-            
             conn.commit()
             return completion_type
             
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type repository update at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type repository update: %s", e)
             raise
             
         finally:
@@ -310,11 +246,7 @@ class CompletionTypeRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type repository associate_with_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type repository associate_with_template: %s", e)
             raise
             
         finally:
@@ -329,7 +261,7 @@ class CompletionTypeRepository:
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             cursor.execute("""
                 SELECT ct.id, ct.name, ct.description, ct.created_at, ct.template_id,
@@ -339,54 +271,10 @@ class CompletionTypeRepository:
                 WHERE ct.id = %s
             """, (completion_type_id,))
             
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-                
-            # If using RealDictCursor, row is dict-like
-            if hasattr(row, 'keys'):
-                completion_type = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id'],
-                    'template': None
-                }
-                
-                # Lägg till template-information om det finns
-                if row['template_id'] is not None:
-                    completion_type['template'] = {
-                        'id': row['template_id'],
-                        'title': row['template_title']
-                    }
-            # Fallback to index-based access
-            else:
-                completion_type = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4],
-                    'template': None
-                }
-                
-                # Lägg till template-information om det finns
-                if row[4] is not None:
-                    completion_type['template'] = {
-                        'id': row[4],
-                        'title': row[5]
-                    }
-            
-            return completion_type
+            return self.LIST_ROW.fetch_one(cursor)
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type repository get_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type repository get_by_id: %s", e)
             return None
             
         finally:
@@ -419,11 +307,7 @@ class CompletionTypeRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type repository remove_template_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type repository remove_template_association: %s", e)
             raise
             
         finally:
@@ -439,6 +323,9 @@ class CompletionTypeRepository:
         cursor = None
         try:
             conn = get_db_connection()
+            # Poolens anslutningar är autocommit; kontrollen och borttagningen
+            # körs i en transaktion (poolen återställer vid release)
+            conn.autocommit = False
             cursor = conn.cursor()
             
             # Först kontrollera om denna completion type används av några templates
@@ -449,15 +336,9 @@ class CompletionTypeRepository:
             
             templates = cursor.fetchall()
             if templates:
-                template_ids = []
-                if hasattr(templates[0], 'keys'):
-                    template_ids = [row['id'] for row in templates]
-                    template_titles = [row['title'] for row in templates]
-                else:
-                    template_ids = [row[0] for row in templates]
-                    template_titles = [row[1] for row in templates]
-                    
-                print(f"Warning: Cannot delete completion type {completion_type_id} because it is used by templates: {template_titles}")
+                template_titles = [row['title'] for row in templates]
+                
+                logger.warning("Cannot delete completion type %s because it is used by templates: %s", completion_type_id, template_titles)
                 return False
             
             # Om det inte finns några referenser, fortsätt med borttagningen
@@ -476,11 +357,7 @@ class CompletionTypeRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in completion type repository delete at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in completion type repository delete: %s", e)
             raise
             
         finally:
@@ -1,57 +1,103 @@
-from infrastructure.database.connection import get_db_connection
+from infrastructure.database.connection import get_db_connection, stream_query
+from infrastructure.database.mapping import RowMapper, Timestamp, tuple_cursor
+from infrastructure.database.pagination import build_page_query, page_from_rows
 import psycopg2
 import psycopg2.extras
-import traceback
-import sys
 import uuid
 import datetime
+from infrastructure.metrics.metrics import instrument_repository
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrument_repository
 class ConnectChildrenCategoryRepository:
     """Repository for connecting children categories operations."""
     
+    LIST_QUERY = """
+        SELECT cc.id, cc.name, cc.description, cc.created_at, 
+               cc.completion_type_id, cc.department_id
+        FROM connect_children_categories cc
+    """
+    
+    # Sorterings- och filterfält som får användas vid keyset-paginering
+    PAGE_SORTS = {
+        'id': 'cc.id',
+        'name': 'cc.name',
+        'created_at': 'cc.created_at'
+    }
+    PAGE_FILTERS = {
+        'completion_type_id': ('cc.completion_type_id', 'eq', int),
+        'department_id': ('cc.department_id', 'eq', int),
+        'name': ('cc.name', 'prefix', str)
+    }
+    
+    # Fältplan för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'created_at': Timestamp('created_at'),
+        'completion_type_id': 'completion_type_id',
+        'department_id': 'department_id'
+    })
+    
+    def _map_row(self, row):
+        """Convert a children category row to a dict."""
+        return self.ROW.map_row(row)
+    
     def get_all(self):
         """Get all children category connections."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
-            
-            query = """
-                SELECT cc.id, cc.name, cc.description, cc.created_at, 
-                       cc.completion_type_id, cc.department_id
-                FROM connect_children_categories cc
-                ORDER BY cc.name
-            """
+            cursor = tuple_cursor(connection)
             
-            cursor.execute(query)
+            cursor.execute(self.LIST_QUERY + " ORDER BY cc.name")
             
-            connect_children_categories = []
-            for row in cursor.fetchall():
-                connect_children_categories.append({
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                    'completion_type_id': row['completion_type_id'],
-                    'department_id': row['department_id']
-                })
+            return self.ROW.fetch_all(cursor)
+        except Exception as e:
+            logger.exception("Error in repository get_all: %s", e)
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+    
+    def get_page(self, page):
+        """Get one keyset page of children categories."""
+        connection = None
+        cursor = None
+        try:
+            query, params = build_page_query(self.LIST_QUERY, page, self.PAGE_SORTS, self.PAGE_FILTERS)
             
-            cursor.close()
-            connection.close()
+            connection = get_db_connection()
+            cursor = tuple_cursor(connection)
+            cursor.execute(query, params)
             
-            return connect_children_categories
+            return page_from_rows(page, self.ROW.fetch_all(cursor))
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository get_all at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository get_page: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
+    
+    def iter_all(self):
+        """Stream all children categories from a server-side cursor."""
+        yield from stream_query(self.LIST_QUERY + " ORDER BY cc.name", mapper=self.ROW)
     
     def get_by_id(self, category_id):
         """Get a children category by ID."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            cursor = tuple_cursor(connection)
             
             query = """
                 SELECT cc.id, cc.name, cc.description, cc.created_at, 
@@ -62,36 +108,25 @@ class ConnectChildrenCategoryRepository:
             
             cursor.execute(query, (category_id,))
             
-            row = cursor.fetchone()
-            if row:
-                category = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                    'completion_type_id': row['completion_type_id'],
-                    'department_id': row['department_id']
-                }
-            else:
-                category = None
-            
-            cursor.close()
-            connection.close()
+            category = self.ROW.fetch_one(cursor)
             
             return category
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository get_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository get_by_id: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
     
     def get_by_completion_type_id(self, completion_type_id):
         """Get children categories by completion type ID."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            cursor = tuple_cursor(connection)
             
             query = """
                 SELECT cc.id, cc.name, cc.description, cc.created_at, 
@@ -103,34 +138,25 @@ class ConnectChildrenCategoryRepository:
             
             cursor.execute(query, (completion_type_id,))
             
-            categories = []
-            for row in cursor.fetchall():
-                categories.append({
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                    'completion_type_id': row['completion_type_id'],
-                    'department_id': row['department_id']
-                })
-            
-            cursor.close()
-            connection.close()
+            categories = self.ROW.fetch_all(cursor)
             
             return categories
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository get_by_completion_type_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository get_by_completion_type_id: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
 
     def get_by_department_id(self, department_id):
         """Get children categories by department ID."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
-            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            cursor = tuple_cursor(connection)
             
             query = """
                 SELECT cc.id, cc.name, cc.description, cc.created_at, 
@@ -142,31 +168,22 @@ class ConnectChildrenCategoryRepository:
             
             cursor.execute(query, (department_id,))
             
-            categories = []
-            for row in cursor.fetchall():
-                categories.append({
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                    'completion_type_id': row['completion_type_id'],
-                    'department_id': row['department_id']
-                })
-            
-            cursor.close()
-            connection.close()
+            categories = self.ROW.fetch_all(cursor)
             
             return categories
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository get_by_department_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository get_by_department_id: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
     
     def create(self, category_data):
         """Create a new children category."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
             cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
@@ -195,31 +212,24 @@ class ConnectChildrenCategoryRepository:
                 category_data.get('department_id')
             ))
             
-            row = cursor.fetchone()
-            category = {
-                'id': row['id'],
-                'name': row['name'],
-                'description': row['description'],
-                'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                'completion_type_id': row['completion_type_id'],
-                'department_id': row['department_id']
-            }
+            category = self.ROW.fetch_one(cursor)
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             return category
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository create at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository create: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
     
     def update(self, category_id, category_data):
         """Update a children category."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
             cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
@@ -229,8 +239,6 @@ class ConnectChildrenCategoryRepository:
             cursor.execute(check_query, (category_id,))
             
             if cursor.fetchone() is None:
-                cursor.close()
-                connection.close()
                 return None
             
             # Update the category
@@ -252,31 +260,24 @@ class ConnectChildrenCategoryRepository:
                 category_id
             ))
             
-            row = cursor.fetchone()
-            category = {
-                'id': row['id'],
-                'name': row['name'],
-                'description': row['description'],
-                'created_at': row['created_at'].isoformat() if row['created_at'] else None,
-                'completion_type_id': row['completion_type_id'],
-                'department_id': row['department_id']
-            }
+            category = self.ROW.fetch_one(cursor)
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             return category
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository update at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository update: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
     
     def associate_with_completion_type(self, category_id, completion_type_id):
         """Associate a children category with a completion type."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
             cursor = connection.cursor()
@@ -293,20 +294,21 @@ class ConnectChildrenCategoryRepository:
             result = cursor.fetchone() is not None
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository associate_with_completion_type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository associate_with_completion_type: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
     
     def associate_with_department(self, category_id, department_id):
         """Associate a children category with a department."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
             cursor = connection.cursor()
@@ -323,20 +325,21 @@ class ConnectChildrenCategoryRepository:
             result = cursor.fetchone() is not None
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository associate_with_department at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository associate_with_department: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
     
     def remove_completion_type_association(self, category_id):
         """Remove the completion type association from a children category."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
             cursor = connection.cursor()
@@ -353,20 +356,21 @@ class ConnectChildrenCategoryRepository:
             result = cursor.fetchone() is not None
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository remove_completion_type_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository remove_completion_type_association: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
     
     def remove_department_association(self, category_id):
         """Remove the department association from a children category."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
             cursor = connection.cursor()
@@ -383,20 +387,21 @@ class ConnectChildrenCategoryRepository:
             result = cursor.fetchone() is not None
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository remove_department_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in repository remove_department_association: %s", e)
             raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
     
     def delete(self, category_id):
         """Delete a children category."""
+        connection = None
+        cursor = None
         try:
             connection = get_db_connection()
             cursor = connection.cursor()
@@ -408,14 +413,13 @@ class ConnectChildrenCategoryRepository:
             result = cursor.fetchone() is not None
             
             connection.commit()
-            cursor.close()
-            connection.close()
             
             return result
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in repository delete at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
-            raise
\ No newline at end of file
+            logger.exception("Error in repository delete: %s", e)
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if connection:
+                connection.close()
\ No newline at end of file
@@ -1,75 +1,65 @@
-from infrastructure.database.connection import get_db_connection
-import traceback
-import sys
+from infrastructure.database.connection import get_db_connection, stream_query
+from infrastructure.database.mapping import RowMapper, Nested, Timestamp, tuple_cursor
+from infrastructure.database.pagination import build_page_query, page_from_rows
+from infrastructure.metrics.metrics import instrument_repository
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrument_repository
 class DepartmentRepository:
     """Repository for department operations."""
     
+    LIST_QUERY = """
+        SELECT d.id, d.name, d.description, d.created_at, d.template_id,
+            t.title as template_title  
+        FROM departments d
+        LEFT JOIN templates t ON d.template_id = t.id
+    """
+    
+    # Sorterings- och filterfält som får användas vid keyset-paginering
+    PAGE_SORTS = {
+        'id': 'd.id',
+        'name': 'd.name',
+        'created_at': 'd.created_at'
+    }
+    PAGE_FILTERS = {
+        'template_id': ('d.template_id', 'eq', int),
+        'name': ('d.name', 'prefix', str)
+    }
+    
+    # Fältplaner för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'created_at': Timestamp('created_at'),
+        'template_id': 'template_id'
+    })
+    LIST_ROW = ROW.extend({
+        'template': Nested({'id': 'template_id', 'title': 'template_title'}, when='template_id')
+    })
+    
+    def _map_list_row(self, row):
+        """Convert a LIST_QUERY row to a department dict."""
+        return self.LIST_ROW.map_row(row)
+    
     def get_all(self):
         """Get all departments."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT d.id, d.name, d.description, d.created_at, d.template_id,
-                    t.title as template_title  
-                FROM departments d
-                LEFT JOIN templates t ON d.template_id = t.id
-            """)
-            
-            departments = []
-            rows = cursor.fetchall()
-            
-            print(f"Query returned {len(rows)} rows")
-            if rows and len(rows) > 0:
-                print(f"First row type: {type(rows[0])}")
-                if hasattr(rows[0], 'keys'):
-                    print(f"Row keys: {list(rows[0].keys())}")
-            
-            for row in rows:
-                if hasattr(row, 'keys'):
-                    department = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'template_id': row['template_id'],
-                        'template': None
-                    }
-                    
-                    if row['template_id'] is not None:
-                        department['template'] = {
-                            'id': row['template_id'],
-                            'title': row['template_title']
-                        }
-                else:
-                    department = {
-                        'id': row[0],
-                        'name': row[1],
-                        'description': row[2],
-                        'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                        'template_id': row[4],
-                        'template': None
-                    }
-                    
-                    if row[4] is not None:
-                        department['template'] = {
-                            'id': row[4],
-                            'title': row[5]
-                        }
-                
-                departments.append(department)
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.LIST_QUERY)
+            departments = self.LIST_ROW.fetch_all(cursor)
+            
+            logger.debug("Query returned %s rows", len(departments))
             
             return departments
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department repository get_all at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department repository get_all: %s", e)
             return []
             
         finally:
@@ -78,6 +68,33 @@ class DepartmentRepository:
             if conn:
                 conn.close()
     
+    def get_page(self, page):
+        """Get one keyset page of departments."""
+        conn = None
+        cursor = None
+        try:
+            query, params = build_page_query(self.LIST_QUERY, page, self.PAGE_SORTS, self.PAGE_FILTERS)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, params)
+            
+            return page_from_rows(page, self.LIST_ROW.fetch_all(cursor))
+            
+        except Exception as e:
+            logger.exception("Error in department repository get_page: %s", e)
+            raise
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def iter_all(self):
+        """Stream all departments from a server-side cursor."""
+        yield from stream_query(self.LIST_QUERY, mapper=self.LIST_ROW)
+    
     def create(self, department_data):
         """Create a new department."""
         conn = None
@@ -106,24 +123,7 @@ class DepartmentRepository:
                     department_data.get('description')
                 ))
             
-            row = cursor.fetchone()
-            
-            if hasattr(row, 'keys'):
-                department = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id']
-                }
-            else:
-                department = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4]
-                }
+            department = self.ROW.fetch_one(cursor)
             
             conn.commit()
             return department
@@ -131,11 +131,7 @@ class DepartmentRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department repository create at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department repository create: %s", e)
             raise
             
         finally:
@@ -176,38 +172,17 @@ class DepartmentRepository:
                     department_id
                 ))
             
-            row = cursor.fetchone()
-            if not row:
+            department = self.ROW.fetch_one(cursor)
+            if not department:
                 return None
             
-            if hasattr(row, 'keys'):
-                department = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id']
-                }
-            else:
-                department = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4]
-                }
-            
             conn.commit()
             return department
             
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department repository update at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department repository update: %s", e)
             raise
             
         finally:
@@ -225,21 +200,21 @@ class DepartmentRepository:
             cursor = conn.cursor()
             
             # Skriv ut detaljer för felsökning
-            print(f"[REPO] Associating department {department_id} with template {template_id}")
-            print(f"[REPO] Department ID type: {type(department_id)}, Template ID type: {type(template_id)}")
+            logger.debug("Associating department %s with template %s", department_id, template_id)
+            logger.debug("Department ID: %r, Template ID: %r", department_id, template_id)
             
             # Testa att först hämta departmentet för att säkerställa att det existerar
             cursor.execute("SELECT id FROM departments WHERE id = %s", (department_id,))
             dept_exists = cursor.fetchone()
-            print(f"[REPO] Department exists check: {dept_exists}")
+            logger.debug("Department exists check: %s", dept_exists)
             
             # Om template_id inte är None, verifiera att mallen existerar
             if template_id is not None:
                 cursor.execute("SELECT id FROM templates WHERE id = %s", (template_id,))
                 template_exists = cursor.fetchone()
-                print(f"[REPO] Template exists check: {template_exists}")
+                logger.debug("Template exists check: %s", template_exists)
                 if not template_exists:
-                    print(f"[REPO] WARNING: Template with ID {template_id} does not exist!")
+                    logger.warning("Template with ID %s does not exist!", template_id)
             
             # Kör uppdateringen
             cursor.execute("""
@@ -253,12 +228,12 @@ class DepartmentRepository:
             success = row is not None
             
             # Skriv ut resultat för felsökning
-            print(f"[REPO] Association query result: {row}")
+            logger.debug("Association query result: %s", row)
             if not success:
-                print(f"[REPO] WARNING: Update succeeded but no rows were returned!")
+                logger.warning("Update succeeded but no rows were returned!")
                 # Kontrollera om någon rad uppdaterades, även om RETURNING inte gav resultat
                 affected_rows = cursor.rowcount
-                print(f"[REPO] Affected rows: {affected_rows}")
+                logger.debug("Affected rows: %s", affected_rows)
                 success = affected_rows > 0
             
             conn.commit()
@@ -267,11 +242,7 @@ class DepartmentRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department repository associate_with_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department repository associate_with_template: %s", e)
             raise
             
         finally:
@@ -304,11 +275,7 @@ class DepartmentRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department repository remove_template_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department repository remove_template_association: %s", e)
             raise
             
         finally:
@@ -340,11 +307,7 @@ class DepartmentRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department repository delete at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department repository delete: %s", e)
             raise
             
         finally:
@@ -359,7 +322,7 @@ class DepartmentRepository:
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             cursor.execute("""
                 SELECT id, name, description, created_at, template_id 
@@ -367,37 +330,12 @@ class DepartmentRepository:
                 WHERE template_id = %s
             """, (template_id,))
             
-            departments = []
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                if hasattr(row, 'keys'):
-                    department = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'template_id': row['template_id']
-                    }
-                else:
-                    department = {
-                        'id': row[0],
-                        'name': row[1],
-                        'description': row[2],
-                        'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                        'template_id': row[4]
-                    }
-                
-                departments.append(department)
+            departments = self.ROW.fetch_all(cursor)
             
             return departments
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department repository get_by_template_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department repository get_by_template_id: %s", e)
             return []
             
         finally:
@@ -412,7 +350,7 @@ class DepartmentRepository:
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             cursor.execute("""
                 SELECT d.id, d.name, d.description, d.created_at, d.template_id,
@@ -422,50 +360,10 @@ class DepartmentRepository:
                 WHERE d.id = %s
             """, (department_id,))
             
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-                
-            if hasattr(row, 'keys'):
-                department = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id'],
-                    'template': None
-                }
-                
-                if row['template_id'] is not None:
-                    department['template'] = {
-                        'id': row['template_id'],
-                        'title': row['template_title']
-                    }
-            else:
-                department = {
-                    'id': row[0],
-                    'name': row[1],
-                    'description': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'template_id': row[4],
-                    'template': None
-                }
-                
-                if row[4] is not None:
-                    department['template'] = {
-                        'id': row[4],
-                        'title': row[5]
-                    }
-            
-            return department
+            return self.LIST_ROW.fetch_one(cursor)
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in department repository get_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in department repository get_by_id: %s", e)
             return None
             
         finally:
@@ -1,79 +1,68 @@
-from infrastructure.database.connection import get_db_connection
-import traceback
-import sys
+from infrastructure.database.bulk import bulk_write
+from infrastructure.database.connection import get_db_connection, stream_query
+from infrastructure.database.mapping import RowMapper, Nested, Timestamp, tuple_cursor
+from infrastructure.database.pagination import build_page_query, page_from_rows
+from infrastructure.metrics.metrics import instrument_repository
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrument_repository
 class InformationRepository:
     """Repository for information operations."""
     
+    LIST_QUERY = """
+        SELECT i.id, i.name, i.label, i.description, i.created_at, i.template_id, i.comments,
+            t.title as template_title  
+        FROM information i
+        LEFT JOIN templates t ON i.template_id = t.id
+    """
+    
+    # Sorterings- och filterfält som får användas vid keyset-paginering
+    PAGE_SORTS = {
+        'id': 'i.id',
+        'name': 'i.name',
+        'created_at': 'i.created_at'
+    }
+    PAGE_FILTERS = {
+        'template_id': ('i.template_id', 'eq', int),
+        'name': ('i.name', 'prefix', str)
+    }
+    
+    # Fältplaner för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'id': 'id',
+        'name': 'name',
+        'label': 'label',
+        'description': 'description',
+        'created_at': Timestamp('created_at'),
+        'template_id': 'template_id',
+        'comments': 'comments'
+    })
+    LIST_ROW = ROW.extend({
+        'template': Nested({'id': 'template_id', 'title': 'template_title'}, when='template_id')
+    })
+    
+    def _map_list_row(self, row):
+        """Convert a LIST_QUERY row to an information dict."""
+        return self.LIST_ROW.map_row(row)
+    
     def get_all(self):
         """Get all information items."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT i.id, i.name, i.label, i.description, i.created_at, i.template_id, i.comments,
-                    t.title as template_title  
-                FROM information i
-                LEFT JOIN templates t ON i.template_id = t.id
-            """)
-            
-            information_items = []
-            rows = cursor.fetchall()
-            
-            print(f"Query returned {len(rows)} rows")
-            if rows and len(rows) > 0:
-                print(f"First row type: {type(rows[0])}")
-                if hasattr(rows[0], 'keys'):
-                    print(f"Row keys: {list(rows[0].keys())}")
-            
-            for row in rows:
-                if hasattr(row, 'keys'):
-                    item = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'label': row['label'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'template_id': row['template_id'],
-                        'comments': row['comments'],
-                        'template': None
-                    }
-                    
-                    if row['template_id'] is not None:
-                        item['template'] = {
-                            'id': row['template_id'],
-                            'title': row['template_title']
-                        }
-                else:
-                    item = {
-                        'id': row[0],
-                        'name': row[1],
-                        'label': row[2],
-                        'description': row[3],
-                        'created_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                        'template_id': row[5],
-                        'comments': row[6],
-                        'template': None
-                    }
-                    
-                    if row[5] is not None:
-                        item['template'] = {
-                            'id': row[5],
-                            'title': row[7]
-                        }
-                
-                information_items.append(item)
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.LIST_QUERY)
+            information_items = self.LIST_ROW.fetch_all(cursor)
+            
+            logger.debug("Query returned %s rows", len(information_items))
             
             return information_items
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information repository get_all at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information repository get_all: %s", e)
             return []
             
         finally:
@@ -82,6 +71,33 @@ class InformationRepository:
             if conn:
                 conn.close()
     
+    def get_page(self, page):
+        """Get one keyset page of information items."""
+        conn = None
+        cursor = None
+        try:
+            query, params = build_page_query(self.LIST_QUERY, page, self.PAGE_SORTS, self.PAGE_FILTERS)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, params)
+            
+            return page_from_rows(page, self.LIST_ROW.fetch_all(cursor))
+            
+        except Exception as e:
+            logger.exception("Error in information repository get_page: %s", e)
+            raise
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def iter_all(self):
+        """Stream all information items from a server-side cursor."""
+        yield from stream_query(self.LIST_QUERY, mapper=self.LIST_ROW)
+    
     def create(self, information_data):
         """Create a new information item."""
         conn = None
@@ -114,28 +130,7 @@ class InformationRepository:
                     information_data.get('comments', False)
                 ))
             
-            row = cursor.fetchone()
-            
-            if hasattr(row, 'keys'):
-                item = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'label': row['label'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id'],
-                    'comments': row['comments']
-                }
-            else:
-                item = {
-                    'id': row[0],
-                    'name': row[1],
-                    'label': row[2],
-                    'description': row[3],
-                    'created_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                    'template_id': row[5],
-                    'comments': row[6]
-                }
+            item = self.ROW.fetch_one(cursor)
             
             conn.commit()
             return item
@@ -143,11 +138,7 @@ class InformationRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information repository create at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information repository create: %s", e)
             raise
             
         finally:
@@ -192,42 +183,17 @@ class InformationRepository:
                     information_id
                 ))
             
-            row = cursor.fetchone()
-            if not row:
+            item = self.ROW.fetch_one(cursor)
+            if not item:
                 return None
             
-            if hasattr(row, 'keys'):
-                item = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'label': row['label'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id'],
-                    'comments': row['comments']
-                }
-            else:
-                item = {
-                    'id': row[0],
-                    'name': row[1],
-                    'label': row[2],
-                    'description': row[3],
-                    'created_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                    'template_id': row[5],
-                    'comments': row[6]
-                }
-            
             conn.commit()
             return item
             
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information repository update at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information repository update: %s", e)
             raise
             
         finally:
@@ -245,21 +211,21 @@ class InformationRepository:
             cursor = conn.cursor()
             
             # Skriv ut detaljer för felsökning
-            print(f"[REPO] Associating information {information_id} with template {template_id}")
-            print(f"[REPO] Information ID type: {type(information_id)}, Template ID type: {type(template_id)}")
+            logger.debug("Associating information %s with template %s", information_id, template_id)
+            logger.debug("Information ID: %r, Template ID: %r", information_id, template_id)
             
             # Testa att först hämta informationen för att säkerställa att det existerar
             cursor.execute("SELECT id FROM information WHERE id = %s", (information_id,))
             info_exists = cursor.fetchone()
-            print(f"[REPO] Information exists check: {info_exists}")
+            logger.debug("Information exists check: %s", info_exists)
             
             # Om template_id inte är None, verifiera att mallen existerar
             if template_id is not None:
                 cursor.execute("SELECT id FROM templates WHERE id = %s", (template_id,))
                 template_exists = cursor.fetchone()
-                print(f"[REPO] Template exists check: {template_exists}")
+                logger.debug("Template exists check: %s", template_exists)
                 if not template_exists:
-                    print(f"[REPO] WARNING: Template with ID {template_id} does not exist!")
+                    logger.warning("Template with ID %s does not exist!", template_id)
             
             # Kör uppdateringen
             cursor.execute("""
@@ -273,12 +239,12 @@ class InformationRepository:
             success = row is not None
             
             # Skriv ut resultat för felsökning
-            print(f"[REPO] Association query result: {row}")
+            logger.debug("Association query result: %s", row)
             if not success:
-                print(f"[REPO] WARNING: Update succeeded but no rows were returned!")
+                logger.warning("Update succeeded but no rows were returned!")
                 # Kontrollera om någon rad uppdaterades, även om RETURNING inte gav resultat
                 affected_rows = cursor.rowcount
-                print(f"[REPO] Affected rows: {affected_rows}")
+                logger.debug("Affected rows: %s", affected_rows)
                 success = affected_rows > 0
             
             conn.commit()
@@ -287,11 +253,7 @@ class InformationRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information repository associate_with_template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information repository associate_with_template: %s", e)
             raise
             
         finally:
@@ -324,11 +286,7 @@ class InformationRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information repository remove_template_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information repository remove_template_association: %s", e)
             raise
             
         finally:
@@ -360,11 +318,7 @@ class InformationRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information repository delete at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information repository delete: %s", e)
             raise
             
         finally:
@@ -373,13 +327,29 @@ class InformationRepository:
             if conn:
                 conn.close()
     
+    def bulk_write(self, creates=(), updates=(), deletes=(), atomic=False):
+        """Create, update and delete information items in one transaction (see infrastructure.database.bulk)."""
+        try:
+            return bulk_write(
+                'information',
+                columns=('name', 'label', 'description', 'template_id', 'comments'),
+                returning=('id', 'name', 'label', 'description', 'created_at', 'template_id', 'comments'),
+                creates=creates, updates=updates, deletes=deletes,
+                optional_columns=('template_id',),
+                references={'template_id': 'templates'},
+                atomic=atomic
+            )
+        except Exception as e:
+            logger.exception("Error in information repository bulk_write: %s", e)
+            raise
+    
     def get_by_template_id(self, template_id):
         """Get information items by template ID."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             cursor.execute("""
                 SELECT id, name, label, description, created_at, template_id, comments
@@ -387,41 +357,12 @@ class InformationRepository:
                 WHERE template_id = %s
             """, (template_id,))
             
-            information_items = []
-            rows = cursor.fetchall()
-            
-            for row in rows:
-                if hasattr(row, 'keys'):
-                    item = {
-                        'id': row['id'],
-                        'name': row['name'],
-                        'label': row['label'],
-                        'description': row['description'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'template_id': row['template_id'],
-                        'comments': row['comments']
-                    }
-                else:
-                    item = {
-                        'id': row[0],
-                        'name': row[1],
-                        'label': row[2],
-                        'description': row[3],
-                        'created_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                        'template_id': row[5],
-                        'comments': row[6]
-                    }
-                
-                information_items.append(item)
+            information_items = self.ROW.fetch_all(cursor)
             
             return information_items
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information repository get_by_template_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information repository get_by_template_id: %s", e)
             return []
             
         finally:
@@ -436,7 +377,7 @@ class InformationRepository:
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             cursor.execute("""
                 SELECT i.id, i.name, i.label, i.description, i.created_at, i.template_id, i.comments,
@@ -446,54 +387,10 @@ class InformationRepository:
                 WHERE i.id = %s
             """, (information_id,))
             
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-                
-            if hasattr(row, 'keys'):
-                item = {
-                    'id': row['id'],
-                    'name': row['name'],
-                    'label': row['label'],
-                    'description': row['description'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'template_id': row['template_id'],
-                    'comments': row['comments'],
-                    'template': None
-                }
-                
-                if row['template_id'] is not None:
-                    item['template'] = {
-                        'id': row['template_id'],
-                        'title': row['template_title']
-                    }
-            else:
-                item = {
-                    'id': row[0],
-                    'name': row[1],
-                    'label': row[2],
-                    'description': row[3],
-                    'created_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                    'template_id': row[5],
-                    'comments': row[6],
-                    'template': None
-                }
-                
-                if row[5] is not None:
-                    item['template'] = {
-                        'id': row[5],
-                        'title': row[7]
-                    }
-            
-            return item
+            return self.LIST_ROW.fetch_one(cursor)
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in information repository get_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in information repository get_by_id: %s", e)
             return None
             
         finally:
@@ -0,0 +1,149 @@
+from domain.search.inverted_index import HEADLINE_START, HEADLINE_STOP, SearchDocument, render_headline
+from infrastructure.database.connection import get_db_connection
+from infrastructure.database.mapping import RowMapper, tuple_cursor
+from infrastructure.metrics.metrics import instrument_repository
+import logging
+
+logger = logging.getLogger(__name__)
+
+@instrument_repository
+class SearchRepository:
+    """Repository for full-text search over templates, information and variables.
+
+    search() reads the search_documents table that the search migration
+    (c4e9a2f7d1b3) keeps up to date with triggers. load_documents() reads
+    the same title and body texts from the source tables, for the in-memory
+    index used without the migration.
+    """
+
+    # Searchable entities and the SQL for their (id, title, body), as in the migration
+    DOCUMENT_QUERIES = {
+        'template': "SELECT id::text, title, content FROM templates",
+        'information': """
+            SELECT id::text, NULLIF(concat_ws(' ', name, label), ''), description
+            FROM information
+        """,
+        'variable': """
+            SELECT id::text, NULLIF(concat_ws(' ', namn, variabel_namn), ''), beskrivning
+            FROM category_variabels
+        """,
+    }
+
+    ENTITIES = tuple(DOCUMENT_QUERIES)
+
+    # Matches of the Swedish or English stemmed query, or titles resembling it,
+    # ranked and cut to one keyset page before the highlights are built.
+    # Highlights use the same two configurations: the fragments come from
+    # the one whose query matches the body, then the other marks its words
+    # in them too. Matches are marked with HEADLINE_START/STOP and escaped
+    # afterwards, since ts_headline returns the stored text unescaped.
+    SEARCH_QUERY = """
+        WITH q AS (
+            SELECT websearch_to_tsquery('swedish', %(q)s) AS swedish,
+                   websearch_to_tsquery('english', %(q)s) AS english
+        ),
+        matches AS (
+            SELECT d.entity, d.id, d.title, d.body,
+                   (ts_rank_cd(d.document, q.swedish || q.english) + word_similarity(%(q)s, coalesce(d.title, '')))::float8 AS rank
+            FROM search_documents d, q
+            WHERE (d.document @@ (q.swedish || q.english) OR %(q)s <%% d.title)
+              AND d.entity = ANY(%(entities)s)
+        ),
+        hits AS (
+            SELECT * FROM matches
+            WHERE %(after_rank)s::float8 IS NULL
+               OR (-rank, entity || ':' || id) > (-%(after_rank)s::float8, %(after_key)s::text)
+            ORDER BY rank DESC, entity || ':' || id
+            LIMIT %(limit)s
+        )
+        SELECT h.entity, h.id, h.rank,
+               ts_headline('english',
+                           ts_headline('swedish', coalesce(h.title, ''), q.swedish, %(mark_all)s),
+                           q.english, %(mark_all)s) AS title,
+               CASE WHEN to_tsvector('english', coalesce(h.body, '')) @@ q.english
+                         AND NOT to_tsvector('swedish', coalesce(h.body, '')) @@ q.swedish
+                    THEN ts_headline('swedish',
+                                     ts_headline('english', coalesce(h.body, ''), q.english, %(fragments)s),
+                                     q.swedish, %(mark_all)s)
+                    ELSE ts_headline('english',
+                                     ts_headline('swedish', coalesce(h.body, ''), q.swedish, %(fragments)s),
+                                     q.english, %(mark_all)s)
+               END AS snippet
+        FROM hits h, q
+        ORDER BY h.rank DESC, h.entity || ':' || h.id
+    """
+
+    # ts_headline options: whole text, or fragments around the matches
+    HEADLINE_MARKS = f'StartSel="{HEADLINE_START}", StopSel="{HEADLINE_STOP}"'
+    MARK_ALL = f"HighlightAll=true, {HEADLINE_MARKS}"
+    FRAGMENTS = f"MaxFragments=2, MaxWords=20, MinWords=5, {HEADLINE_MARKS}"
+
+    # Fältplan för radmappning (se infrastructure.database.mapping)
+    HIT_ROW = RowMapper({
+        'type': 'entity',
+        'id': 'id',
+        'title': 'title',
+        'snippet': 'snippet',
+        'rank': 'rank'
+    })
+
+    def search(self, query, entities, limit, after=None):
+        """Get up to limit hits for a query, best first, starting after the (rank, key) position."""
+        conn = None
+        cursor = None
+        try:
+            after_rank, after_key = after if after else (None, None)
+
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.SEARCH_QUERY, {
+                'q': query,
+                'entities': list(entities),
+                'after_rank': after_rank,
+                'after_key': after_key,
+                'limit': limit,
+                'mark_all': self.MARK_ALL,
+                'fragments': self.FRAGMENTS
+            })
+
+            hits = self.HIT_ROW.fetch_all(cursor)
+            for hit in hits:
+                hit['title'] = render_headline(hit['title'])
+                hit['snippet'] = render_headline(hit['snippet'])
+            return hits
+
+        except Exception as e:
+            logger.exception("Error in search repository search: %s", e)
+            raise
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    def load_documents(self):
+        """Read every searchable row from the source tables as SearchDocuments."""
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+
+            documents = []
+            for entity, query in self.DOCUMENT_QUERIES.items():
+                cursor.execute(query)
+                documents.extend(SearchDocument(entity, *row) for row in cursor.fetchall())
+
+            logger.debug("Loaded %s search documents", len(documents))
+            return documents
+
+        except Exception as e:
+            logger.exception("Error in search repository load_documents: %s", e)
+            raise
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
@@ -1,136 +1,211 @@
-from infrastructure.database.connection import get_db_connection
-import traceback
-import sys
+from domain.repositories.template_version_repository import TemplateVersionRepository
+from infrastructure.database.connection import get_db_connection, stream_query
+from infrastructure.database.mapping import RowMapper, Nested, Timestamp, EmptyList, tuple_cursor
+from infrastructure.database.schema import get_schema_registry
+from infrastructure.database.pagination import build_page_query, page_from_rows
+from psycopg2.extras import Json
+from infrastructure.metrics.metrics import instrument_repository
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrument_repository
 class TemplateRepository:
     """Repository for template operations."""
     
+    # Uppdaterad query för att hämta templates med departments och colors
+    LIST_QUERY = """
+        SELECT t.id, t.title, t.content, t.created_at, t.updated_at, 
+               d.id as department_id, d.name as department_name,
+               c.id as color_id, c.name as color_name, c.hex_value, c.description as color_description
+        FROM templates t
+        LEFT JOIN departments d ON t.department_id = d.id
+        LEFT JOIN colors c ON t.color_id = c.id
+    """
+    
+    # Sorterings- och filterfält som får användas vid keyset-paginering
+    PAGE_SORTS = {
+        'id': 't.id',
+        'title': 't.title',
+        'created_at': 't.created_at',
+        'updated_at': 't.updated_at'
+    }
+    PAGE_FILTERS = {
+        'department_id': ('t.department_id', 'eq', int),
+        'color_id': ('t.color_id', 'eq', int),
+        'name': ('t.title', 'prefix', str)
+    }
+    
+    # Ett skrivande statement (UPDATE ... RETURNING *) vars rad returneras med department och color
+    WRITE_RETURNING_QUERY = """
+        WITH t AS ({write})
+        SELECT t.id, t.title, t.content, t.created_at, t.updated_at, 
+               d.id as department_id, d.name as department_name,
+               c.id as color_id, c.name as color_name, c.hex_value, c.description as color_description
+        FROM t
+        LEFT JOIN departments d ON t.department_id = d.id
+        LEFT JOIN colors c ON t.color_id = c.id
+    """
+    
+    # Completion type-id:n som en array av id-kolumnens egen typ, så att ANY() fungerar för uuid och heltal
+    COMPLETION_TYPE_IDS = """ARRAY(
+        SELECT r.id FROM jsonb_populate_recordset(NULL::completion_types, %s::jsonb) AS r
+    )"""
+    
+    # Fältplaner för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'id': 'id',
+        'title': 'title',
+        'content': 'content',
+        'created_at': Timestamp('created_at'),
+        'updated_at': Timestamp('updated_at'),
+        'department_id': 'department_id',
+        'color_id': 'color_id',
+        'completion_types': EmptyList()
+    })
+    LIST_ROW = ROW.without('department_id', 'color_id', 'completion_types').extend({
+        'department': Nested({'id': 'department_id', 'name': 'department_name'}, when='department_id'),
+        'color': Nested({
+            'id': 'color_id',
+            'name': 'color_name',
+            'hex_value': 'hex_value',
+            'description': 'color_description'
+        }, when='color_id'),
+        'completion_types': EmptyList()
+    })
+    DOCUMENT_ROW = LIST_ROW.extend({
+        'department': 'department',
+        'color': 'color',
+        'completion_types': 'completion_types'
+    })
+    DOCUMENT_RELATED_ROW = DOCUMENT_ROW.extend({
+        'categories': 'categories',
+        'information': 'information'
+    })
+    COMPLETION_TYPE_ROW = RowMapper({
+        'id': 'id',
+        'name': 'name',
+        'description': 'description'
+    })
+    RENDER_SOURCE_ROW = RowMapper({
+        'id': 'id',
+        'updated_at': 'updated_at',
+        'content': 'content'
+    })
+    
+    def __init__(self):
+        self.versions = TemplateVersionRepository()
+
+    def _map_list_row(self, row):
+        """Convert a LIST_QUERY row to a template dict."""
+        return self.LIST_ROW.map_row(row)
+    
+    def _attach_completion_types(self, cursor, templates):
+        """Fill in completion_types for a list of templates with one query."""
+        # Se om completion_types har template_id kolumnen
+        try:
+            has_template_id = get_schema_registry().has_column('completion_types', 'template_id')
+            
+            if has_template_id:
+                # Skapa en dictionary av templates för snabb lookup
+                templates_dict = {t['id']: t for t in templates}
+                
+                # Hämta alla completion types för alla templates på en gång
+                template_ids = list(templates_dict.keys())
+                if template_ids:
+                    placeholders = ', '.join(['%s'] * len(template_ids))
+                    
+                    cursor.execute(f"""
+                        SELECT id, name, description, template_id
+                        FROM completion_types
+                        WHERE template_id IN ({placeholders})
+                    """, template_ids)
+                    
+                    rows = cursor.fetchall()
+                    template_ids = [row[3] if isinstance(row, tuple) else row['template_id'] for row in rows]
+                    completion_types = self.COMPLETION_TYPE_ROW.map_rows(rows, cursor.description)
+                    
+                    # Lägg till completion types till rätt template
+                    for template_id, completion_type in zip(template_ids, completion_types):
+                        if template_id in templates_dict:
+                            templates_dict[template_id]['completion_types'].append(completion_type)
+        except Exception as e:
+            logger.warning("Could not retrieve completion types for templates: %s", e)
+    
+    def _sync_completion_types(self, cursor, template_id, completion_type_ids):
+        """Make completion_type_ids the completion types of a template; returns them in the given order.
+        
+        The current associations are read once and the difference is applied
+        with one UPDATE for the removed and one for the added ids, however many
+        there are. Ids that do not exist are ignored. The cursor's connection
+        must have autocommit off, so both UPDATEs commit together.
+        """
+        wanted = [ct_id for ct_id in dict.fromkeys(completion_type_ids or []) if ct_id not in (None, '')]
+        wanted_keys = {str(ct_id) for ct_id in wanted}
+        
+        cursor.execute("""
+            SELECT id, name, description
+            FROM completion_types
+            WHERE template_id = %s
+        """, (template_id,))
+        current = {str(ct['id']): ct for ct in self.COMPLETION_TYPE_ROW.fetch_all(cursor)}
+        
+        removed = [ct['id'] for key, ct in current.items() if key not in wanted_keys]
+        if removed:
+            cursor.execute(f"""
+                UPDATE completion_types
+                SET template_id = NULL
+                WHERE template_id = %s AND id = ANY({self.COMPLETION_TYPE_IDS})
+            """, (template_id, Json([{'id': ct_id} for ct_id in removed])))
+        
+        added = [ct_id for ct_id in wanted if str(ct_id) not in current]
+        if added:
+            cursor.execute(f"""
+                UPDATE completion_types
+                SET template_id = %s
+                WHERE id = ANY({self.COMPLETION_TYPE_IDS})
+                RETURNING id, name, description
+            """, (template_id, Json([{'id': ct_id} for ct_id in added])))
+            current.update((str(ct['id']), ct) for ct in self.COMPLETION_TYPE_ROW.fetch_all(cursor))
+        
+        return [current[str(ct_id)] for ct_id in wanted if str(ct_id) in current]
+    
+    def _completion_types_after_write(self, cursor, template_id, template_data):
+        """Sync the completion types of a written template if they were given, else read them."""
+        if not get_schema_registry().has_column('completion_types', 'template_id'):
+            return []
+        if 'completion_types' in template_data:
+            return self._sync_completion_types(cursor, template_id, template_data['completion_types'])
+        
+        cursor.execute("""
+            SELECT id, name, description
+            FROM completion_types
+            WHERE template_id = %s
+        """, (template_id,))
+        return self.COMPLETION_TYPE_ROW.fetch_all(cursor)
+    
     def get_all(self):
         """Get all templates."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
-            # Uppdaterad query för att hämta templates med departments och colors
-            cursor.execute("""
-                SELECT t.id, t.title, t.content, t.created_at, t.updated_at, 
-                       d.id as department_id, d.name as department_name,
-                       c.id as color_id, c.name as color_name, c.hex_value, c.description as color_description
-                FROM templates t
-                LEFT JOIN departments d ON t.department_id = d.id
-                LEFT JOIN colors c ON t.color_id = c.id
-            """)
+            cursor.execute(self.LIST_QUERY)
             
-            templates = []
-            rows = cursor.fetchall()
+            # Skapa templates från resultatet
+            templates = self.LIST_ROW.fetch_all(cursor)
             
             # Debug: Print what we're getting from the database
-            print(f"Template query returned {len(rows)} rows")
+            logger.debug("Template query returned %s rows", len(templates))
             
-            # Skapa templates från resultatet
-            for row in rows:
-                # If using RealDictCursor, row is dict-like
-                if hasattr(row, 'keys'):
-                    template = {
-                        'id': row['id'],
-                        'title': row['title'],
-                        'content': row['content'],
-                        'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                        'updated_at': row['updated_at'].isoformat() if hasattr(row['updated_at'], 'isoformat') else row['updated_at'],
-                        'department': {
-                            'id': row['department_id'],
-                            'name': row['department_name']
-                        } if row['department_id'] else None,
-                        'color': {
-                            'id': row['color_id'],
-                            'name': row['color_name'],
-                            'hex_value': row['hex_value'],
-                            'description': row['color_description']
-                        } if row['color_id'] else None,
-                        'completion_types': []
-                    }
-                # Fallback to index-based access for tuple-like rows
-                else:
-                    template = {
-                        'id': row[0],
-                        'title': row[1],
-                        'content': row[2],
-                        'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                        'updated_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                        'department': {
-                            'id': row[5],
-                            'name': row[6]
-                        } if row[5] else None,
-                        'color': {
-                            'id': row[7],
-                            'name': row[8],
-                            'hex_value': row[9],
-                            'description': row[10]
-                        } if row[7] else None,
-                        'completion_types': []
-                    }
-                
-                templates.append(template)
-                
-            # Se om completion_types har template_id kolumnen
-            try:
-                cursor.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'completion_types' AND column_name = 'template_id'
-                """)
-                
-                has_template_id = cursor.fetchone() is not None
-                
-                if has_template_id:
-                    # Skapa en dictionary av templates för snabb lookup
-                    templates_dict = {t['id']: t for t in templates}
-                    
-                    # Hämta alla completion types för alla templates på en gång
-                    template_ids = list(templates_dict.keys())
-                    if template_ids:
-                        placeholders = ', '.join(['%s'] * len(template_ids))
-                        
-                        cursor.execute(f"""
-                            SELECT id, name, description, template_id
-                            FROM completion_types
-                            WHERE template_id IN ({placeholders})
-                        """, template_ids)
-                        
-                        completion_type_rows = cursor.fetchall()
-                        
-                        # Lägg till completion types till rätt template
-                        for ct_row in completion_type_rows:
-                            if hasattr(ct_row, 'keys'):
-                                template_id = ct_row['template_id']
-                                completion_type = {
-                                    'id': ct_row['id'],
-                                    'name': ct_row['name'],
-                                    'description': ct_row['description']
-                                }
-                            else:
-                                template_id = ct_row[3]
-                                completion_type = {
-                                    'id': ct_row[0],
-                                    'name': ct_row[1],
-                                    'description': ct_row[2]
-                                }
-                            
-                            if template_id in templates_dict:
-                                templates_dict[template_id]['completion_types'].append(completion_type)
-            except Exception as e:
-                print(f"Warning: Could not retrieve completion types for templates: {e}")
+            self._attach_completion_types(cursor, templates)
             
             return templates
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository get_all at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository get_all: %s", e)
             # Return empty list on error instead of crashing
             return []
             
@@ -140,13 +215,55 @@ class TemplateRepository:
             if conn:
                 conn.close()
     
+    def get_page(self, page, aggregated=False, include_related=False):
+        """Get one keyset page of templates.
+        
+        With aggregated (or include_related) the page is read through the
+        single-query document path, see get_all_documents().
+        """
+        conn = None
+        cursor = None
+        try:
+            aggregated = aggregated or include_related
+            base_query = self._document_query(include_related=include_related) if aggregated else self.LIST_QUERY
+            query, params = build_page_query(base_query, page, self.PAGE_SORTS, self.PAGE_FILTERS)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, params)
+            
+            if aggregated:
+                return page_from_rows(page, self._document_mapper(include_related).fetch_all(cursor))
+            
+            result = page_from_rows(page, self.LIST_ROW.fetch_all(cursor))
+            self._attach_completion_types(cursor, result.items)
+            
+            return result
+            
+        except Exception as e:
+            logger.exception("Error in template repository get_page: %s", e)
+            raise
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def iter_all(self, include_related=False):
+        """Stream all templates as nested documents from a server-side cursor."""
+        yield from stream_query(
+            self._document_query(include_related=include_related),
+            mapper=self._document_mapper(include_related)
+        )
+    
     def get_by_id(self, template_id):
         """Get template by ID."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             
             # Uppdaterad query för att hämta template med department och color
             cursor.execute("""
@@ -159,60 +276,13 @@ class TemplateRepository:
                 WHERE t.id = %s
             """, (template_id,))
             
-            row = cursor.fetchone()
-            if not row:
+            template = self.LIST_ROW.fetch_one(cursor)
+            if not template:
                 return None
             
-            # If using RealDictCursor, row is dict-like
-            if hasattr(row, 'keys'):
-                template = {
-                    'id': row['id'],
-                    'title': row['title'],
-                    'content': row['content'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'updated_at': row['updated_at'].isoformat() if hasattr(row['updated_at'], 'isoformat') else row['updated_at'],
-                    'department': {
-                        'id': row['department_id'],
-                        'name': row['department_name']
-                    } if row['department_id'] else None,
-                    'color': {
-                        'id': row['color_id'],
-                        'name': row['color_name'],
-                        'hex_value': row['hex_value'],
-                        'description': row['color_description']
-                    } if row['color_id'] else None,
-                    'completion_types': []
-                }
-            # Fallback to index-based access
-            else:
-                template = {
-                    'id': row[0],
-                    'title': row[1],
-                    'content': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'updated_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                    'department': {
-                        'id': row[5],
-                        'name': row[6]
-                    } if row[5] else None,
-                    'color': {
-                        'id': row[7],
-                        'name': row[8],
-                        'hex_value': row[9],
-                        'description': row[10]
-                    } if row[7] else None,
-                    'completion_types': []
-                }
-            
             # Se om completion_types har template_id kolumnen
             try:
-                cursor.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'completion_types' AND column_name = 'template_id'
-                """)
-                
-                has_template_id = cursor.fetchone() is not None
+                has_template_id = get_schema_registry().has_column('completion_types', 'template_id')
                 
                 if has_template_id:
                     # Hämta completion types för denna template
@@ -222,35 +292,14 @@ class TemplateRepository:
                         WHERE template_id = %s
                     """, (template_id,))
                     
-                    completion_type_rows = cursor.fetchall()
-                    
-                    # Lägg till completion types till template
-                    for ct_row in completion_type_rows:
-                        if hasattr(ct_row, 'keys'):
-                            completion_type = {
-                                'id': ct_row['id'],
-                                'name': ct_row['name'],
-                                'description': ct_row['description']
-                            }
-                        else:
-                            completion_type = {
-                                'id': ct_row[0],
-                                'name': ct_row[1],
-                                'description': ct_row[2]
-                            }
-                        
-                        template['completion_types'].append(completion_type)
+                    template['completion_types'] = self.COMPLETION_TYPE_ROW.fetch_all(cursor)
             except Exception as e:
-                print(f"Warning: Could not retrieve completion types for template {template_id}: {e}")
+                logger.warning("Could not retrieve completion types for template %s: %s", template_id, e)
             
             return template
             
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository get_by_id at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository get_by_id: %s", e)
             return None
             
         finally:
@@ -259,12 +308,161 @@ class TemplateRepository:
             if conn:
                 conn.close()
     
+    def _document_query(self, where_clause='', include_related=False):
+        """Build the single-statement query that returns templates as nested documents."""
+        # Bygg nästlade objekt direkt i Postgres istället för rad för rad i Python
+        select_parts = [
+            "t.id", "t.title", "t.content", "t.created_at", "t.updated_at",
+            """CASE WHEN d.id IS NOT NULL
+                   THEN json_build_object('id', d.id, 'name', d.name)
+               END AS department""",
+            """CASE WHEN c.id IS NOT NULL
+                   THEN json_build_object('id', c.id, 'name', c.name,
+                                          'hex_value', c.hex_value, 'description', c.description)
+               END AS color"""
+        ]
+        
+        if get_schema_registry().has_column('completion_types', 'template_id'):
+            select_parts.append("""COALESCE((
+                    SELECT json_agg(json_build_object('id', ct.id, 'name', ct.name,
+                                                      'description', ct.description) ORDER BY ct.id)
+                    FROM completion_types ct
+                    WHERE ct.template_id = t.id
+                ), '[]'::json) AS completion_types""")
+        else:
+            select_parts.append("'[]'::json AS completion_types")
+        
+        if include_related:
+            select_parts.append("""COALESCE((
+                    SELECT json_agg(json_build_object('id', cat.id, 'name', cat.name,
+                                                      'description', cat.description,
+                                                      'created_at', cat.created_at,
+                                                      'template_id', cat.template_id) ORDER BY cat.name)
+                    FROM categories cat
+                    WHERE cat.template_id = t.id
+                ), '[]'::json) AS categories""")
+            select_parts.append("""COALESCE((
+                    SELECT json_agg(json_build_object('id', i.id, 'name', i.name, 'label', i.label,
+                                                      'description', i.description,
+                                                      'created_at', i.created_at,
+                                                      'template_id', i.template_id,
+                                                      'comments', i.comments) ORDER BY i.name)
+                    FROM information i
+                    WHERE i.template_id = t.id
+                ), '[]'::json) AS information""")
+        
+        return f"""
+            SELECT {', '.join(select_parts)}
+            FROM templates t
+            LEFT JOIN departments d ON t.department_id = d.id
+            LEFT JOIN colors c ON t.color_id = c.id
+            {where_clause}
+        """
+    
+    def _document_mapper(self, include_related=False):
+        """The mapper for rows from _document_query."""
+        return self.DOCUMENT_RELATED_ROW if include_related else self.DOCUMENT_ROW
+    
+    def _document_from_row(self, row, include_related=False):
+        """Convert a row from _document_query to the template dict shape."""
+        # Tidsstämplarna formateras i Python så att formatet är identiskt med get_all
+        return self._document_mapper(include_related).map_row(row)
+    
+    def get_all_documents(self, include_related=False):
+        """Get all templates as nested documents using a single query.
+        
+        Returns the same shape as get_all(). With include_related the documents
+        also carry the template's categories and information items.
+        """
+        conn = None
+        cursor = None
+        try:
+            query = self._document_query(include_related=include_related)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query)
+            templates = self._document_mapper(include_related).fetch_all(cursor)
+            
+            logger.debug("Template document query returned %s rows", len(templates))
+            
+            return templates
+            
+        except Exception as e:
+            logger.exception("Error in template repository get_all_documents: %s", e)
+            # Return empty list on error instead of crashing
+            return []
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def get_document_by_id(self, template_id, include_related=False):
+        """Get a template as a nested document using a single query."""
+        conn = None
+        cursor = None
+        try:
+            query = self._document_query("WHERE t.id = %s", include_related)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, (template_id,))
+            
+            return self._document_mapper(include_related).fetch_one(cursor)
+            
+        except Exception as e:
+            logger.exception("Error in template repository get_document_by_id: %s", e)
+            return None
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def get_render_source(self, template_id, known_updated_at=None):
+        """Get what the renderer needs for a template: id, updated_at and content.
+        
+        content is None when updated_at equals known_updated_at, so a cached
+        compiled template costs one small round-trip. Templates without
+        updated_at always get their content. Returns None if the template does
+        not exist; unlike the other getters, database errors are raised so
+        callers can tell them apart from a missing template.
+        """
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT id, updated_at,
+                       CASE WHEN updated_at = %s THEN NULL ELSE content END AS content
+                FROM templates
+                WHERE id = %s
+            """, (known_updated_at, template_id))
+            return self.RENDER_SOURCE_ROW.fetch_one(cursor)
+        
+        except Exception as e:
+            logger.exception("Error in template repository get_render_source: %s", e)
+            raise
+        
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
     def create(self, template_data):
         """Create a new template."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
+            # Poolens anslutningar är autocommit; mallen, dess completion types och
+            # första version ska skrivas i en transaktion (poolen återställer vid release)
+            conn.autocommit = False
             cursor = conn.cursor()
             
             # Ta med både department_id och color_id om de finns
@@ -290,52 +488,14 @@ class TemplateRepository:
             """
             
             cursor.execute(query, values)
-            row = cursor.fetchone()
-            
-            # If using RealDictCursor, row is dict-like
-            if hasattr(row, 'keys'):
-                template = {
-                    'id': row['id'],
-                    'title': row['title'],
-                    'content': row['content'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'updated_at': row['updated_at'].isoformat() if hasattr(row['updated_at'], 'isoformat') else row['updated_at'],
-                    'department_id': row['department_id'],
-                    'color_id': row['color_id'],
-                    'completion_types': []
-                }
-            # Fallback to index-based access
-            else:
-                template = {
-                    'id': row[0],
-                    'title': row[1],
-                    'content': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'updated_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                    'department_id': row[5],
-                    'color_id': row[6],
-                    'completion_types': []
-                }
+            template = self.ROW.fetch_one(cursor)
             
             # Se om completion_types har template_id kolumnen
-            try:
-                cursor.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'completion_types' AND column_name = 'template_id'
-                """)
-                
-                has_template_id = cursor.fetchone() is not None
-                
-                if has_template_id and 'completion_types' in template_data and template_data['completion_types']:
-                    for ct_id in template_data['completion_types']:
-                        cursor.execute("""
-                            UPDATE completion_types
-                            SET template_id = %s
-                            WHERE id = %s
-                        """, (template['id'], ct_id))
-            except Exception as e:
-                print(f"Warning: Could not associate completion types with template {template['id']}: {e}")
+            if template_data.get('completion_types') and get_schema_registry().has_column('completion_types', 'template_id'):
+                template['completion_types'] = self._sync_completion_types(cursor, template['id'], template_data['completion_types'])
+
+            if self.versions.available():
+                self.versions.append(cursor, template['id'], template['title'], template['content'])
             
             conn.commit()
             return template
@@ -343,11 +503,7 @@ class TemplateRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository create at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository create: %s", e)
             raise
             
         finally:
@@ -357,11 +513,14 @@ class TemplateRepository:
                 conn.close()
     
     def update(self, template_id, template_data):
-        """Update a template."""
+        """Update a template; returns it nested like get_by_id(), or None if it does not exist."""
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
+            # En transaktion, så att radlåset hålls tills versionen är skriven och
+            # en misslyckad version rullar tillbaka ändringen (poolen återställer vid release)
+            conn.autocommit = False
             cursor = conn.cursor()
             
             # Bygg uppdateringsfrågan dynamiskt baserat på vilka fält som ska uppdateras
@@ -378,73 +537,66 @@ class TemplateRepository:
             
             # Lägg till template_id i values
             values.append(template_id)
-            
-            # Bygg query
-            query = f"""
+
+            # Lås raden och läs dess innehåll före ändringen, som nästa version jämförs mot
+            previous = None
+            if self.versions.available():
+                cursor.execute("SELECT title, content FROM templates WHERE id = %s FOR UPDATE", (template_id,))
+                previous = cursor.fetchone()
+                if previous is None:
+                    return None
+            
+            # Uppdatera och hämta department och color i samma fråga
+            cursor.execute(self.WRITE_RETURNING_QUERY.format(write=f"""
                 UPDATE templates
                 SET {', '.join(query_parts)}
                 WHERE id = %s
-                RETURNING id, title, content, created_at, updated_at, department_id, color_id
-            """
-            
-            cursor.execute(query, values)
-            row = cursor.fetchone()
-            if not row:
+                RETURNING *
+            """), values)
+            template = self.LIST_ROW.fetch_one(cursor)
+            if not template:
                 return None
+
+            template['completion_types'] = self._completion_types_after_write(cursor, template['id'], template_data)
+
+            if previous is not None:
+                self.versions.append(cursor, template['id'], template['title'], template['content'], previous)
             
-            # If using RealDictCursor, row is dict-like
-            if hasattr(row, 'keys'):
-                template = {
-                    'id': row['id'],
-                    'title': row['title'],
-                    'content': row['content'],
-                    'created_at': row['created_at'].isoformat() if hasattr(row['created_at'], 'isoformat') else row['created_at'],
-                    'updated_at': row['updated_at'].isoformat() if hasattr(row['updated_at'], 'isoformat') else row['updated_at'],
-                    'department_id': row['department_id'],
-                    'color_id': row['color_id'],
-                    'completion_types': []
-                }
-            # Fallback to index-based access
-            else:
-                template = {
-                    'id': row[0],
-                    'title': row[1],
-                    'content': row[2],
-                    'created_at': row[3].isoformat() if hasattr(row[3], 'isoformat') else row[3],
-                    'updated_at': row[4].isoformat() if hasattr(row[4], 'isoformat') else row[4],
-                    'department_id': row[5],
-                    'color_id': row[6],
-                    'completion_types': []
-                }
+            conn.commit()
+            return template
             
-            # Se om completion_types har template_id kolumnen
-            try:
-                cursor.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'completion_types' AND column_name = 'template_id'
-                """)
-                
-                has_template_id = cursor.fetchone() is not None
-                
-                if has_template_id and 'completion_types' in template_data:
-                    # Rensa befintliga relationer
-                    cursor.execute("""
-                        UPDATE completion_types
-                        SET template_id = NULL
-                        WHERE template_id = %s
-                    """, (template_id,))
-                    
-                    # Skapa nya relationer
-                    if template_data['completion_types']:
-                        for ct_id in template_data['completion_types']:
-                            cursor.execute("""
-                                UPDATE completion_types
-                                SET template_id = %s
-                                WHERE id = %s
-                            """, (template_id, ct_id))
-            except Exception as e:
-                print(f"Warning: Could not update completion type associations for template {template_id}: {e}")
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            logger.exception("Error in template repository update: %s", e)
+            raise
+            
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def set_completion_types(self, template_id, completion_type_ids):
+        """Replace the completion types of a template; returns it nested like get_by_id(), or None if it does not exist."""
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            # Borttagningen och tilläggen av associationer ska gå i en transaktion
+            # (poolens anslutningar är autocommit; poolen återställer vid release)
+            conn.autocommit = False
+            cursor = conn.cursor()
+            
+            # Enbart associationerna ändras, så mallen läses utan att updated_at rörs
+            cursor.execute(f"{self.LIST_QUERY} WHERE t.id = %s", (template_id,))
+            template = self.LIST_ROW.fetch_one(cursor)
+            if not template:
+                return None
+
+            template['completion_types'] = self._completion_types_after_write(
+                cursor, template['id'], {'completion_types': completion_type_ids}
+            )
             
             conn.commit()
             return template
@@ -452,11 +604,7 @@ class TemplateRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository update at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository set_completion_types: %s", e)
             raise
             
         finally:
@@ -471,26 +619,18 @@ class TemplateRepository:
         cursor = None
         try:
             conn = get_db_connection()
+            # Poolens anslutningar är autocommit; completion types ska lösgöras och
+            # mallen tas bort i en transaktion (poolen återställer vid release)
+            conn.autocommit = False
             cursor = conn.cursor()
             
             # Rensa relationer i completion_types om template_id kolumnen finns
-            try:
+            if get_schema_registry().has_column('completion_types', 'template_id'):
                 cursor.execute("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'completion_types' AND column_name = 'template_id'
-                """)
-                
-                has_template_id = cursor.fetchone() is not None
-                
-                if has_template_id:
-                    cursor.execute("""
-                        UPDATE completion_types
-                        SET template_id = NULL
-                        WHERE template_id = %s
-                    """, (template_id,))
-            except Exception as e:
-                print(f"Warning: Could not clear completion type associations for template {template_id}: {e}")
+                    UPDATE completion_types
+                    SET template_id = NULL
+                    WHERE template_id = %s
+                """, (template_id,))
             
             # Ta bort template
             cursor.execute("DELETE FROM templates WHERE id = %s RETURNING id", (template_id,))
@@ -503,11 +643,7 @@ class TemplateRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository delete at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository delete: %s", e)
             raise
             
         finally:
@@ -550,11 +686,7 @@ class TemplateRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository update_color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository update_color: %s", e)
             raise
             
         finally:
@@ -588,11 +720,7 @@ class TemplateRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository remove_color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository remove_color: %s", e)
             raise
             
         finally:
@@ -610,16 +738,10 @@ class TemplateRepository:
             cursor = conn.cursor()
             
             # Kontrollera om completion_types har template_id kolumnen
-            cursor.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'completion_types' AND column_name = 'template_id'
-            """)
-            
-            has_template_id = cursor.fetchone() is not None
+            has_template_id = get_schema_registry().has_column('completion_types', 'template_id')
             
             if not has_template_id:
-                print(f"Warning: completion_types table does not have template_id column")
+                logger.warning("completion_types table does not have template_id column")
                 return False
             
             cursor.execute("""
@@ -638,11 +760,7 @@ class TemplateRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository associate_completion_type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository associate_completion_type: %s", e)
             raise
             
         finally:
@@ -660,16 +778,10 @@ class TemplateRepository:
             cursor = conn.cursor()
             
             # Kontrollera om completion_types har template_id kolumnen
-            cursor.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'completion_types' AND column_name = 'template_id'
-            """)
-            
-            has_template_id = cursor.fetchone() is not None
+            has_template_id = get_schema_registry().has_column('completion_types', 'template_id')
             
             if not has_template_id:
-                print(f"Warning: completion_types table does not have template_id column")
+                logger.warning("completion_types table does not have template_id column")
                 return False
             
             cursor.execute("""
@@ -688,11 +800,7 @@ class TemplateRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error in template repository remove_completion_type_association at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error in template repository remove_completion_type_association: %s", e)
             raise
             
         finally:
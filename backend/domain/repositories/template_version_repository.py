@@ -0,0 +1,224 @@
+from domain.versioning.delta import apply_delta, content_hash, delta_size, make_delta
+from infrastructure.config.config import get_settings
+from infrastructure.database.connection import get_db_connection
+from infrastructure.database.mapping import RowMapper, Timestamp, tuple_cursor
+from infrastructure.database.schema import get_schema_registry
+from infrastructure.metrics.metrics import instrument_repository
+from psycopg2.extras import Json
+import logging
+
+logger = logging.getLogger(__name__)
+
+@instrument_repository
+class TemplateVersionRepository:
+    """Repository for the append-only version history of template titles and content.
+
+    Versions are stored as deltas against the version before them, with a
+    full snapshot at least every TEMPLATE_SNAPSHOT_INTERVAL versions, so
+    rebuilding any version reads at most that many rows. The latest version
+    is served from the templates row itself.
+    """
+
+    LAST_QUERY = """
+        SELECT version, base_version, content_hash
+        FROM template_versions
+        WHERE template_id = %s
+        ORDER BY version DESC
+        LIMIT 1
+    """
+
+    # The snapshot a version is built from and the deltas up to the version
+    CHAIN_QUERY = """
+        SELECT version, kind, title, content, delta, content_hash, created_at
+        FROM template_versions
+        WHERE template_id = %(id)s
+          AND version BETWEEN (
+              SELECT base_version FROM template_versions WHERE template_id = %(id)s AND version = %(version)s
+          ) AND %(version)s
+        ORDER BY version
+    """
+
+    LATEST_QUERY = """
+        SELECT v.version, v.title, v.content_hash, v.created_at,
+               (SELECT t.content FROM templates t WHERE t.id = %(id)s) AS content
+        FROM template_versions v
+        WHERE v.template_id = %(id)s
+        ORDER BY v.version DESC
+        LIMIT 1
+    """
+
+    # Fältplaner för radmappning (se infrastructure.database.mapping)
+    LAST_ROW = RowMapper({
+        'version': 'version',
+        'base_version': 'base_version',
+        'content_hash': 'content_hash'
+    })
+    ROW = RowMapper({
+        'version': 'version',
+        'kind': 'kind',
+        'title': 'title',
+        'content_hash': 'content_hash',
+        'created_at': Timestamp('created_at')
+    })
+    CHAIN_ROW = ROW.extend({
+        'content': 'content',
+        'delta': 'delta'
+    })
+    LATEST_ROW = ROW.without('kind').extend({
+        'content': 'content'
+    })
+
+    def available(self):
+        """Check whether the template_versions migration has been applied."""
+        return get_schema_registry().has_table('template_versions')
+
+    def _insert(self, cursor, template_id, version, base_version, title, content, delta=None):
+        cursor.execute("""
+            INSERT INTO template_versions
+                (template_id, version, kind, base_version, title, content, delta, content_hash)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, (
+            template_id, version, 'delta' if delta is not None else 'snapshot', base_version,
+            title, None if delta is not None else content, Json(delta) if delta is not None else None,
+            content_hash(content)
+        ))
+
+    def append(self, cursor, template_id, title, content, previous=None):
+        """Record a version of a template with the caller's cursor; returns its number.
+
+        The cursor's connection must have autocommit off, so the version is
+        committed or rolled back together with the template write. For an
+        update, the caller must also hold the template row's lock (SELECT ...
+        FOR UPDATE) until it commits, so concurrent updates number their
+        versions one after another.
+
+        previous is the (title, content) the template held before the write,
+        or None for a new template. A template changed outside this API
+        since its last version first gets that state recorded as a snapshot,
+        so every delta applies to the content it was made from. Writes that
+        change neither title nor content add no version.
+        """
+        template_id = str(template_id)
+        content = content or ''
+        cursor.execute(self.LAST_QUERY, (template_id,))
+        last = self.LAST_ROW.fetch_one(cursor)
+
+        version = last['version'] + 1 if last else 1
+        base_version = last['base_version'] if last else None
+        if previous is not None:
+            previous_title, previous_content = previous[0], previous[1] or ''
+            if last is None or last['content_hash'] != content_hash(previous_content):
+                self._insert(cursor, template_id, version, version, previous_title, previous_content)
+                base_version = version
+                version += 1
+            elif previous_title == title and previous_content == content:
+                return last['version']
+
+        interval = get_settings()['TEMPLATE_SNAPSHOT_INTERVAL']
+        if previous is None or version - base_version >= interval:
+            self._insert(cursor, template_id, version, version, title, content)
+            return version
+
+        delta = make_delta(previous_content, content)
+        if delta_size(delta) * 2 > len(content):
+            # Most of the text changed; a snapshot is about as small and ends the chain
+            self._insert(cursor, template_id, version, version, title, content)
+        else:
+            self._insert(cursor, template_id, version, base_version, title, content, delta)
+        return version
+
+    def list_versions(self, template_id):
+        """Get the versions of a template without content, newest first; [] without history."""
+        if not self.available():
+            return []
+
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute("""
+                SELECT version, kind, title, content_hash, created_at
+                FROM template_versions
+                WHERE template_id = %s
+                ORDER BY version DESC
+            """, (str(template_id),))
+
+            return self.ROW.fetch_all(cursor)
+
+        except Exception as e:
+            logger.exception("Error in template version repository list_versions: %s", e)
+            raise
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    def get_version(self, template_id, version):
+        """Get one version with its content, rebuilt from its snapshot; None if it does not exist."""
+        if not self.available():
+            return None
+
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.CHAIN_QUERY, {'id': str(template_id), 'version': version})
+            chain = self.CHAIN_ROW.fetch_all(cursor)
+            if not chain:
+                return None
+
+            content = chain[0]['content']
+            for row in chain[1:]:
+                content = apply_delta(content, row['delta'])
+
+            found = chain[-1]
+            if content_hash(content) != found['content_hash']:
+                raise RuntimeError(f"Version {version} of template {template_id} does not match its hash")
+
+            found['content'] = content
+            del found['kind'], found['delta']
+            return found
+
+        except Exception as e:
+            logger.exception("Error in template version repository get_version: %s", e)
+            raise
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+    def get_latest(self, template_id):
+        """Get the newest version; its content comes from the templates row when that still matches."""
+        if not self.available():
+            return None
+
+        conn = None
+        cursor = None
+        try:
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.LATEST_QUERY, {'id': str(template_id)})
+            latest = self.LATEST_ROW.fetch_one(cursor)
+
+        except Exception as e:
+            logger.exception("Error in template version repository get_latest: %s", e)
+            raise
+
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+
+        if latest is None:
+            return None
+        if latest['content'] is not None and content_hash(latest['content']) == latest['content_hash']:
+            return latest
+        # Deleted, or changed outside this API since: rebuild from the history
+        return self.get_version(template_id, latest['version'])
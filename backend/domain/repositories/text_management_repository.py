@@ -1,44 +1,49 @@
-from infrastructure.database.connection import get_db_connection
-import traceback
-import sys
+from infrastructure.database.bulk import bulk_write
+from infrastructure.database.connection import get_db_connection, stream_query
+from infrastructure.database.mapping import RowMapper, tuple_cursor
+from infrastructure.database.pagination import build_page_query, page_from_rows
+from infrastructure.metrics.metrics import instrument_repository
+import logging
 
+logger = logging.getLogger(__name__)
+
+@instrument_repository
 class TextManagementRepository:
+    LIST_QUERY = "SELECT id, namn, beskrivning, variabel_namn, comments FROM category_variabels"
+    
+    # Sorterings- och filterfält som får användas vid keyset-paginering
+    PAGE_SORTS = {
+        'id': 'id',
+        'namn': 'namn'
+    }
+    PAGE_FILTERS = {
+        'name': ('namn', 'prefix', str)
+    }
+    
+    # Fältplan för radmappning (se infrastructure.database.mapping)
+    ROW = RowMapper({
+        'id': 'id',
+        'namn': 'namn',
+        'beskrivning': 'beskrivning',
+        'variabel_namn': 'variabel_namn',
+        'comments': 'comments'
+    })
+    
+    def _map_variable(self, var):
+        # Konvertera databasresultat till JSON-vänligt format
+        return self.ROW.map_row(var)
+    
     def get_all_variables(self):
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, namn, beskrivning, variabel_namn, comments FROM category_variabels")
-            variables = cursor.fetchall()
+            cursor = tuple_cursor(conn)
+            cursor.execute(self.LIST_QUERY)
             
-            # Konvertera databasresultat till JSON-vänligt format
-            result = []
-            for var in variables:
-                if hasattr(var, 'keys'):
-                    # Om vi använder RealDictCursor
-                    variable = {
-                        'id': var['id'],
-                        'namn': var['namn'],
-                        'beskrivning': var['beskrivning'],
-                        'variabel_namn': var['variabel_namn'],
-                        'comments': var['comments']
-                    }
-                else:
-                    # Använder reguljär cursor
-                    variable = {
-                        'id': var[0],
-                        'namn': var[1],
-                        'beskrivning': var[2],
-                        'variabel_namn': var[3],
-                        'comments': var[4]
-                    }
-                result.append(variable)
-                
-            return result
+            return self.ROW.fetch_all(cursor)
         except Exception as e:
-            print(f"Error getting variables: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting variables: %s", e)
             return []
         finally:
             if cursor:
@@ -46,42 +51,44 @@ class TextManagementRepository:
             if conn:
                 conn.close()
     
+    def get_variables_page(self, page):
+        conn = None
+        cursor = None
+        try:
+            query, params = build_page_query(self.LIST_QUERY, page, self.PAGE_SORTS, self.PAGE_FILTERS)
+            
+            conn = get_db_connection()
+            cursor = tuple_cursor(conn)
+            cursor.execute(query, params)
+            
+            return page_from_rows(page, self.ROW.fetch_all(cursor))
+        except Exception as e:
+            logger.exception("Error getting variables page: %s", e)
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+            if conn:
+                conn.close()
+    
+    def iter_variables(self):
+        yield from stream_query(self.LIST_QUERY, mapper=self.ROW)
+    
     def get_variable_by_id(self, variable_id):
         conn = None
         cursor = None
         try:
             conn = get_db_connection()
-            cursor = conn.cursor()
+            cursor = tuple_cursor(conn)
             cursor.execute("SELECT id, namn, beskrivning, variabel_namn, comments FROM category_variabels WHERE id = %s", (variable_id,))
-            var = cursor.fetchone()
-            
-            if not var:
-                return None
-                
             # Konvertera till JSON-vänligt format
-            if hasattr(var, 'keys'):
-                # Om vi använder RealDictCursor
-                variable = {
-                    'id': var['id'],
-                    'namn': var['namn'],
-                    'beskrivning': var['beskrivning'],
-                    'variabel_namn': var['variabel_namn'],
-                    'comments': var['comments']
-                }
-            else:
-                # Använder reguljär cursor
-                variable = {
-                    'id': var[0],
-                    'namn': var[1],
-                    'beskrivning': var[2],
-                    'variabel_namn': var[3],
-                    'comments': var[4]
-                }
-                
+            variable = self.ROW.fetch_one(cursor)
+            if not variable:
+                return None
+            
             return variable
         except Exception as e:
-            print(f"Error getting variable {variable_id}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting variable %s: %s", variable_id, e)
             return None
         finally:
             if cursor:
@@ -106,35 +113,15 @@ class TextManagementRepository:
                 )
             )
             
-            var = cursor.fetchone()
-            
             # Konvertera till JSON-vänligt format
-            if hasattr(var, 'keys'):
-                # Om vi använder RealDictCursor
-                variable = {
-                    'id': var['id'],
-                    'namn': var['namn'],
-                    'beskrivning': var['beskrivning'],
-                    'variabel_namn': var['variabel_namn'],
-                    'comments': var['comments']
-                }
-            else:
-                # Använder reguljär cursor
-                variable = {
-                    'id': var[0],
-                    'namn': var[1],
-                    'beskrivning': var[2],
-                    'variabel_namn': var[3],
-                    'comments': var[4]
-                }
+            variable = self.ROW.fetch_one(cursor)
             
             conn.commit()
             return variable
         except Exception as e:
             if conn:
                 conn.rollback()
-            print(f"Error creating variable: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating variable: %s", e)
             raise
         finally:
             if cursor:
@@ -160,38 +147,17 @@ class TextManagementRepository:
                 )
             )
             
-            var = cursor.fetchone()
-            
-            if not var:
-                return None
-                
             # Konvertera till JSON-vänligt format
-            if hasattr(var, 'keys'):
-                # Om vi använder RealDictCursor
-                variable = {
-                    'id': var['id'],
-                    'namn': var['namn'],
-                    'beskrivning': var['beskrivning'],
-                    'variabel_namn': var['variabel_namn'],
-                    'comments': var['comments']
-                }
-            else:
-                # Använder reguljär cursor
-                variable = {
-                    'id': var[0],
-                    'namn': var[1],
-                    'beskrivning': var[2],
-                    'variabel_namn': var[3],
-                    'comments': var[4]
-                }
+            variable = self.ROW.fetch_one(cursor)
+            if not variable:
+                return None
             
             conn.commit()
             return variable
         except Exception as e:
             if conn:
                 conn.rollback()
-            print(f"Error updating variable {variable_id}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating variable %s: %s", variable_id, e)
             raise
         finally:
             if cursor:
@@ -214,11 +180,24 @@ class TextManagementRepository:
         except Exception as e:
             if conn:
                 conn.rollback()
-            print(f"Error deleting variable {variable_id}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting variable %s: %s", variable_id, e)
             raise
         finally:
             if cursor:
                 cursor.close()
             if conn:
-                conn.close()
\ No newline at end of file
+                conn.close()
+    
+    def bulk_write_variables(self, creates=(), updates=(), deletes=(), atomic=False):
+        """Create, update and delete variables in one transaction (see infrastructure.database.bulk)."""
+        try:
+            return bulk_write(
+                'category_variabels',
+                columns=('namn', 'beskrivning', 'variabel_namn', 'comments'),
+                returning=('id', 'namn', 'beskrivning', 'variabel_namn', 'comments'),
+                creates=creates, updates=updates, deletes=deletes,
+                atomic=atomic
+            )
+        except Exception as e:
+            logger.exception("Error in bulk write of variables: %s", e)
+            raise
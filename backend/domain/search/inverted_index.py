@@ -0,0 +1,202 @@
+import heapq
+import html
+import math
+import re
+
+# Words are runs of letters and digits; underscores separate words, as in Postgres
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+# Title words count double, like the A/B weights of the Postgres index
+TITLE_WEIGHT = 2.0
+BODY_WEIGHT = 1.0
+
+# Trigram (Jaccard) similarity a vocabulary word needs to match a misspelled query word
+FUZZY_THRESHOLD = 0.4
+# Fuzzy candidates considered per query word
+FUZZY_CANDIDATES = 3
+
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+SNIPPET_WORDS = 20
+
+# Control characters ts_headline marks matches with, so the text can be
+# escaped before the marks become HTML
+HEADLINE_START = '\x02'
+HEADLINE_STOP = '\x03'
+
+def tokenize(text):
+    """Lowercased words of a text; the pattern is Unicode-aware, so å, ä and ö stay inside words."""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def _trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SearchDocument:
+    """One searchable row: entity type, id, title and body text."""
+
+    __slots__ = ('entity', 'id', 'title', 'body', 'key')
+
+    def __init__(self, entity, id, title, body):
+        self.entity = entity
+        self.id = id
+        self.title = title or ''
+        self.body = body or ''
+        self.key = f"{entity}:{id}"
+
+class InvertedIndex:
+    """In-memory full-text index with typo tolerance, used when Postgres search is not available.
+
+    Every word maps to the documents containing it and a weighted term
+    frequency; a trigram index over the vocabulary finds the words closest to
+    a misspelled query word. A document matches when every query word
+    matches one of its words, exactly or fuzzily, and hits are ranked by
+    TF-IDF, scaled by the similarity of fuzzy matches.
+    """
+
+    def __init__(self, documents):
+        self.documents = []
+        self._postings = {}
+        self._trigrams = {}
+        self._trigram_counts = {}
+
+        for document in documents:
+            position = len(self.documents)
+            self.documents.append(document)
+            weights = {}
+            for token in tokenize(document.title):
+                weights[token] = weights.get(token, 0.0) + TITLE_WEIGHT
+            for token in tokenize(document.body):
+                weights[token] = weights.get(token, 0.0) + BODY_WEIGHT
+            for token, weight in weights.items():
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = {}
+                    trigrams = _trigrams(token)
+                    self._trigram_counts[token] = len(trigrams)
+                    for trigram in trigrams:
+                        self._trigrams.setdefault(trigram, set()).add(token)
+                postings[position] = weight
+
+    def __len__(self):
+        return len(self.documents)
+
+    def _expand(self, word):
+        """Vocabulary words matching a query word, with their similarity (1.0 for the word itself)."""
+        if word in self._postings:
+            return [(word, 1.0)]
+
+        wanted = _trigrams(word)
+        shared = {}
+        for trigram in wanted:
+            for candidate in self._trigrams.get(trigram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        scored = []
+        for candidate, count in shared.items():
+            similarity = count / (len(wanted) + self._trigram_counts[candidate] - count)
+            if similarity >= FUZZY_THRESHOLD:
+                scored.append((similarity, candidate))
+        scored.sort(reverse=True)
+        return [(candidate, similarity) for similarity, candidate in scored[:FUZZY_CANDIDATES]]
+
+    def search(self, query, entities=None, limit=None, after=None):
+        """Ranked hits for a query, best first: a list of (rank, document, matched words).
+
+        after is the (rank, key) of the last hit of the previous page; limit
+        caps the number of hits returned.
+        """
+        words = list(dict.fromkeys(tokenize(query)))
+        if not words:
+            return []
+
+        # Every query word has to match, as with websearch_to_tsquery
+        expansions = [self._expand(word) for word in words]
+        if not all(expansions):
+            return []
+
+        total = len(self.documents)
+        scores = None
+        for expansion in expansions:
+            word_scores = {}
+            for term, similarity in expansion:
+                postings = self._postings[term]
+                factor = math.log(1 + total / len(postings)) * similarity
+                if not word_scores:
+                    word_scores = {position: weight * factor for position, weight in postings.items()}
+                    continue
+                for position, weight in postings.items():
+                    score = weight * factor
+                    if score > word_scores.get(position, 0.0):
+                        word_scores[position] = score
+
+            if scores is None:
+                scores = word_scores
+            else:
+                if len(word_scores) < len(scores):
+                    scores, word_scores = word_scores, scores
+                scores = {
+                    position: score + word_scores[position]
+                    for position, score in scores.items() if position in word_scores
+                }
+            if not scores:
+                return []
+
+        documents = self.documents
+        candidates = (
+            (-score, documents[position].key, position) for position, score in scores.items()
+            if entities is None or documents[position].entity in entities
+        )
+        if after is not None:
+            boundary = (-after[0], after[1])
+            candidates = (candidate for candidate in candidates if candidate[:2] > boundary)
+        ranked = heapq.nsmallest(limit, candidates) if limit is not None else sorted(candidates)
+
+        hits = []
+        for negated, _, position in ranked:
+            terms = {
+                term for expansion in expansions for term, _ in expansion
+                if position in self._postings[term]
+            }
+            hits.append((-negated, documents[position], terms))
+        return hits
+
+def highlight(text, terms, snippet=False):
+    """HTML-escape text and wrap its words found in terms in <mark> tags.
+
+    With snippet, only about SNIPPET_WORDS words around the first match are
+    kept, like the fragments of ts_headline.
+    """
+    if not text:
+        return ''
+
+    pieces = []
+    first = None
+    last_end = 0
+    for match in TOKEN_PATTERN.finditer(text):
+        if match.group().lower() in terms:
+            if first is None:
+                first = match.start()
+            pieces.append(html.escape(text[last_end:match.start()]))
+            pieces.append(f"{HIGHLIGHT_START}{html.escape(match.group())}{HIGHLIGHT_STOP}")
+            last_end = match.end()
+    pieces.append(html.escape(text[last_end:]))
+    marked = ''.join(pieces)
+
+    if not snippet:
+        return marked
+
+    words = marked.split()
+    if first is None:
+        return ' '.join(words[:SNIPPET_WORDS])
+    start = max(len(text[:first].split()) - SNIPPET_WORDS // 4, 0)
+    return ' '.join(words[start:start + SNIPPET_WORDS])
+
+def render_headline(text):
+    """HTML-escape a ts_headline result and turn its HEADLINE_START/STOP marks into <mark> tags."""
+    if not text:
+        return ''
+    escaped = html.escape(text)
+    # A word matched by both the Swedish and the English pass is marked twice
+    escaped = escaped.replace(HEADLINE_START * 2, HEADLINE_START).replace(HEADLINE_STOP * 2, HEADLINE_STOP)
+    return escaped.replace(HEADLINE_START, HIGHLIGHT_START).replace(HEADLINE_STOP, HIGHLIGHT_STOP)
@@ -0,0 +1,81 @@
+from domain.search.inverted_index import (
+    HEADLINE_START,
+    HEADLINE_STOP,
+    InvertedIndex,
+    SearchDocument,
+    highlight,
+    render_headline,
+    tokenize,
+)
+
+DOCUMENTS = [
+    SearchDocument('template', '1', 'Försenat tåg', 'Ersättning vid försening av tåg till Malmö'),
+    SearchDocument('template', '2', 'Ombokning', 'Boka om din resa till Stockholm'),
+    SearchDocument('information', '3', 'Ersättning', 'Regler för ersättning vid försening'),
+    SearchDocument('variable', '4', None, None),
+]
+
+def keys(hits):
+    return [document.key for _, document, _ in hits]
+
+def test_tokenize_keeps_swedish_letters_and_splits_on_underscores():
+    assert tokenize('Tåg_nummer 12, Malmö!') == ['tåg', 'nummer', '12', 'malmö']
+    assert tokenize(None) == []
+
+def test_every_query_word_must_match():
+    index = InvertedIndex(DOCUMENTS)
+
+    assert len(index) == 4
+    assert keys(index.search('ersättning försening')) == ['information:3', 'template:1']
+    assert index.search('ersättning stockholm') == []
+    assert index.search('!!') == []
+
+def test_title_matches_rank_higher():
+    index = InvertedIndex(DOCUMENTS)
+
+    hits = index.search('ersättning')
+    assert keys(hits) == ['information:3', 'template:1']
+    assert hits[0][0] > hits[1][0]
+
+def test_misspelled_words_match_fuzzily():
+    index = InvertedIndex(DOCUMENTS)
+
+    hits = index.search('ombokninng')
+    assert keys(hits) == ['template:2']
+    assert hits[0][2] == {'ombokning'}
+
+def test_entities_limit_and_after():
+    index = InvertedIndex(DOCUMENTS)
+
+    assert keys(index.search('ersättning', entities={'template'})) == ['template:1']
+    first = index.search('ersättning', limit=1)
+    assert keys(first) == ['information:3']
+    rank, document, _ = first[0]
+    assert keys(index.search('ersättning', limit=1, after=(rank, document.key))) == ['template:1']
+
+def test_highlight_marks_matched_words():
+    assert highlight('Försenat tåg, försenat', {'försenat'}) == (
+        '<mark>Försenat</mark> tåg, <mark>försenat</mark>'
+    )
+    assert highlight(None, {'tåg'}) == ''
+
+def test_highlight_escapes_html():
+    text = '<script>alert(1)</script> & tåg'
+
+    assert highlight(text, {'tåg', 'script'}) == (
+        '&lt;<mark>script</mark>&gt;alert(1)&lt;/<mark>script</mark>&gt; &amp; <mark>tåg</mark>'
+    )
+
+def test_highlight_snippet_keeps_words_around_the_first_match():
+    text = ' '.join(f"ord{i}" for i in range(100)) + ' tåg'
+
+    snippet = highlight(text, {'tåg'}, snippet=True)
+    assert snippet.endswith('<mark>tåg</mark>')
+    assert len(snippet.split()) <= 20
+    assert highlight(text, {'buss'}, snippet=True).split() == [f"ord{i}" for i in range(20)]
+
+def test_render_headline_escapes_and_marks():
+    headline = f"<b>{HEADLINE_START}tåg{HEADLINE_STOP}</b> {HEADLINE_START * 2}resa{HEADLINE_STOP * 2}"
+
+    assert render_headline(headline) == '&lt;b&gt;<mark>tåg</mark>&lt;/b&gt; <mark>resa</mark>'
+    assert render_headline(None) == ''
@@ -0,0 +1,41 @@
+from difflib import SequenceMatcher
+import hashlib
+import json
+
+def content_hash(content):
+    """SHA-256 of a text, hex encoded; the same digest Postgres computes with sha256(convert_to(..., 'UTF8'))."""
+    return hashlib.sha256((content or '').encode('utf-8')).hexdigest()
+
+def make_delta(old, new):
+    """Describe new as edits of old, line by line.
+
+    The delta is a JSON-friendly list: [start, end] copies lines start..end
+    (exclusive) of old, a string is inserted as is. Lines keep their line
+    endings, so applying the delta gives back new exactly.
+    """
+    old_lines = (old or '').splitlines(keepends=True)
+    new_lines = (new or '').splitlines(keepends=True)
+
+    delta = []
+    matcher = SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            delta.append(''.join(new_lines[j1:j2]))
+    return delta
+
+def apply_delta(old, delta):
+    """Rebuild the new text from old and a delta made by make_delta()."""
+    old_lines = (old or '').splitlines(keepends=True)
+    parts = []
+    for op in delta:
+        if isinstance(op, str):
+            parts.append(op)
+        else:
+            parts.extend(old_lines[op[0]:op[1]])
+    return ''.join(parts)
+
+def delta_size(delta):
+    """Stored size of a delta in characters, to compare it with a full snapshot."""
+    return len(json.dumps(delta, separators=(',', ':'), ensure_ascii=False))
@@ -0,0 +1,43 @@
+import json
+
+import pytest
+
+from domain.versioning.delta import apply_delta, content_hash, delta_size, make_delta
+
+VERSIONS = [
+    None,
+    '',
+    'Hej $namn$,\n\nTack för ditt meddelande.\n\nMvh\nKundtjänst\n',
+    'Hej $namn$,\n\nTack för ditt meddelande om din resa.\n\nMvh\nKundtjänst\n',
+    'Hej $namn$!\r\n\r\nTack för ditt meddelande om din resa.\r\n\r\nMvh\r\nKundtjänst',
+    'Kundtjänst\nMvh\n\nHej $namn$,\n',
+    'en rad utan radbrytning',
+]
+
+@pytest.mark.parametrize('old', VERSIONS)
+@pytest.mark.parametrize('new', VERSIONS)
+def test_round_trip(old, new):
+    delta = make_delta(old, new)
+
+    assert apply_delta(old, delta) == (new or '')
+
+def test_round_trip_survives_json():
+    old, new = VERSIONS[2], VERSIONS[3]
+
+    delta = json.loads(json.dumps(make_delta(old, new)))
+    assert apply_delta(old, delta) == new
+
+def test_unchanged_lines_are_copied_by_range():
+    delta = make_delta(VERSIONS[2], VERSIONS[3])
+
+    assert delta == [[0, 2], 'Tack för ditt meddelande om din resa.\n', [3, 6]]
+    assert delta_size(delta) < len(VERSIONS[3])
+
+def test_identical_texts_need_one_copy():
+    assert make_delta(VERSIONS[2], VERSIONS[2]) == [[0, 6]]
+    assert make_delta('', '') == []
+
+def test_content_hash_is_sha256_of_utf8():
+    assert content_hash('åäö') == '5d0d31f63d1712b2ea533b0c4946c2f1014faf152f0c0e5ee5b81c85e8799953'
+    assert content_hash(None) == 'e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855'
+    assert content_hash('a') != content_hash('b')
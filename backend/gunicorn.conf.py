@@ -0,0 +1,95 @@
+"""gunicorn settings for wsgi:app.
+
+Worker processes spread CPU work (JSON encoding, rendering) over the cores.
+Within a worker, the default gevent worker serves every request on a
+greenlet, so a process stays busy while its requests wait on the database
+and an open /api/events stream costs a greenlet instead of a thread. Every
+worker has its own connection pool, so the database sees up to workers x
+DB_POOL_MAX_SIZE connections; requests beyond DB_POOL_MAX_SIZE wait for a
+connection.
+"""
+import os
+
+# gevent, or gthread for a thread per request (GUNICORN_THREADS, default 4),
+# under which each open /api/events stream holds a thread and a worker
+# serves at most half of them as streams (EVENTS_MAX_SUBSCRIBERS)
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+if worker_class == 'eventlet':
+    # Only gevent gets psycopg2 patched; under eventlet every query would block the whole worker
+    raise RuntimeError("GUNICORN_WORKER_CLASS=eventlet is not supported; use gevent or gthread")
+if worker_class == 'gevent':
+    # Patch before the app is preloaded, so that the locks, threads and
+    # sockets it creates yield to other greenlets, and psycopg2 waits on the
+    # database without blocking the whole worker
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+import multiprocessing
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+workers = int(os.getenv('GUNICORN_WORKERS', '0')) or multiprocessing.cpu_count()
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+# Concurrent requests and open streams per gevent worker
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Requests still running on SIGTERM get this long to finish before workers are killed
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers now and then to bound slow leaks; jitter keeps them from restarting together
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Load the app once in the master so a broken configuration fails before any worker starts.
+# Process-local state is reset in each worker by the os.register_at_fork hooks of the
+# connection, cache, change feed, events, render and logging modules.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() in ('1', 'true', 'yes')
+
+# Workers write their metrics here, so that /metrics on any worker reports all
+# of them; a new directory per master, so restarts start the counters over
+_own_metrics_dir = not os.getenv('METRICS_DIR')
+if _own_metrics_dir:
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='gunicorn-metrics-')
+
+# Access lines go to stdout next to the application log when enabled
+accesslog = '-' if os.getenv('GUNICORN_ACCESS_LOG', 'false').lower() in ('1', 'true', 'yes') else None
+
+def when_ready(server):
+    # The master never serves requests, so it has no use for connections opened while preloading
+    from infrastructure.database.connection import close_pool
+    close_pool()
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        server.log.info("Worker %s started with up to %s connections", worker.pid, worker_connections)
+    else:
+        server.log.info("Worker %s started with %s threads", worker.pid, threads)
+
+def worker_exit(server, worker):
+    # In-flight requests have drained by now; keep this worker's final counts
+    # for the others to report, and release the database and render workers cleanly
+    from infrastructure.metrics.metrics import registry
+    try:
+        registry.write_snapshot(os.environ['METRICS_DIR'])
+    except OSError as e:
+        server.log.warning("Could not write final metrics of worker %s: %s", worker.pid, e)
+    from infrastructure.database.connection import close_pool
+    from application.services.render_service import shutdown_render_pool
+    from infrastructure.database.async_connection import close_async_pool
+    from infrastructure.cache.change_feed import stop_change_listener
+    from infrastructure.config.logging_config import stop_logging
+    stop_change_listener()
+    close_pool()
+    close_async_pool()
+    shutdown_render_pool()
+    stop_logging()
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(os.environ['METRICS_DIR'], ignore_errors=True)
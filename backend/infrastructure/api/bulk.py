@@ -0,0 +1,9 @@
+from flask import jsonify, request
+
+def wants_atomic():
+    """Check for the flag that makes a bulk request all-or-nothing."""
+    return request.args.get('atomic', '').lower() in ('1', 'true', 'yes')
+
+def bulk_response(result):
+    """Response for a bulk write: 200 when it was committed, 422 when an atomic write was rolled back."""
+    return jsonify(result), 200 if result['committed'] else 422
@@ -0,0 +1,94 @@
+from flask import Response, g, request
+from infrastructure.database.table_versions import get_table_versions
+import hashlib
+
+# Tables that can change the response of a route, keyed by the static path
+# segments of its URL rule. A rule depends on the tables of all its segments,
+# e.g. /api/templates/<id>/departments on templates and departments.
+RESOURCE_TABLES = {
+    'templates': ('templates', 'departments', 'colors', 'completion_types', 'categories', 'information'),
+    'departments': ('departments', 'templates'),
+    'colors': ('colors',),
+    'completion-types': ('completion_types', 'templates'),
+    'categories': ('categories', 'templates'),
+    'children-categories': ('connect_children_categories',),
+    'information': ('information', 'templates'),
+    'variables': ('category_variabels',),
+    'search': ('templates', 'information', 'category_variabels'),
+    'tree': ('templates', 'departments', 'completion_types', 'categories', 'connect_children_categories'),
+    'bootstrap': ('templates', 'categories', 'departments', 'colors', 'completion_types',
+                  'connect_children_categories', 'information', 'category_variabels'),
+}
+
+def _route_tables():
+    """Tables behind the matched route, or an empty set for unversioned routes."""
+    if request.url_rule is None:
+        return set()
+
+    tables = set()
+    for segment in request.url_rule.rule.strip('/').split('/'):
+        if not segment.startswith('<'):
+            tables.update(RESOURCE_TABLES.get(segment, ()))
+    return tables
+
+def _validators(tables):
+    """Build the ETag and Last-Modified for the current request from table versions."""
+    versions = get_table_versions(tables)
+    if versions is None:
+        return None, None
+
+    state = ';'.join(f"{table}:{versions.get(table, (0, None))[0]}" for table in sorted(tables))
+    # The query string is part of the tag, since it selects pages, filters and shapes
+    etag = hashlib.sha1(f"{request.full_path}|{state}".encode('utf-8')).hexdigest()
+
+    modified = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+    last_modified = max(modified).replace(microsecond=0) if modified else None
+    return etag, last_modified
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified is not None and request.if_modified_since is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+def register_conditional_get(app):
+    """Answer GET requests with ETag/Last-Modified and 304 when nothing has changed.
+
+    Versions are read before the view runs, so a write that lands during the
+    request can only make the tag older than the body, never newer.
+    """
+
+    @app.before_request
+    def check_conditional_get():
+        if request.method != 'GET':
+            return None
+
+        tables = _route_tables()
+        if not tables:
+            return None
+
+        etag, last_modified = _validators(tables)
+        if etag is None:
+            return None
+
+        g.etag = etag
+        g.last_modified = last_modified
+        if _not_modified(etag, last_modified):
+            response = Response(status=304)
+            _add_validators(response)
+            return response
+        return None
+
+    @app.after_request
+    def add_conditional_headers(response):
+        if response.status_code == 200 and 'etag' in g and 'ETag' not in response.headers:
+            _add_validators(response)
+        return response
+
+def _add_validators(response):
+    response.set_etag(g.etag)
+    if g.last_modified is not None:
+        response.last_modified = g.last_modified
+    # Let browsers keep the body but revalidate on every poll
+    response.headers.setdefault('Cache-Control', 'no-cache')
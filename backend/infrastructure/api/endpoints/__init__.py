@@ -11,6 +11,14 @@ from infrastructure.api.endpoints.debug import register_debug_routes
 from infrastructure.api.endpoints.connect_children_categories import register_connect_children_categories_routes
 from infrastructure.api.endpoints.categories import register_category_routes
 from infrastructure.api.endpoints.information import register_information_routes
+from infrastructure.api.endpoints.render import register_render_routes
+from infrastructure.api.endpoints.metrics import register_metrics_routes
+from infrastructure.api.endpoints.health import register_health_routes
+from infrastructure.api.endpoints.overview import register_overview_routes
+from infrastructure.api.endpoints.bootstrap import register_bootstrap_routes
+from infrastructure.api.endpoints.category_tree import register_category_tree_routes
+from infrastructure.api.endpoints.search import register_search_routes
+from infrastructure.api.endpoints.events import register_event_routes
 
 __all__ = [
     'register_department_routes',
@@ -21,5 +29,13 @@ __all__ = [
     'register_debug_routes',
     'register_connect_children_categories_routes',
     'register_category_routes',
-    'register_information_routes'
+    'register_information_routes',
+    'register_render_routes',
+    'register_metrics_routes',
+    'register_health_routes',
+    'register_overview_routes',
+    'register_bootstrap_routes',
+    'register_category_tree_routes',
+    'register_search_routes',
+    'register_event_routes'
 ]
\ No newline at end of file
@@ -0,0 +1,24 @@
+from flask import g, jsonify
+import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+def register_bootstrap_routes(app, bootstrap_service):
+    """Register the composite bootstrap route of the prompt builder.
+
+    The ETag comes from the conditional GET hook, which covers all tables of
+    the document, so a client with a current copy gets a 304 without any of
+    the reads running.
+    """
+    
+    @app.route('/api/bootstrap', methods=['GET'])
+    def get_bootstrap():
+        try:
+            document = bootstrap_service.get_bootstrap()
+            document['version'] = g.get('etag')
+            document['generated_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat()
+            return jsonify(document)
+        except Exception as e:
+            logger.exception("Error getting bootstrap data: %s", e)
+            return jsonify({'error': 'Failed to retrieve bootstrap data', 'details': str(e)}), 500
@@ -1,6 +1,10 @@
 from flask import jsonify, request
-import traceback
-import sys
+from infrastructure.api.bulk import wants_atomic, bulk_response
+from infrastructure.api.pagination import wants_unpaged, parse_page_request, page_response
+from infrastructure.api.streaming import wants_stream, stream_json_array
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_category_routes(app, category_service):
     """Register category-related routes with the Flask app."""
@@ -8,34 +12,33 @@ def register_category_routes(app, category_service):
     @app.route('/api/categories', methods=['GET'])
     def get_categories():
         try:
-            print("GET /api/categories: Fetching categories")
+            if wants_stream():
+                return stream_json_array(category_service.stream_categories())
+            if not wants_unpaged():
+                return page_response(category_service.get_categories_page(parse_page_request()))
+            
+            logger.debug("GET /api/categories: Fetching categories")
             
             categories = category_service.get_all_categories()
             
-            print(f"GET /api/categories: Retrieved {len(categories)} categories")
+            logger.debug("GET /api/categories: Retrieved %s categories", len(categories))
             
             return jsonify(categories)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting categories at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting categories: %s", e)
             return jsonify({'error': 'Failed to retrieve categories', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>/categories', methods=['GET'])
     def get_categories_by_template(template_id):
         try:
-            print(f"GET /api/templates/{template_id}/categories: Fetching categories for template")
+            logger.debug("GET /api/templates/%s/categories: Fetching categories for template", template_id)
             categories = category_service.get_categories_by_template(template_id)
-            print(f"GET /api/templates/{template_id}/categories: Retrieved {len(categories)} categories")
+            logger.debug("GET /api/templates/%s/categories: Retrieved %s categories", template_id, len(categories))
             return jsonify(categories)
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting categories for template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting categories for template %s: %s", template_id, e)
             return jsonify({'error': 'Failed to retrieve categories', 'details':str(e)}), 500
 
     @app.route('/api/categories', methods=['POST'])
@@ -45,23 +48,38 @@ def register_category_routes(app, category_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"POST /api/categories: Creating category with data: {data}")
+            logger.debug("POST /api/categories: Creating category with data: %s", data)
             
             category = category_service.create_category(data)
             
-            print(f"POST /api/categories: Category created with ID {category.get('id', 'unknown')}")
+            logger.debug("POST /api/categories: Category created with ID %s", category.get('id', 'unknown'))
             
             return jsonify(category), 201
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error creating category at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating category: %s", e)
             return jsonify({'error': 'Failed to create category', 'details': str(e)}), 500
     
+    @app.route('/api/categories:bulk', methods=['POST'])
+    def bulk_categories():
+        try:
+            payload = request.json
+            if not payload:
+                return jsonify({'error': 'No data provided'}), 400
+            
+            result = category_service.bulk_categories(payload, atomic=wants_atomic())
+            
+            logger.debug("POST /api/categories:bulk: %s created, %s updated, %s deleted, %s errors",
+                         len(result['created']), len(result['updated']), len(result['deleted']), len(result['errors']))
+            
+            return bulk_response(result)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error in bulk write of categories: %s", e)
+            return jsonify({'error': 'Failed to write categories', 'details': str(e)}), 500
+    
     @app.route('/api/categories/<category_id>', methods=['GET'])
     def get_category(category_id):
         try:
@@ -71,11 +89,7 @@ def register_category_routes(app, category_service):
                 return jsonify(category)
             return jsonify({'error': 'Category not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting category {category_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting category %s: %s", category_id, e)
             return jsonify({'error': 'Failed to retrieve category', 'details': str(e)}), 500
     
     @app.route('/api/categories/<category_id>', methods=['PUT'])
@@ -85,17 +99,17 @@ def register_category_routes(app, category_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"PUT /api/categories/{category_id}: Received data: {data}")
-            print(f"Category ID type: {type(category_id)}")
+            logger.debug("PUT /api/categories/%s: Received data: %s", category_id, data)
+            logger.debug("Category ID: %r", category_id)
             
             # If this is a template association request
             if 'template_id' in data and len(data) == 1:
                 template_id = data['template_id']
-                print(f"PUT /api/categories/{category_id}: Associating with template {template_id} (Type: {type(template_id)})")
+                logger.debug("PUT /api/categories/%s: Associating with template %r", category_id, template_id)
                 
                 # VIKTIGT: Hantera tom sträng som NULL-värde
                 if template_id == '':
-                    print(f"Empty template_id detected, will set to NULL")
+                    logger.debug("Empty template_id detected, will set to NULL")
                     # Anropa remove_template_association istället för associate_with_template
                     success = category_service.remove_template_association(category_id)
                     if success:
@@ -116,17 +130,13 @@ def register_category_routes(app, category_service):
             category = category_service.update_category(category_id, data)
             
             if category:
-                print(f"PUT /api/categories/{category_id}: Updated")
+                logger.debug("PUT /api/categories/%s: Updated", category_id)
                 return jsonify(category)
             return jsonify({'error': 'Category not found'}), 404
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating category {category_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating category %s: %s", category_id, e)
             return jsonify({'error': 'Failed to update category', 'details': str(e)}), 500
         
     @app.route('/api/categories/<category_id>', methods=['DELETE'])
@@ -137,9 +147,5 @@ def register_category_routes(app, category_service):
                 return jsonify({'message': 'Category deleted successfully'})
             return jsonify({'error': 'Category not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error deleting category {category_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting category %s: %s", category_id, e)
             return jsonify({'error': 'Failed to delete category', 'details': str(e)}), 500
\ No newline at end of file
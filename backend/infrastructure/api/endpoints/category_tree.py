@@ -0,0 +1,45 @@
+from flask import jsonify, request
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _parse_depth():
+    """The optional depth query parameter; raises ValueError for a non-integer."""
+    depth = request.args.get('depth')
+    if depth in (None, ''):
+        return None
+    try:
+        return int(depth)
+    except ValueError:
+        raise ValueError("depth must be an integer")
+
+def register_category_tree_routes(app, category_tree_service):
+    """Register routes that return whole subtrees of the category tree.
+
+    Each route answers with the node and everything below it nested under
+    'children'; ?depth=N stops N levels below the node.
+    """
+
+    def subtree_response(kind, node_id):
+        try:
+            tree = category_tree_service.get_subtree(kind, node_id, _parse_depth())
+            if tree is None:
+                return jsonify({'error': 'Node not found'}), 404
+            return jsonify(tree)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error getting category tree of %s %s: %s", kind, node_id, e)
+            return jsonify({'error': 'Failed to retrieve category tree', 'details': str(e)}), 500
+
+    @app.route('/api/templates/<template_id>/tree', methods=['GET'])
+    def get_template_tree(template_id):
+        return subtree_response('template', template_id)
+
+    @app.route('/api/departments/<department_id>/tree', methods=['GET'])
+    def get_department_tree(department_id):
+        return subtree_response('department', department_id)
+
+    @app.route('/api/completion-types/<completion_type_id>/tree', methods=['GET'])
+    def get_completion_type_tree(completion_type_id):
+        return subtree_response('completion_type', completion_type_id)
@@ -1,6 +1,9 @@
 from flask import jsonify, request
-import traceback
-import sys
+from infrastructure.api.pagination import wants_unpaged, parse_page_request, page_response
+from infrastructure.api.streaming import wants_stream, stream_json_array
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_color_routes(app, color_service):
     """Register color-related routes with the Flask app."""
@@ -8,16 +11,19 @@ def register_color_routes(app, color_service):
     @app.route('/api/colors', methods=['GET'])
     def get_colors():
         try:
-            print("GET /api/colors: Fetching colors")
+            if wants_stream():
+                return stream_json_array(color_service.stream_colors())
+            if not wants_unpaged():
+                return page_response(color_service.get_colors_page(parse_page_request()))
+            
+            logger.debug("GET /api/colors: Fetching colors")
             colors = color_service.get_all_colors()
-            print(f"GET /api/colors: Retrieved {len(colors)} colors")
+            logger.debug("GET /api/colors: Retrieved %s colors", len(colors))
             return jsonify(colors)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting colors at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting colors: %s", e)
             return jsonify({'error': 'Failed to retrieve colors', 'details': str(e)}), 500
     
     @app.route('/api/colors', methods=['POST'])
@@ -28,20 +34,16 @@ def register_color_routes(app, color_service):
                 return jsonify({'error': 'No data provided'}), 400
             
             # Enhanced debug logging
-            print(f"POST /api/colors: Received data: {data}")
+            logger.debug("POST /api/colors: Received data: %s", data)
             
             color = color_service.create_color(data)
-            print(f"POST /api/colors: Created color with ID {color.get('id', 'unknown')} and hex_value {color.get('hex_value', 'unknown')}")
+            logger.debug("POST /api/colors: Created color with ID %s and hex_value %s", color.get('id', 'unknown'), color.get('hex_value', 'unknown'))
             
             return jsonify(color), 201
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error creating color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating color: %s", e)
             return jsonify({'error': 'Failed to create color', 'details': str(e)}), 500
     
     @app.route('/api/colors/<color_id>', methods=['GET'])
@@ -55,11 +57,7 @@ def register_color_routes(app, color_service):
                 return jsonify(color)
             return jsonify({'error': 'Color not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting color {color_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting color %s: %s", color_id, e)
             return jsonify({'error': 'Failed to retrieve color', 'details': str(e)}), 500
     
     @app.route('/api/colors/<color_id>', methods=['PUT'])
@@ -70,22 +68,18 @@ def register_color_routes(app, color_service):
                 return jsonify({'error': 'No data provided'}), 400
             
             # Enhanced debug logging
-            print(f"PUT /api/colors/{color_id}: Received data: {data}")
+            logger.debug("PUT /api/colors/%s: Received data: %s", color_id, data)
             
             color = color_service.update_color(color_id, data)
             
             if color:
-                print(f"PUT /api/colors/{color_id}: Updated color with hex_value {color.get('hex_value', 'unknown')}")
+                logger.debug("PUT /api/colors/%s: Updated color with hex_value %s", color_id, color.get('hex_value', 'unknown'))
                 return jsonify(color)
             return jsonify({'error': 'Color not found'}), 404
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating color {color_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating color %s: %s", color_id, e)
             return jsonify({'error': 'Failed to update color', 'details': str(e)}), 500
     
     @app.route('/api/colors/<color_id>', methods=['DELETE'])
@@ -97,9 +91,5 @@ def register_color_routes(app, color_service):
                 return jsonify({'message': 'Color deleted'})
             return jsonify({'error': 'Color not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error deleting color {color_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting color %s: %s", color_id, e)
             return jsonify({'error': 'Failed to delete color', 'details': str(e)}), 500
\ No newline at end of file
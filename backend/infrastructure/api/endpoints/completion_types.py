@@ -1,6 +1,9 @@
 from flask import jsonify, request
-import traceback
-import sys
+from infrastructure.api.pagination import wants_unpaged, parse_page_request, page_response
+from infrastructure.api.streaming import wants_stream, stream_json_array
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_completion_type_routes(app, completion_type_service):
     """Register completion type-related routes with the Flask app."""
@@ -8,16 +11,19 @@ def register_completion_type_routes(app, completion_type_service):
     @app.route('/api/completion-types', methods=['GET'])
     def get_completion_types():
         try:
-            print("GET /api/completion-types: Fetching completion types")
+            if wants_stream():
+                return stream_json_array(completion_type_service.stream_completion_types())
+            if not wants_unpaged():
+                return page_response(completion_type_service.get_completion_types_page(parse_page_request()))
+            
+            logger.debug("GET /api/completion-types: Fetching completion types")
             completion_types = completion_type_service.get_all_completion_types()
-            print(f"GET /api/completion-types: Retrieved {len(completion_types)} completion types")
+            logger.debug("GET /api/completion-types: Retrieved %s completion types", len(completion_types))
             return jsonify(completion_types)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting completion types at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting completion types: %s", e)
             return jsonify({'error': 'Failed to retrieve completion types', 'details':str(e)}), 500
     
     @app.route('/api/completion-types', methods=['POST'])
@@ -28,20 +34,16 @@ def register_completion_type_routes(app, completion_type_service):
                 return jsonify({'error': 'No data provided'}), 400
             
             # Debug logging
-            print(f"POST /api/completion-types: Received data: {data}") 
+            logger.debug("POST /api/completion-types: Received data: %s", data) 
             
             completion_type = completion_type_service.create_completion_type(data)
-            print(f"POST /api/completion-types: Created with ID {completion_type.get('id', 'unknown')}")
+            logger.debug("POST /api/completion-types: Created with ID %s", completion_type.get('id', 'unknown'))
             
             return jsonify(completion_type), 201
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error creating completion type at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating completion type: %s", e)
             return jsonify({'error': 'Failed to create', 'details': str(e)}), 500
     
     @app.route('/api/completion-types/<completion_type_id>', methods=['GET'])
@@ -53,11 +55,7 @@ def register_completion_type_routes(app, completion_type_service):
                 return jsonify(completion_type)
             return jsonify({'error': 'Completion type not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]  
-            print(f"Error getting {completion_type_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting %s: %s", completion_type_id, e)
             return jsonify({'error': 'Failed to retrieve', 'details': str(e)}), 500
     
     @app.route('/api/completion-types/<completion_type_id>', methods=['PUT'])
@@ -67,11 +65,11 @@ def register_completion_type_routes(app, completion_type_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"PUT /api/completion-types/{completion_type_id}: Received data: {data}")
+            logger.debug("PUT /api/completion-types/%s: Received data: %s", completion_type_id, data)
             
             # If this is a template association request
             if 'template_id' in data and len(data) == 1:
-                print(f"PUT /api/completion-types/{completion_type_id}: Associating with template {data['template_id']}")
+                logger.debug("PUT /api/completion-types/%s: Associating with template %r", completion_type_id, data['template_id'])
                 success = completion_type_service.associate_with_template(completion_type_id, data['template_id'])
                 
                 if success:
@@ -85,17 +83,13 @@ def register_completion_type_routes(app, completion_type_service):
             completion_type = completion_type_service.update_completion_type(completion_type_id, data)
             
             if completion_type:
-                print(f"PUT /api/{completion_type_id}: Updated")
+                logger.debug("PUT /api/%s: Updated", completion_type_id)
                 return jsonify(completion_type)
             return jsonify({'error': 'Completion type not found'}), 404
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0] 
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating {completion_type_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating %s: %s", completion_type_id, e)
             return jsonify({'error': 'Failed to update', 'details': str(e)}), 500
     
     @app.route('/api/completion-types/<completion_type_id>', methods=['DELETE'])
@@ -110,9 +104,5 @@ def register_completion_type_routes(app, completion_type_service):
                 'detail': 'This completion type is referenced by one or more templates. Remove these associations first.'
             }), 409  
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error deleting {completion_type_id} at {fname}:{line}: {e}") 
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting %s: %s", completion_type_id, e)
             return jsonify({'error': 'Failed to delete', 'details': str(e)}), 500
\ No newline at end of file
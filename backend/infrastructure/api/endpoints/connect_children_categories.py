@@ -1,6 +1,9 @@
 from flask import jsonify, request
-import traceback
-import sys
+from infrastructure.api.pagination import wants_unpaged, parse_page_request, page_response
+from infrastructure.api.streaming import wants_stream, stream_json_array
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_connect_children_categories_routes(app, connect_children_category_service):
     """Register children categories-related routes with the Flask app."""
@@ -8,49 +11,44 @@ def register_connect_children_categories_routes(app, connect_children_category_s
     @app.route('/api/children-categories', methods=['GET'])
     def get_children_categories():
         try:
-            print("GET /api/children-categories: Fetching children categories")
+            if wants_stream():
+                return stream_json_array(connect_children_category_service.stream_categories())
+            if not wants_unpaged():
+                return page_response(connect_children_category_service.get_categories_page(parse_page_request()))
+            
+            logger.debug("GET /api/children-categories: Fetching children categories")
             
             categories = connect_children_category_service.get_all_categories()
             
-            print(f"GET /api/children-categories: Retrieved {len(categories)} categories")
+            logger.debug("GET /api/children-categories: Retrieved %s categories", len(categories))
             
             return jsonify(categories)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting children categories at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting children categories: %s", e)
             return jsonify({'error': 'Failed to retrieve children categories', 'details': str(e)}), 500
     
     @app.route('/api/completion-types/<completion_type_id>/children-categories', methods=['GET'])
     def get_categories_by_completion_type(completion_type_id):
         try:
-            print(f"GET /api/completion-types/{completion_type_id}/children-categories: Fetching categories for completion type")
+            logger.debug("GET /api/completion-types/%s/children-categories: Fetching categories for completion type", completion_type_id)
             categories = connect_children_category_service.get_categories_by_completion_type(completion_type_id)
-            print(f"GET /api/completion-types/{completion_type_id}/children-categories: Retrieved {len(categories)} categories")
+            logger.debug("GET /api/completion-types/%s/children-categories: Retrieved %s categories", completion_type_id, len(categories))
             return jsonify(categories)
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting categories for completion type {completion_type_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting categories for completion type %s: %s", completion_type_id, e)
             return jsonify({'error': 'Failed to retrieve children categories', 'details':str(e)}), 500
     
     @app.route('/api/departments/<department_id>/children-categories', methods=['GET'])
     def get_categories_by_department(department_id):
         try:
-            print(f"GET /api/departments/{department_id}/children-categories: Fetching categories for department")
+            logger.debug("GET /api/departments/%s/children-categories: Fetching categories for department", department_id)
             categories = connect_children_category_service.get_categories_by_department(department_id)
-            print(f"GET /api/departments/{department_id}/children-categories: Retrieved {len(categories)} categories")
+            logger.debug("GET /api/departments/%s/children-categories: Retrieved %s categories", department_id, len(categories))
             return jsonify(categories)
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting categories for department {department_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting categories for department %s: %s", department_id, e)
             return jsonify({'error': 'Failed to retrieve children categories', 'details':str(e)}), 500
             
     @app.route('/api/children-categories', methods=['POST'])
@@ -60,21 +58,17 @@ def register_connect_children_categories_routes(app, connect_children_category_s
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"POST /api/children-categories: Creating children category with data: {data}")
+            logger.debug("POST /api/children-categories: Creating children category with data: %s", data)
             
             category = connect_children_category_service.create_category(data)
             
-            print(f"POST /api/children-categories: Children category created with ID {category.get('id', 'unknown')}")
+            logger.debug("POST /api/children-categories: Children category created with ID %s", category.get('id', 'unknown'))
             
             return jsonify(category), 201
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error creating children category at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating children category: %s", e)
             return jsonify({'error': 'Failed to create children category', 'details': str(e)}), 500
     
     @app.route('/api/children-categories/<category_id>', methods=['GET'])
@@ -86,11 +80,7 @@ def register_connect_children_categories_routes(app, connect_children_category_s
                 return jsonify(category)
             return jsonify({'error': 'Children category not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting children category {category_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting children category %s: %s", category_id, e)
             return jsonify({'error': 'Failed to retrieve children category', 'details': str(e)}), 500
     
     @app.route('/api/children-categories/<category_id>', methods=['PUT'])
@@ -100,17 +90,17 @@ def register_connect_children_categories_routes(app, connect_children_category_s
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"PUT /api/children-categories/{category_id}: Received data: {data}")
-            print(f"Category ID type: {type(category_id)}")
+            logger.debug("PUT /api/children-categories/%s: Received data: %s", category_id, data)
+            logger.debug("Category ID: %r", category_id)
             
             # If this is a completion type association request
             if 'completion_type_id' in data and len(data) == 1:
                 completion_type_id = data['completion_type_id']
-                print(f"PUT /api/children-categories/{category_id}: Associating with completion type {completion_type_id} (Type: {type(completion_type_id)})")
+                logger.debug("PUT /api/children-categories/%s: Associating with completion type %r", category_id, completion_type_id)
                 
                 # Handle empty string as NULL value
                 if completion_type_id == '':
-                    print(f"Empty completion_type_id detected, will set to NULL")
+                    logger.debug("Empty completion_type_id detected, will set to NULL")
                     # Call remove_completion_type_association instead of associate_with_completion_type
                     success = connect_children_category_service.remove_completion_type_association(category_id)
                     if success:
@@ -130,11 +120,11 @@ def register_connect_children_categories_routes(app, connect_children_category_s
             # If this is a department association request
             if 'department_id' in data and len(data) == 1:
                 department_id = data['department_id']
-                print(f"PUT /api/children-categories/{category_id}: Associating with department {department_id} (Type: {type(department_id)})")
+                logger.debug("PUT /api/children-categories/%s: Associating with department %r", category_id, department_id)
                 
                 # Handle empty string as NULL value
                 if department_id == '':
-                    print(f"Empty department_id detected, will set to NULL")
+                    logger.debug("Empty department_id detected, will set to NULL")
                     # Call remove_department_association
                     success = connect_children_category_service.remove_department_association(category_id)
                     if success:
@@ -154,17 +144,13 @@ def register_connect_children_categories_routes(app, connect_children_category_s
             category = connect_children_category_service.update_category(category_id, data)
             
             if category:
-                print(f"PUT /api/children-categories/{category_id}: Updated")
+                logger.debug("PUT /api/children-categories/%s: Updated", category_id)
                 return jsonify(category)
             return jsonify({'error': 'Children category not found'}), 404
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating children category {category_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating children category %s: %s", category_id, e)
             return jsonify({'error': 'Failed to update children category', 'details': str(e)}), 500
         
     @app.route('/api/children-categories/<category_id>', methods=['DELETE'])
@@ -175,9 +161,5 @@ def register_connect_children_categories_routes(app, connect_children_category_s
                 return jsonify({'message': 'Children category deleted successfully'})
             return jsonify({'error': 'Children category not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error deleting children category {category_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting children category %s: %s", category_id, e)
             return jsonify({'error': 'Failed to delete children category', 'details': str(e)}), 500
\ No newline at end of file
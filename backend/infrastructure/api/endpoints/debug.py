@@ -1,6 +1,7 @@
-from flask import jsonify
-import traceback
-import sys
+from flask import jsonify, request
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_debug_routes(app):
     """Register debug-related routes with the Flask app."""
@@ -8,66 +9,65 @@ def register_debug_routes(app):
     @app.route('/api/debug/db-status', methods=['GET'])
     def check_db_status():
         try:
-            from infrastructure.database.connection import get_db_connection
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            # Check if we can connect to the database
-            cursor.execute("SELECT 1")
-            db_connect = cursor.fetchone() is not None
+            from infrastructure.database.connection import db_connection
+            with db_connection() as conn:
+                cursor = conn.cursor()
             
-            # Check which tables exist
-            cursor.execute("""
-                SELECT table_name 
-                FROM information_schema.tables 
-                WHERE table_schema = 'public'
-            """)
-            tables = [row[0] if isinstance(row, tuple) else row['table_name'] for row in cursor.fetchall()]
+                # Check if we can connect to the database
+                cursor.execute("SELECT 1")
+                db_connect = cursor.fetchone() is not None
             
-            # Check column structure of templates table
-            template_columns = []
-            if 'templates' in tables:
+                # Check which tables exist
                 cursor.execute("""
-                    SELECT column_name, data_type 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'templates'
+                    SELECT table_name 
+                    FROM information_schema.tables 
+                    WHERE table_schema = 'public'
                 """)
-                template_columns = [
-                    {'name': row[0] if isinstance(row, tuple) else row['column_name'], 
-                     'type': row[1] if isinstance(row, tuple) else row['data_type']}
-                    for row in cursor.fetchall()
-                ]
+                tables = [row[0] if isinstance(row, tuple) else row['table_name'] for row in cursor.fetchall()]
             
-            # Check column structure of colors table
-            color_columns = []
-            if 'colors' in tables:
-                cursor.execute("""
-                    SELECT column_name, data_type 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'colors'
-                """)
-                color_columns = [
-                    {'name': row[0] if isinstance(row, tuple) else row['column_name'], 
-                     'type': row[1] if isinstance(row, tuple) else row['data_type']}
-                    for row in cursor.fetchall()
-                ]
+                # Check column structure of templates table
+                template_columns = []
+                if 'templates' in tables:
+                    cursor.execute("""
+                        SELECT column_name, data_type 
+                        FROM information_schema.columns 
+                        WHERE table_name = 'templates'
+                    """)
+                    template_columns = [
+                        {'name': row[0] if isinstance(row, tuple) else row['column_name'], 
+                         'type': row[1] if isinstance(row, tuple) else row['data_type']}
+                        for row in cursor.fetchall()
+                    ]
             
-            # Check column structure of completion_types table
-            completion_type_columns = []
-            if 'completion_types' in tables:
-                cursor.execute("""
-                    SELECT column_name, data_type 
-                    FROM information_schema.columns 
-                    WHERE table_name = 'completion_types'
-                """)
-                completion_type_columns = [
-                    {'name': row[0] if isinstance(row, tuple) else row['column_name'], 
-                     'type': row[1] if isinstance(row, tuple) else row['data_type']}
-                    for row in cursor.fetchall()
-                ]
+                # Check column structure of colors table
+                color_columns = []
+                if 'colors' in tables:
+                    cursor.execute("""
+                        SELECT column_name, data_type 
+                        FROM information_schema.columns 
+                        WHERE table_name = 'colors'
+                    """)
+                    color_columns = [
+                        {'name': row[0] if isinstance(row, tuple) else row['column_name'], 
+                         'type': row[1] if isinstance(row, tuple) else row['data_type']}
+                        for row in cursor.fetchall()
+                    ]
+            
+                # Check column structure of completion_types table
+                completion_type_columns = []
+                if 'completion_types' in tables:
+                    cursor.execute("""
+                        SELECT column_name, data_type 
+                        FROM information_schema.columns 
+                        WHERE table_name = 'completion_types'
+                    """)
+                    completion_type_columns = [
+                        {'name': row[0] if isinstance(row, tuple) else row['column_name'], 
+                         'type': row[1] if isinstance(row, tuple) else row['data_type']}
+                        for row in cursor.fetchall()
+                    ]
             
-            cursor.close()
-            conn.close()
+                cursor.close()
             
             return jsonify({
                 'database_connected': db_connect,
@@ -77,9 +77,42 @@ def register_debug_routes(app):
                 'completion_type_columns': completion_type_columns
             })
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error checking database status at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
-            return jsonify({'error': 'Failed to check database status', 'details': str(e)}), 500
\ No newline at end of file
+            logger.exception("Error checking database status: %s", e)
+            return jsonify({'error': 'Failed to check database status', 'details': str(e)}), 500
+    
+    @app.route('/api/debug/schema', methods=['GET'])
+    def get_schema_capabilities():
+        from infrastructure.database.schema import get_schema_registry
+        return jsonify(get_schema_registry().describe())
+    
+    @app.route('/api/debug/schema/refresh', methods=['POST'])
+    def refresh_schema_capabilities():
+        from infrastructure.database.schema import get_schema_registry
+        registry = get_schema_registry()
+        if not registry.refresh():
+            return jsonify({'error': 'Failed to refresh schema capabilities'}), 503
+        return jsonify(registry.describe())
+    
+    @app.route('/api/debug/cache', methods=['GET'])
+    def get_cache_stats():
+        from infrastructure.cache.cache import get_cache
+        return jsonify(get_cache().stats())
+    
+    @app.route('/api/debug/cache/clear', methods=['POST'])
+    def clear_cache():
+        from infrastructure.cache.cache import get_cache
+        cache = get_cache()
+        cache.clear()
+        return jsonify(cache.stats())
+    
+    @app.route('/api/debug/queries', methods=['GET'])
+    def get_query_summary():
+        from infrastructure.database.instrumentation import get_query_stats
+        limit = request.args.get('limit', 50, type=int)
+        return jsonify(get_query_stats().snapshot(limit=max(1, limit)))
+    
+    @app.route('/api/debug/queries/reset', methods=['POST'])
+    def reset_query_summary():
+        from infrastructure.database.instrumentation import get_query_stats
+        get_query_stats().reset()
+        return jsonify({'status': 'ok'})
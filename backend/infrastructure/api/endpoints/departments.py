@@ -1,6 +1,9 @@
 from flask import jsonify, request
-import traceback
-import sys
+from infrastructure.api.pagination import wants_unpaged, parse_page_request, page_response
+from infrastructure.api.streaming import wants_stream, stream_json_array
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_department_routes(app, department_service):
     """Register department-related routes with the Flask app."""
@@ -8,34 +11,33 @@ def register_department_routes(app, department_service):
     @app.route('/api/departments', methods=['GET'])
     def get_departments():
         try:
-            print("GET /api/departments: Fetching departments")
+            if wants_stream():
+                return stream_json_array(department_service.stream_departments())
+            if not wants_unpaged():
+                return page_response(department_service.get_departments_page(parse_page_request()))
+            
+            logger.debug("GET /api/departments: Fetching departments")
             
             departments = department_service.get_all_departments()
             
-            print(f"GET /api/departments: Retrieved {len(departments)} departments")
+            logger.debug("GET /api/departments: Retrieved %s departments", len(departments))
             
             return jsonify(departments)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting departments at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting departments: %s", e)
             return jsonify({'error': 'Failed to retrieve departments', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>/departments', methods=['GET'])
     def get_departments_by_template(template_id):
         try:
-            print(f"GET /api/templates/{template_id}/departments: Fetching departments for template")
+            logger.debug("GET /api/templates/%s/departments: Fetching departments for template", template_id)
             departments = department_service.get_departments_by_template(template_id)
-            print(f"GET /api/templates/{template_id}/departments: Retrieved {len(departments)} departments")
+            logger.debug("GET /api/templates/%s/departments: Retrieved %s departments", template_id, len(departments))
             return jsonify(departments)
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting departments for template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting departments for template %s: %s", template_id, e)
             return jsonify({'error': 'Failed to retrieve departments', 'details':str(e)}), 500
 
     @app.route('/api/departments', methods=['POST'])
@@ -45,21 +47,17 @@ def register_department_routes(app, department_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"POST /api/departments: Creating department with data: {data}")
+            logger.debug("POST /api/departments: Creating department with data: %s", data)
             
             department = department_service.create_department(data)
             
-            print(f"POST /api/departments: Department created with ID {department.get('id', 'unknown')}")
+            logger.debug("POST /api/departments: Department created with ID %s", department.get('id', 'unknown'))
             
             return jsonify(department), 201
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error creating department at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating department: %s", e)
             return jsonify({'error': 'Failed to create department', 'details': str(e)}), 500
     
     @app.route('/api/departments/<department_id>', methods=['GET'])
@@ -71,11 +69,7 @@ def register_department_routes(app, department_service):
                 return jsonify(department)
             return jsonify({'error': 'Department not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting department {department_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting department %s: %s", department_id, e)
             return jsonify({'error': 'Failed to retrieve department', 'details': str(e)}), 500
     
     # Uppdatering till routes.py - update_department
@@ -86,17 +80,17 @@ def register_department_routes(app, department_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"PUT /api/departments/{department_id}: Received data: {data}")
-            print(f"Department ID type: {type(department_id)}")
+            logger.debug("PUT /api/departments/%s: Received data: %s", department_id, data)
+            logger.debug("Department ID: %r", department_id)
             
             # If this is a template association request
             if 'template_id' in data and len(data) == 1:
                 template_id = data['template_id']
-                print(f"PUT /api/departments/{department_id}: Associating with template {template_id} (Type: {type(template_id)})")
+                logger.debug("PUT /api/departments/%s: Associating with template %r", department_id, template_id)
                 
                 # VIKTIGT: Hantera tom sträng som NULL-värde
                 if template_id == '':
-                    print(f"Empty template_id detected, will set to NULL")
+                    logger.debug("Empty template_id detected, will set to NULL")
                     # Anropa remove_template_association istället för associate_with_template
                     success = department_service.remove_template_association(department_id)
                     if success:
@@ -117,17 +111,13 @@ def register_department_routes(app, department_service):
             department = department_service.update_department(department_id, data)
             
             if department:
-                print(f"PUT /api/departments/{department_id}: Updated")
+                logger.debug("PUT /api/departments/%s: Updated", department_id)
                 return jsonify(department)
             return jsonify({'error': 'Department not found'}), 404
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating department {department_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating department %s: %s", department_id, e)
             return jsonify({'error': 'Failed to update department', 'details': str(e)}), 500
         
     @app.route('/api/departments/<department_id>', methods=['DELETE'])
@@ -138,9 +128,5 @@ def register_department_routes(app, department_service):
                 return jsonify({'message': 'Department deleted successfully'})
             return jsonify({'error': 'Department not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error deleting department {department_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting department %s: %s", department_id, e)
             return jsonify({'error': 'Failed to delete department', 'details': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,55 @@
+from flask import Response, jsonify, request
+from infrastructure.config.config import get_settings
+from infrastructure.events.change_events import format_event_id, get_broadcaster
+import json
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Milliseconds EventSource waits before reconnecting after a stream ends
+RETRY_MS = 2000
+
+def _format_event(event_id, name, data):
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+def register_event_routes(app):
+    """Register the Server-Sent Events stream of entity changes.
+
+    GET /api/events sends a 'change' event {entity, id, op, version} for
+    every create, update, delete and (dis)association, so clients can
+    update instead of refetching and polling. A reconnecting EventSource
+    sends Last-Event-ID and resumes after it. A 'reset' event means changes
+    were missed and the client must refetch what it shows.
+    """
+
+    @app.route('/api/events', methods=['GET'])
+    def get_events():
+        settings = get_settings()
+        broadcaster = get_broadcaster()
+        position = broadcaster.subscribe(request.headers.get('Last-Event-ID') or request.args.get('last_event_id'))
+        if position is None:
+            response = jsonify({'error': 'Too many open event streams'})
+            response.status_code = 503
+            response.headers['Retry-After'] = str(int(settings['EVENTS_HEARTBEAT']))
+            return response
+
+        def generate(position):
+            # Streams end now and then so clients reconnect and spread over the workers
+            deadline = time.monotonic() + settings['EVENTS_STREAM_SECONDS']
+            yield f"retry: {RETRY_MS}\n\n"
+            while time.monotonic() < deadline:
+                events, position, reset = broadcaster.wait(position, settings['EVENTS_HEARTBEAT'])
+                if reset:
+                    yield _format_event(format_event_id(*position), 'reset', {})
+                elif events:
+                    yield ''.join(_format_event(event_id, 'change', data) for event_id, data in events)
+                else:
+                    yield ": keepalive\n\n"
+
+        response = Response(generate(position), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        # Keep proxies such as nginx from buffering the stream
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.call_on_close(broadcaster.unsubscribe)
+        return response
@@ -0,0 +1,28 @@
+from flask import jsonify
+from infrastructure.database.health import get_readiness_check
+import datetime
+
+def register_health_routes(app):
+    """Register the liveness and readiness probes.
+
+    Liveness only shows that the process serves requests. Readiness reuses a
+    pooled connection and a cached result, so frequent probes do not turn
+    into database handshakes.
+    """
+
+    @app.route('/api/health', methods=['GET'])
+    def health_check():
+        return jsonify({
+            'status': 'ok',
+            'version': '1.0.0',
+            'timestamp': datetime.datetime.now().isoformat()
+        })
+
+    @app.route('/api/health/live', methods=['GET'])
+    def liveness():
+        return jsonify({'status': 'ok'})
+
+    @app.route('/api/health/ready', methods=['GET'])
+    def readiness():
+        result = get_readiness_check().check()
+        return jsonify(dict(result, status='ok' if result['ready'] else 'unavailable')), 200 if result['ready'] else 503
@@ -1,6 +1,10 @@
 from flask import jsonify, request
-import traceback
-import sys
+from infrastructure.api.bulk import wants_atomic, bulk_response
+from infrastructure.api.pagination import wants_unpaged, parse_page_request, page_response
+from infrastructure.api.streaming import wants_stream, stream_json_array
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_information_routes(app, information_service):
     """Register information-related routes with the Flask app."""
@@ -8,34 +12,33 @@ def register_information_routes(app, information_service):
     @app.route('/api/information', methods=['GET'])
     def get_information():
         try:
-            print("GET /api/information: Fetching information items")
+            if wants_stream():
+                return stream_json_array(information_service.stream_information())
+            if not wants_unpaged():
+                return page_response(information_service.get_information_page(parse_page_request()))
+            
+            logger.debug("GET /api/information: Fetching information items")
             
             information_items = information_service.get_all_information()
             
-            print(f"GET /api/information: Retrieved {len(information_items)} information items")
+            logger.debug("GET /api/information: Retrieved %s information items", len(information_items))
             
             return jsonify(information_items)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting information at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting information: %s", e)
             return jsonify({'error': 'Failed to retrieve information items', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>/information', methods=['GET'])
     def get_information_by_template(template_id):
         try:
-            print(f"GET /api/templates/{template_id}/information: Fetching information items for template")
+            logger.debug("GET /api/templates/%s/information: Fetching information items for template", template_id)
             information_items = information_service.get_information_by_template(template_id)
-            print(f"GET /api/templates/{template_id}/information: Retrieved {len(information_items)} information items")
+            logger.debug("GET /api/templates/%s/information: Retrieved %s information items", template_id, len(information_items))
             return jsonify(information_items)
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting information for template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting information for template %s: %s", template_id, e)
             return jsonify({'error': 'Failed to retrieve information items', 'details':str(e)}), 500
 
     @app.route('/api/information', methods=['POST'])
@@ -45,23 +48,38 @@ def register_information_routes(app, information_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"POST /api/information: Creating information item with data: {data}")
+            logger.debug("POST /api/information: Creating information item with data: %s", data)
             
             information = information_service.create_information(data)
             
-            print(f"POST /api/information: Information item created with ID {information.get('id', 'unknown')}")
+            logger.debug("POST /api/information: Information item created with ID %s", information.get('id', 'unknown'))
             
             return jsonify(information), 201
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error creating information at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating information: %s", e)
             return jsonify({'error': 'Failed to create information item', 'details': str(e)}), 500
     
+    @app.route('/api/information:bulk', methods=['POST'])
+    def bulk_information():
+        try:
+            payload = request.json
+            if not payload:
+                return jsonify({'error': 'No data provided'}), 400
+            
+            result = information_service.bulk_information(payload, atomic=wants_atomic())
+            
+            logger.debug("POST /api/information:bulk: %s created, %s updated, %s deleted, %s errors",
+                         len(result['created']), len(result['updated']), len(result['deleted']), len(result['errors']))
+            
+            return bulk_response(result)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error in bulk write of information items: %s", e)
+            return jsonify({'error': 'Failed to write information items', 'details': str(e)}), 500
+    
     @app.route('/api/information/<information_id>', methods=['GET'])
     def get_information_item(information_id):
         try:
@@ -71,11 +89,7 @@ def register_information_routes(app, information_service):
                 return jsonify(information)
             return jsonify({'error': 'Information item not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting information {information_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting information %s: %s", information_id, e)
             return jsonify({'error': 'Failed to retrieve information item', 'details': str(e)}), 500
     
     @app.route('/api/information/<information_id>', methods=['PUT'])
@@ -85,17 +99,17 @@ def register_information_routes(app, information_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"PUT /api/information/{information_id}: Received data: {data}")
-            print(f"Information ID type: {type(information_id)}")
+            logger.debug("PUT /api/information/%s: Received data: %s", information_id, data)
+            logger.debug("Information ID: %r", information_id)
             
             # If this is a template association request
             if 'template_id' in data and len(data) == 1:
                 template_id = data['template_id']
-                print(f"PUT /api/information/{information_id}: Associating with template {template_id} (Type: {type(template_id)})")
+                logger.debug("PUT /api/information/%s: Associating with template %r", information_id, template_id)
                 
                 # VIKTIGT: Hantera tom sträng som NULL-värde
                 if template_id == '':
-                    print(f"Empty template_id detected, will set to NULL")
+                    logger.debug("Empty template_id detected, will set to NULL")
                     # Anropa remove_template_association istället för associate_with_template
                     success = information_service.remove_template_association(information_id)
                     if success:
@@ -116,17 +130,13 @@ def register_information_routes(app, information_service):
             information = information_service.update_information(information_id, data)
             
             if information:
-                print(f"PUT /api/information/{information_id}: Updated")
+                logger.debug("PUT /api/information/%s: Updated", information_id)
                 return jsonify(information)
             return jsonify({'error': 'Information item not found'}), 404
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating information {information_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating information %s: %s", information_id, e)
             return jsonify({'error': 'Failed to update information item', 'details': str(e)}), 500
         
     @app.route('/api/information/<information_id>/comments', methods=['PUT'])
@@ -136,7 +146,7 @@ def register_information_routes(app, information_service):
             if not isinstance(data, dict) or 'comments' not in data:
                 return jsonify({'error': 'Missing comments field in request data'}), 400
                 
-            print(f"PUT /api/information/{information_id}/comments: Setting comments to {data['comments']}")
+            logger.debug("PUT /api/information/%s/comments: Setting comments to %s", information_id, data['comments'])
             
             # Hämta existerande information
             info = information_service.get_information_by_id(information_id)
@@ -159,11 +169,7 @@ def register_information_routes(app, information_service):
             return jsonify({'error': 'Failed to update comments status'}), 500
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating information comments {information_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating information comments %s: %s", information_id, e)
             return jsonify({'error': 'Failed to update comments status', 'details': str(e)}), 500
         
     @app.route('/api/information/<information_id>', methods=['DELETE'])
@@ -174,9 +180,5 @@ def register_information_routes(app, information_service):
                 return jsonify({'message': 'Information item deleted successfully'})
             return jsonify({'error': 'Information item not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error deleting information {information_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting information %s: %s", information_id, e)
             return jsonify({'error': 'Failed to delete information item', 'details': str(e)}), 500
\ No newline at end of file
@@ -0,0 +1,122 @@
+from flask import Response, g, request
+from infrastructure.cache.cache import get_cache
+from infrastructure.cache.change_feed import get_change_listener_stats
+from infrastructure.config.config import get_settings
+from infrastructure.events.change_events import get_broadcaster
+from infrastructure.database.connection import get_pool_stats
+from infrastructure.metrics.metrics import SNAPSHOT_SECONDS, Counter, Gauge, registry, render_processes
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+http_requests = registry.counter(
+    'http_requests_total', 'HTTP requests handled.', ('endpoint', 'method', 'status'))
+http_duration = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency until the response is returned.', ('endpoint', 'method'))
+http_in_flight = registry.gauge(
+    'http_requests_in_flight', 'HTTP requests currently being handled.')
+
+def _cache_metrics(caches):
+    """Hit ratio, lookups and size of each cache, read from its stats()."""
+    hits = Counter('cache_hits_total', 'Cache lookups that found an entry.', ('cache',))
+    misses = Counter('cache_misses_total', 'Cache lookups that found no entry.', ('cache',))
+    ratio = Gauge('cache_hit_ratio', 'Share of cache lookups that found an entry.', ('cache',))
+    size = Gauge('cache_entries', 'Entries currently held by the cache.', ('cache',))
+    evictions = Counter('cache_evictions_total', 'Entries evicted to stay within the size limit.', ('cache',))
+
+    for name, stats in caches:
+        lookups = stats['hits'] + stats['misses']
+        hits.inc(name, amount=stats['hits'])
+        misses.inc(name, amount=stats['misses'])
+        ratio.set(name, value=stats['hits'] / lookups if lookups else 0.0)
+        if 'size' in stats:
+            size.set(name, value=stats['size'])
+        if 'evictions' in stats:
+            evictions.inc(name, amount=stats['evictions'])
+    return [hits, misses, ratio, size, evictions]
+
+def _pool_metrics():
+    stats = get_pool_stats()
+    if stats is None:
+        return []
+    connections = Gauge('db_pool_connections', 'Pooled database connections by state.', ('state',))
+    connections.set('in_use', value=stats['in_use'])
+    connections.set('idle', value=stats['idle'])
+    waiters = Gauge('db_pool_waiters', 'Threads waiting to borrow a database connection.')
+    waiters.set(value=stats['waiters'])
+    max_size = Gauge('db_pool_max_size', 'Maximum number of pooled database connections.')
+    max_size.set(value=stats['max_size'])
+    return [connections, waiters, max_size]
+
+def _change_feed_metrics():
+    stats = get_change_listener_stats()
+    if stats is None:
+        return []
+    connected = Gauge('change_feed_connected', 'Whether the change listener is connected (1) or not (0).')
+    connected.set(value=1 if stats['connected'] else 0)
+    notifications = Counter('change_feed_notifications_total', 'Table changes received from the change feed.')
+    notifications.inc(amount=stats['notifications'])
+    reconnects = Counter('change_feed_reconnects_total', 'Times the change listener lost its connection.')
+    reconnects.inc(amount=stats['reconnects'])
+    return [connected, notifications, reconnects]
+
+def _event_metrics():
+    stats = get_broadcaster().stats()
+    subscribers = Gauge('event_stream_subscribers', 'Open /api/events streams.')
+    subscribers.set(value=stats['subscribers'])
+    published = Counter('change_events_total', 'Change events added to the event buffer.')
+    published.inc(amount=stats['published'])
+    resets = Counter('event_stream_resets_total', 'Times a subscriber had missed events and was told to refetch.')
+    resets.inc(amount=stats['resets'])
+    return [subscribers, published, resets]
+
+def register_metrics_routes(app, render_service):
+    """Register /metrics and the hooks that time every request.
+
+    Scraping never touches the database. With METRICS_DIR set, as under
+    gunicorn, every worker writes a snapshot of its values there after
+    requests (at most every SNAPSHOT_SECONDS) and whichever worker answers a
+    scrape reports the sum over all of them; otherwise it reports its own.
+    """
+    metrics_dir = get_settings()['METRICS_DIR']
+
+    registry.add_collector('caches', lambda: _cache_metrics([
+        ('reference_data', get_cache().stats()),
+        ('compiled_templates', render_service.compiled_templates.stats())
+    ]))
+    registry.add_collector('pool', _pool_metrics)
+    registry.add_collector('change_feed', _change_feed_metrics)
+    registry.add_collector('events', _event_metrics)
+
+    @app.before_request
+    def start_request_timer():
+        g._metrics_started = time.perf_counter()
+        http_in_flight.inc()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.get('_metrics_started')
+        if started is not None:
+            endpoint = request.endpoint or 'unmatched'
+            http_requests.inc(endpoint, request.method, str(response.status_code))
+            http_duration.observe(endpoint, request.method, value=time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def end_request_timer(exc):
+        if g.pop('_metrics_started', None) is not None:
+            http_in_flight.dec()
+        if metrics_dir:
+            try:
+                registry.write_snapshot(metrics_dir, SNAPSHOT_SECONDS)
+            except OSError as e:
+                logger.warning("Could not write metrics snapshot to %s: %s", metrics_dir, e)
+
+    @app.route('/metrics', methods=['GET'])
+    def get_metrics():
+        if metrics_dir:
+            return Response(render_processes(metrics_dir), content_type=CONTENT_TYPE)
+        return Response(registry.render(), content_type=CONTENT_TYPE)
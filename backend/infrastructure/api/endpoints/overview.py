@@ -0,0 +1,20 @@
+from flask import jsonify
+import logging
+
+logger = logging.getLogger(__name__)
+
+def register_overview_routes(app, overview_service):
+    """Register the template overview route, which fans out its reads concurrently."""
+    
+    @app.route('/api/templates/<template_id>/overview', methods=['GET'])
+    def get_template_overview(template_id):
+        try:
+            overview = overview_service.get_overview(template_id)
+            if overview is None:
+                return jsonify({'error': 'Template not found'}), 404
+            return jsonify(overview)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error getting overview of template %s: %s", template_id, e)
+            return jsonify({'error': 'Failed to retrieve template overview', 'details': str(e)}), 500
@@ -0,0 +1,80 @@
+from flask import jsonify, request
+from domain.rendering.compiler import MissingVariablesError, MISSING_KEEP
+from infrastructure.api.streaming import stream_ndjson
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MIMETYPES = ('application/x-ndjson', 'application/jsonl', 'application/ndjson')
+
+def _ndjson_items(stream):
+    """Parse an NDJSON body lazily; an invalid line becomes a ValueError item."""
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError(f"Invalid JSON: {e}")
+
+def _batch_request():
+    """Read the variable maps and missing policy of a batch render request.
+
+    The body is either a JSON array of variable maps, an object with items
+    (and optionally missing), or NDJSON with one variable map per line.
+    """
+    missing = request.args.get('missing', MISSING_KEEP)
+    if request.mimetype in NDJSON_MIMETYPES:
+        return _ndjson_items(request.stream), missing
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        missing = data.get('missing', missing)
+        data = data.get('items')
+    if not isinstance(data, list):
+        raise ValueError("Request body must be a JSON array of variable maps or NDJSON")
+    return data, missing
+
+def register_render_routes(app, render_service):
+    """Register prompt rendering routes with the Flask app."""
+
+    @app.route('/api/templates/<template_id>/render', methods=['POST'])
+    def render_template(template_id):
+        try:
+            data = request.get_json(silent=True) or {}
+            if not isinstance(data, dict):
+                return jsonify({'error': 'Request body must be a JSON object'}), 400
+
+            rendered = render_service.render_template(
+                template_id,
+                data.get('variables'),
+                data.get('missing', MISSING_KEEP)
+            )
+            if rendered is None:
+                return jsonify({'error': 'Template not found'}), 404
+
+            return jsonify(rendered)
+        except MissingVariablesError as e:
+            return jsonify({'error': str(e), 'missing_variables': e.names}), 422
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error rendering template %s: %s", template_id, e)
+            return jsonify({'error': 'Failed to render template', 'details': str(e)}), 500
+
+    @app.route('/api/templates/<template_id>/render:batch', methods=['POST'])
+    def render_template_batch(template_id):
+        try:
+            items, missing = _batch_request()
+            results = render_service.render_batch(template_id, items, missing)
+            if results is None:
+                return jsonify({'error': 'Template not found'}), 404
+
+            return stream_ndjson(results)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error batch rendering template %s: %s", template_id, e)
+            return jsonify({'error': 'Failed to render templates', 'details': str(e)}), 500
@@ -0,0 +1,31 @@
+from flask import jsonify, request
+from infrastructure.api.pagination import page_response, parse_limit
+import logging
+
+logger = logging.getLogger(__name__)
+
+def register_search_routes(app, search_service):
+    """Register the full-text search route.
+
+    GET /api/search?q=...&type=template,information,variable returns hits
+    as {type, id, title, snippet, rank}, best first, with matched words in
+    <mark> tags. Pages follow like the list endpoints: limit, and the
+    cursor from X-Next-Cursor.
+    """
+
+    @app.route('/api/search', methods=['GET'])
+    def search():
+        try:
+            types = [value.strip() for value in request.args.get('type', '').split(',') if value.strip()]
+            page = search_service.search(
+                request.args.get('q'),
+                types=types or None,
+                limit=parse_limit(),
+                cursor=request.args.get('cursor')
+            )
+            return page_response(page)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error searching for %r: %s", request.args.get('q'), e)
+            return jsonify({'error': 'Search failed', 'details': str(e)}), 500
@@ -1,6 +1,15 @@
 from flask import jsonify, request
-import traceback
-import sys
+from infrastructure.api.pagination import wants_unpaged, parse_page_request, page_response
+from infrastructure.api.streaming import wants_stream, stream_json_array
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _read_options():
+    """Read the aggregated/include query parameters of template GET routes."""
+    aggregated = request.args.get('aggregated', '').lower() in ('1', 'true', 'yes')
+    include_related = request.args.get('include', '').lower() == 'related'
+    return aggregated, include_related
 
 def register_template_routes(app, template_service):
     """Register template-related routes with the Flask app."""
@@ -9,30 +18,32 @@ def register_template_routes(app, template_service):
     @app.route('/api/templates', methods=['GET'])
     def get_templates():
         try:
-            print("GET /api/templates: Getting all templates test")
-            templates = template_service.get_all_templates()
+            aggregated, include_related = _read_options()
+            if wants_stream():
+                return stream_json_array(template_service.stream_templates(include_related))
+            if not wants_unpaged():
+                page = template_service.get_templates_page(parse_page_request(), aggregated, include_related)
+                return page_response(page)
+            
+            logger.debug("GET /api/templates: Getting all templates")
+            templates = template_service.get_all_templates(aggregated, include_related)
             return jsonify(templates)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting templates at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting templates: %s", e)
             return jsonify({'error': 'Failed to retrieve templates', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>', methods=['GET'])
     def get_template(template_id):
         try:
-            template = template_service.get_template_by_id(template_id)
+            aggregated, include_related = _read_options()
+            template = template_service.get_template_by_id(template_id, aggregated, include_related)
             if template:
                 return jsonify(template)
             return jsonify({'error': 'Template not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting template %s: %s", template_id, e)
             return jsonify({'error': 'Failed to retrieve template', 'details': str(e)}), 500
     
     @app.route('/api/templates', methods=['POST'])
@@ -42,18 +53,14 @@ def register_template_routes(app, template_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"POST /api/templates: Creating template with data: {data}")
+            logger.debug("POST /api/templates: Creating template with data: %s", data)
             
             template = template_service.create_template(data)
             return jsonify(template), 201
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error creating template at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating template: %s", e)
             return jsonify({'error': 'Failed to create template', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>', methods=['PUT'])
@@ -63,7 +70,7 @@ def register_template_routes(app, template_service):
             if not data:
                 return jsonify({'error': 'No data provided'}), 400
                 
-            print(f"PUT /api/templates/{template_id}: Updating template with data: {data}")
+            logger.debug("PUT /api/templates/%s: Updating template with data: %s", template_id, data)
             
             template = template_service.update_template(template_id, data)
             if template:
@@ -72,11 +79,7 @@ def register_template_routes(app, template_service):
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating template %s: %s", template_id, e)
             return jsonify({'error': 'Failed to update template', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>', methods=['DELETE'])
@@ -87,11 +90,7 @@ def register_template_routes(app, template_service):
                 return jsonify({'message': 'Template deleted'})
             return jsonify({'error': 'Template not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error deleting template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting template %s: %s", template_id, e)
             return jsonify({'error': 'Failed to delete template', 'details': str(e)}), 500
     
     # Template color routes
@@ -102,18 +101,14 @@ def register_template_routes(app, template_service):
             if not data or 'color_id' not in data:
                 return jsonify({'error': 'No color_id provided'}), 400
             
-            print(f"PUT /api/templates/{template_id}/color: Updating color to {data['color_id']}")
+            logger.debug("PUT /api/templates/%s/color: Updating color to %s", template_id, data['color_id'])
             
             success = template_service.update_template_color(template_id, data['color_id'])
             if success:
                 return jsonify({'message': f'Template {template_id} color updated to {data["color_id"]}'})
             return jsonify({'error': 'Failed to update template color'}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating template {template_id} color at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating template %s color: %s", template_id, e)
             return jsonify({'error': 'Failed to update template color', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>/color', methods=['DELETE'])
@@ -124,11 +119,7 @@ def register_template_routes(app, template_service):
                 return jsonify({'message': f'Color removed from template {template_id}'})
             return jsonify({'error': 'Failed to remove color from template'}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error removing color from template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error removing color from template %s: %s", template_id, e)
             return jsonify({'error': 'Failed to remove color from template', 'details': str(e)}), 500
     
     # Template completion type routes
@@ -140,11 +131,7 @@ def register_template_routes(app, template_service):
                 return jsonify({'message': f'Completion type {completion_type_id} associated with template {template_id}'})
             return jsonify({'error': 'Failed to associate completion type with template'}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error associating completion type {completion_type_id} with template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error associating completion type %s with template %s: %s", completion_type_id, template_id, e)
             return jsonify({'error': 'Failed to associate completion type with template', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>/completion-types/<completion_type_id>', methods=['DELETE'])
@@ -155,11 +142,7 @@ def register_template_routes(app, template_service):
                 return jsonify({'message': f'Completion type {completion_type_id} association removed from template {template_id}'})
             return jsonify({'error': 'Failed to remove completion type association from template'}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error removing completion type {completion_type_id} association from template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error removing completion type %s association from template %s: %s", completion_type_id, template_id, e)
             return jsonify({'error': 'Failed to remove completion type association from template', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>/completion-types', methods=['PUT'])
@@ -169,16 +152,14 @@ def register_template_routes(app, template_service):
             if not data or 'completion_type_ids' not in data:
                 return jsonify({'error': 'No completion_type_ids provided'}), 400
             
-            success = template_service.update_template_completion_types(template_id, data['completion_type_ids'])
-            if success:
-                return jsonify({'message': f'Template {template_id} completion types updated'})
-            return jsonify({'error': 'Failed to update template completion types'}), 400
+            template = template_service.update_template_completion_types(template_id, data['completion_type_ids'])
+            if template:
+                return jsonify(template)
+            return jsonify({'error': 'Template not found'}), 404
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating template {template_id} completion types at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating template %s completion types: %s", template_id, e)
             return jsonify({'error': 'Failed to update template completion types', 'details': str(e)}), 500
     
     @app.route('/api/templates/<template_id>/completion-types', methods=['GET'])
@@ -194,9 +175,40 @@ def register_template_routes(app, template_service):
             else:
                 return jsonify([])
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting completion types for template {template_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
-            return jsonify({'error': 'Failed to retrieve completion types for template', 'details': str(e)}), 500
\ No newline at end of file
+            logger.exception("Error getting completion types for template %s: %s", template_id, e)
+            return jsonify({'error': 'Failed to retrieve completion types for template', 'details': str(e)}), 500
+    
+    # Template version history
+    @app.route('/api/templates/<template_id>/versions', methods=['GET'])
+    def get_template_versions(template_id):
+        try:
+            versions = template_service.get_template_versions(template_id)
+            if versions:
+                return jsonify(versions)
+            return jsonify({'error': 'Template not found'}), 404
+        except Exception as e:
+            logger.exception("Error getting versions for template %s: %s", template_id, e)
+            return jsonify({'error': 'Failed to retrieve template versions', 'details': str(e)}), 500
+    
+    @app.route('/api/templates/<template_id>/versions/<version>', methods=['GET'])
+    def get_template_version(template_id, version):
+        try:
+            found = template_service.get_template_version(template_id, version)
+            if not found:
+                return jsonify({'error': 'Template version not found'}), 404
+            if version == 'latest':
+                return jsonify(found)
+            
+            # En numrerad version ändras aldrig, så den får cachas för alltid
+            if request.if_none_match.contains(found['content_hash']):
+                response = app.response_class(status=304)
+            else:
+                response = jsonify(found)
+            response.set_etag(found['content_hash'])
+            response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+            return response
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error getting version %s of template %s: %s", version, template_id, e)
+            return jsonify({'error': 'Failed to retrieve template version', 'details': str(e)}), 500
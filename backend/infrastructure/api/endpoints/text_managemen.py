@@ -1,7 +1,11 @@
 # infrastructure/api/endpoints/text_management.py
 from flask import jsonify, request
-import traceback
-import sys
+from infrastructure.api.bulk import wants_atomic, bulk_response
+from infrastructure.api.pagination import wants_unpaged, parse_page_request, page_response
+from infrastructure.api.streaming import wants_stream, stream_json_array
+import logging
+
+logger = logging.getLogger(__name__)
 
 def register_text_management_routes(app, text_management_service):
     """Register text management-related routes with the Flask app."""
@@ -9,16 +13,19 @@ def register_text_management_routes(app, text_management_service):
     @app.route('/api/text/variables', methods=['GET'])
     def get_variables():
         try:
-            print("GET /api/text/variables: Fetching variables")
+            if wants_stream():
+                return stream_json_array(text_management_service.stream_variables())
+            if not wants_unpaged():
+                return page_response(text_management_service.get_variables_page(parse_page_request()))
+            
+            logger.debug("GET /api/text/variables: Fetching variables")
             variables = text_management_service.get_all_variables()
-            print(f"GET /api/text/variables: Retrieved {len(variables)} variables")
+            logger.debug("GET /api/text/variables: Retrieved %s variables", len(variables))
             return jsonify(variables)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting variables at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting variables: %s", e)
             return jsonify({'error': 'Failed to retrieve variables', 'details': str(e)}), 500
 
     @app.route('/api/text/variables', methods=['POST'])
@@ -28,42 +35,53 @@ def register_text_management_routes(app, text_management_service):
             if not variable_data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"POST /api/text/variables: Creating variable with data: {variable_data}")
+            logger.debug("POST /api/text/variables: Creating variable with data: %s", variable_data)
             
             variable = text_management_service.create_variable(variable_data)
             
-            print(f"POST /api/text/variables: Variable created with ID {variable.get('id', 'unknown')}")
+            logger.debug("POST /api/text/variables: Variable created with ID %s", variable.get('id', 'unknown'))
             
             return jsonify(variable), 201
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error creating variable at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error creating variable: %s", e)
             return jsonify({'error': 'Failed to create variable', 'details': str(e)}), 500
 
+    @app.route('/api/text/variables:bulk', methods=['POST'])
+    def bulk_variables():
+        try:
+            payload = request.json
+            if not payload:
+                return jsonify({'error': 'No data provided'}), 400
+            
+            result = text_management_service.bulk_variables(payload, atomic=wants_atomic())
+            
+            logger.debug("POST /api/text/variables:bulk: %s created, %s updated, %s deleted, %s errors",
+                         len(result['created']), len(result['updated']), len(result['deleted']), len(result['errors']))
+            
+            return bulk_response(result)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        except Exception as e:
+            logger.exception("Error in bulk write of variables: %s", e)
+            return jsonify({'error': 'Failed to write variables', 'details': str(e)}), 500
+    
     @app.route('/api/text/variables/<int:variable_id>', methods=['GET'])
     def get_variable(variable_id):
         try:
-            print(f"GET /api/text/variables/{variable_id}: Fetching variable")
+            logger.debug("GET /api/text/variables/%s: Fetching variable", variable_id)
             
             variable = text_management_service.get_variable_by_id(variable_id)
             
             if variable:
-                print(f"GET /api/text/variables/{variable_id}: Retrieved variable {variable.get('namn', '')}")
+                logger.debug("GET /api/text/variables/%s: Retrieved variable %s", variable_id, variable.get('namn', ''))
                 return jsonify(variable)
                 
-            print(f"GET /api/text/variables/{variable_id}: Variable not found")
+            logger.warning("GET /api/text/variables/%s: Variable not found", variable_id)
             return jsonify({'error': 'Variable not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error getting variable {variable_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error getting variable %s: %s", variable_id, e)
             return jsonify({'error': 'Failed to retrieve variable', 'details': str(e)}), 500
 
     @app.route('/api/text/variables/<int:variable_id>', methods=['PUT'])
@@ -73,24 +91,20 @@ def register_text_management_routes(app, text_management_service):
             if not variable_data:
                 return jsonify({'error': 'No data provided'}), 400
             
-            print(f"PUT /api/text/variables/{variable_id}: Updating variable with data: {variable_data}")
+            logger.debug("PUT /api/text/variables/%s: Updating variable with data: %s", variable_id, variable_data)
             
             updated_variable = text_management_service.update_variable(variable_id, variable_data)
             
             if updated_variable:
-                print(f"PUT /api/text/variables/{variable_id}: Variable updated")
+                logger.debug("PUT /api/text/variables/%s: Variable updated", variable_id)
                 return jsonify(updated_variable)
                 
-            print(f"PUT /api/text/variables/{variable_id}: Variable not found")
+            logger.warning("PUT /api/text/variables/%s: Variable not found", variable_id)
             return jsonify({'error': 'Variable not found'}), 404
         except ValueError as e:
             return jsonify({'error': str(e)}), 400
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating variable {variable_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating variable %s: %s", variable_id, e)
             return jsonify({'error': 'Failed to update variable', 'details': str(e)}), 500
 
     @app.route('/api/text/variables/<int:variable_id>/comments', methods=['PUT'])
@@ -100,41 +114,33 @@ def register_text_management_routes(app, text_management_service):
             if not isinstance(data, dict) or 'comments' not in data:
                 return jsonify({'error': 'Missing comments field in request data'}), 400
                 
-            print(f"PUT /api/text/variables/{variable_id}/comments: Setting comments to {data['comments']}")
+            logger.debug("PUT /api/text/variables/%s/comments: Setting comments to %s", variable_id, data['comments'])
             
             updated_variable = text_management_service.update_variable_comments(variable_id, data['comments'])
             
             if updated_variable:
-                print(f"PUT /api/text/variables/{variable_id}/comments: Comments status updated to {data['comments']}")
+                logger.debug("PUT /api/text/variables/%s/comments: Comments status updated to %s", variable_id, data['comments'])
                 return jsonify({'message': 'Comments status updated successfully', 'variable': updated_variable})
                 
             return jsonify({'error': 'Variable not found'}), 404
                 
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error updating variable comments {variable_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error updating variable comments %s: %s", variable_id, e)
             return jsonify({'error': 'Failed to update comments status', 'details': str(e)}), 500
 
     @app.route('/api/text/variables/<int:variable_id>', methods=['DELETE'])
     def delete_variable(variable_id):
         try:
-            print(f"DELETE /api/text/variables/{variable_id}: Deleting variable")
+            logger.debug("DELETE /api/text/variables/%s: Deleting variable", variable_id)
             
             deleted = text_management_service.delete_variable(variable_id)
             
             if deleted:
-                print(f"DELETE /api/text/variables/{variable_id}: Variable deleted")
+                logger.debug("DELETE /api/text/variables/%s: Variable deleted", variable_id)
                 return '', 204
                 
-            print(f"DELETE /api/text/variables/{variable_id}: Variable not found")
+            logger.warning("DELETE /api/text/variables/%s: Variable not found", variable_id)
             return jsonify({'error': 'Variable not found'}), 404
         except Exception as e:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Error deleting variable {variable_id} at {fname}:{line}: {e}")
-            print(f"Stacktrace: {traceback.format_exc()}")
+            logger.exception("Error deleting variable %s: %s", variable_id, e)
             return jsonify({'error': 'Failed to delete variable', 'details': str(e)}), 500
\ No newline at end of file
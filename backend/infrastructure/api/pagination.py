@@ -0,0 +1,54 @@
+from flask import jsonify, request
+from infrastructure.config.config import get_settings
+from infrastructure.database.pagination import PageRequest
+from urllib.parse import urlencode
+
+# Query parameters that are passed on to the repositories as filters
+FILTER_PARAMS = ('template_id', 'department_id', 'completion_type_id', 'color_id', 'name')
+
+def wants_unpaged():
+    """Check for the explicit flag that returns the whole list in one response."""
+    return request.args.get('unpaged', '').lower() in ('1', 'true', 'yes')
+
+def parse_limit():
+    """Read the limit query parameter; raises ValueError for invalid values."""
+    settings = get_settings()
+
+    limit = request.args.get('limit', settings['DEFAULT_PAGE_SIZE'])
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > settings['MAX_PAGE_SIZE']:
+        raise ValueError(f"limit must be between 1 and {settings['MAX_PAGE_SIZE']}")
+    return limit
+
+def parse_page_request():
+    """Build a PageRequest from limit, cursor, sort and filter query parameters.
+
+    sort takes a field name, prefixed with '-' for descending order.
+    Raises ValueError for invalid values.
+    """
+    limit = parse_limit()
+
+    sort = request.args.get('sort', 'id')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+
+    filters = {}
+    for name in FILTER_PARAMS:
+        value = request.args.get(name)
+        if value not in (None, ''):
+            filters[name] = value
+
+    return PageRequest(limit, request.args.get('cursor'), sort, descending, filters)
+
+def page_response(page):
+    """JSON array response with X-Next-Cursor and Link headers for the next page."""
+    response = jsonify(page.items)
+    if page.next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = page.next_cursor
+        response.headers['X-Next-Cursor'] = page.next_cursor
+        response.headers['Link'] = f'<{request.path}?{urlencode(args)}>; rel="next"'
+    return response
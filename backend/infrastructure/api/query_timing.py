@@ -0,0 +1,64 @@
+from flask import g, request
+from infrastructure.config.config import get_settings
+from infrastructure.database.instrumentation import end_query_log, get_query_stats, start_query_log
+import datetime
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+def _server_timing(summary, total_ms):
+    return (
+        f'db;dur={summary["db_ms"]:.1f};desc="{summary["queries"]} queries", '
+        f'dbwait;dur={summary["wait_ms"]:.1f};desc="{summary["connections"]} connections", '
+        f'app;dur={total_ms:.1f}'
+    )
+
+def register_query_instrumentation(app):
+    """Record the SQL run by each request.
+
+    Totals go out in a Server-Timing header; the per-request summary is kept
+    for /api/debug/queries, and statements repeated more than
+    SQL_N_PLUS_ONE_THRESHOLD times are logged as likely N+1 patterns. For
+    streamed responses the header only covers the queries run before the
+    body started.
+    """
+    if not get_settings()['SQL_INSTRUMENTATION']:
+        return
+
+    @app.before_request
+    def start_request_queries():
+        g._query_log_token = start_query_log()
+
+    @app.after_request
+    def add_server_timing(response):
+        token = g.get('_query_log_token')
+        if token is not None:
+            log = token.var.get()
+            summary = log.summary(get_settings()['SQL_N_PLUS_ONE_THRESHOLD'])
+            total_ms = (time.perf_counter() - log.started) * 1000
+            response.headers['Server-Timing'] = _server_timing(summary, total_ms)
+            g._query_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_queries(exc):
+        token = g.pop('_query_log_token', None)
+        if token is None:
+            return
+        log = token.var.get()
+        end_query_log(token)
+
+        summary = log.summary(get_settings()['SQL_N_PLUS_ONE_THRESHOLD'])
+        for statement in summary['n_plus_one']:
+            count = next(s['count'] for s in summary['statements'] if s['fingerprint'] == statement)
+            logger.warning("Possible N+1 query in %s %s: %s ran %s times", request.method, request.path, statement, count)
+
+        summary.update({
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': g.get('_query_status', 500),
+            'duration_ms': round((time.perf_counter() - log.started) * 1000, 3),
+            'finished_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
+        })
+        get_query_stats().record_request(summary)
@@ -7,7 +7,15 @@ from application.services.text_management_service import TextManagementService
 from application.services.connect_children_categories_service import ConnectChildrenCategoryService
 from application.services.category_service import CategoryService
 from application.services.information_service import InformationService
+from application.services.render_service import RenderService
+from application.services.template_overview_service import TemplateOverviewService
+from application.services.bootstrap_service import BootstrapService
+from application.services.category_tree_service import CategoryTreeService
+from application.services.search_service import SearchService
 
+from infrastructure.api.conditional import register_conditional_get
+from infrastructure.api.query_timing import register_query_instrumentation
+from infrastructure.cache.change_feed import register_change_feed
 from infrastructure.api.endpoints import (
     register_department_routes,
     register_template_routes,
@@ -17,7 +25,15 @@ from infrastructure.api.endpoints import (
     register_debug_routes,
     register_connect_children_categories_routes,
     register_category_routes,
-    register_information_routes
+    register_information_routes,
+    register_render_routes,
+    register_metrics_routes,
+    register_health_routes,
+    register_overview_routes,
+    register_bootstrap_routes,
+    register_category_tree_routes,
+    register_search_routes,
+    register_event_routes
 )
 
 def register_routes(app):
@@ -32,6 +48,21 @@ def register_routes(app):
     connect_children_category_service = ConnectChildrenCategoryService()
     category_service = CategoryService()
     information_service = InformationService()
+    render_service = RenderService()
+    overview_service = TemplateOverviewService()
+    category_tree_service = CategoryTreeService()
+    search_service = SearchService()
+    bootstrap_service = BootstrapService(
+        template_service, category_service, department_service, color_service,
+        completion_type_service, connect_children_category_service, information_service,
+        text_management_service
+    )
+    
+    # Request latency histograms and /metrics; registered first so that it times the other hooks too
+    register_metrics_routes(app, render_service)
+    
+    # Per-request SQL timings; registered first so that it also sees the queries of other hooks
+    register_query_instrumentation(app)
     
     # Register all routes
     register_department_routes(app, department_service)
@@ -42,14 +73,19 @@ def register_routes(app):
     register_connect_children_categories_routes(app, connect_children_category_service)
     register_category_routes(app, category_service)
     register_information_routes(app, information_service)
+    register_render_routes(app, render_service)
+    register_overview_routes(app, overview_service)
+    register_bootstrap_routes(app, bootstrap_service)
+    register_category_tree_routes(app, category_tree_service)
+    register_search_routes(app, search_service)
+    register_event_routes(app)
     register_debug_routes(app)
     
-    # Health check endpoint
-    @app.route('/api/health', methods=['GET'])
-    def health_check():
-        import datetime
-        return jsonify({
-            'status': 'ok',
-            'version': '1.0.0',
-            'timestamp': datetime.datetime.now().isoformat()
-        })
\ No newline at end of file
+    # ETag/Last-Modified and 304 responses for GET routes backed by versioned tables
+    register_conditional_get(app)
+    
+    # Cache eviction on writes made by any worker (or directly in the database)
+    register_change_feed(app)
+    
+    # Liveness and readiness probes
+    register_health_routes(app)
@@ -0,0 +1,72 @@
+from flask import Response, current_app, request, stream_with_context
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Flush to the client once this many bytes of JSON have been produced
+CHUNK_SIZE = 64 * 1024
+
+def wants_stream():
+    """Check for the flag that streams the whole list instead of building it in memory."""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def stream_json_array(items):
+    """Stream an iterable of dicts as one JSON array.
+
+    Items are serialized one at a time, so memory use stays flat no matter how
+    many items the iterable produces. The first item is fetched before the
+    response is returned, so a failing query still turns into an error status.
+    """
+    return _stream(items, '[', ',', ']', 'application/json')
+
+def stream_ndjson(items):
+    """Stream an iterable of dicts as newline-delimited JSON, one item per line.
+
+    Same guarantees as stream_json_array(). The request context stays
+    available while streaming, so items may read a streamed request body.
+    """
+    return _stream(items, '', '', '', 'application/x-ndjson', terminator='\n')
+
+def _stream(items, opening, separator, closing, mimetype, terminator=''):
+    dumps = current_app.json.dumps
+    path = request.path
+    iterator = iter(items)
+    try:
+        head = [next(iterator)]
+    except StopIteration:
+        head = []
+    except Exception:
+        _close(items)
+        raise
+
+    def generate():
+        buffer = [opening]
+        size = len(opening)
+        first = True
+        try:
+            for source in (head, iterator):
+                for item in source:
+                    chunk = dumps(item) + terminator
+                    if not first:
+                        chunk = separator + chunk
+                    first = False
+                    buffer.append(chunk)
+                    size += len(chunk)
+                    if size >= CHUNK_SIZE:
+                        yield ''.join(buffer)
+                        buffer = []
+                        size = 0
+            buffer.append(closing)
+            yield ''.join(buffer)
+        except Exception as e:
+            # Headers are already sent, so the only thing left to do is to stop the body
+            logger.exception("Error while streaming %s: %s", path, e)
+        finally:
+            _close(items)
+
+    return Response(stream_with_context(generate()), mimetype=mimetype)
+
+def _close(items):
+    close = getattr(items, 'close', None)
+    if close:
+        close()
@@ -0,0 +1,115 @@
+from datetime import datetime, timezone
+
+import pytest
+from flask import Flask, jsonify
+
+from infrastructure.api import conditional
+
+UPDATED_AT = datetime(2024, 5, 1, 12, 0, 0, 500000, tzinfo=timezone.utc)
+
+
+class Versions(dict):
+    """Table versions served to the middleware, with a log of the tables it asked for."""
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.requested = []
+
+
+@pytest.fixture
+def versions(monkeypatch):
+    versions = Versions({'colors': (3, UPDATED_AT)})
+
+    def get_table_versions(tables):
+        versions.requested.append(set(tables))
+        if not versions:
+            return None
+        return {table: versions[table] for table in tables if table in versions}
+
+    monkeypatch.setattr(conditional, 'get_table_versions', get_table_versions)
+    return versions
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    conditional.register_conditional_get(app)
+
+    @app.route('/api/colors', methods=['GET', 'POST'])
+    def colors():
+        return jsonify([])
+
+    @app.route('/api/templates/<template_id>/departments')
+    def departments(template_id):
+        return jsonify([])
+
+    @app.route('/api/health')
+    def health():
+        return jsonify({'status': 'ok'})
+
+    return app.test_client()
+
+
+def test_tables_come_from_every_static_segment(client, versions):
+    client.get('/api/templates/1/departments')
+
+    assert versions.requested == [{'templates', 'departments', 'colors', 'completion_types',
+                                   'categories', 'information'}]
+
+
+def test_response_carries_validators(client, versions):
+    response = client.get('/api/colors')
+
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.last_modified == UPDATED_AT.replace(microsecond=0)
+    assert response.headers['Cache-Control'] == 'no-cache'
+
+
+def test_matching_etag_gets_304(client, versions):
+    etag = client.get('/api/colors').headers['ETag']
+
+    response = client.get('/api/colors', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+
+
+def test_a_write_changes_the_etag(client, versions):
+    etag = client.get('/api/colors').headers['ETag']
+    versions['colors'] = (4, UPDATED_AT)
+
+    response = client.get('/api/colors', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_query_string_is_part_of_the_etag(client, versions):
+    etag = client.get('/api/colors?limit=10').headers['ETag']
+
+    assert client.get('/api/colors?limit=20').headers['ETag'] != etag
+
+
+def test_if_modified_since_is_used_without_an_etag(client, versions):
+    since = client.get('/api/colors').headers['Last-Modified']
+
+    assert client.get('/api/colors', headers={'If-Modified-Since': since}).status_code == 304
+    versions['colors'] = (4, datetime(2024, 5, 2, tzinfo=timezone.utc))
+    assert client.get('/api/colors', headers={'If-Modified-Since': since}).status_code == 200
+
+
+def test_unversioned_routes_and_writes_are_left_alone(client, versions):
+    assert 'ETag' not in client.get('/api/health').headers
+    assert 'ETag' not in client.post('/api/colors').headers
+    assert versions.requested == []
+
+
+def test_missing_table_versions_disable_validators(client, versions):
+    versions.clear()
+
+    response = client.get('/api/colors', headers={'If-None-Match': '"anything"'})
+
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
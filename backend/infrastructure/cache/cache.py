@@ -0,0 +1,207 @@
+from collections import OrderedDict
+from infrastructure.config.config import get_settings
+import json
+import threading
+import time
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+class MemoryCache:
+    """In-process cache with a TTL per entry and LRU eviction above max_entries.
+
+    Values are returned as stored, so callers must not mutate them.
+    """
+
+    def __init__(self, ttl=300, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bumped on every invalidation so that a load that raced with a write is not stored
+        self.generation = 0
+
+    def get(self, key):
+        """Return (True, value) for a fresh entry, otherwise (False, None)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return True, value
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def set(self, key, value, ttl=None, generation=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, *keys):
+        with self._lock:
+            self.generation += 1
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def delete_prefix(self, prefix):
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if key.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+class RedisCache:
+    """Cache shared between processes, stored as JSON in Redis.
+
+    Requires the redis package, which is only imported when this backend is
+    configured.
+    """
+
+    def __init__(self, url, ttl=300, prefix='template_ai:'):
+        import redis
+
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.generation = None
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        self._count(raw is not None)
+        if raw is None:
+            return False, None
+        return True, json.loads(raw)
+
+    def set(self, key, value, ttl=None, generation=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._client.set(self.prefix + key, json.dumps(value, default=str), px=int(ttl * 1000))
+
+    def delete(self, *keys):
+        if keys:
+            self._client.delete(*[self.prefix + key for key in keys])
+
+    def delete_prefix(self, prefix):
+        keys = list(self._client.scan_iter(match=self.prefix + prefix + '*'))
+        if keys:
+            self._client.delete(*keys)
+
+    def clear(self):
+        self.delete_prefix('')
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'redis',
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+def create_cache(settings):
+    """Build the cache backend selected by CACHE_BACKEND.
+
+    Falls back to the in-process cache if the shared backend cannot be used.
+    """
+    if settings['CACHE_BACKEND'] == 'redis':
+        try:
+            cache = RedisCache(settings['CACHE_URL'], settings['CACHE_TTL'])
+            cache._client.ping()
+            logger.info("Using Redis cache at %s", settings['CACHE_URL'])
+            return cache
+        except Exception as e:
+            logger.warning("Redis cache unavailable, falling back to in-process cache: %s", e)
+    return MemoryCache(settings['CACHE_TTL'], settings['CACHE_MAX_ENTRIES'])
+
+def _forget_cache_after_fork():
+    """Give a forked child its own cache instead of the parent's copy or Redis socket."""
+    global _cache, _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_cache_after_fork)
+
+def get_cache():
+    """Get the process-wide cache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache(get_settings())
+    return _cache
+
+def cached(key, loader):
+    """Read-through lookup: return the cached value or load and store it.
+
+    Empty results are not stored, because the repositories also return
+    empty results when the database is unreachable. Cache backend errors
+    fall through to the loader so the cache can never take a read down.
+    """
+    cache = get_cache()
+    try:
+        generation = cache.generation
+        hit, value = cache.get(key)
+        if hit:
+            return value
+    except Exception as e:
+        logger.warning("Cache get failed for %s: %s", key, e)
+        return loader()
+
+    value = loader()
+    if value:
+        try:
+            cache.set(key, value, generation=generation)
+        except Exception as e:
+            logger.warning("Cache set failed for %s: %s", key, e)
+    return value
+
+def invalidate(*keys, prefixes=()):
+    """Remove exact keys and every key under the given prefixes."""
+    cache = get_cache()
+    try:
+        cache.delete(*keys)
+        for prefix in prefixes:
+            cache.delete_prefix(prefix)
+    except Exception as e:
+        logger.warning("Cache invalidation failed for %s %s: %s", keys, prefixes, e)
@@ -0,0 +1,208 @@
+from infrastructure.cache.cache import invalidate
+from infrastructure.config.config import get_settings
+from infrastructure.database.connection import connect_unpooled
+from infrastructure.database.schema import get_schema_registry, SchemaUnavailableError
+import select
+import threading
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Channel the bump_table_version() trigger notifies with the name of a changed table
+CHANNEL = 'table_changes'
+
+# Cache key prefixes whose entries are built from each table. Templates are
+# listed under departments and completion types because those embed
+# template titles and links.
+TABLE_CACHE_PREFIXES = {
+    'templates': ('departments:', 'completion_types:'),
+    'departments': ('departments:',),
+    'colors': ('colors:',),
+    'completion_types': ('completion_types:',),
+    'categories': (),
+    'information': (),
+    'connect_children_categories': (),
+    'category_variabels': (),
+}
+
+# Seconds without notifications after which the connection is checked with a query
+IDLE_CHECK_SECONDS = 30
+
+_listener = None
+_listener_lock = threading.Lock()
+
+# Handlers per channel; the listener LISTENs on every channel that has one
+_handlers = {}
+
+def add_change_handler(channel, handler):
+    """Call handler with the payloads of each batch of notifications on channel.
+
+    Payloads arrive in commit order. After the listener (re)connects the
+    handler is called with None, since notifications sent while nobody
+    listened are lost. Register handlers at import time, before the
+    listener starts.
+    """
+    _handlers.setdefault(channel, []).append(handler)
+
+def evict_changed(tables):
+    """Drop the cached entries built from the given tables; None means any table."""
+    if tables is None:
+        tables = TABLE_CACHE_PREFIXES.keys()
+    prefixes = sorted({prefix for table in tables for prefix in TABLE_CACHE_PREFIXES.get(table, ())})
+    if prefixes:
+        invalidate(prefixes=prefixes)
+
+add_change_handler(CHANNEL, evict_changed)
+
+class ChangeListener:
+    """Background thread that LISTENs on the registered channels and passes notifications to their handlers."""
+
+    def __init__(self, reconnect_delay=1.0):
+        self.reconnect_delay = reconnect_delay
+        self._stop = threading.Event()
+        self._thread = None
+        self.connected = False
+        self.notifications = 0
+        self.reconnects = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name='change-feed', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stats(self):
+        return {
+            'connected': self.connected,
+            'notifications': self.notifications,
+            'reconnects': self.reconnects
+        }
+
+    def _dispatch(self, channel, payloads):
+        for handler in _handlers.get(channel, ()):
+            try:
+                handler(payloads)
+            except Exception as e:
+                logger.exception("Change feed handler for %s failed: %s", channel, e)
+
+    def _run(self):
+        delay = self.reconnect_delay
+        while not self._stop.is_set():
+            conn = None
+            try:
+                conn = connect_unpooled()
+                channels = sorted(_handlers)
+                cursor = conn.cursor()
+                for channel in channels:
+                    cursor.execute(f"LISTEN {channel}")
+                cursor.close()
+                self.connected = True
+                delay = self.reconnect_delay
+                logger.info("Change feed listening on %s", ', '.join(channels))
+                for channel in channels:
+                    self._dispatch(channel, None)
+                self._listen(conn)
+            except Exception as e:
+                if self._stop.is_set():
+                    break
+                self.reconnects += 1
+                logger.warning("Change feed connection lost, reconnecting in %.1f s: %s", delay, e)
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+            self._stop.wait(delay)
+            delay = min(delay * 2, 60)
+
+    def _listen(self, conn):
+        idle = 0.0
+        while not self._stop.is_set():
+            # Short waits so stop() is noticed quickly; a notification wakes select at once
+            if select.select([conn], [], [], 1.0) == ([], [], []):
+                idle += 1.0
+                if idle >= IDLE_CHECK_SECONDS:
+                    # A dropped TCP connection never becomes readable; a query finds out
+                    cursor = conn.cursor()
+                    cursor.execute("SELECT 1")
+                    cursor.close()
+                    idle = 0.0
+                continue
+
+            idle = 0.0
+            conn.poll()
+            received = {}
+            while conn.notifies:
+                notify = conn.notifies.pop(0)
+                received.setdefault(notify.channel, []).append(notify.payload)
+            for channel, payloads in received.items():
+                self.notifications += len(payloads)
+                logger.debug("Change feed received %s notifications on %s", len(payloads), channel)
+                self._dispatch(channel, payloads)
+
+def get_change_listener():
+    """Get this process's change listener, starting it on first use.
+
+    Returns None when the change feed is disabled or the table_versions
+    migration, whose triggers send the notifications, is not applied.
+    """
+    global _listener
+    if _listener is None:
+        with _listener_lock:
+            if _listener is None:
+                settings = get_settings()
+                if not settings['CHANGE_FEED_ENABLED']:
+                    return None
+                try:
+                    if not get_schema_registry().has_table('table_versions'):
+                        return None
+                except SchemaUnavailableError:
+                    # Not known yet; a later call tries again once the catalog is readable
+                    return None
+                listener = ChangeListener(settings['CHANGE_FEED_RECONNECT_DELAY'])
+                listener.start()
+                _listener = listener
+    return _listener
+
+def get_change_listener_stats():
+    """State of this process's change listener, or None if it has not been started."""
+    listener = _listener
+    return listener.stats() if listener is not None else None
+
+def stop_change_listener():
+    """Stop this process's change listener, e.g. on worker exit."""
+    global _listener
+    with _listener_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def _forget_listener_after_fork():
+    """Threads do not survive fork; a forked worker starts its own listener."""
+    global _listener, _listener_lock
+    _listener = None
+    _listener_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_listener_after_fork)
+
+def register_change_feed(app):
+    """Start the change listener of each worker process with its first request.
+
+    Starting it lazily keeps it out of a preloading gunicorn master, which
+    never serves requests. With the change feed disabled no hook is
+    registered, so requests do not pay for the check.
+    """
+    if not get_settings()['CHANGE_FEED_ENABLED']:
+        logger.info("Change feed disabled; not starting a change listener")
+        return
+
+    @app.before_request
+    def ensure_change_listener():
+        if _listener is None:
+            get_change_listener()
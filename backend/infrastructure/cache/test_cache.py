@@ -0,0 +1,77 @@
+import pytest
+
+from infrastructure.cache import cache as cache_module
+from infrastructure.cache.cache import MemoryCache, cached
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entries_expire_after_their_ttl(clock):
+    cache = MemoryCache(ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=30)
+
+    clock[0] += 10
+    assert cache.get('a') == (False, None)
+    assert cache.get('b') == (True, 2)
+    assert cache.stats()['size'] == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = MemoryCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+
+    cache.set('c', 3)
+
+    assert cache.get('b') == (False, None)
+    assert cache.get('a') == (True, 1)
+    assert cache.get('c') == (True, 3)
+    assert cache.evictions == 1
+
+
+def test_invalidation_removes_keys_and_prefixes(clock):
+    cache = MemoryCache()
+    for key in ('templates:all', 'templates:1', 'colors:all'):
+        cache.set(key, key)
+
+    cache.delete('colors:all')
+    cache.delete_prefix('templates:')
+
+    assert cache.stats()['size'] == 0
+
+
+def test_load_that_raced_with_an_invalidation_is_not_stored(clock):
+    cache = MemoryCache()
+    generation = cache.generation
+
+    cache.delete('templates:all')
+    cache.set('templates:all', ['stale'], generation=generation)
+
+    assert cache.get('templates:all') == (False, None)
+    cache.set('templates:all', ['fresh'], generation=cache.generation)
+    assert cache.get('templates:all') == (True, ['fresh'])
+
+
+def test_cached_loads_once_and_skips_empty_results(clock, monkeypatch):
+    cache = MemoryCache()
+    monkeypatch.setattr(cache_module, 'get_cache', lambda: cache)
+    loads = []
+
+    def loader():
+        loads.append(1)
+        return ['row']
+
+    assert cached('k', loader) == ['row']
+    assert cached('k', loader) == ['row']
+    assert len(loads) == 1
+
+    assert cached('empty', list) == []
+    assert cache.get('empty') == (False, None)
@@ -1,37 +1,129 @@
 import os
 from dotenv import load_dotenv
+from types import MappingProxyType
+import threading
 import socket
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_settings = None
+_settings_lock = threading.Lock()
 
 def load_config():
     """Load configuration from environment variables."""
     load_dotenv()
-    
+
     # Get values with fallbacks
     host = os.getenv('DB_HOST', 'db.oatxqwsmylwagybwqmjg.supabase.co')
-    
-    # Try DNS lookup for the hostname
-    if not host.replace('.', '').isdigit() and '.' in host:
-        try:
-            print(f"Trying to resolve hostname {host}...")
-            ip_address = socket.gethostbyname(host)
-            print(f"Hostname {host} resolved to IP address {ip_address}")
-        except socket.gaierror as dns_error:
-            print(f"DNS error: Could not find host {host}. {dns_error}")
-    
     port = os.getenv('DB_PORT', '5432')
     dbname = os.getenv('DB_NAME', 'postgres')
     user = os.getenv('DB_USER', 'postgres')
     password = os.getenv('DB_PASSWORD', 'KqM51oyYzDzVDJES')
     env = os.getenv('ENV', 'development')
-    
-    # Print debug info
-    print(f"DB_HOST: {host}")
-    print(f"DB_PORT: {port}")
-    print(f"DB_NAME: {dbname}")
-    print(f"DB_USER: {user}")
-    # Do not print password for security reasons
-    print(f"ENV: {env}")
-    
+
+    # Connection pool sizing and recycling (seconds)
+    pool_min_size = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+    pool_max_size = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+    pool_idle_timeout = float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))
+    pool_max_lifetime = float(os.getenv('DB_POOL_MAX_LIFETIME', '1800'))
+    pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+
+    # How often the cached information_schema capabilities are refreshed (seconds)
+    schema_refresh_interval = float(os.getenv('SCHEMA_REFRESH_INTERVAL', '300'))
+
+    # Keyset pagination of list endpoints
+    default_page_size = int(os.getenv('DEFAULT_PAGE_SIZE', '100'))
+    max_page_size = int(os.getenv('MAX_PAGE_SIZE', '1000'))
+
+    # Rows fetched per round-trip when streaming list responses
+    stream_itersize = int(os.getenv('STREAM_ITERSIZE', '500'))
+
+    # Read-through cache for reference data: 'memory' (per process) or 'redis' (shared)
+    cache_backend = os.getenv('CACHE_BACKEND', 'memory')
+    cache_url = os.getenv('CACHE_URL', 'redis://localhost:6379/0')
+    cache_ttl = float(os.getenv('CACHE_TTL', '300'))
+    cache_max_entries = int(os.getenv('CACHE_MAX_ENTRIES', '1024'))
+
+    # Number of compiled templates kept by the prompt renderer
+    render_cache_size = int(os.getenv('RENDER_CACHE_SIZE', '1024'))
+
+    # Batch rendering: items per work unit, batch size where worker processes
+    # take over, and the number of worker processes (0 = one per CPU)
+    render_batch_chunk = int(os.getenv('RENDER_BATCH_CHUNK', '250'))
+    render_parallel_threshold = int(os.getenv('RENDER_PARALLEL_THRESHOLD', '2000'))
+    render_workers = int(os.getenv('RENDER_WORKERS', '0'))
+
+    # Logging: level, 'text' or 'json' output, and the share of requests whose debug logs are kept
+    log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
+    log_format = os.getenv('LOG_FORMAT', 'text')
+    log_debug_sample_rate = float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0'))
+
+    # SQL instrumentation: on/off, repeats of one statement per request flagged
+    # as N+1, and the number of request summaries kept for /api/debug/queries
+    sql_instrumentation = os.getenv('SQL_INSTRUMENTATION', 'true').lower() in ('1', 'true', 'yes')
+    sql_n_plus_one_threshold = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', '5'))
+    query_log_history = int(os.getenv('QUERY_LOG_HISTORY', '100'))
+
+    # Readiness probe: seconds a result is reused, and seconds to wait for a pooled connection
+    readiness_cache_seconds = float(os.getenv('READINESS_CACHE_SECONDS', '5'))
+    readiness_timeout = float(os.getenv('READINESS_TIMEOUT', '2'))
+
+    # Async repository stack (needs the optional asyncpg package): its own pool,
+    # prepared statement cache per connection (0 behind a transaction-mode pgbouncer)
+    # and the seconds a request waits for an async operation
+    async_db_enabled = os.getenv('ASYNC_DB_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    async_db_pool_min_size = int(os.getenv('ASYNC_DB_POOL_MIN_SIZE', '1'))
+    async_db_pool_max_size = int(os.getenv('ASYNC_DB_POOL_MAX_SIZE', '10'))
+    async_db_statement_cache_size = int(os.getenv('ASYNC_DB_STATEMENT_CACHE_SIZE', '100'))
+    async_db_timeout = float(os.getenv('ASYNC_DB_TIMEOUT', '10'))
+
+    # Threads that run the reads of /api/bootstrap concurrently
+    bootstrap_workers = int(os.getenv('BOOTSTRAP_WORKERS', '8'))
+
+    # Largest number of rows (creates + updates + deletes) in one bulk request
+    bulk_max_rows = int(os.getenv('BULK_MAX_ROWS', '5000'))
+
+    # /api/search: 'auto' (Postgres once the search migration is applied, else
+    # in memory), 'postgres' or 'memory', and the seconds an in-memory index is
+    # reused when table versions are not available
+    search_backend = os.getenv('SEARCH_BACKEND', 'auto').lower()
+    search_index_ttl = float(os.getenv('SEARCH_INDEX_TTL', '60'))
+
+    # Template history: a full snapshot at least every N versions, which bounds
+    # how many rows rebuilding an old version reads
+    template_snapshot_interval = max(int(os.getenv('TEMPLATE_SNAPSHOT_INTERVAL', '10')), 1)
+
+    # Change feed: a listener thread per worker evicts cached entries when
+    # table_versions triggers NOTIFY a write, and waits this many seconds
+    # (doubling up to a minute) before reconnecting after an error
+    change_feed_enabled = os.getenv('CHANGE_FEED_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    change_feed_reconnect_delay = float(os.getenv('CHANGE_FEED_RECONNECT_DELAY', '1'))
+
+    # /api/events: change events kept for resuming streams, open streams per
+    # worker, seconds between keepalive comments, and seconds before a stream
+    # is closed so the client reconnects (and resumes) elsewhere. The gevent
+    # worker holds a greenlet per stream; under a thread worker a stream holds
+    # a thread, so there at most half of GUNICORN_THREADS (and never all of
+    # them) serve streams.
+    events_buffer_size = int(os.getenv('EVENTS_BUFFER_SIZE', '1000'))
+    if os.getenv('GUNICORN_WORKER_CLASS', 'gevent') == 'gevent':
+        events_max_subscribers = int(os.getenv('EVENTS_MAX_SUBSCRIBERS', '500'))
+    else:
+        gunicorn_threads = int(os.getenv('GUNICORN_THREADS', '4'))
+        events_max_subscribers = min(
+            int(os.getenv('EVENTS_MAX_SUBSCRIBERS', str(gunicorn_threads // 2))),
+            gunicorn_threads - 1
+        )
+    events_heartbeat = float(os.getenv('EVENTS_HEARTBEAT', '15'))
+    events_stream_seconds = float(os.getenv('EVENTS_STREAM_SECONDS', '300'))
+
+    # Directory where each worker process writes its metrics, so that
+    # /metrics on any worker reports all of them (gunicorn.conf.py sets one);
+    # empty reports this process only
+    metrics_dir = os.getenv('METRICS_DIR', '')
+
     # Store connection string parts separately
     config = {
         'DB_HOST': host,
@@ -40,6 +132,116 @@ def load_config():
         'DB_USER': user,
         'DB_PASSWORD': password,
         'ENV': env,
+        'DB_POOL_MIN_SIZE': pool_min_size,
+        'DB_POOL_MAX_SIZE': pool_max_size,
+        'DB_POOL_IDLE_TIMEOUT': pool_idle_timeout,
+        'DB_POOL_MAX_LIFETIME': pool_max_lifetime,
+        'DB_POOL_TIMEOUT': pool_timeout,
+        'SCHEMA_REFRESH_INTERVAL': schema_refresh_interval,
+        'DEFAULT_PAGE_SIZE': default_page_size,
+        'MAX_PAGE_SIZE': max_page_size,
+        'STREAM_ITERSIZE': stream_itersize,
+        'CACHE_BACKEND': cache_backend,
+        'CACHE_URL': cache_url,
+        'CACHE_TTL': cache_ttl,
+        'CACHE_MAX_ENTRIES': cache_max_entries,
+        'RENDER_CACHE_SIZE': render_cache_size,
+        'RENDER_BATCH_CHUNK': render_batch_chunk,
+        'RENDER_PARALLEL_THRESHOLD': render_parallel_threshold,
+        'RENDER_WORKERS': render_workers,
+        'LOG_LEVEL': log_level,
+        'LOG_FORMAT': log_format,
+        'LOG_DEBUG_SAMPLE_RATE': log_debug_sample_rate,
+        'SQL_INSTRUMENTATION': sql_instrumentation,
+        'SQL_N_PLUS_ONE_THRESHOLD': sql_n_plus_one_threshold,
+        'QUERY_LOG_HISTORY': query_log_history,
+        'READINESS_CACHE_SECONDS': readiness_cache_seconds,
+        'READINESS_TIMEOUT': readiness_timeout,
+        'ASYNC_DB_ENABLED': async_db_enabled,
+        'ASYNC_DB_POOL_MIN_SIZE': async_db_pool_min_size,
+        'ASYNC_DB_POOL_MAX_SIZE': async_db_pool_max_size,
+        'ASYNC_DB_STATEMENT_CACHE_SIZE': async_db_statement_cache_size,
+        'ASYNC_DB_TIMEOUT': async_db_timeout,
+        'BOOTSTRAP_WORKERS': bootstrap_workers,
+        'BULK_MAX_ROWS': bulk_max_rows,
+        'SEARCH_BACKEND': search_backend,
+        'SEARCH_INDEX_TTL': search_index_ttl,
+        'TEMPLATE_SNAPSHOT_INTERVAL': template_snapshot_interval,
+        'CHANGE_FEED_ENABLED': change_feed_enabled,
+        'CHANGE_FEED_RECONNECT_DELAY': change_feed_reconnect_delay,
+        'EVENTS_BUFFER_SIZE': events_buffer_size,
+        'EVENTS_MAX_SUBSCRIBERS': events_max_subscribers,
+        'EVENTS_HEARTBEAT': events_heartbeat,
+        'EVENTS_STREAM_SECONDS': events_stream_seconds,
+        'METRICS_DIR': metrics_dir,
     }
-    
+
     return config
+
+def get_settings():
+    """Get the process-wide settings, loading them on first use.
+
+    The returned mapping is read-only. Use reload_settings() to pick up
+    changed environment variables.
+    """
+    global _settings
+    if _settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _settings = MappingProxyType(load_config())
+    return _settings
+
+def reload_settings():
+    """Reload settings from the environment and .env file.
+
+    Objects built from the previous settings (such as the connection pool)
+    keep their old values until they are recreated.
+    """
+    global _settings
+    with _settings_lock:
+        _settings = MappingProxyType(load_config())
+    return _settings
+
+def check_db_host(settings):
+    """Resolve DB_HOST once so DNS problems show up at startup."""
+    host = settings['DB_HOST']
+    if host.replace('.', '').isdigit() or '.' not in host:
+        return None
+
+    try:
+        logger.debug("Trying to resolve hostname %s...", host)
+        ip_address = socket.gethostbyname(host)
+        logger.info("Hostname %s resolved to IP address %s", host, ip_address)
+        return ip_address
+    except socket.gaierror as dns_error:
+        logger.warning("DNS error: Could not find host %s. %s", host, dns_error)
+        return None
+
+def print_settings(settings):
+    """Print the non-secret settings."""
+    logger.info("DB_HOST: %s", settings['DB_HOST'])
+    logger.info("DB_PORT: %s", settings['DB_PORT'])
+    logger.info("DB_NAME: %s", settings['DB_NAME'])
+    logger.info("DB_USER: %s", settings['DB_USER'])
+    # Do not print password for security reasons
+    logger.info("ENV: %s", settings['ENV'])
+
+def load_startup_settings():
+    """Load settings once at startup and report what that used to cost per connection."""
+    started = time.perf_counter()
+    settings = reload_settings()
+    loaded = time.perf_counter()
+    check_db_host(settings)
+    resolved = time.perf_counter()
+
+    print_settings(settings)
+
+    load_ms = (loaded - started) * 1000
+    dns_ms = (resolved - loaded) * 1000
+    logger.info(
+        "Configuration loaded in %.2f ms, DB_HOST lookup took %.2f ms. "
+        "This was previously paid on every database connection; "
+        "%.2f ms per connection is now removed from the request path.",
+        load_ms, dns_ms, load_ms + dns_ms
+    )
+    return settings
@@ -0,0 +1,132 @@
+from logging.handlers import QueueHandler, QueueListener
+from flask import g, has_request_context, request
+import datetime
+import logging
+import atexit
+import random
+import os
+import queue
+import json
+import sys
+
+_listener = None
+_queue_handler = None
+_settings = None
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(request_method)s %(request_path)s %(message)s'
+
+class RequestContextFilter(logging.Filter):
+    """Add the method and path of the current request (or '-') to every record."""
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_method = request.method
+            record.request_path = request.path
+        else:
+            record.request_method = '-'
+            record.request_path = '-'
+        return True
+
+class DebugSamplingFilter(logging.Filter):
+    """Keep the debug records of a sampled share of requests.
+
+    The decision is made once per request, so a kept request has all of its
+    debug lines. Records of other levels always pass.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        if not has_request_context():
+            return random.random() < self.rate
+        sampled = g.get('_log_debug_sampled')
+        if sampled is None:
+            sampled = random.random() < self.rate
+            g._log_debug_sampled = sampled
+        return sampled
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'method': getattr(record, 'request_method', '-'),
+            'path': getattr(record, 'request_path', '-'),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class _AsyncQueueHandler(QueueHandler):
+    """Queue handler that leaves formatting to the listener thread.
+
+    Only the message is merged in the calling thread, so that later changes
+    to the arguments cannot alter it; tracebacks and the final line are
+    formatted by the listener.
+    """
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+def configure_logging(settings):
+    """Route all logging through a queue to a background thread writing to stdout.
+
+    Calls from request threads only put the record on the queue, so slow or
+    contended stdout no longer holds up requests. Safe to call again to apply
+    changed settings.
+    """
+    global _listener, _queue_handler, _settings
+    stop_logging()
+    _settings = settings
+
+    if settings['LOG_FORMAT'] == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _AsyncQueueHandler(log_queue)
+    _queue_handler.addFilter(RequestContextFilter())
+    _queue_handler.addFilter(DebugSamplingFilter(settings['LOG_DEBUG_SAMPLE_RATE']))
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(getattr(logging, settings['LOG_LEVEL'], logging.INFO))
+
+    _listener = QueueListener(log_queue, stream_handler)
+    _listener.start()
+
+def stop_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def _restart_logging_after_fork():
+    """Start a new writer thread in a forked child; the parent's thread does not survive the fork."""
+    global _listener, _queue_handler
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener = None
+    _queue_handler = None
+    configure_logging(_settings)
+
+atexit.register(stop_logging)
+os.register_at_fork(after_in_child=_restart_logging_after_fork)
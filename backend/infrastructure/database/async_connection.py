@@ -0,0 +1,105 @@
+from infrastructure.config.config import get_settings
+from infrastructure.database.async_runtime import close_async_runtime, get_async_runtime
+import importlib.util
+import functools
+import asyncio
+import json
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only touched from the async runtime's loop
+_pool = None
+_pool_lock = asyncio.Lock()
+
+_PLACEHOLDER = re.compile(r"%%|%s")
+
+try:
+    from asyncpg.exceptions import DataError
+except ImportError:
+    class DataError(Exception):
+        """Stands in for asyncpg's DataError when asyncpg is not installed; never raised."""
+
+def async_db_available():
+    """Whether the async stack can be used: enabled in settings and asyncpg installed."""
+    return get_settings()['ASYNC_DB_ENABLED'] and importlib.util.find_spec('asyncpg') is not None
+
+@functools.lru_cache(maxsize=1024)
+def to_asyncpg_query(query):
+    """Rewrite psycopg2 %s placeholders as asyncpg's numbered $1, $2, ... ones.
+
+    Lets the async repositories run the same SQL as the sync ones.
+    """
+    counter = [0]
+
+    def replace(match):
+        if match.group(0) == '%%':
+            return '%'
+        counter[0] += 1
+        return f"${counter[0]}"
+
+    return _PLACEHOLDER.sub(replace, query)
+
+async def _init_connection(conn):
+    # Decode json columns to Python objects, as psycopg2 does
+    for type_name in ('json', 'jsonb'):
+        await conn.set_type_codec(type_name, encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+async def get_async_pool():
+    """Get the asyncpg pool, creating it on first use. Must run on the async runtime."""
+    global _pool
+    if _pool is None:
+        async with _pool_lock:
+            if _pool is None:
+                import asyncpg
+
+                config = get_settings()
+                _pool = await asyncpg.create_pool(
+                    host=config['DB_HOST'],
+                    port=int(config['DB_PORT']),
+                    database=config['DB_NAME'],
+                    user=config['DB_USER'],
+                    password=config['DB_PASSWORD'],
+                    min_size=config['ASYNC_DB_POOL_MIN_SIZE'],
+                    max_size=config['ASYNC_DB_POOL_MAX_SIZE'],
+                    statement_cache_size=config['ASYNC_DB_STATEMENT_CACHE_SIZE'],
+                    init=_init_connection
+                )
+                logger.info("Async connection pool created (max %s connections)", config['ASYNC_DB_POOL_MAX_SIZE'])
+    return _pool
+
+async def fetch(query, params=()):
+    """Run a query and return all rows as asyncpg Records."""
+    pool = await get_async_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetch(to_asyncpg_query(query), *params)
+
+async def fetchrow(query, params=()):
+    """Run a query and return its first row, or None."""
+    pool = await get_async_pool()
+    async with pool.acquire() as conn:
+        return await conn.fetchrow(to_asyncpg_query(query), *params)
+
+async def _close_pool():
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+def run_async(coro):
+    """Run a coroutine on the async runtime from synchronous code and wait for it."""
+    return get_async_runtime().run(coro, timeout=get_settings()['ASYNC_DB_TIMEOUT'])
+
+def close_async_pool():
+    """Close the asyncpg pool and stop the runtime, e.g. on shutdown."""
+    close_async_runtime(_close_pool)
+
+def _forget_pool_after_fork():
+    # The pool belongs to the parent's loop; the child's runtime builds its own
+    global _pool, _pool_lock
+    _pool = None
+    _pool_lock = asyncio.Lock()
+
+os.register_at_fork(after_in_child=_forget_pool_after_fork)
@@ -0,0 +1,77 @@
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import threading
+import asyncio
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+class AsyncRuntime:
+    """An event loop on a background thread that synchronous code hands coroutines to.
+
+    Flask views run on worker threads without a loop of their own; they submit
+    coroutines here and wait for the result, so that connections of an async
+    driver can be pooled across requests on a single long-lived loop.
+    """
+
+    def __init__(self, name='async-runtime'):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop; returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """Run a coroutine on the loop and wait for its result."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise TimeoutError(f"Async operation did not finish within {timeout} seconds")
+
+    def close(self, cleanup=None):
+        """Run an optional cleanup coroutine function, then stop the loop and its thread."""
+        if cleanup is not None:
+            try:
+                self.run(cleanup(), timeout=10)
+            except Exception as e:
+                logger.warning("Async runtime cleanup failed: %s", e)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=10)
+        if not self._thread.is_alive():
+            self.loop.close()
+
+def get_async_runtime():
+    """Get the process-wide async runtime, starting its thread on first use."""
+    global _runtime
+    if _runtime is None:
+        with _runtime_lock:
+            if _runtime is None:
+                _runtime = AsyncRuntime()
+    return _runtime
+
+def close_async_runtime(cleanup=None):
+    """Stop the async runtime, if it was started."""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is not None:
+            _runtime.close(cleanup)
+            _runtime = None
+
+def _forget_runtime_after_fork():
+    """The loop thread does not survive a fork; the child starts its own on first use."""
+    global _runtime, _runtime_lock
+    _runtime = None
+    _runtime_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_runtime_after_fork)
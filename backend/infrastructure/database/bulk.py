@@ -0,0 +1,127 @@
+from infrastructure.database.connection import transaction
+from psycopg2.extras import Json, execute_values
+import psycopg2
+
+# Rows per multi-row INSERT statement
+INSERT_PAGE_SIZE = 1000
+
+# Request rows as typed records of a table: each JSON object is read with the
+# column types of the table, so ids of any type compare without casts, and
+# the position of each object in the request comes along
+_ROWS_AS = """jsonb_array_elements(%s::jsonb) WITH ORDINALITY AS e(item, position),
+              LATERAL jsonb_populate_record(NULL::{table}, e.item) AS v"""
+
+def _plain(row, skip=('position',)):
+    """Row as a JSON-friendly dict, with timestamps formatted like the single-row paths."""
+    return {
+        key: value.isoformat() if hasattr(value, 'isoformat') else value
+        for key, value in row.items() if key not in skip
+    }
+
+def _error(operation, index, message):
+    return {'operation': operation, 'index': index, 'error': message}
+
+def _missing_references(cursor, references, rows, operation, errors):
+    """Drop rows pointing at rows that do not exist in a referenced table, reporting each."""
+    for column, table in (references or {}).items():
+        linked = [(index, item) for index, item in rows if item.get(column) is not None]
+        if not linked:
+            continue
+        cursor.execute(
+            f"""SELECT e.position FROM {_ROWS_AS.format(table=table)}
+                WHERE NOT EXISTS (SELECT 1 FROM {table} r WHERE r.id = v.id)""",
+            (Json([{'id': item[column]} for _, item in linked]),)
+        )
+        missing = {linked[row['position'] - 1][0] for row in cursor.fetchall()}
+        for index, item in linked:
+            if index in missing:
+                errors.append(_error(operation, index, f"{column} {item[column]} does not exist"))
+        rows = [(index, item) for index, item in rows if index not in missing]
+    return rows
+
+def bulk_write(table, columns, returning, creates=(), updates=(), deletes=(),
+               optional_columns=(), references=None, atomic=False):
+    """Create, update and delete rows of one table in a single transaction.
+
+    creates and updates are lists of (index, dict) with validated column
+    values (updates also carry 'id'), deletes a list of (index, id); index is
+    the row's position in the request and is used in error reports. Columns
+    in optional_columns keep their value on update when the dict lacks the
+    key. references maps a column to the table its ids must exist in.
+
+    Inserts go through multi-row VALUES statements and updates and deletes
+    through one statement each. Rows that fail a reference check or do not
+    exist are reported in 'errors'; with atomic, any error rolls the whole
+    write back.
+    """
+    result = {'created': [], 'updated': [], 'deleted': [], 'errors': [], 'committed': False}
+    errors = result['errors']
+    returned = ', '.join(f"t.{column}" for column in returning)
+
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            try:
+                creates = _missing_references(cursor, references, list(creates), 'create', errors)
+                updates = _missing_references(cursor, references, list(updates), 'update', errors)
+
+                if creates and not (atomic and errors):
+                    rows = execute_values(
+                        cursor,
+                        f"INSERT INTO {table} AS t ({', '.join(columns)}) VALUES %s RETURNING {returned}",
+                        [tuple(item.get(column) for column in columns) for _, item in creates],
+                        page_size=INSERT_PAGE_SIZE,
+                        fetch=True
+                    )
+                    result['created'] = [_plain(row) for row in rows]
+
+                if updates and not (atomic and errors):
+                    assignments = ', '.join(
+                        f"{column} = CASE WHEN e.item ? '{column}' THEN v.{column} ELSE t.{column} END"
+                        if column in optional_columns else f"{column} = v.{column}"
+                        for column in columns
+                    )
+                    cursor.execute(
+                        f"""UPDATE {table} AS t SET {assignments}
+                            FROM {_ROWS_AS.format(table=table)}
+                            WHERE t.id = v.id
+                            RETURNING e.position, {returned}""",
+                        (Json([
+                            {key: value for key, value in item.items() if key == 'id' or key in columns}
+                            for _, item in updates
+                        ]),)
+                    )
+                    found = {row['position']: row for row in cursor.fetchall()}
+                    for position, (index, item) in enumerate(updates, start=1):
+                        if position in found:
+                            result['updated'].append(_plain(found[position]))
+                        else:
+                            errors.append(_error('update', index, f"Row {item['id']} not found"))
+
+                if deletes and not (atomic and errors):
+                    cursor.execute(
+                        f"""DELETE FROM {table} AS t
+                            USING {_ROWS_AS.format(table=table)}
+                            WHERE t.id = v.id
+                            RETURNING e.position, t.id""",
+                        (Json([{'id': row_id} for _, row_id in deletes]),)
+                    )
+                    found = {row['position']: row['id'] for row in cursor.fetchall()}
+                    for position, (index, row_id) in enumerate(deletes, start=1):
+                        if position in found:
+                            result['deleted'].append(found[position])
+                        else:
+                            errors.append(_error('delete', index, f"Row {row_id} not found"))
+            finally:
+                cursor.close()
+
+            if atomic and errors:
+                conn.rollback()
+                result.update(created=[], updated=[], deleted=[])
+            else:
+                result['committed'] = True
+    except (psycopg2.DataError, psycopg2.IntegrityError) as e:
+        # A value the column cannot hold (e.g. a malformed id) or a violated constraint
+        raise ValueError(f"Bulk write rejected by the database: {str(e).strip()}")
+
+    return result
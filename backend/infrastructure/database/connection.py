@@ -1,13 +1,25 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from infrastructure.config.config import load_config
-import traceback
-import sys
+from infrastructure.config.config import get_settings
+from infrastructure.database.pool import ConnectionPool
+from infrastructure.database.instrumentation import InstrumentedCursor, record_connection_wait
+from infrastructure.database.mapping import tuple_cursor
+from contextlib import contextmanager
+import threading
+import time
+import uuid
+import os
+import logging
 
-def get_db_connection():
-    """Get a database connection."""
-    config = load_config()
-    
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+# Pools inherited from a parent process; kept referenced so they are never closed from the child
+_inherited_pools = []
+
+def _connect(config):
+    """Open a new raw database connection."""
     try:
         # For Supabase, the username might contain a dot which is part of the format
         # We don't need to sanitize this as it's expected
@@ -23,55 +35,170 @@ def get_db_connection():
         return conn
     except Exception as e:
         # Show detailed error information
-        exc_type, exc_obj, exc_tb = sys.exc_info()
-        fname = traceback.extract_tb(exc_tb)[-1][0]
-        line = traceback.extract_tb(exc_tb)[-1][1]
-        print(f"Connection error in {fname} at line {line}: {e}")
-        
+        logger.warning("Connection error: %s", e)
+
         # Try an alternative connection approach - sometimes Supabase requires a connection string
         try:
-            print("Trying alternative connection method...")
+            logger.info("Trying alternative connection method...")
             conn_string = f"postgresql://{config['DB_USER']}:{config['DB_PASSWORD']}@{config['DB_HOST']}:{config['DB_PORT']}/{config['DB_NAME']}"
             conn = psycopg2.connect(conn_string, cursor_factory=RealDictCursor)
             conn.autocommit = True
-            print("Alternative connection method successful!")
+            logger.info("Alternative connection method successful!")
             return conn
         except Exception as e2:
-            exc_type, exc_obj, exc_tb = sys.exc_info()
-            fname = traceback.extract_tb(exc_tb)[-1][0]
-            line = traceback.extract_tb(exc_tb)[-1][1]
-            print(f"Second attempt failed in {fname} at line {line}: {e2}")
-            
+            logger.warning("Second attempt failed: %s", e2)
+
             # One more attempt with URL-encoded password
             try:
                 import urllib.parse
-                print("Trying with URL-encoded password...")
+                logger.info("Trying with URL-encoded password...")
                 encoded_password = urllib.parse.quote_plus(config['DB_PASSWORD'])
                 encoded_user = urllib.parse.quote_plus(config['DB_USER'])
                 conn_string = f"postgresql://{encoded_user}:{encoded_password}@{config['DB_HOST']}:{config['DB_PORT']}/{config['DB_NAME']}"
                 conn = psycopg2.connect(conn_string, cursor_factory=RealDictCursor)
                 conn.autocommit = True
-                print("URL-encoded connection successful!")
+                logger.info("URL-encoded connection successful!")
                 return conn
             except Exception as e3:
-                print(f"Third attempt failed: {e3}")
+                logger.warning("Third attempt failed: %s", e3)
                 raise e3
 
+def connect_unpooled():
+    """Open a dedicated autocommit connection outside the pool, e.g. for LISTEN.
+
+    The caller owns the connection and must close it.
+    """
+    return _connect(get_settings())
+
+def get_pool():
+    """Get the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = get_settings()
+                _pool = ConnectionPool(
+                    lambda: _connect(config),
+                    min_size=config['DB_POOL_MIN_SIZE'],
+                    max_size=config['DB_POOL_MAX_SIZE'],
+                    idle_timeout=config['DB_POOL_IDLE_TIMEOUT'],
+                    max_lifetime=config['DB_POOL_MAX_LIFETIME'],
+                    timeout=config['DB_POOL_TIMEOUT'],
+                    cursor_wrapper=InstrumentedCursor if config['SQL_INSTRUMENTATION'] else None
+                )
+                try:
+                    _pool.fill()
+                except Exception as e:
+                    # The pool opens connections on demand, so a failed warm-up is not fatal
+                    logger.warning("Could not pre-fill connection pool: %s", e)
+    return _pool
+
+def close_pool():
+    """Close the connection pool, e.g. on shutdown."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+def _forget_pool_after_fork():
+    """Start a forked child without the parent's pool.
+
+    The child must not use or close the parent's connections: closing them
+    would send a terminate message over sockets the parent still uses.
+    """
+    global _pool, _pool_lock
+    if _pool is not None:
+        _inherited_pools.append(_pool)
+    _pool = None
+    _pool_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_pool_after_fork)
+
+def get_pool_stats():
+    """Usage of the connection pool, or None if it has not been created yet."""
+    pool = _pool
+    return pool.stats() if pool is not None else None
+
+def get_db_connection():
+    """Borrow a database connection from the pool.
+
+    Calling close() on the returned connection hands it back to the pool.
+    The time spent waiting for it is added to the current request's query log.
+    """
+    started = time.perf_counter()
+    conn = get_pool().acquire()
+    record_connection_wait((time.perf_counter() - started) * 1000)
+    return conn
+
+@contextmanager
+def db_connection():
+    """Borrow a pooled database connection for the duration of a with-block."""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+@contextmanager
+def transaction():
+    """Borrow a pooled connection and run the with-block in one transaction.
+
+    Commits when the block finishes and rolls back if it raises. The pool
+    restores autocommit when the connection is handed back.
+    """
+    conn = get_db_connection()
+    try:
+        conn.autocommit = False
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+def stream_query(query, params=None, itersize=None, mapper=None):
+    """Yield rows from a server-side (named) cursor, itersize rows per round-trip.
+
+    With a RowMapper the rows are read as tuples and yielded mapped.
+    The pooled connection is held until the generator is exhausted or closed,
+    so callers must iterate it to the end or close() it.
+    """
+    if itersize is None:
+        itersize = get_settings()['STREAM_ITERSIZE']
+
+    conn = get_db_connection()
+    cursor = None
+    try:
+        # Named cursors need a transaction; the pool restores autocommit on release
+        conn.autocommit = False
+        if mapper is not None:
+            cursor = tuple_cursor(conn, name=f"stream_{uuid.uuid4().hex}")
+        else:
+            cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=RealDictCursor)
+        cursor.itersize = itersize
+        cursor.execute(query, params)
+        for row in mapper.iter_rows(cursor) if mapper is not None else cursor:
+            yield row
+    finally:
+        if cursor is not None:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+        conn.close()
+
 def test_connection():
     """Test the database connection."""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute('SELECT 1 as test')
-        result = cursor.fetchone()
-        print(f"Connection test successful: {result}")
-        cursor.close()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT 1 as test')
+            result = cursor.fetchone()
+            logger.debug("Connection test successful: %s", result)
+            cursor.close()
         return True
     except Exception as e:
-        exc_type, exc_obj, exc_tb = sys.exc_info()
-        fname = traceback.extract_tb(exc_tb)[-1][0]
-        line = traceback.extract_tb(exc_tb)[-1][1]
-        print(f"Database connection error in {fname} at line {line}: {e}")
-        print(f"Stacktrace: {traceback.format_exc()}")
+        logger.exception("Database connection error: %s", e)
         return False
@@ -0,0 +1,91 @@
+from infrastructure.config.config import get_settings
+from infrastructure.database.connection import get_pool
+import threading
+import datetime
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_readiness = None
+_readiness_lock = threading.Lock()
+
+class ReadinessCheck:
+    """Database readiness, probed over a pooled connection and cached for a while.
+
+    Only one caller probes at a time; concurrent callers get the previous
+    result instead of queueing behind it. When every pooled connection is
+    busy the probe is skipped, since busy connections already show that the
+    database answers, and the result reports the pool as saturated.
+    """
+
+    def __init__(self, interval=5.0, timeout=2.0):
+        self.interval = interval
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._result = None
+        self._checked = 0.0
+
+    def _probe(self):
+        pool = get_pool()
+        stats = pool.stats()
+        saturated = stats['idle'] == 0 and stats['size'] >= stats['max_size']
+        database = None
+        error = None
+
+        if not saturated:
+            try:
+                conn = pool.acquire(timeout=self.timeout)
+                try:
+                    cursor = conn.cursor()
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+                    cursor.close()
+                finally:
+                    conn.close()
+                database = True
+            except Exception as e:
+                logger.warning("Readiness probe failed: %s", e)
+                database = False
+                error = str(e)
+            stats = pool.stats()
+
+        result = {
+            'ready': database is not False,
+            'database': database,
+            'pool': dict(stats,
+                         saturated=saturated or stats['waiters'] > 0,
+                         utilization=round(stats['in_use'] / stats['max_size'], 3)),
+            'checked_at': datetime.datetime.now(datetime.timezone.utc).isoformat()
+        }
+        if error:
+            result['error'] = error
+        return result
+
+    def check(self):
+        """The latest readiness result, probing again once it is older than the interval."""
+        now = time.monotonic()
+        result = self._result
+        if result is not None and now - self._checked < self.interval:
+            return result
+
+        if not self._lock.acquire(blocking=result is None):
+            return result
+        try:
+            if self._result is not None and time.monotonic() - self._checked < self.interval:
+                return self._result
+            self._result = self._probe()
+            self._checked = time.monotonic()
+            return self._result
+        finally:
+            self._lock.release()
+
+def get_readiness_check():
+    """Get the process-wide readiness check, creating it on first use."""
+    global _readiness
+    if _readiness is None:
+        with _readiness_lock:
+            if _readiness is None:
+                settings = get_settings()
+                _readiness = ReadinessCheck(settings['READINESS_CACHE_SECONDS'], settings['READINESS_TIMEOUT'])
+    return _readiness
@@ -0,0 +1,228 @@
+from infrastructure.config.config import get_settings
+from collections import deque
+from contextvars import ContextVar
+import functools
+import threading
+import time
+import re
+
+_current_log = ContextVar('query_log', default=None)
+# [queries, milliseconds] of the innermost call wrapped in count_queries()
+_current_counter = ContextVar('query_counter', default=None)
+
+_query_stats = None
+_query_stats_lock = threading.Lock()
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'")
+_PARAMS = re.compile(r"%\(\w+\)s|%s")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE = r"(?:\?(?:::\w+)?|NULL|TRUE|FALSE)"
+_IN_LISTS = re.compile(rf"\(\s*{_VALUE}(?:\s*,\s*{_VALUE})+\s*\)", re.IGNORECASE)
+_ROW_LISTS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_WHITESPACE = re.compile(r"\s+")
+
+# Longer statements (e.g. multi-row inserts) are unique per call and are not worth caching
+_CACHED_LENGTH = 4096
+
+def _normalize(query):
+    text = _LITERALS.sub('?', query)
+    text = _PARAMS.sub('?', text)
+    text = _NUMBERS.sub('?', text)
+    text = _IN_LISTS.sub('(...)', text)
+    text = _ROW_LISTS.sub('(...)', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+_normalize_cached = functools.lru_cache(maxsize=2048)(_normalize)
+
+def fingerprint(query):
+    """Normalize a statement so that executions differing only in values group together."""
+    if isinstance(query, bytes):
+        query = query.decode('utf-8', 'replace')
+    elif not isinstance(query, str):
+        query = repr(query)
+    if len(query) > _CACHED_LENGTH:
+        return _normalize(query)
+    return _normalize_cached(query)
+
+class QueryLog:
+    """Statements, timings and connection waits recorded during one request.
+
+    A request may fan its reads out over threads, so recording is locked.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.wait_ms = 0.0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def add_wait(self, ms):
+        with self._lock:
+            self.wait_ms += ms
+            self.connections += 1
+
+    def add_query(self, statement, ms, rows):
+        entry = {'fingerprint': statement, 'ms': ms, 'rows': rows}
+        with self._lock:
+            self.queries.append(entry)
+        return entry
+
+    def summary(self, n_plus_one_threshold):
+        """Totals per fingerprint, slowest first, with repeated statements flagged."""
+        groups = {}
+        for query in self.queries:
+            group = groups.setdefault(query['fingerprint'], {
+                'fingerprint': query['fingerprint'], 'count': 0, 'total_ms': 0.0, 'rows': 0
+            })
+            group['count'] += 1
+            group['total_ms'] += query['ms']
+            group['rows'] += query['rows'] or 0
+
+        statements = sorted(groups.values(), key=lambda g: g['total_ms'], reverse=True)
+        for group in statements:
+            group['total_ms'] = round(group['total_ms'], 3)
+        return {
+            'queries': len(self.queries),
+            'db_ms': round(sum(q['ms'] for q in self.queries), 3),
+            'wait_ms': round(self.wait_ms, 3),
+            'connections': self.connections,
+            'statements': statements,
+            'n_plus_one': [g['fingerprint'] for g in statements if g['count'] > n_plus_one_threshold]
+        }
+
+class QueryStats:
+    """Process-wide totals per fingerprint and the summaries of recent requests."""
+
+    def __init__(self, history=100):
+        self._lock = threading.Lock()
+        self._totals = {}
+        self._recent = deque(maxlen=history)
+
+    def record_query(self, statement, ms, rows):
+        with self._lock:
+            total = self._totals.get(statement)
+            if total is None:
+                total = self._totals[statement] = {
+                    'fingerprint': statement, 'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'rows': 0
+                }
+            total['count'] += 1
+            total['total_ms'] += ms
+            total['rows'] += rows or 0
+            if ms > total['max_ms']:
+                total['max_ms'] = ms
+
+    def record_request(self, summary):
+        with self._lock:
+            self._recent.append(summary)
+
+    def snapshot(self, limit=50):
+        with self._lock:
+            totals = sorted(self._totals.values(), key=lambda t: t['total_ms'], reverse=True)[:limit]
+            return {
+                'statements': [
+                    dict(t, total_ms=round(t['total_ms'], 3), max_ms=round(t['max_ms'], 3),
+                         avg_ms=round(t['total_ms'] / t['count'], 3))
+                    for t in totals
+                ],
+                'recent_requests': list(self._recent)[-limit:]
+            }
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self._recent.clear()
+
+def get_query_stats():
+    """Get the process-wide query statistics, creating them on first use."""
+    global _query_stats
+    if _query_stats is None:
+        with _query_stats_lock:
+            if _query_stats is None:
+                _query_stats = QueryStats(get_settings()['QUERY_LOG_HISTORY'])
+    return _query_stats
+
+def start_query_log():
+    """Start recording queries for the current request; returns a token for end_query_log()."""
+    return _current_log.set(QueryLog())
+
+def end_query_log(token):
+    _current_log.reset(token)
+
+def current_query_log():
+    return _current_log.get()
+
+def start_query_counter():
+    """Count the statements run until end_query_counter(); returns (counter, token).
+
+    The counter is a [queries, milliseconds] list. Counters do not nest: a
+    statement is only added to the innermost one.
+    """
+    counter = [0, 0.0]
+    return counter, _current_counter.set(counter)
+
+def end_query_counter(token):
+    _current_counter.reset(token)
+
+def record_connection_wait(ms):
+    log = _current_log.get()
+    if log is not None:
+        log.add_wait(ms)
+
+class InstrumentedCursor:
+    """Cursor proxy that times every statement and counts the rows it returns.
+
+    For server-side (named) cursors rows are counted while they are iterated.
+    """
+
+    def __init__(self, cursor):
+        object.__setattr__(self, '_cursor', cursor)
+        object.__setattr__(self, '_entry', None)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cursor, name, value)
+
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._cursor.__exit__(exc_type, exc, tb)
+
+    def _record(self, query, started):
+        ms = (time.perf_counter() - started) * 1000
+        cursor = self._cursor
+        rows = cursor.rowcount if cursor.rowcount >= 0 and not cursor.name else 0
+        statement = fingerprint(query)
+        get_query_stats().record_query(statement, ms, rows)
+        counter = _current_counter.get()
+        if counter is not None:
+            counter[0] += 1
+            counter[1] += ms
+        log = _current_log.get()
+        if log is not None:
+            object.__setattr__(self, '_entry', log.add_query(statement, ms, rows))
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return self._cursor.execute(query, vars)
+        finally:
+            self._record(query, started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(query, vars_list)
+        finally:
+            self._record(query, started)
+
+    def __iter__(self):
+        entry = self._entry
+        for row in self._cursor:
+            if entry is not None and self._cursor.name:
+                entry['rows'] += 1
+            yield row
@@ -0,0 +1,140 @@
+from psycopg2.extensions import cursor as TupleCursor
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Type OIDs of date, time, timestamp, timestamptz and timetz columns
+TEMPORAL_TYPES = frozenset((1082, 1083, 1114, 1184, 1266))
+
+def _isoformat(value):
+    """Format a date/time value like the API always has; other values pass through."""
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+class Timestamp:
+    """A date/time column, sent as an ISO 8601 string."""
+
+    def __init__(self, column):
+        self.column = column
+
+class Nested:
+    """A nested object built from several columns, or None when the `when` column is NULL."""
+
+    def __init__(self, fields, when):
+        self.fields = fields
+        self.when = when
+
+class EmptyList:
+    """A new empty list per row, for collections that are filled in afterwards."""
+
+class RowMapper:
+    """Converts query rows into the dicts the API returns.
+
+    The field plan is declared once per shape: each output key maps to a
+    column name, a Timestamp, a Nested object or an EmptyList. For every
+    distinct result description (column names and types) the plan is
+    compiled into a function that builds the dicts of a whole batch of rows
+    in one comprehension: tuple rows are read by position, dict-like rows
+    (RealDictCursor, asyncpg records) by name, and date/time conversion is
+    decided per column instead of per value.
+    """
+
+    def __init__(self, fields):
+        self.fields = dict(fields)
+        self._compiled = {}
+        self._lock = threading.Lock()
+
+    def extend(self, fields):
+        """A mapper with extra (or replaced) fields."""
+        return RowMapper({**self.fields, **fields})
+
+    def without(self, *keys):
+        """A mapper without some of the fields."""
+        return RowMapper({key: spec for key, spec in self.fields.items() if key not in keys})
+
+    def _compile(self, columns, type_codes):
+        """Compile the plan for rows with these columns; None means rows are read by name."""
+        key = (columns, type_codes)
+        compiled = self._compiled.get(key)
+        if compiled is not None:
+            return compiled
+
+        def read(column):
+            if columns is None:
+                return f"r[{column!r}]"
+            try:
+                return f"r[{columns.index(column)}]"
+            except ValueError:
+                raise KeyError(f"Column {column!r} is not in the result ({', '.join(columns)})")
+
+        def expression(spec):
+            if isinstance(spec, str):
+                return read(spec)
+            if isinstance(spec, Timestamp):
+                value = read(spec.column)
+                if type_codes is not None and type_codes[columns.index(spec.column)] in TEMPORAL_TYPES:
+                    # Known date/time column: only NULL needs a check
+                    return f"(None if {value} is None else {value}.isoformat())"
+                return f"_isoformat({value})"
+            if isinstance(spec, Nested):
+                inner = ', '.join(f"{key!r}: {expression(field)}" for key, field in spec.fields.items())
+                return f"({{{inner}}} if {read(spec.when)} is not None else None)"
+            if isinstance(spec, EmptyList):
+                return "[]"
+            raise TypeError(f"Unsupported field spec: {spec!r}")
+
+        body = ', '.join(f"{key!r}: {expression(spec)}" for key, spec in self.fields.items())
+        source = (
+            f"def map_rows(rows):\n    return [{{{body}}} for r in rows]\n"
+            f"def map_row(r):\n    return {{{body}}}\n"
+        )
+        namespace = {'_isoformat': _isoformat}
+        exec(compile(source, f"<row mapper {', '.join(self.fields)}>", 'exec'), namespace)
+        compiled = (namespace['map_rows'], namespace['map_row'])
+
+        with self._lock:
+            # Result shapes per mapper are few; the bound only guards against ad-hoc queries
+            if len(self._compiled) >= 64:
+                self._compiled.clear()
+            self._compiled[key] = compiled
+        return compiled
+
+    def _plan(self, row, description):
+        if isinstance(row, tuple) and description is not None:
+            return self._compile(
+                tuple(column.name for column in description),
+                tuple(column.type_code for column in description)
+            )
+        return self._compile(None, None)
+
+    def map_row(self, row, description=None):
+        """Map one row; tuple rows need the cursor description."""
+        if row is None:
+            return None
+        return self._plan(row, description)[1](row)
+
+    def map_rows(self, rows, description=None):
+        """Map a list of rows; tuple rows need the cursor description."""
+        if not rows:
+            return []
+        return self._plan(rows[0], description)[0](rows)
+
+    def fetch_all(self, cursor):
+        """Fetch and map all rows of an executed cursor."""
+        return self.map_rows(cursor.fetchall(), cursor.description)
+
+    def fetch_one(self, cursor):
+        """Fetch and map one row of an executed cursor, or None."""
+        return self.map_row(cursor.fetchone(), cursor.description)
+
+    def iter_rows(self, cursor):
+        """Map the rows of an executed cursor as they are iterated."""
+        map_row = None
+        for row in cursor:
+            if map_row is None:
+                map_row = self._plan(row, cursor.description)[1]
+            yield map_row(row)
+
+def tuple_cursor(conn, **kwargs):
+    """A cursor returning plain tuples, for reads mapped by a RowMapper."""
+    return conn.cursor(cursor_factory=TupleCursor, **kwargs)
@@ -0,0 +1,117 @@
+import base64
+import binascii
+import json
+
+class PageRequest:
+    """Keyset page parameters: limit, opaque cursor, sort field and filters."""
+
+    def __init__(self, limit, cursor=None, sort='id', descending=False, filters=None):
+        self.limit = limit
+        self.sort = sort
+        self.descending = descending
+        self.filters = filters or {}
+        self.cursor = decode_cursor(cursor, sort, descending) if cursor else None
+
+class Page:
+    """One page of items and the cursor of the next page (None on the last page)."""
+
+    def __init__(self, items, next_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+
+def encode_cursor(sort, descending, values):
+    """Encode the keyset position after the last item of a page."""
+    payload = json.dumps({'s': sort, 'd': descending, 'v': values}, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, sort, descending):
+    """Decode a cursor and check that it belongs to the requested sort order."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = payload['v']
+        matches = payload['s'] == sort and payload['d'] == descending
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise ValueError("Invalid cursor")
+
+    if not matches or not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Cursor does not match the requested sort order")
+    return values
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def build_page_query(base_query, page, sorts, filters):
+    """Add filters, keyset condition, ordering and limit to a list query.
+
+    sorts maps sort field names to SQL columns and must contain 'id', which
+    is used as tie-breaker. Rows whose sort column is NULL come last in
+    both directions. filters maps filter names to (column, mode, type) where
+    mode is 'eq' or 'prefix'; values that do not convert to type raise
+    ValueError. One extra row is fetched so that page_from_rows()
+    can tell whether another page exists.
+    """
+    if page.sort not in sorts:
+        raise ValueError(f"Unsupported sort field: {page.sort}")
+
+    sort_column = sorts[page.sort]
+    id_column = sorts['id']
+    conditions = []
+    params = []
+
+    for name, value in page.filters.items():
+        if name not in filters:
+            raise ValueError(f"Unsupported filter: {name}")
+        column, mode, kind = filters[name]
+        try:
+            value = kind(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid value for filter {name}: expected {kind.__name__}, got {value!r}")
+        if mode == 'prefix':
+            conditions.append(f"{column} ILIKE %s")
+            params.append(_escape_like(value) + '%')
+        else:
+            conditions.append(f"{column} = %s")
+            params.append(value)
+
+    if page.cursor is not None:
+        operator = '<' if page.descending else '>'
+        if page.sort == 'id':
+            conditions.append(f"{id_column} {operator} %s")
+            params.append(page.cursor[1])
+        elif page.cursor[0] is None:
+            # Past the last non-NULL value: only the NULL rows remain
+            conditions.append(f"{sort_column} IS NULL AND {id_column} {operator} %s")
+            params.append(page.cursor[1])
+        else:
+            # A NULL never compares, so the rows are compared on (NULLs last,
+            # value, id); COALESCE with the cursor's own value gives the NULL
+            # rows a value of the column's type, and the flag sends them after it
+            null_flag, cursor_flag = ('IS NOT NULL', 'true') if page.descending else ('IS NULL', 'false')
+            conditions.append(
+                f"({sort_column} {null_flag}, COALESCE({sort_column}, %s), {id_column}) "
+                f"{operator} ({cursor_flag}, %s, %s)"
+            )
+            params.extend([page.cursor[0], page.cursor[0], page.cursor[1]])
+
+    direction = 'DESC' if page.descending else 'ASC'
+    order_by = f"{sort_column} {direction}"
+    if page.sort != 'id':
+        order_by += f" NULLS LAST, {id_column} {direction}"
+
+    query = base_query
+    if conditions:
+        query += "\nWHERE " + " AND ".join(conditions)
+    query += f"\nORDER BY {order_by}\nLIMIT %s"
+    params.append(page.limit + 1)
+
+    return query, params
+
+def page_from_rows(page, items):
+    """Trim the look-ahead item and build the next cursor from the last item."""
+    if len(items) <= page.limit:
+        return Page(items)
+
+    items = items[:page.limit]
+    last = items[-1]
+    return Page(items, encode_cursor(page.sort, page.descending, [last[page.sort], last['id']]))
@@ -0,0 +1,278 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import psycopg2
+from psycopg2 import extensions
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be borrowed within the timeout."""
+
+
+class _PoolEntry:
+    """A raw connection together with its bookkeeping timestamps."""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """Proxy around a borrowed connection.
+
+    Behaves like the underlying psycopg2 connection, except that close()
+    hands the connection back to the pool instead of tearing down the socket.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        entry = self.__dict__.get('_entry')
+        if entry is None:
+            raise psycopg2.InterfaceError('connection already returned to pool')
+        return getattr(entry.conn, name)
+
+    def __setattr__(self, name, value):
+        if name.startswith('_'):
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self._entry.conn, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def closed(self):
+        return self._entry is None or self._entry.conn.closed
+
+    def cursor(self, *args, **kwargs):
+        cursor = self.__getattr__('cursor')(*args, **kwargs)
+        wrapper = self._pool.cursor_wrapper
+        return wrapper(cursor) if wrapper is not None else cursor
+
+    def close(self):
+        """Return the connection to the pool. Safe to call more than once."""
+        entry = self._entry
+        if entry is not None:
+            self._entry = None
+            self._pool.release(entry)
+
+
+class ConnectionPool:
+    """Process-wide, thread-safe pool of psycopg2 connections."""
+
+    def __init__(self, connect, min_size=1, max_size=10, idle_timeout=300.0,
+                 max_lifetime=1800.0, health_check_after=30.0, timeout=10.0,
+                 cursor_wrapper=None, prune_interval=60.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Invalid pool size: min={min_size}, max={max_size}")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        # Optional callable wrapping every cursor handed out by borrowed connections
+        self.cursor_wrapper = cursor_wrapper
+        # Borrowing is LIFO, so connections at the bottom of the idle set are
+        # only expired by prune(), which release() runs at most this often
+        self.prune_interval = prune_interval
+        self._next_prune = time.monotonic() + prune_interval
+
+        self._lock = threading.Condition(threading.Lock())
+        self._idle = deque()
+        self._size = 0
+        self._waiters = 0
+        self._closed = False
+
+    def _open(self):
+        """Open a new raw connection. Caller must already have reserved a slot."""
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+        return _PoolEntry(conn)
+
+    def _discard(self, entry):
+        """Close a raw connection and free its slot."""
+        try:
+            if not entry.conn.closed:
+                entry.conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+    def _is_expired(self, entry, now):
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            return True
+        if self.idle_timeout and now - entry.last_used > self.idle_timeout:
+            return True
+        return False
+
+    def _is_healthy(self, entry, now):
+        """Check a connection before handing it out."""
+        conn = entry.conn
+        if conn.closed:
+            return False
+        if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        # Only pay for a round-trip if the connection has been sitting idle a while
+        if self.health_check_after is not None and now - entry.last_used >= self.health_check_after:
+            try:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute('SELECT 1')
+                finally:
+                    cursor.close()
+            except Exception:
+                return False
+        return True
+
+    def fill(self):
+        """Open connections until min_size is reached."""
+        while True:
+            with self._lock:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            entry = self._open()
+            with self._lock:
+                self._idle.append(entry)
+                self._lock.notify()
+
+    def acquire(self, timeout=None):
+        """Borrow a connection, waiting up to timeout seconds for one to free up."""
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            entry = None
+            with self._lock:
+                while True:
+                    if self._closed:
+                        raise psycopg2.InterfaceError('connection pool is closed')
+                    if self._idle:
+                        # LIFO keeps the hottest connections in use and lets the rest expire
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout}s waiting for a database connection "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._waiters += 1
+                    try:
+                        self._lock.wait(remaining)
+                    finally:
+                        self._waiters -= 1
+
+            if entry is None:
+                return PooledConnection(self, self._open())
+
+            now = time.monotonic()
+            if self._is_expired(entry, now) or not self._is_healthy(entry, now):
+                self._discard(entry)
+                continue
+
+            return PooledConnection(self, entry)
+
+    def release(self, entry):
+        """Return a raw connection to the idle set, or drop it if it is unusable."""
+        conn = entry.conn
+        try:
+            if conn.closed:
+                raise psycopg2.InterfaceError('connection closed while borrowed')
+            if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if not conn.autocommit:
+                conn.autocommit = True
+        except Exception:
+            self._discard(entry)
+            return
+
+        entry.last_used = now = time.monotonic()
+        prune = False
+        with self._lock:
+            if self._closed:
+                keep = False
+            else:
+                keep = True
+                self._idle.append(entry)
+                self._lock.notify()
+                if now >= self._next_prune:
+                    self._next_prune = now + self.prune_interval
+                    prune = True
+        if not keep:
+            self._discard(entry)
+        elif prune:
+            self.prune()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Borrow a connection for the duration of a with-block."""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def prune(self):
+        """Close idle connections that have outlived idle_timeout or max_lifetime."""
+        now = time.monotonic()
+        expired = []
+        with self._lock:
+            keep = deque()
+            while self._idle:
+                entry = self._idle.popleft()
+                if self._is_expired(entry, now) and self._size - len(expired) > self.min_size:
+                    expired.append(entry)
+                else:
+                    keep.append(entry)
+            self._idle = keep
+        for entry in expired:
+            self._discard(entry)
+
+    def stats(self):
+        """Snapshot of pool usage."""
+        with self._lock:
+            idle = len(self._idle)
+            return {
+                'size': self._size,
+                'idle': idle,
+                'in_use': self._size - idle,
+                'waiters': self._waiters,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            }
+
+    def close(self):
+        """Close all idle connections and refuse further borrows."""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._lock.notify_all()
+        for entry in idle:
+            self._discard(entry)
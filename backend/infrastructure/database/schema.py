@@ -0,0 +1,142 @@
+from infrastructure.config.config import get_settings
+from infrastructure.database.connection import db_connection
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+_registry = None
+_registry_lock = threading.Lock()
+
+class SchemaUnavailableError(Exception):
+    """The catalog has never been read, so it is unknown which tables exist."""
+
+    def __init__(self, retry_in):
+        super().__init__(f"Schema capabilities are not loaded yet; retrying in {retry_in:.0f}s")
+        self.retry_in = retry_in
+
+class SchemaRegistry:
+    """Cached view of which tables and columns exist in the public schema.
+
+    The catalog is probed once and then re-read synchronously by the first
+    lookup after refresh_interval seconds have passed, or on demand through
+    refresh(); concurrent lookups keep using the old snapshot meanwhile.
+
+    Until the catalog has been read once, lookups raise SchemaUnavailableError
+    instead of reporting tables as missing. Failed loads are retried with a
+    doubling backoff up to max_retry_delay, so an unreachable database is not
+    probed by every lookup.
+    """
+
+    def __init__(self, refresh_interval=300.0, retry_delay=1.0, max_retry_delay=60.0):
+        self.refresh_interval = refresh_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self._tables = None
+        self._loaded_at = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self):
+        """Probe information_schema and replace the cached capabilities."""
+        with self._refresh_lock:
+            return self._load()
+
+    def _load(self):
+        try:
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("""
+                        SELECT table_name, column_name
+                        FROM information_schema.columns
+                        WHERE table_schema = 'public'
+                    """)
+                    rows = cursor.fetchall()
+                finally:
+                    cursor.close()
+        except Exception as e:
+            # Keep serving the previous snapshot if the catalog cannot be read
+            self._failures += 1
+            delay = min(self.retry_delay * 2 ** (self._failures - 1), self.max_retry_delay)
+            self._retry_at = time.monotonic() + delay
+            logger.warning("Could not refresh schema capabilities, retrying in %.0fs: %s", delay, e)
+            return False
+
+        tables = {}
+        for row in rows:
+            if hasattr(row, 'keys'):
+                table_name, column_name = row['table_name'], row['column_name']
+            else:
+                table_name, column_name = row[0], row[1]
+            tables.setdefault(table_name, set()).add(column_name)
+
+        self._tables = {name: frozenset(columns) for name, columns in tables.items()}
+        self._loaded_at = time.monotonic()
+        self._failures = 0
+        self._retry_at = 0.0
+        logger.info("Schema capabilities loaded for %s tables", len(self._tables))
+        return True
+
+    def _current(self):
+        """Return the cached tables, loading or refreshing them when needed."""
+        now = time.monotonic()
+        if self._tables is None:
+            if now >= self._retry_at:
+                with self._refresh_lock:
+                    if self._tables is None and time.monotonic() >= self._retry_at:
+                        self._load()
+            tables = self._tables
+            if tables is None:
+                raise SchemaUnavailableError(max(self._retry_at - time.monotonic(), 0.0))
+            return tables
+        if (self.refresh_interval and now - self._loaded_at > self.refresh_interval
+                and now >= self._retry_at):
+            # Only one caller pays for the refresh; the others keep using the old snapshot
+            if self._refresh_lock.acquire(blocking=False):
+                try:
+                    self._load()
+                finally:
+                    self._refresh_lock.release()
+        return self._tables
+
+    def has_table(self, table_name):
+        """Check whether a table exists."""
+        return table_name in self._current()
+
+    def has_column(self, table_name, column_name):
+        """Check whether a table has a given column."""
+        return column_name in self._current().get(table_name, ())
+
+    def columns(self, table_name):
+        """Get the column names of a table."""
+        return sorted(self._current().get(table_name, ()))
+
+    def describe(self):
+        """Get the cached capabilities as a JSON-friendly dict."""
+        try:
+            tables = self._current()
+        except SchemaUnavailableError:
+            tables = {}
+        now = time.monotonic()
+        return {
+            'loaded': self._tables is not None,
+            'age_seconds': round(now - self._loaded_at, 1) if self._loaded_at else None,
+            'refresh_interval': self.refresh_interval,
+            'failures': self._failures,
+            'retry_in_seconds': round(self._retry_at - now, 1) if self._retry_at > now else None,
+            'tables': {name: sorted(columns) for name, columns in sorted(tables.items())}
+        }
+
+def get_schema_registry():
+    """Get the process-wide schema registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = SchemaRegistry(
+                    refresh_interval=get_settings()['SCHEMA_REFRESH_INTERVAL']
+                )
+    return _registry
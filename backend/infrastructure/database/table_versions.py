@@ -0,0 +1,41 @@
+from infrastructure.database.connection import db_connection
+from infrastructure.database.schema import get_schema_registry, SchemaUnavailableError
+import logging
+
+logger = logging.getLogger(__name__)
+
+def get_table_versions(tables):
+    """Read the change counters of the given tables from table_versions.
+
+    Returns a dict of table name to (version, updated_at), or None when the
+    table_versions migration has not been applied or the lookup fails.
+    """
+    try:
+        if not get_schema_registry().has_table('table_versions'):
+            return None
+    except SchemaUnavailableError as e:
+        logger.warning("Could not read table versions: %s", e)
+        return None
+
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    "SELECT table_name, version, updated_at FROM table_versions WHERE table_name = ANY(%s)",
+                    (list(tables),)
+                )
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+    except Exception as e:
+        logger.warning("Could not read table versions: %s", e)
+        return None
+
+    versions = {}
+    for row in rows:
+        if hasattr(row, 'keys'):
+            versions[row['table_name']] = (row['version'], row['updated_at'])
+        else:
+            versions[row[0]] = (row[1], row[2])
+    return versions
@@ -0,0 +1,96 @@
+from collections import namedtuple
+from datetime import datetime
+
+import pytest
+
+from infrastructure.database.mapping import EmptyList, Nested, RowMapper, Timestamp
+
+Column = namedtuple('Column', ('name', 'type_code'))
+
+TEXT = 25
+INT = 23
+TIMESTAMP = 1114
+
+class FakeCursor:
+    """An executed cursor: rows plus the description psycopg2 gives them."""
+
+    def __init__(self, columns, rows):
+        self.description = [Column(name, type_code) for name, type_code in columns]
+        self._rows = list(rows)
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def __iter__(self):
+        return iter(self._rows)
+
+MAPPER = RowMapper({
+    'id': 'id',
+    'name': 'name',
+    'created_at': Timestamp('created_at'),
+    'template': Nested({'id': 'template_id', 'title': 'template_title'}, when='template_id'),
+    'children': EmptyList()
+})
+
+COLUMNS = (('id', INT), ('name', TEXT), ('created_at', TIMESTAMP), ('template_id', INT), ('template_title', TEXT))
+
+CREATED = datetime(2026, 10, 18, 12, 30)
+
+def test_fetch_all_maps_tuple_rows_by_position():
+    cursor = FakeCursor(COLUMNS, [
+        (1, 'Resa', CREATED, 7, 'Ombokning'),
+        (2, 'Retur', None, None, None)
+    ])
+
+    assert MAPPER.fetch_all(cursor) == [
+        {
+            'id': 1, 'name': 'Resa', 'created_at': '2026-10-18T12:30:00',
+            'template': {'id': 7, 'title': 'Ombokning'}, 'children': []
+        },
+        {'id': 2, 'name': 'Retur', 'created_at': None, 'template': None, 'children': []}
+    ]
+
+def test_columns_are_found_by_name_in_any_order():
+    cursor = FakeCursor(tuple(reversed(COLUMNS)), [('Ombokning', 7, CREATED, 'Resa', 1)])
+
+    assert MAPPER.fetch_one(cursor)['template'] == {'id': 7, 'title': 'Ombokning'}
+    assert MAPPER.fetch_one(cursor)['name'] == 'Resa'
+
+def test_dict_rows_are_read_by_name():
+    row = {'id': 1, 'name': 'Resa', 'created_at': '2026-10-18', 'template_id': None, 'template_title': None}
+
+    mapped = MAPPER.map_row(row)
+    assert mapped['created_at'] == '2026-10-18'
+    assert mapped['template'] is None
+
+def test_each_row_gets_its_own_empty_list():
+    cursor = FakeCursor(COLUMNS, [(1, 'a', None, None, None), (2, 'b', None, None, None)])
+
+    first, second = MAPPER.fetch_all(cursor)
+    assert first['children'] is not second['children']
+
+def test_empty_results():
+    cursor = FakeCursor(COLUMNS, [])
+
+    assert MAPPER.fetch_all(cursor) == []
+    assert MAPPER.fetch_one(cursor) is None
+
+def test_iter_rows_maps_lazily():
+    cursor = FakeCursor(COLUMNS, [(1, 'a', None, None, None), (2, 'b', None, None, None)])
+
+    assert [row['id'] for row in MAPPER.iter_rows(cursor)] == [1, 2]
+
+def test_extend_and_without():
+    mapper = MAPPER.without('template', 'children').extend({'label': 'name'})
+    cursor = FakeCursor(COLUMNS, [(1, 'Resa', None, None, None)])
+
+    assert mapper.fetch_one(cursor) == {'id': 1, 'name': 'Resa', 'created_at': None, 'label': 'Resa'}
+
+def test_missing_column_is_reported():
+    cursor = FakeCursor((('id', INT),), [(1,)])
+
+    with pytest.raises(KeyError, match="'name'"):
+        MAPPER.fetch_all(cursor)
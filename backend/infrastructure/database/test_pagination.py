@@ -0,0 +1,95 @@
+import pytest
+
+from infrastructure.database.pagination import (
+    PageRequest,
+    build_page_query,
+    decode_cursor,
+    encode_cursor,
+    page_from_rows,
+)
+
+SORTS = {'id': 'c.id', 'name': 'c.name'}
+FILTERS = {'template_id': ('c.template_id', 'eq', int), 'name': ('c.name', 'prefix', str)}
+
+def test_cursor_round_trip():
+    token = encode_cursor('name', True, ['Åsa', 12])
+
+    assert '=' not in token
+    assert decode_cursor(token, 'name', True) == ['Åsa', 12]
+
+def test_cursor_keeps_null_sort_values():
+    token = encode_cursor('name', False, [None, 3])
+
+    assert decode_cursor(token, 'name', False) == [None, 3]
+
+def test_cursor_of_another_sort_order_is_rejected():
+    token = encode_cursor('name', False, ['a', 1])
+
+    with pytest.raises(ValueError, match='sort order'):
+        decode_cursor(token, 'name', True)
+    with pytest.raises(ValueError, match='sort order'):
+        decode_cursor(token, 'id', False)
+
+@pytest.mark.parametrize('token', ['not a cursor', '', 'e30', encode_cursor('id', False, [1])])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token, 'id', False)
+
+def test_first_page_query():
+    page = PageRequest(10, sort='name', filters={'template_id': '3', 'name': '50%_'})
+
+    query, params = build_page_query("SELECT * FROM c", page, SORTS, FILTERS)
+
+    assert query == (
+        "SELECT * FROM c\nWHERE c.template_id = %s AND c.name ILIKE %s"
+        "\nORDER BY c.name ASC NULLS LAST, c.id ASC\nLIMIT %s"
+    )
+    assert params == [3, '50\\%\\_%', 11]
+
+def test_next_page_by_id():
+    page = PageRequest(10, encode_cursor('id', True, [5, 5]), descending=True)
+
+    query, params = build_page_query("SELECT * FROM c", page, SORTS, FILTERS)
+
+    assert "WHERE c.id < %s\nORDER BY c.id DESC\n" in query
+    assert params == [5, 11]
+
+@pytest.mark.parametrize('descending, condition', [
+    (False, "(c.name IS NULL, COALESCE(c.name, %s), c.id) > (false, %s, %s)"),
+    (True, "(c.name IS NOT NULL, COALESCE(c.name, %s), c.id) < (true, %s, %s)"),
+])
+def test_next_page_puts_null_sort_values_last(descending, condition):
+    page = PageRequest(10, encode_cursor('name', descending, ['b', 4]), 'name', descending)
+
+    query, params = build_page_query("SELECT * FROM c", page, SORTS, FILTERS)
+
+    assert f"WHERE {condition}\n" in query
+    assert params == ['b', 'b', 4, 11]
+
+def test_next_page_after_a_null_sort_value():
+    page = PageRequest(10, encode_cursor('name', False, [None, 4]), 'name')
+
+    query, params = build_page_query("SELECT * FROM c", page, SORTS, FILTERS)
+
+    assert "WHERE c.name IS NULL AND c.id > %s\n" in query
+    assert params == [4, 11]
+
+def test_unsupported_sort_and_filter():
+    with pytest.raises(ValueError, match='sort'):
+        build_page_query("SELECT * FROM c", PageRequest(10, sort='color'), SORTS, FILTERS)
+    with pytest.raises(ValueError, match='filter'):
+        build_page_query("SELECT * FROM c", PageRequest(10, filters={'color_id': 1}), SORTS, FILTERS)
+
+def test_filter_value_of_the_wrong_type_is_rejected():
+    with pytest.raises(ValueError, match='template_id'):
+        build_page_query("SELECT * FROM c", PageRequest(10, filters={'template_id': 'abc'}), SORTS, FILTERS)
+
+def test_page_from_rows_trims_the_look_ahead_row():
+    page = PageRequest(2, sort='name')
+    rows = [{'id': 1, 'name': 'a'}, {'id': 2, 'name': None}, {'id': 3, 'name': None}]
+
+    result = page_from_rows(page, rows)
+
+    assert result.items == rows[:2]
+    assert decode_cursor(result.next_cursor, 'name', False) == [None, 2]
+    assert page_from_rows(page, rows[:2]).next_cursor is None
@@ -0,0 +1,121 @@
+import psycopg2
+import pytest
+from psycopg2 import extensions
+
+from infrastructure.database.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    """Stands in for a psycopg2 connection; records what the pool does with it."""
+
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = True
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+@pytest.fixture
+def opened():
+    return []
+
+
+@pytest.fixture
+def pool(opened):
+    def connect():
+        conn = FakeConnection()
+        opened.append(conn)
+        return conn
+
+    pool = ConnectionPool(connect, min_size=0, max_size=2, health_check_after=None, timeout=0.05)
+    yield pool
+    pool.close()
+
+
+def test_acquire_opens_connections_up_to_max_size(pool, opened):
+    first = pool.acquire()
+    second = pool.acquire()
+
+    assert len(opened) == 2
+    assert pool.stats()['in_use'] == 2
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+
+    first.close()
+    second.close()
+
+
+def test_released_connection_is_reused(pool, opened):
+    conn = pool.acquire()
+    conn.close()
+    conn.close()  # a second close is a no-op
+
+    with pool.connection() as again:
+        assert again._entry.conn is opened[0]
+    assert len(opened) == 1
+    assert pool.stats() == {
+        'size': 1, 'idle': 1, 'in_use': 0, 'waiters': 0, 'min_size': 0, 'max_size': 2
+    }
+
+
+def test_release_rolls_back_and_restores_autocommit(pool, opened):
+    conn = pool.acquire()
+    conn.autocommit = False
+    opened[0].status = extensions.TRANSACTION_STATUS_INTRANS
+    conn.close()
+
+    assert opened[0].rollbacks == 1
+    assert opened[0].autocommit is True
+    assert pool.stats()['idle'] == 1
+
+
+def test_connection_closed_while_borrowed_is_discarded(pool, opened):
+    conn = pool.acquire()
+    opened[0].closed = 1
+    conn.close()
+
+    assert pool.stats()['size'] == 0
+    pool.acquire().close()
+    assert len(opened) == 2
+
+
+def test_idle_connection_in_a_transaction_is_replaced(pool, opened):
+    pool.acquire().close()
+    opened[0].status = extensions.TRANSACTION_STATUS_INERROR
+
+    with pool.connection() as conn:
+        assert conn._entry.conn is opened[1]
+    assert opened[0].closed
+
+
+def test_close_discards_idle_connections_and_refuses_borrows(pool, opened):
+    pool.acquire().close()
+    pool.close()
+
+    assert opened[0].closed
+    assert pool.stats()['size'] == 0
+    with pytest.raises(psycopg2.InterfaceError):
+        pool.acquire()
+
+
+def test_release_prunes_expired_idle_connections():
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=3, idle_timeout=60,
+                          health_check_after=None, prune_interval=0)
+    first, second = pool.acquire(), pool.acquire()
+    first.close()
+    pool._idle[0].last_used -= 120  # idle past idle_timeout, at the bottom of the LIFO set
+
+    second.close()
+
+    assert pool.stats()['idle'] == 1
+    pool.close()
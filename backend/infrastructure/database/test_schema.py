@@ -0,0 +1,126 @@
+import contextlib
+
+import pytest
+
+from infrastructure.database import schema
+from infrastructure.database.schema import SchemaRegistry, SchemaUnavailableError
+
+
+class FakeCursor:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def execute(self, query):
+        pass
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """Serves catalog rows through db_connection(), or fails while down is set."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.down = False
+        self.probes = 0
+
+    @contextlib.contextmanager
+    def connection(self):
+        self.probes += 1
+        if self.down:
+            raise ConnectionError("database is down")
+        yield self
+
+    def cursor(self):
+        return FakeCursor(self.rows)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase([('templates', 'id'), ('templates', 'title'), ('colors', 'id')])
+    monkeypatch.setattr(schema, 'db_connection', database.connection)
+    return database
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(schema.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_lookups_answer_from_the_loaded_catalog(database):
+    registry = SchemaRegistry(refresh_interval=None)
+
+    assert registry.has_table('templates')
+    assert not registry.has_table('template_versions')
+    assert registry.has_column('templates', 'title')
+    assert not registry.has_column('templates', 'body')
+    assert registry.columns('templates') == ['id', 'title']
+    assert database.probes == 1
+
+
+def test_unknown_capabilities_raise_instead_of_answering_false(database, clock):
+    database.down = True
+    registry = SchemaRegistry(refresh_interval=None, retry_delay=1.0, max_retry_delay=4.0)
+
+    with pytest.raises(SchemaUnavailableError):
+        registry.has_column('templates', 'title')
+    with pytest.raises(SchemaUnavailableError):
+        registry.has_table('templates')
+    # The second lookup falls inside the backoff and does not probe again
+    assert database.probes == 1
+
+    database.down = False
+    clock[0] += 1.0
+    assert registry.has_column('templates', 'title')
+    assert database.probes == 2
+
+
+def test_failed_loads_back_off_up_to_the_limit(database, clock):
+    database.down = True
+    registry = SchemaRegistry(refresh_interval=None, retry_delay=1.0, max_retry_delay=4.0)
+
+    delays = []
+    for _ in range(4):
+        with pytest.raises(SchemaUnavailableError) as raised:
+            registry.has_table('templates')
+        delays.append(raised.value.retry_in)
+        clock[0] += raised.value.retry_in
+
+    assert delays == [1.0, 2.0, 4.0, 4.0]
+    assert database.probes == 4
+
+
+def test_failed_refresh_keeps_the_previous_snapshot(database, clock):
+    registry = SchemaRegistry(refresh_interval=10.0, retry_delay=1.0)
+    assert registry.has_table('colors')
+
+    database.down = True
+    clock[0] += 11.0
+    assert registry.has_table('colors')
+    # Within the backoff the stale snapshot is served without probing
+    assert registry.has_table('colors')
+    assert database.probes == 2
+
+    database.down = False
+    database.rows = [('templates', 'id')]
+    clock[0] += 1.0
+    assert not registry.has_table('colors')
+    assert database.probes == 3
+
+
+def test_describe_reports_an_unloaded_catalog(database, clock):
+    database.down = True
+    registry = SchemaRegistry(refresh_interval=None, retry_delay=2.0)
+
+    described = registry.describe()
+
+    assert described['loaded'] is False
+    assert described['failures'] == 1
+    assert described['retry_in_seconds'] == 2.0
+    assert described['tables'] == {}
@@ -0,0 +1,296 @@
+from collections import deque
+from infrastructure.cache.change_feed import add_change_handler, get_change_listener_stats
+from infrastructure.config.config import get_settings
+from infrastructure.database.connection import db_connection
+from infrastructure.database.table_versions import get_table_versions
+import psycopg2
+import itertools
+import threading
+import json
+import time
+import uuid
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Channel publish_change_event() notifies with each numbered change event
+CHANNEL = 'entity_changes'
+
+# Table behind each entity name used in change events
+ENTITY_TABLES = {
+    'template': 'templates',
+    'department': 'departments',
+    'color': 'colors',
+    'completion_type': 'completion_types',
+    'category': 'categories',
+    'information': 'information',
+    'child_category': 'connect_children_categories',
+    'variable': 'category_variabels',
+}
+
+# Seconds an event that arrived ahead of a missing number waits for it
+REORDER_SECONDS = 1.0
+
+_broadcaster = None
+_broadcaster_lock = threading.Lock()
+# Until when publishing through the database is skipped after finding the migration missing
+_database_publish_retry_at = 0.0
+
+def format_event_id(stream, seq):
+    return f"{stream}-{seq}"
+
+def parse_event_id(event_id):
+    """Split an event id into (stream, seq), or None if it is not one."""
+    stream, _, seq = (event_id or '').rpartition('-')
+    try:
+        return stream, int(seq)
+    except ValueError:
+        return None
+
+class EventBroadcaster:
+    """Fans change events out to stream subscribers from one shared ring buffer.
+
+    Events are numbered per stream: 'db' for ids from the change_events_seq
+    sequence, shared by all workers, or a token of this process for events
+    published locally. A subscriber holds only its position (stream, seq),
+    so an idle one costs nothing per event and publishing does not depend
+    on the number of subscribers. A subscriber whose position is no longer
+    in the buffer (it fell behind, resumed from an old or foreign id, or
+    events were missed) gets a reset and must refetch.
+    """
+
+    def __init__(self, capacity=1000, max_subscribers=500):
+        self.capacity = capacity
+        self.max_subscribers = max_subscribers
+        self._events = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self._local_stream = uuid.uuid4().hex[:8]
+        self._local_seq = 0
+        # The buffer holds events horizon+1..latest of stream, without gaps
+        self.stream = self._local_stream
+        self.horizon = 0
+        self.latest = 0
+        # Position that was current when the stream last switched; subscribers there missed nothing
+        self._previous_head = None
+        # Events of the current stream that arrived ahead of a missing number, by seq
+        self._pending = {}
+        self._pending_timer = None
+        self.subscribers = 0
+        self.published = 0
+        self.resets = 0
+
+    def publish_local(self, data):
+        """Add an event numbered by this process, for when the database cannot number it."""
+        with self._condition:
+            self._local_seq += 1
+            self._append(self._local_stream, self._local_seq, data)
+
+    def deliver(self, stream, seq, data):
+        """Add an event numbered by its source.
+
+        Sources may deliver a little out of order. An event ahead of a
+        missing number waits up to REORDER_SECONDS for it; if it does not
+        come, it was missed and the waiting events are added after the gap.
+        An event whose number was given up on is dropped.
+        """
+        with self._condition:
+            if stream == self.stream:
+                if seq <= self.latest:
+                    return
+                if seq > self.latest + 1:
+                    self._pending[seq] = data
+                    if self._pending_timer is None:
+                        self._pending_timer = threading.Timer(REORDER_SECONDS, self._give_up_missing)
+                        self._pending_timer.args = (self._pending_timer,)
+                        self._pending_timer.daemon = True
+                        self._pending_timer.start()
+                    return
+            self._append(stream, seq, data)
+            while self.latest + 1 in self._pending:
+                self._append(self.stream, self.latest + 1, self._pending.pop(self.latest + 1))
+            if not self._pending:
+                self._cancel_pending_timer()
+
+    def _give_up_missing(self, timer):
+        with self._condition:
+            if timer is not self._pending_timer:
+                # The gap was filled, or the stream switched, while this timer fired
+                return
+            self._pending_timer = None
+            for seq in sorted(self._pending):
+                self._append(self.stream, seq, self._pending[seq])
+            self._pending.clear()
+
+    def _cancel_pending_timer(self):
+        if self._pending_timer is not None:
+            self._pending_timer.cancel()
+            self._pending_timer = None
+
+    def _append(self, stream, seq, data):
+        if stream != self.stream or seq != self.latest + 1:
+            # A new source, or events in between were missed: nothing older can be replayed
+            self._previous_head = (self.stream, self.latest) if stream != self.stream else None
+            self._events.clear()
+            if stream != self.stream:
+                self._pending.clear()
+                self._cancel_pending_timer()
+            self.stream = stream
+            self.horizon = seq - 1
+        elif len(self._events) == self.capacity:
+            self.horizon = self._events[0][0]
+        self._events.append((seq, data))
+        self.latest = seq
+        self.published += 1
+        self._condition.notify_all()
+
+    def subscribe(self, last_event_id=None):
+        """Add a subscriber; returns its position, or None when max_subscribers are connected.
+
+        Given the id of the last event a client saw, the subscriber resumes
+        after it; otherwise it starts with the next event.
+        """
+        with self._condition:
+            if self.subscribers >= self.max_subscribers:
+                return None
+            self.subscribers += 1
+            if last_event_id:
+                return parse_event_id(last_event_id) or ('', 0)
+            return (self.stream, self.latest)
+
+    def unsubscribe(self):
+        with self._condition:
+            self.subscribers -= 1
+
+    def _current(self, position):
+        if position == self._previous_head:
+            return (self.stream, self.horizon)
+        return position
+
+    def wait(self, position, timeout):
+        """Get the events after position, waiting up to timeout seconds if there are none yet.
+
+        Returns (events, position, reset): events are (event id, data)
+        pairs, and position is where the subscriber continues. With reset
+        the events after the old position are gone and the new position is
+        the newest event.
+        """
+        with self._condition:
+            position = self._current(position)
+            if position == (self.stream, self.latest):
+                self._condition.wait(timeout)
+                position = self._current(position)
+
+            stream, after = position
+            if stream != self.stream or not self.horizon <= after <= self.latest:
+                self.resets += 1
+                return [], (self.stream, self.latest), True
+
+            events = [
+                (format_event_id(stream, seq), data)
+                for seq, data in itertools.islice(self._events, after - self.horizon, None)
+            ]
+            return events, (self.stream, self.latest), False
+
+    def stats(self):
+        with self._condition:
+            return {
+                'subscribers': self.subscribers,
+                'max_subscribers': self.max_subscribers,
+                'buffered': len(self._events),
+                'pending': len(self._pending),
+                'capacity': self.capacity,
+                'published': self.published,
+                'resets': self.resets
+            }
+
+def get_broadcaster():
+    """Get the process-wide event broadcaster, creating it on first use."""
+    global _broadcaster
+    if _broadcaster is None:
+        with _broadcaster_lock:
+            if _broadcaster is None:
+                settings = get_settings()
+                _broadcaster = EventBroadcaster(settings['EVENTS_BUFFER_SIZE'], settings['EVENTS_MAX_SUBSCRIBERS'])
+    return _broadcaster
+
+def _forget_broadcaster_after_fork():
+    """A forked worker starts with its own broadcaster and no subscribers."""
+    global _broadcaster, _broadcaster_lock
+    _broadcaster = None
+    _broadcaster_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_forget_broadcaster_after_fork)
+
+def _deliver_notifications(payloads):
+    """Change feed handler: add the events numbered by publish_change_event() to the buffer."""
+    if payloads is None:
+        # Missed events show up as a gap in the sequence numbers
+        return
+    broadcaster = get_broadcaster()
+    for payload in payloads:
+        try:
+            data = json.loads(payload)
+            seq = data.pop('seq')
+        except (ValueError, KeyError) as e:
+            logger.warning("Ignoring malformed change event %r: %s", payload, e)
+            continue
+        broadcaster.deliver('db', seq, data)
+
+add_change_handler(CHANNEL, _deliver_notifications)
+
+def _publish_to_database(entity, table, changes):
+    """Number and NOTIFY the events in Postgres; False if the change feed cannot carry them."""
+    global _database_publish_retry_at
+    stats = get_change_listener_stats()
+    if not stats or not stats['connected'] or time.monotonic() < _database_publish_retry_at:
+        return False
+
+    try:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            try:
+                # One round-trip for a whole bulk write
+                cursor.execute(
+                    "SELECT publish_change_event(%s, e.id, %s, e.op) FROM unnest(%s::text[], %s::text[]) AS e(id, op)",
+                    (entity, table, [entity_id for entity_id, _ in changes], [op for _, op in changes])
+                )
+            finally:
+                cursor.close()
+        return True
+    except psycopg2.errors.UndefinedFunction:
+        logger.info("publish_change_event() is missing; change events stay within this process")
+        _database_publish_retry_at = time.monotonic() + get_settings()['SCHEMA_REFRESH_INTERVAL']
+        return False
+
+def publish_changes(entity, changes):
+    """Tell /api/events subscribers that entities were created, updated, deleted or (dis)associated.
+
+    changes is a list of (id, op) pairs. Call it after the write has
+    committed. Through the database the events reach the subscribers of
+    every worker; without the change feed or its migration they reach only
+    this process. Never raises, so a failed publish cannot fail the write.
+    """
+    changes = [(str(entity_id), op) for entity_id, op in changes if entity_id is not None]
+    if not changes:
+        return
+    table = ENTITY_TABLES[entity]
+
+    try:
+        if _publish_to_database(entity, table, changes):
+            return
+    except Exception as e:
+        logger.warning("Could not publish %s changes to %s through the database: %s", len(changes), entity, e)
+
+    try:
+        versions = get_table_versions((table,))
+        version = versions[table][0] if versions and table in versions else None
+        broadcaster = get_broadcaster()
+        for entity_id, op in changes:
+            broadcaster.publish_local({'entity': entity, 'id': entity_id, 'op': op, 'version': version})
+    except Exception as e:
+        logger.warning("Could not publish %s changes to %s: %s", len(changes), entity, e)
+
+def publish_change(entity, entity_id, op):
+    """Publish one change event; see publish_changes()."""
+    publish_changes(entity, [(entity_id, op)])
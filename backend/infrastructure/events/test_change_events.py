@@ -0,0 +1,139 @@
+import pytest
+
+from infrastructure.events import change_events
+from infrastructure.events.change_events import EventBroadcaster, format_event_id, parse_event_id
+
+
+def seqs(events):
+    return [parse_event_id(event_id)[1] for event_id, _ in events]
+
+
+@pytest.fixture
+def broadcaster():
+    return EventBroadcaster(capacity=4, max_subscribers=2)
+
+
+def test_event_ids_round_trip():
+    assert parse_event_id(format_event_id('db', 12)) == ('db', 12)
+    assert parse_event_id('not-an-id') is None
+    assert parse_event_id(None) is None
+
+
+def test_new_subscriber_starts_with_the_next_event(broadcaster):
+    broadcaster.deliver('db', 1, {'id': 1})
+    position = broadcaster.subscribe()
+
+    broadcaster.deliver('db', 2, {'id': 2})
+    events, position, reset = broadcaster.wait(position, 0)
+
+    assert (events, reset) == ([('db-2', {'id': 2})], False)
+    assert position == ('db', 2)
+
+
+def test_resume_from_last_event_id_replays_the_rest_of_the_buffer(broadcaster):
+    for seq in range(1, 4):
+        broadcaster.deliver('db', seq, {'id': seq})
+
+    events, position, reset = broadcaster.wait(broadcaster.subscribe('db-1'), 0)
+
+    assert seqs(events) == [2, 3]
+    assert (position, reset) == (('db', 3), False)
+
+
+def test_resume_from_the_newest_event_waits_for_the_next(broadcaster):
+    broadcaster.deliver('db', 1, {})
+
+    events, position, reset = broadcaster.wait(broadcaster.subscribe('db-1'), 0)
+
+    assert (events, position, reset) == ([], ('db', 1), False)
+
+
+@pytest.mark.parametrize('last_event_id', ['db-1', 'other-7', 'garbage', 'db-9'])
+def test_resume_from_a_position_outside_the_buffer_resets(broadcaster, last_event_id):
+    # capacity 4: events 3..6 are buffered, 1 and 2 have been dropped
+    for seq in range(1, 7):
+        broadcaster.deliver('db', seq, {})
+
+    events, position, reset = broadcaster.wait(broadcaster.subscribe(last_event_id), 0)
+
+    assert (events, position, reset) == ([], ('db', 6), True)
+    assert broadcaster.stats()['resets'] == 1
+
+
+def test_oldest_buffered_position_can_still_resume(broadcaster):
+    for seq in range(1, 7):
+        broadcaster.deliver('db', seq, {})
+
+    events, _, reset = broadcaster.wait(broadcaster.subscribe('db-2'), 0)
+
+    assert (seqs(events), reset) == ([3, 4, 5, 6], False)
+
+
+def test_subscriber_at_the_head_survives_a_stream_switch(broadcaster):
+    broadcaster.publish_local({'id': 1})
+    position = broadcaster.subscribe()
+
+    broadcaster.deliver('db', 40, {'id': 2})
+    events, position, reset = broadcaster.wait(position, 0)
+
+    assert (events, reset) == ([('db-40', {'id': 2})], False)
+    assert position == ('db', 40)
+
+
+def test_subscriber_behind_a_stream_switch_resets(broadcaster):
+    broadcaster.publish_local({'id': 1})
+    position = broadcaster.subscribe()
+    broadcaster.publish_local({'id': 2})
+
+    broadcaster.deliver('db', 40, {'id': 3})
+
+    assert broadcaster.wait(position, 0)[2] is True
+
+
+def test_subscribers_are_capped(broadcaster):
+    assert broadcaster.subscribe() is not None
+    assert broadcaster.subscribe() is not None
+    assert broadcaster.subscribe() is None
+
+    broadcaster.unsubscribe()
+    assert broadcaster.subscribe() is not None
+
+
+def test_late_event_fills_its_gap(broadcaster):
+    broadcaster.deliver('db', 1, {})
+    position = broadcaster.subscribe()
+
+    broadcaster.deliver('db', 3, {})
+    assert broadcaster.wait(position, 0)[0] == []
+    broadcaster.deliver('db', 2, {})
+
+    events, position, reset = broadcaster.wait(position, 0)
+    assert (seqs(events), reset) == ([2, 3], False)
+    assert broadcaster.stats()['pending'] == 0
+
+
+def test_duplicate_and_old_events_are_dropped(broadcaster):
+    broadcaster.deliver('db', 1, {})
+    broadcaster.deliver('db', 2, {})
+    position = broadcaster.subscribe()
+
+    broadcaster.deliver('db', 2, {})
+    broadcaster.deliver('db', 1, {})
+
+    assert broadcaster.wait(position, 0)[0] == []
+    assert broadcaster.stats()['published'] == 2
+
+
+def test_missing_event_is_given_up_after_the_reorder_window(broadcaster, monkeypatch):
+    monkeypatch.setattr(change_events, 'REORDER_SECONDS', 0.01)
+    broadcaster.deliver('db', 1, {})
+    position = broadcaster.subscribe()
+
+    broadcaster.deliver('db', 3, {})
+    broadcaster.deliver('db', 4, {})
+    events, position, reset = broadcaster.wait(position, 1.0)
+
+    # The gap at 2 cannot be replayed, so the subscriber refetches
+    assert (events, position, reset) == ([], ('db', 4), True)
+    broadcaster.deliver('db', 2, {})
+    assert broadcaster.stats()['published'] == 3
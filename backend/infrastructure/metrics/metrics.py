@@ -0,0 +1,342 @@
+from infrastructure.database.instrumentation import end_query_counter, start_query_counter
+import functools
+import inspect
+import threading
+import bisect
+import json
+import time
+import math
+import os
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from a cache hit to a slow report query
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds between the snapshots a process writes for the others to report
+SNAPSHOT_SECONDS = 5.0
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+    def snapshot(self):
+        """The metric and its values as a JSON-friendly dict."""
+        with self._lock:
+            values = [[list(labels), value] for labels, value in self._values.items()]
+        return {'name': self.name, 'kind': self.kind, 'help': self.help_text,
+                'labels': list(self.label_names), 'values': values}
+
+    def render(self):
+        with self._lock:
+            values = list(self._values.items())
+        lines = self._header()
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+class Gauge(_Metric):
+    """Value that can go up and down, per label set."""
+
+    kind = 'gauge'
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed buckets, per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, *labels, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), then sum and count
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def add(self, *labels, state):
+        """Add the bucket counts, sum and count of another histogram's state."""
+        counts, total, count = state
+        with self._lock:
+            current = self._values.get(labels)
+            if current is None:
+                current = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            current[0] = [a + b for a, b in zip(current[0], counts)]
+            current[1] += total
+            current[2] += count
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot['buckets'] = list(self.buckets)
+        return snapshot
+
+    def render(self):
+        with self._lock:
+            values = [(labels, (list(state[0]), state[1], state[2])) for labels, state in self._values.items()]
+        lines = self._header()
+        bounds = self.buckets + (math.inf,)
+        for labels, (counts, total, count) in values:
+            cumulative = 0
+            for bound, bucket_count in zip(bounds, counts):
+                cumulative += bucket_count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds metrics and collectors and renders them in the Prometheus text format.
+
+    Collectors are called at scrape time and return extra metrics built from
+    state that is tracked elsewhere, such as cache and pool statistics.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._collectors = {}
+        self._snapshot_due = 0.0
+
+    def _add(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._add(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._add(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, name, collector):
+        """Add a collector, replacing any earlier one of the same name."""
+        with self._lock:
+            self._collectors[name] = collector
+
+    def collect(self):
+        """The registered metrics and those the collectors build now."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors.values())
+        for collector in collectors:
+            metrics.extend(collector())
+        return metrics
+
+    def render(self):
+        return render_metrics(self.collect())
+
+    def write_snapshot(self, directory, min_interval=0.0):
+        """Write this process's values to <directory>/<pid>.json for render_processes().
+
+        Skipped if the last snapshot is less than min_interval seconds old.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if min_interval and now < self._snapshot_due:
+                return
+            self._snapshot_due = now + min_interval
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump([metric.snapshot() for metric in self.collect()], f, separators=(',', ':'))
+        # Readers never see a half-written file
+        os.replace(temporary, path)
+
+registry = MetricsRegistry()
+
+def render_metrics(metrics):
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def merge_snapshots(snapshots):
+    """Combine (pid, metric snapshots) of several processes into metrics.
+
+    Counters and histograms are summed over every process that wrote a
+    snapshot, exited ones included, so totals never go down when a worker is
+    recycled. Gauges describe a process's current state; those of running
+    processes are kept apart with a pid label.
+    """
+    merged = {}
+    kinds = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}
+    for pid, snapshot in snapshots:
+        alive = None
+        for entry in snapshot:
+            kind = entry['kind']
+            if kind == 'gauge':
+                if alive is None:
+                    alive = _process_alive(pid)
+                if not alive:
+                    continue
+            metric = merged.get(entry['name'])
+            if metric is None:
+                if kind == 'gauge':
+                    metric = Gauge(entry['name'], entry['help'], entry['labels'] + ['pid'])
+                elif kind == 'histogram':
+                    metric = Histogram(entry['name'], entry['help'], entry['labels'], entry['buckets'])
+                else:
+                    metric = kinds[kind](entry['name'], entry['help'], entry['labels'])
+                merged[entry['name']] = metric
+            for labels, value in entry['values']:
+                if kind == 'gauge':
+                    metric.set(*labels, str(pid), value=value)
+                elif kind == 'histogram':
+                    metric.add(*labels, state=value)
+                else:
+                    metric.inc(*labels, amount=value)
+    return list(merged.values())
+
+def render_processes(directory):
+    """Render the metrics of every process that writes snapshots to directory.
+
+    This process's snapshot is written first, so a scrape never reports
+    less than an earlier one that this process answered.
+    """
+    registry.write_snapshot(directory)
+    snapshots = []
+    for name in os.listdir(directory):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshots.append((int(name[:-5]), json.load(f)))
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping metrics snapshot %s: %s", name, e)
+    return render_metrics(merge_snapshots(snapshots))
+
+repository_calls = registry.counter(
+    'repository_calls_total', 'Repository method calls.', ('repository', 'method', 'outcome'))
+repository_duration = registry.histogram(
+    'repository_call_duration_seconds', 'Time spent in repository methods.', ('repository', 'method'))
+repository_queries = registry.counter(
+    'repository_queries_total', 'SQL statements run by repository methods.', ('repository', 'method'))
+repository_query_seconds = registry.counter(
+    'repository_query_seconds_total', 'Time spent executing SQL in repository methods.', ('repository', 'method'))
+
+def _observe_call(repository, method, started, counter, outcome):
+    repository_calls.inc(repository, method, outcome)
+    repository_duration.observe(repository, method, value=time.perf_counter() - started)
+    if counter[0]:
+        repository_queries.inc(repository, method, amount=counter[0])
+        repository_query_seconds.inc(repository, method, amount=counter[1] / 1000)
+
+def _timed(repository, method, func):
+    if inspect.isgeneratorfunction(func):
+        @functools.wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            # Timed from the first row to exhaustion or close()
+            started = time.perf_counter()
+            counter = [0, 0.0]
+            outcome = 'error'
+            iterator = func(*args, **kwargs)
+            try:
+                while True:
+                    step_counter, token = start_query_counter()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        outcome = 'ok'
+                        return
+                    finally:
+                        end_query_counter(token)
+                        counter[0] += step_counter[0]
+                        counter[1] += step_counter[1]
+                    yield item
+            except GeneratorExit:
+                outcome = 'ok'
+                raise
+            finally:
+                iterator.close()
+                _observe_call(repository, method, started, counter, outcome)
+        return generator_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        counter, token = start_query_counter()
+        outcome = 'error'
+        try:
+            result = func(*args, **kwargs)
+            outcome = 'ok'
+            return result
+        finally:
+            end_query_counter(token)
+            _observe_call(repository, method, started, counter, outcome)
+    return wrapper
+
+def instrument_repository(cls):
+    """Class decorator recording calls, durations and SQL statements of public methods."""
+    for name, attribute in list(vars(cls).items()):
+        if name.startswith('_') or not inspect.isfunction(attribute):
+            continue
+        setattr(cls, name, _timed(cls.__name__, name, attribute))
+    return cls
@@ -0,0 +1,46 @@
+import os
+
+from infrastructure.metrics.metrics import MetricsRegistry, merge_snapshots, render_metrics
+
+def snapshot(requests, in_flight, latency):
+    registry = MetricsRegistry()
+    registry.counter('requests_total', 'Requests.', ('status',)).inc('200', amount=requests)
+    registry.gauge('in_flight', 'Requests in flight.').set(value=in_flight)
+    registry.histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0)).observe(value=latency)
+    return [metric.snapshot() for metric in registry.collect()]
+
+def test_counters_and_histograms_are_summed_over_processes():
+    merged = render_metrics(merge_snapshots([
+        (os.getpid(), snapshot(3, 1, 0.05)),
+        (os.getpid(), snapshot(4, 0, 0.5))
+    ]))
+
+    assert 'requests_total{status="200"} 7' in merged
+    assert 'latency_seconds_bucket{le="0.1"} 1' in merged
+    assert 'latency_seconds_bucket{le="1"} 2' in merged
+    assert 'latency_seconds_count 2' in merged
+
+def test_gauges_are_kept_per_live_process():
+    exited = 2 ** 22 + 1  # above the default pid_max, so never a running process
+
+    merged = render_metrics(merge_snapshots([
+        (os.getpid(), snapshot(1, 2, 0.05)),
+        (exited, snapshot(5, 9, 0.05))
+    ]))
+
+    assert f'in_flight{{pid="{os.getpid()}"}} 2' in merged
+    assert f'pid="{exited}"' not in merged
+    assert 'requests_total{status="200"} 6' in merged
+
+def test_write_snapshot_respects_min_interval(tmp_path):
+    registry = MetricsRegistry()
+    counter = registry.counter('requests_total', 'Requests.')
+    counter.inc()
+    registry.write_snapshot(tmp_path, min_interval=60)
+    counter.inc()
+    registry.write_snapshot(tmp_path, min_interval=60)
+
+    path = tmp_path / f"{os.getpid()}.json"
+    assert '"values":[[[],1]]' in path.read_text()
+    registry.write_snapshot(tmp_path)
+    assert '"values":[[[],2]]' in path.read_text()
@@ -0,0 +1,72 @@
+"""add table_versions for conditional GET
+
+Revision ID: a1c4e7d2b9f0
+Revises:
+Create Date: 2026-10-18 08:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a1c4e7d2b9f0'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Tables whose changes are reflected in API responses
+VERSIONED_TABLES = (
+    'templates',
+    'departments',
+    'colors',
+    'completion_types',
+    'categories',
+    'information',
+    'connect_children_categories',
+    'category_variabels',
+)
+
+
+def upgrade():
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name text PRIMARY KEY,
+            version bigint NOT NULL DEFAULT 0,
+            updated_at timestamptz NOT NULL DEFAULT now()
+        )
+    """)
+
+    # Statement-level so a bulk write bumps the version once. The triggers also
+    # see writes made directly through Supabase, not only through this API.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = table_versions.version + 1,
+                updated_at = now();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table in VERSIONED_TABLES:
+        op.execute(f"""
+            INSERT INTO table_versions (table_name) VALUES ('{table}')
+            ON CONFLICT (table_name) DO NOTHING
+        """)
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """)
+
+
+def downgrade():
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_bump_version ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.execute("DROP TABLE IF EXISTS table_versions")
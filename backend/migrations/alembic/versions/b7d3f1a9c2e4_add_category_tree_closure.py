@@ -0,0 +1,224 @@
+"""add category tree closure table
+
+Revision ID: b7d3f1a9c2e4
+Revises: a1c4e7d2b9f0
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7d3f1a9c2e4'
+down_revision = 'a1c4e7d2b9f0'
+branch_labels = None
+depends_on = None
+
+# Tables that make up the tree: (table, node kind, name column, parent links).
+# A parent link is (column, parent kind); a children category hangs off both
+# its completion type and its department.
+TREE_TABLES = (
+    ('templates', 'template', 'title', ()),
+    ('departments', 'department', 'name', ()),
+    ('completion_types', 'completion_type', 'name', (('template_id', 'template'),)),
+    ('categories', 'category', 'name', (('template_id', 'template'),)),
+    ('connect_children_categories', 'children_category', 'name',
+     (('completion_type_id', 'completion_type'), ('department_id', 'department'))),
+)
+
+
+def upgrade():
+    # Ids are stored as text so that one table holds nodes of every kind
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS category_tree_nodes (
+            kind text NOT NULL,
+            id text NOT NULL,
+            name text,
+            PRIMARY KEY (kind, id)
+        )
+    """)
+    # One row per ancestor/descendant pair, including each node with itself at depth 0
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS category_tree_paths (
+            ancestor_kind text NOT NULL,
+            ancestor_id text NOT NULL,
+            descendant_kind text NOT NULL,
+            descendant_id text NOT NULL,
+            depth integer NOT NULL,
+            PRIMARY KEY (ancestor_kind, ancestor_id, descendant_kind, descendant_id)
+        )
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS category_tree_paths_subtree
+        ON category_tree_paths (ancestor_kind, ancestor_id, depth)
+        INCLUDE (descendant_kind, descendant_id)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS category_tree_paths_ancestors
+        ON category_tree_paths (descendant_kind, descendant_id, depth)
+    """)
+
+    # Cut a node and everything below it loose from the node's ancestors
+    op.execute("""
+        CREATE OR REPLACE FUNCTION category_tree_detach(p_kind text, p_id text) RETURNS void AS $$
+            DELETE FROM category_tree_paths p
+            USING category_tree_paths up, category_tree_paths down
+            WHERE up.descendant_kind = p_kind AND up.descendant_id = p_id AND up.depth > 0
+              AND down.ancestor_kind = p_kind AND down.ancestor_id = p_id
+              AND p.ancestor_kind = up.ancestor_kind AND p.ancestor_id = up.ancestor_id
+              AND p.descendant_kind = down.descendant_kind AND p.descendant_id = down.descendant_id
+        $$ LANGUAGE sql
+    """)
+
+    # Insert or move a node: its subtree goes along under the new parents.
+    # Parents that are not in the tree are skipped.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION category_tree_put(
+            p_kind text, p_id text, p_name text, p_parent_kinds text[], p_parent_ids text[]
+        ) RETURNS void AS $$
+        BEGIN
+            INSERT INTO category_tree_nodes (kind, id, name)
+            VALUES (p_kind, p_id, p_name)
+            ON CONFLICT (kind, id) DO UPDATE SET name = EXCLUDED.name;
+
+            INSERT INTO category_tree_paths (ancestor_kind, ancestor_id, descendant_kind, descendant_id, depth)
+            VALUES (p_kind, p_id, p_kind, p_id, 0)
+            ON CONFLICT DO NOTHING;
+
+            PERFORM category_tree_detach(p_kind, p_id);
+
+            INSERT INTO category_tree_paths (ancestor_kind, ancestor_id, descendant_kind, descendant_id, depth)
+            SELECT up.ancestor_kind, up.ancestor_id, down.descendant_kind, down.descendant_id,
+                   min(up.depth + down.depth + 1)
+            FROM unnest(p_parent_kinds, p_parent_ids) AS parent(kind, id)
+            JOIN category_tree_paths up
+              ON up.descendant_kind = parent.kind AND up.descendant_id = parent.id
+            CROSS JOIN category_tree_paths down
+            WHERE down.ancestor_kind = p_kind AND down.ancestor_id = p_id
+            GROUP BY up.ancestor_kind, up.ancestor_id, down.descendant_kind, down.descendant_id
+            ON CONFLICT (ancestor_kind, ancestor_id, descendant_kind, descendant_id)
+            DO UPDATE SET depth = LEAST(category_tree_paths.depth, EXCLUDED.depth);
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Remove a node; what was below it stays in the tree as separate subtrees
+    op.execute("""
+        CREATE OR REPLACE FUNCTION category_tree_remove(p_kind text, p_id text) RETURNS void AS $$
+        BEGIN
+            PERFORM category_tree_detach(p_kind, p_id);
+            DELETE FROM category_tree_paths
+            WHERE (ancestor_kind = p_kind AND ancestor_id = p_id)
+               OR (descendant_kind = p_kind AND descendant_id = p_id);
+            DELETE FROM category_tree_nodes WHERE kind = p_kind AND id = p_id;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Row trigger shared by all tree tables. Arguments: node kind, name column,
+    # then pairs of parent column and parent kind. Columns are read through
+    # jsonb so that a missing column (completion_types.template_id on older
+    # schemas) reads as NULL.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION category_tree_sync() RETURNS trigger AS $$
+        DECLARE
+            new_row jsonb;
+            old_row jsonb;
+            parent_kinds text[] := '{}';
+            parent_ids text[] := '{}';
+            parents_changed boolean := TG_OP = 'INSERT';
+            i integer;
+        BEGIN
+            IF TG_OP <> 'INSERT' THEN
+                old_row := to_jsonb(OLD);
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                PERFORM category_tree_remove(TG_ARGV[0], old_row->>'id');
+                RETURN NULL;
+            END IF;
+
+            new_row := to_jsonb(NEW);
+            IF TG_OP = 'UPDATE' AND old_row->>'id' IS DISTINCT FROM new_row->>'id' THEN
+                PERFORM category_tree_remove(TG_ARGV[0], old_row->>'id');
+                parents_changed := true;
+            END IF;
+
+            FOR i IN 2 .. TG_NARGS - 1 BY 2 LOOP
+                IF new_row->>TG_ARGV[i] IS NOT NULL THEN
+                    parent_kinds := parent_kinds || TG_ARGV[i + 1];
+                    parent_ids := parent_ids || (new_row->>TG_ARGV[i]);
+                END IF;
+                IF TG_OP = 'UPDATE' AND old_row->>TG_ARGV[i] IS DISTINCT FROM new_row->>TG_ARGV[i] THEN
+                    parents_changed := true;
+                END IF;
+            END LOOP;
+
+            IF parents_changed THEN
+                PERFORM category_tree_put(
+                    TG_ARGV[0], new_row->>'id', new_row->>TG_ARGV[1], parent_kinds, parent_ids
+                );
+            ELSIF old_row->>TG_ARGV[1] IS DISTINCT FROM new_row->>TG_ARGV[1] THEN
+                UPDATE category_tree_nodes SET name = new_row->>TG_ARGV[1]
+                WHERE kind = TG_ARGV[0] AND id = new_row->>'id';
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    # Backfill: nodes first, then the closure of the parent links
+    nodes = []
+    edges = []
+    for table, kind, name_column, parents in TREE_TABLES:
+        nodes.append(f"SELECT '{kind}', t.id::text, to_jsonb(t)->>'{name_column}' FROM {table} t")
+        for column, parent_kind in parents:
+            edges.append(
+                f"SELECT '{parent_kind}', to_jsonb(t)->>'{column}', '{kind}', t.id::text FROM {table} t"
+            )
+
+    op.execute(f"""
+        INSERT INTO category_tree_nodes (kind, id, name)
+        {' UNION ALL '.join(nodes)}
+        ON CONFLICT (kind, id) DO UPDATE SET name = EXCLUDED.name
+    """)
+    op.execute(f"""
+        INSERT INTO category_tree_paths (ancestor_kind, ancestor_id, descendant_kind, descendant_id, depth)
+        WITH RECURSIVE edges (parent_kind, parent_id, kind, id) AS (
+            {' UNION ALL '.join(edges)}
+        ),
+        closure (ancestor_kind, ancestor_id, kind, id, depth) AS (
+            SELECT kind, id, kind, id, 0 FROM category_tree_nodes
+            UNION ALL
+            SELECT c.ancestor_kind, c.ancestor_id, e.kind, e.id, c.depth + 1
+            FROM closure c
+            JOIN edges e ON e.parent_kind = c.kind AND e.parent_id = c.id
+        )
+        SELECT ancestor_kind, ancestor_id, kind, id, min(depth)
+        FROM closure
+        GROUP BY ancestor_kind, ancestor_id, kind, id
+        ON CONFLICT DO NOTHING
+    """)
+
+    for table, kind, name_column, parents in TREE_TABLES:
+        arguments = ', '.join(
+            f"'{argument}'"
+            for argument in (kind, name_column, *(value for link in parents for value in link))
+        )
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_category_tree ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {table}_category_tree
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION category_tree_sync({arguments})
+        """)
+
+
+def downgrade():
+    for table, _, _, _ in TREE_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_category_tree ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS category_tree_sync()")
+    op.execute("DROP FUNCTION IF EXISTS category_tree_remove(text, text)")
+    op.execute("DROP FUNCTION IF EXISTS category_tree_put(text, text, text, text[], text[])")
+    op.execute("DROP FUNCTION IF EXISTS category_tree_detach(text, text)")
+    op.execute("DROP TABLE IF EXISTS category_tree_paths")
+    op.execute("DROP TABLE IF EXISTS category_tree_nodes")
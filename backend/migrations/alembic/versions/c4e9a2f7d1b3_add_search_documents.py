@@ -0,0 +1,108 @@
+"""add search_documents for full-text and fuzzy search
+
+Revision ID: c4e9a2f7d1b3
+Revises: b7d3f1a9c2e4
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e9a2f7d1b3'
+down_revision = 'b7d3f1a9c2e4'
+branch_labels = None
+depends_on = None
+
+# Searchable tables: (table, entity, title columns, body columns)
+SEARCH_TABLES = (
+    ('templates', 'template', ('title',), ('content',)),
+    ('information', 'information', ('name', 'label'), ('description',)),
+    ('category_variabels', 'variable', ('namn', 'variabel_namn'), ('beskrivning',)),
+)
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Content is written in Swedish and English, so both stemmers index every
+    # document; titles weigh more than bodies in the ranking
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS search_documents (
+            entity text NOT NULL,
+            id text NOT NULL,
+            title text,
+            body text,
+            document tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('swedish', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('swedish', coalesce(body, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(body, '')), 'B')
+            ) STORED,
+            PRIMARY KEY (entity, id)
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS search_documents_document ON search_documents USING gin (document)")
+    # Typo-tolerant title matches (word_similarity, the <% operator)
+    op.execute("CREATE INDEX IF NOT EXISTS search_documents_title_trgm ON search_documents USING gin (title gin_trgm_ops)")
+
+    # Row trigger shared by the searchable tables. Arguments: entity, then the
+    # title and body columns as comma-separated lists.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION search_documents_sync() RETURNS trigger AS $$
+        DECLARE
+            new_row jsonb;
+            new_title text;
+            new_body text;
+        BEGIN
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.id IS DISTINCT FROM NEW.id) THEN
+                DELETE FROM search_documents WHERE entity = TG_ARGV[0] AND id = OLD.id::text;
+            END IF;
+            IF TG_OP = 'DELETE' THEN
+                RETURN NULL;
+            END IF;
+
+            new_row := to_jsonb(NEW);
+            SELECT NULLIF(string_agg(new_row->>c.name, ' ' ORDER BY c.position), '')
+            INTO new_title
+            FROM unnest(string_to_array(TG_ARGV[1], ',')) WITH ORDINALITY AS c(name, position);
+            SELECT NULLIF(string_agg(new_row->>c.name, ' ' ORDER BY c.position), '')
+            INTO new_body
+            FROM unnest(string_to_array(TG_ARGV[2], ',')) WITH ORDINALITY AS c(name, position);
+
+            INSERT INTO search_documents (entity, id, title, body)
+            VALUES (TG_ARGV[0], new_row->>'id', new_title, new_body)
+            ON CONFLICT (entity, id) DO UPDATE
+            SET title = EXCLUDED.title, body = EXCLUDED.body
+            WHERE search_documents.title IS DISTINCT FROM EXCLUDED.title
+               OR search_documents.body IS DISTINCT FROM EXCLUDED.body;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table, entity, title_columns, body_columns in SEARCH_TABLES:
+        title = ', '.join(f"t.{column}::text" for column in title_columns)
+        body = ', '.join(f"t.{column}::text" for column in body_columns)
+        op.execute(f"""
+            INSERT INTO search_documents (entity, id, title, body)
+            SELECT '{entity}', t.id::text, NULLIF(concat_ws(' ', {title}), ''), NULLIF(concat_ws(' ', {body}), '')
+            FROM {table} t
+            ON CONFLICT (entity, id) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body
+        """)
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_documents ON {table}")
+        op.execute(f"""
+            CREATE TRIGGER {table}_search_documents
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION search_documents_sync(
+                '{entity}', '{','.join(title_columns)}', '{','.join(body_columns)}'
+            )
+        """)
+
+
+def downgrade():
+    for table, _, _, _ in SEARCH_TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS {table}_search_documents ON {table}")
+    op.execute("DROP FUNCTION IF EXISTS search_documents_sync()")
+    op.execute("DROP TABLE IF EXISTS search_documents")
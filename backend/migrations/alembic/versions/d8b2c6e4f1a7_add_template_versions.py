@@ -0,0 +1,67 @@
+"""add append-only template_versions
+
+Revision ID: d8b2c6e4f1a7
+Revises: c4e9a2f7d1b3
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8b2c6e4f1a7'
+down_revision = 'c4e9a2f7d1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # A snapshot row holds the whole content; a delta row holds the edits
+    # against the version before it, and base_version is the snapshot its
+    # chain starts from. Rows outlive their template, so (template_id,
+    # version) stays a valid cache key for good.
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS template_versions (
+            template_id text NOT NULL,
+            version integer NOT NULL,
+            kind text NOT NULL CHECK (kind IN ('snapshot', 'delta')),
+            base_version integer NOT NULL,
+            title text,
+            content text,
+            delta jsonb,
+            content_hash text NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            PRIMARY KEY (template_id, version),
+            CHECK ((kind = 'snapshot') = (content IS NOT NULL AND delta IS NULL))
+        )
+    """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION template_versions_append_only() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'template_versions is append-only';
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS template_versions_append_only ON template_versions")
+    op.execute("""
+        CREATE TRIGGER template_versions_append_only
+        BEFORE UPDATE OR DELETE ON template_versions
+        FOR EACH ROW EXECUTE FUNCTION template_versions_append_only()
+    """)
+
+    # Every existing template starts its history with a snapshot of what it holds now
+    op.execute("""
+        INSERT INTO template_versions (template_id, version, kind, base_version, title, content, content_hash)
+        SELECT id::text, 1, 'snapshot', 1, title, coalesce(content, ''),
+               encode(sha256(convert_to(coalesce(content, ''), 'UTF8')), 'hex')
+        FROM templates
+        ON CONFLICT DO NOTHING
+    """)
+
+
+def downgrade():
+    op.execute("DROP TRIGGER IF EXISTS template_versions_append_only ON template_versions")
+    op.execute("DROP FUNCTION IF EXISTS template_versions_append_only()")
+    op.execute("DROP TABLE IF EXISTS template_versions")
@@ -0,0 +1,51 @@
+"""notify table changes for cross-worker cache invalidation
+
+Revision ID: e5a9d3b7c1f2
+Revises: d8b2c6e4f1a7
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5a9d3b7c1f2'
+down_revision = 'd8b2c6e4f1a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The statement triggers from a1c4e7d2b9f0 already fire on every versioned
+    # table; they now also NOTIFY the changed table's name. Postgres delivers
+    # notifications on commit only and folds duplicates within a transaction,
+    # so a bulk write or a rolled-back one costs listeners nothing extra.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = table_versions.version + 1,
+                updated_at = now();
+            PERFORM pg_notify('table_changes', TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade():
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, version, updated_at)
+            VALUES (TG_TABLE_NAME, 1, now())
+            ON CONFLICT (table_name) DO UPDATE
+            SET version = table_versions.version + 1,
+                updated_at = now();
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
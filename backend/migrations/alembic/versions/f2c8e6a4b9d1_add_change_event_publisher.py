@@ -0,0 +1,48 @@
+"""add publish_change_event() for the /api/events stream
+
+Revision ID: f2c8e6a4b9d1
+Revises: e5a9d3b7c1f2
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8e6a4b9d1'
+down_revision = 'e5a9d3b7c1f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("CREATE SEQUENCE IF NOT EXISTS change_events_seq")
+
+    # Numbers an entity change from one sequence shared by all workers and
+    # NOTIFYs it. Nothing is locked: concurrent publishers may commit, and so
+    # notify, out of sequence order, and listeners put such events back in
+    # order before they take a missing number for a missed event.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION publish_change_event(p_entity text, p_id text, p_table text, p_op text)
+        RETURNS bigint AS $$
+        DECLARE
+            seq bigint;
+        BEGIN
+            seq := nextval('change_events_seq');
+            PERFORM pg_notify('entity_changes', json_build_object(
+                'seq', seq,
+                'entity', p_entity,
+                'id', p_id,
+                'op', p_op,
+                'version', (SELECT version FROM table_versions WHERE table_name = p_table)
+            )::text);
+            RETURN seq;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade():
+    op.execute("DROP FUNCTION IF EXISTS publish_change_event(text, text, text, text)")
+    op.execute("DROP SEQUENCE IF EXISTS change_events_seq")
@@ -0,0 +1,11 @@
+"""Production entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+`app` is the WSGI callable. The connection pool, caches, render workers and
+log writer are process-local and are started lazily, so every gunicorn
+worker builds its own after the fork (see gunicorn.conf.py).
+"""
+from app import create_app
+
+app = create_app()